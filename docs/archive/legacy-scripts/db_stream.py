@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Streaming POI reads for the pipeline scripts: unbuffered cursors, keyset pages, prefetch.
+
+The fact-sheet build, R6 translations, the R6b AM/PM sweep and the
+markdown fix each read every active POI with up to four long description
+columns using one fetchall(). The whole result set was then in memory (in
+the driver's buffer and again as row dicts) before any work started, and it
+grew with every destination. stream_rows reads it differently:
+
+    keyset pages : SELECT ... WHERE <filter> AND id > <last id> ORDER BY id
+                   LIMIT STREAM_CHUNK. Each page is an index range scan, with
+                   no OFFSET rescans, and later pages are not affected by rows
+                   that earlier pages updated.
+    unbuffered   : each page is read from an unbuffered cursor
+                   (mysql.connector buffered=False, pymysql SSDictCursor) in
+                   FETCH_BATCH rows, so the driver never holds more than the
+                   page.
+    prefetch     : the next page is fetched in a background thread while the
+                   caller works on the current one, so processing overlaps
+                   with the transfer. The connection is then in use between
+                   pages. Callers that write through the same connection while
+                   iterating pass prefetch=False (pages are then read
+                   synchronously and the connection is free between rows).
+
+Peak memory is at most three pages (one being processed, one queued, one
+being fetched), whatever the number of destinations.
+
+Usage:
+    for poi in stream_rows(conn, 'id, name, enriched_detail_description', 'POI',
+                           'is_active = 1 AND destination_id = %s', (2,)):
+        ...
+    for page in prefetched(my_pages()): ...     # any page generator
+"""
+
+import queue
+import threading
+
+# ============================================================
+# CONFIG
+# ============================================================
+STREAM_CHUNK = 200          # Rows per keyset page
+FETCH_BATCH = 50            # Rows per fetchmany() on the unbuffered cursor
+
+_DONE = object()
+
+
+def _is_pymysql(conn):
+    return type(conn).__module__.split('.')[0] == 'pymysql'
+
+
+def fetch_unbuffered(conn, query, params=()):
+    """All rows of query as dicts, read from an unbuffered (server-side) cursor.
+
+    Meant for bounded queries (one page). The cursor is drained and closed
+    before returning, so the connection is free again.
+    """
+    if _is_pymysql(conn):
+        import pymysql
+        cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+    else:
+        cursor = conn.cursor(dictionary=True, buffered=False)
+    try:
+        cursor.execute(query, params)
+        rows = []
+        while True:
+            batch = cursor.fetchmany(FETCH_BATCH)
+            if not batch:
+                return rows
+            rows.extend(batch)
+    finally:
+        cursor.close()
+
+
+def keyset_pages(conn, columns, table, where='1 = 1', params=(), key='id', chunk=STREAM_CHUNK):
+    """Pages (lists of row dicts) of SELECT columns FROM table WHERE where, in key order.
+
+    columns must include key.
+    """
+    last = None
+    while True:
+        if last is None:
+            query = f'SELECT {columns} FROM {table} WHERE ({where}) ORDER BY {key} LIMIT {chunk}'
+            page = fetch_unbuffered(conn, query, tuple(params))
+        else:
+            query = (f'SELECT {columns} FROM {table} WHERE ({where}) AND {key} > %s '
+                     f'ORDER BY {key} LIMIT {chunk}')
+            page = fetch_unbuffered(conn, query, tuple(params) + (last,))
+        if not page:
+            return
+        yield page
+        if len(page) < chunk:
+            return
+        last = page[-1][key]
+
+
+def prefetched(pages):
+    """Iterate pages with the next one fetched in a background thread (one page ahead)."""
+    ready = queue.Queue(maxsize=1)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for page in pages:
+                ready.put(page)
+                if stop.is_set():
+                    return
+            ready.put(_DONE)
+        except BaseException as e:   # Re-raised in the consumer
+            ready.put(e)
+
+    thread = threading.Thread(target=produce, name='db-prefetch', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = ready.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        while thread.is_alive():   # Unblock a producer waiting on a full queue
+            try:
+                ready.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        thread.join()
+
+
+def stream_rows(conn, columns, table, where='1 = 1', params=(), key='id', chunk=STREAM_CHUNK,
+                prefetch=True):
+    """Rows of SELECT columns FROM table WHERE where, in key order, a page at a time."""
+    pages = keyset_pages(conn, columns, table, where, params, key, chunk)
+    for page in (prefetched(pages) if prefetch else pages):
+        yield from page
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Fingerprint manifest for incremental fact-sheet builds (R2 generate_fact_sheets).
+
+A fact sheet is a pure function of three inputs. Each is hashed separately:
+
+    row_hash      : the POI's DB columns. MySQL computes it as MD5(JSON_ARRAY(...))
+                    (ROW_HASH_SQL), so unchanged rows are recognized without
+                    transferring their long text columns.
+    scrape_hash   : the website part of the sheet after cross-POI dedupe
+                    (cleaned main page and subpages, shared-page POIs, page
+                    title, extracted facts).
+    enhanced_hash : the POI's R6b source layers in factsheet_store (empty when
+                    absent).
+
+fingerprint = sha1(BUILDER_VERSION, row_hash, scrape_hash, enhanced_hash).
+A sheet is rebuilt only when its fingerprint differs from the one in the
+manifest. Bump BUILDER_VERSION when the sheet-building code changes, so
+the next build starts from scratch.
+
+The manifest also stores facts_hash: a hash of the sheet's material
+content (FACT_FIELDS plus the enhanced hash). facts_changed_at moves only
+when facts_hash changes. Downstream stages can ask which POIs have
+materially new facts without diffing JSON. A rebuild with identical output
+(e.g. only a column that is not in the sheet changed) does not count.
+
+    manifest = Manifest()
+    if manifest.fingerprint(poi_id) != fp: ... rebuild ...
+    manifest.record(poi_id, fp, hashes, facts_hash(sheet, enhanced_hash))
+    manifest.finish_build(stats)
+
+    changed_poi_ids(since='2026-03-01')      # POIs with new facts since then
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from datetime import datetime
+
+# ============================================================
+# CONFIG
+# ============================================================
+FACTSHEET_MANIFEST = '/root/fase_r2_fact_sheet_manifest.sqlite'
+BUILDER_VERSION = 2          # 2: website text packed by relevance (source_packer)
+
+# POI columns a sheet is built from (the R2 fact-sheet query)
+POI_COLUMNS = ('id', 'name', 'category', 'subcategory', 'rating', 'review_count',
+               'website', 'description', 'enriched_highlights',
+               'enriched_detail_description', 'city', 'address',
+               'latitude', 'longitude', 'destination_id', 'google_placeid',
+               'google_price_level')
+ROW_HASH_SQL = 'MD5(JSON_ARRAY(' + ', '.join(POI_COLUMNS) + '))'
+
+# Sheet fields that carry facts (what R3/R4 prompts are built from)
+FACT_FIELDS = ('name', 'category', 'subcategory', 'city', 'website', 'data_quality',
+               'verified_facts', 'source_text_for_llm')
+
+
+def content_hash(value):
+    """sha1 of value's canonical JSON ('' for None)."""
+    if value is None:
+        return ''
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+def fingerprint(row_hash, scrape_hash, enhanced_hash):
+    return content_hash([BUILDER_VERSION, row_hash, scrape_hash, enhanced_hash])
+
+
+def facts_hash(sheet, enhanced_hash=''):
+    return content_hash([{k: sheet.get(k) for k in FACT_FIELDS}, enhanced_hash])
+
+
+def _timestamp(since):
+    """Unix time for a datetime, ISO date string or number."""
+    if isinstance(since, datetime):
+        return since.timestamp()
+    if isinstance(since, str):
+        return datetime.fromisoformat(since).timestamp()
+    return float(since)
+
+
+# ============================================================
+# MANIFEST
+# ============================================================
+class Manifest:
+    """Per-POI input fingerprints and fact hashes of the last build (SQLite)."""
+
+    def __init__(self, path=FACTSHEET_MANIFEST):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS sheets (
+                poi_id INTEGER PRIMARY KEY,
+                fingerprint TEXT,
+                row_hash TEXT,
+                scrape_hash TEXT,
+                enhanced_hash TEXT,
+                facts_hash TEXT,
+                built_at REAL,
+                facts_changed_at REAL,
+                removed_at REAL
+            )
+        """)
+        self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS sheets_facts_changed ON sheets (facts_changed_at)
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS builds (
+                build_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                finished_at REAL,
+                sheets INTEGER,
+                rebuilt INTEGER,
+                facts_changed INTEGER,
+                removed INTEGER
+            )
+        """)
+        self.conn.commit()
+        self._fingerprints = dict(self.conn.execute(
+            'SELECT poi_id, fingerprint FROM sheets WHERE removed_at IS NULL'))
+        self.started = time.time()
+
+    def fingerprint(self, poi_id):
+        """Fingerprint of poi_id's sheet in the last build, or None."""
+        return self._fingerprints.get(poi_id)
+
+    def record(self, poi_id, fp, hashes, new_facts_hash):
+        """Store a rebuilt sheet's fingerprint; returns True when its facts changed."""
+        row = self.conn.execute('SELECT facts_hash, removed_at FROM sheets WHERE poi_id = ?',
+                                (poi_id,)).fetchone()
+        changed = row is None or row[0] != new_facts_hash or row[1] is not None
+        self.conn.execute("""
+            INSERT INTO sheets (poi_id, fingerprint, row_hash, scrape_hash, enhanced_hash,
+                                facts_hash, built_at, facts_changed_at, removed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL)
+            ON CONFLICT(poi_id) DO UPDATE SET
+                fingerprint = excluded.fingerprint,
+                row_hash = excluded.row_hash,
+                scrape_hash = excluded.scrape_hash,
+                enhanced_hash = excluded.enhanced_hash,
+                facts_hash = excluded.facts_hash,
+                built_at = excluded.built_at,
+                facts_changed_at = CASE WHEN facts_hash = excluded.facts_hash
+                                        AND removed_at IS NULL
+                                        THEN facts_changed_at ELSE excluded.facts_changed_at END,
+                removed_at = NULL
+        """, (poi_id, fp, hashes['row'], hashes['scrape'], hashes['enhanced'],
+              new_facts_hash, self.started, self.started))
+        self._fingerprints[poi_id] = fp
+        return changed
+
+    def mark_removed(self, poi_ids):
+        """POIs that no longer get a sheet (inactive, content removed). Returns the count."""
+        gone = [pid for pid in self._fingerprints if pid not in poi_ids]
+        self.conn.executemany('UPDATE sheets SET removed_at = ?, facts_changed_at = ? '
+                              'WHERE poi_id = ?',
+                              [(self.started, self.started, pid) for pid in gone])
+        for pid in gone:
+            del self._fingerprints[pid]
+        return len(gone)
+
+    def finish_build(self, stats):
+        """Commit and log the build (stats: sheets / rebuilt / facts_changed / removed)."""
+        self.conn.execute("""
+            INSERT INTO builds (finished_at, sheets, rebuilt, facts_changed, removed)
+            VALUES (?, ?, ?, ?, ?)
+        """, (time.time(), stats['sheets'], stats['rebuilt'], stats['facts_changed'],
+              stats['removed']))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+# ============================================================
+# DOWNSTREAM QUERIES
+# ============================================================
+def changed_poi_ids(since, path=FACTSHEET_MANIFEST, include_removed=False):
+    """POI ids whose facts changed (or that got a first sheet) after since.
+
+    since: datetime, ISO date/time string or unix time.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        query = 'SELECT poi_id FROM sheets WHERE facts_changed_at > ?'
+        if not include_removed:
+            query += ' AND removed_at IS NULL'
+        return {row[0] for row in conn.execute(query, (_timestamp(since),))}
+    finally:
+        conn.close()
+
+
+def last_build(path=FACTSHEET_MANIFEST):
+    """{'finished_at', 'sheets', 'rebuilt', 'facts_changed', 'removed'} of the last build, or None."""
+    conn = sqlite3.connect(path)
+    try:
+        row = conn.execute('SELECT finished_at, sheets, rebuilt, facts_changed, removed '
+                           'FROM builds ORDER BY build_id DESC LIMIT 1').fetchone()
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    return dict(zip(('finished_at', 'sheets', 'rebuilt', 'facts_changed', 'removed'), row))
+
+
+def format_build_stats(stats):
+    """One-line summary for build logs."""
+    return (f'{stats["sheets"]} sheets, {stats["rebuilt"]} rebuilt '
+            f'({stats["sheets"] - stats["rebuilt"]} unchanged), {stats["facts_changed"]} with new '
+            f'facts, {stats["removed"]} removed; {stats.get("rows_fetched", 0)} full rows fetched')
@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+Indexed fact-sheet store: random access by poi_id instead of one big JSON file.
+
+fase_r2_fact_sheets.json is ~3,000 indented sheets. Each consumer
+(R3 test prompts, R4 regeneration, R5 quarterly audit, R6b) loaded all of
+it into memory just to read 12 or 50 sheets. The store keeps the sheets
+in SQLite (FACTSHEET_STORE):
+
+    sheets       : one row per POI. The small fields as JSON, plus indexed
+                   columns (destination_id, position, data_quality,
+                   category) so a selection does not parse every sheet.
+                   Sheets are ordered by destination, then position (the R2
+                   order within a destination), so a single-destination
+                   build keeps the order of the other destination.
+    large_fields : LARGE_FIELDS (page text, subpages, LLM source text,
+                   current content), one row per (poi_id, field).
+
+Reading returns FactSheet objects. These are dicts holding the small
+fields, and they read a large field from disk the first time it is
+accessed (fs['source_text_for_llm'], fs.get(...)). Startup time and RSS
+therefore depend on the sheets and fields actually used, not on the corpus
+size. fs.to_dict() gives the complete sheet, with the original key order.
+
+R2 writes the store (put / delete) and only touches the sheets that
+changed (see factsheet_manifest). The first time the store is opened
+without a database file, it imports the legacy JSON file if there is one
+(into memory when opened readonly, e.g. by a dry run).
+
+The LLM source text is not stored as one string. Each source is a layer,
+stored once per POI with its freshness:
+
+    layers       : one row per (poi_id, layer). R2 writes R2_LAYERS (website,
+                   subpages, Google description, highlights, verified facts)
+                   and R6b writes R6B_LAYERS (Facebook, Instagram, Schema.org
+                   data, deep re-scrape). Each row has the body text, the
+                   freshness status and last activity date (R6b social and
+                   deep-scrape sources) and a hash of all of these.
+    source_texts : the combined text per (poi_id, layer set), cached under
+                   the hash of its layer hashes.
+
+source_text(poi_id, 'r2') is fs['source_text_for_llm'] and
+source_text(poi_id, 'enhanced') is the R6b enhanced source text. Both are
+built on demand, with section headers rendered from each layer (the R6b
+Facebook header and warnings follow its freshness). Only the writers (R2,
+R6b source rescrape; opened with cache_writes=True) store the result: put()
+caches the R2 text it just rendered, and a cached text is used while its
+layer hashes match. Readers never write, so R3/R4/R5 and claim stripping can
+share the store. Adding a source therefore writes only that source's
+rows, and the R2 text is no longer copied into the R6b output. Sheets from
+a legacy JSON file keep their source text as one 'legacy' layer until R2
+rebuilds them.
+
+Usage:
+    store = open_fact_sheets()
+    fs = store.get(poi_id)                           # or None
+    for fs in store.iter_sheets(destination_id=2, quality='rich'): ...
+    store.export_json('/root/fase_r2_fact_sheets.json')
+    store.set_layers(poi_id, {'facebook': (text, 'stale', '2025-06-01')}, R6B_LAYERS)
+    text = store.source_text(poi_id, 'enhanced')
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from urllib.parse import quote
+
+from factsheet_manifest import content_hash
+
+# ============================================================
+# CONFIG
+# ============================================================
+FACTSHEET_STORE = '/root/fase_r2_fact_sheets.sqlite'
+LEGACY_JSON = '/root/fase_r2_fact_sheets.json'
+
+# Read on first access only
+LARGE_FIELDS = ('current_content', 'website_content', 'website_subpages', 'source_text_for_llm')
+QUERY_CHUNK = 500           # poi_ids per IN (...) query
+
+# Source layers in prompt order; 'legacy' holds the whole text of an imported JSON sheet
+R2_LAYERS = ('legacy', 'website', 'subpages', 'google', 'highlights', 'verified_facts')
+R6B_LAYERS = ('facebook', 'instagram', 'structured_data', 'deep_scrape')
+LAYER_SETS = {'r2': R2_LAYERS, 'enhanced': R2_LAYERS + R6B_LAYERS}
+
+LAYER_HEADERS = {
+    'legacy': None,
+    'website': 'WEBSITE CONTENT:',
+    'subpages': 'SUBPAGES:',
+    'google': 'GOOGLE PLACES DESCRIPTION:',
+    'highlights': 'HIGHLIGHTS:',
+    'verified_facts': 'VERIFIED FACTS:',
+    'instagram': '--- INSTAGRAM BIO (STATIC — use for name/type only) ---',
+    'structured_data': '--- STRUCTURED DATA (SCHEMA.ORG) ---',
+    'deep_scrape': '--- DEEP WEBSITE RE-SCRAPE ---',
+}
+
+_lock = threading.Lock()
+_stats = {'texts': 0, 'cache_hits': 0, 'built': 0, 'layers_written': 0, 'layers_unchanged': 0}
+
+
+def render_layer(layer, body, freshness=None, last_activity=None):
+    """A layer's section of the source text: header (by freshness for Facebook) and body."""
+    if layer == 'facebook':
+        if freshness == 'fresh':
+            header = f'--- FACEBOOK PAGE DATA (FRESH — last active: {last_activity or "unknown"}) ---'
+        elif freshness == 'stale':
+            header = (f'--- FACEBOOK PAGE DATA (STALE — last active: {last_activity or "unknown"}) ---\n'
+                      'WARNING: This Facebook page has not been updated in >4 months.\n'
+                      'ONLY use for: business name confirmation, address, phone number.\n'
+                      'DO NOT use for: opening hours, menu, prices, services, facilities.')
+        else:
+            header = ('--- FACEBOOK PAGE DATA (FRESHNESS UNKNOWN) ---\n'
+                      'WARNING: Cannot determine if this page is current.\n'
+                      'ONLY use for: business name confirmation, address, phone number.')
+    else:
+        header = LAYER_HEADERS[layer]
+    return f'{header}\n{body}' if header else body
+
+
+def render_source_text(layers):
+    """Combined source text of {layer: body or (body, freshness, last_activity)}, in layer order."""
+    sections = []
+    for layer in LAYER_SETS['enhanced']:
+        value = layers.get(layer)
+        if value:
+            body, freshness, last_activity = value if isinstance(value, tuple) else (value, None, None)
+            sections.append(render_layer(layer, body, freshness, last_activity))
+    return '\n\n'.join(sections)
+
+
+def _layers_key(hashes):
+    """Cache key of a layer set: the hashes of its present layers, in layer order."""
+    return content_hash(hashes) if hashes else ''
+
+
+# ============================================================
+# LAZY SHEETS
+# ============================================================
+class FactSheet(dict):
+    """A fact sheet; LARGE_FIELDS are loaded from the store on first access."""
+
+    def __init__(self, small, keys, lazy, store):
+        super().__init__(small)
+        self._keys = keys
+        self._lazy = set(lazy)
+        self._store = store
+
+    def __missing__(self, key):
+        if key not in self._lazy:
+            raise KeyError(key)
+        value = self._store.large_field(dict.__getitem__(self, 'poi_id'), key)
+        self._lazy.discard(key)
+        self[key] = value
+        return value
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self._lazy
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def unload(self):
+        """Drop the large fields read so far (they are read again on the next access)."""
+        for key in self._keys:
+            if key in LARGE_FIELDS and dict.__contains__(self, key):
+                dict.__delitem__(self, key)
+                self._lazy.add(key)
+
+    def to_dict(self):
+        """The complete sheet as a plain dict (all large fields loaded), in stored key order."""
+        return {key: self[key] for key in self._keys}
+
+
+# ============================================================
+# STORE
+# ============================================================
+class FactSheetStore:
+    """SQLite fact-sheet store; see module docstring."""
+
+    def __init__(self, path=FACTSHEET_STORE, cache_writes=False, readonly=False):
+        self.path = path
+        self.cache_writes = cache_writes   # Store combined source texts built on demand
+        self._lock = threading.Lock()
+        if readonly:
+            # An existing store, opened without creating or changing anything
+            self.conn = sqlite3.connect(f'file:{quote(os.path.abspath(path))}?mode=ro', uri=True,
+                                        timeout=30, check_same_thread=False)
+            return
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS sheets (
+                poi_id INTEGER PRIMARY KEY,
+                position INTEGER,
+                destination_id INTEGER,
+                data_quality TEXT,
+                category TEXT,
+                keys TEXT,
+                small TEXT
+            )
+        """)
+        self.conn.execute('CREATE INDEX IF NOT EXISTS sheets_order ON sheets (destination_id, position)')
+        self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS sheets_selection
+            ON sheets (destination_id, data_quality, category)
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS large_fields (
+                poi_id INTEGER,
+                field TEXT,
+                value TEXT,
+                PRIMARY KEY (poi_id, field)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS layers (
+                poi_id INTEGER,
+                layer TEXT,
+                body TEXT,
+                freshness TEXT,
+                last_activity TEXT,
+                hash TEXT,
+                updated_at TEXT,
+                PRIMARY KEY (poi_id, layer)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS source_texts (
+                poi_id INTEGER,
+                layer_set TEXT,
+                layers_hash TEXT,
+                text TEXT,
+                PRIMARY KEY (poi_id, layer_set)
+            ) WITHOUT ROWID
+        """)
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
+
+    # ------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------
+    def _sheet(self, row):
+        keys = json.loads(row[0])
+        return FactSheet(json.loads(row[1]), keys, [k for k in keys if k in LARGE_FIELDS], self)
+
+    def get(self, poi_id):
+        """The sheet of poi_id (int or numeric string), or None."""
+        with self._lock:
+            row = self.conn.execute('SELECT keys, small FROM sheets WHERE poi_id = ?',
+                                    (int(poi_id),)).fetchone()
+        return self._sheet(row) if row else None
+
+    def get_many(self, poi_ids):
+        """Sheets of the given poi_ids that exist, in store order."""
+        poi_ids = [int(pid) for pid in poi_ids]
+        rows = []
+        with self._lock:
+            for i in range(0, len(poi_ids), QUERY_CHUNK):
+                chunk = poi_ids[i:i + QUERY_CHUNK]
+                rows += self.conn.execute(f"""
+                    SELECT destination_id, position, keys, small FROM sheets
+                    WHERE poi_id IN ({', '.join('?' * len(chunk))})
+                """, chunk).fetchall()
+        rows.sort(key=lambda row: (row[0] is not None, row[0] or 0, row[1]))
+        return [self._sheet(row[2:]) for row in rows]
+
+    def iter_sheets(self, destination_id=None, quality=None, category=None):
+        """Sheets in fact-sheet order, optionally filtered on the indexed columns."""
+        where, params = [], []
+        for column, value in (('destination_id', destination_id), ('data_quality', quality),
+                              ('category', category)):
+            if value is not None:
+                where.append(f'{column} = ?')
+                params.append(value)
+        query = 'SELECT keys, small FROM sheets'
+        if where:
+            query += ' WHERE ' + ' AND '.join(where)
+        with self._lock:
+            rows = self.conn.execute(query + ' ORDER BY destination_id, position', params).fetchall()
+        return [self._sheet(row) for row in rows]
+
+    def large_field(self, poi_id, field):
+        if field == 'source_text_for_llm':
+            return self.source_text(poi_id)
+        with self._lock:
+            row = self.conn.execute('SELECT value FROM large_fields WHERE poi_id = ? AND field = ?',
+                                    (int(poi_id), field)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def __contains__(self, poi_id):
+        with self._lock:
+            return self.conn.execute('SELECT 1 FROM sheets WHERE poi_id = ?',
+                                     (int(poi_id),)).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM sheets').fetchone()[0]
+
+    def poi_ids(self):
+        with self._lock:
+            return [row[0] for row in self.conn.execute(
+                'SELECT poi_id FROM sheets ORDER BY destination_id, position')]
+
+    def stored_poi_ids(self):
+        """poi_ids with a sheet, layers or a cached text (R6b writes layers of POIs without a sheet)."""
+        with self._lock:
+            return [row[0] for row in self.conn.execute(
+                'SELECT poi_id FROM sheets UNION SELECT poi_id FROM layers'
+                ' UNION SELECT poi_id FROM source_texts')]
+
+    def quality_counts(self, destination_id=None):
+        """{'rich', 'moderate', 'minimal', 'none'} sheet counts from the index."""
+        counts = {'rich': 0, 'moderate': 0, 'minimal': 0, 'none': 0}
+        query = 'SELECT data_quality, COUNT(*) FROM sheets'
+        params = ()
+        if destination_id is not None:
+            query += ' WHERE destination_id = ?'
+            params = (destination_id,)
+        with self._lock:
+            counts.update(self.conn.execute(query + ' GROUP BY data_quality', params).fetchall())
+        return counts
+
+    # ------------------------------------------------------------
+    # Source layers
+    # ------------------------------------------------------------
+    def _layer_hashes(self, poi_id, layers):
+        """[(layer, hash)] of poi_id's present layers, in layer order (caller holds the lock)."""
+        rows = dict(self.conn.execute(
+            f"SELECT layer, hash FROM layers WHERE poi_id = ? AND layer IN ({', '.join('?' * len(layers))})",
+            (poi_id,) + tuple(layers)).fetchall())
+        return [(layer, rows[layer]) for layer in layers if layer in rows]
+
+    def source_text(self, poi_id, layer_set='r2'):
+        """Combined source text of poi_id's layers in LAYER_SETS[layer_set] ('' without layers).
+
+        Read-only unless the store was opened with cache_writes=True.
+        """
+        poi_id = int(poi_id)
+        layers = LAYER_SETS[layer_set]
+        with self._lock:
+            key = _layers_key(self._layer_hashes(poi_id, layers))
+            cached = self.conn.execute(
+                'SELECT layers_hash, text FROM source_texts WHERE poi_id = ? AND layer_set = ?',
+                (poi_id, layer_set)).fetchone()
+            if cached and cached[0] == key:
+                with _lock:
+                    _stats['texts'] += 1
+                    _stats['cache_hits'] += 1
+                return cached[1]
+            rows = self.conn.execute(
+                f"""SELECT layer, body, freshness, last_activity FROM layers
+                    WHERE poi_id = ? AND layer IN ({', '.join('?' * len(layers))})""",
+                (poi_id,) + tuple(layers)).fetchall()
+            text = render_source_text({layer: (body, freshness, last_activity)
+                                       for layer, body, freshness, last_activity in rows})
+            if self.cache_writes:   # Made durable by the writer's commit()
+                self._cache_text(poi_id, layer_set, key, text)
+        with _lock:
+            _stats['texts'] += 1
+            _stats['built'] += 1
+        return text
+
+    def _cache_text(self, poi_id, layer_set, key, text):
+        self.conn.execute(
+            'INSERT OR REPLACE INTO source_texts (poi_id, layer_set, layers_hash, text) VALUES (?, ?, ?, ?)',
+            (poi_id, layer_set, key, text))
+
+    def set_layers(self, poi_id, layers, scope):
+        """Replace poi_id's layers in scope with layers ({layer: body or (body, freshness, last_activity)}).
+
+        Empty bodies are not stored. Rows whose hash did not change are left as
+        they are, so cached source texts stay valid; commit() makes the rest visible.
+        """
+        poi_id = int(poi_id)
+        rows = {}
+        for layer, value in layers.items():
+            body, freshness, last_activity = value if isinstance(value, tuple) else (value, None, None)
+            if body:
+                rows[layer] = (body, freshness, last_activity,
+                               content_hash([layer, body, freshness, last_activity]))
+        written = 0
+        with self._lock:
+            current = dict(self._layer_hashes(poi_id, scope))
+            stale = [layer for layer in current if layer not in rows]
+            self.conn.executemany('DELETE FROM layers WHERE poi_id = ? AND layer = ?',
+                                  [(poi_id, layer) for layer in stale])
+            for layer, (body, freshness, last_activity, digest) in rows.items():
+                if current.get(layer) == digest:
+                    continue
+                self.conn.execute("""
+                    INSERT OR REPLACE INTO layers (poi_id, layer, body, freshness, last_activity,
+                                                   hash, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
+                """, (poi_id, layer, body, freshness, last_activity, digest))
+                written += 1
+        with _lock:
+            _stats['layers_written'] += written + len(stale)
+            _stats['layers_unchanged'] += len(rows) - written
+
+    def layers_hashes(self, layers):
+        """{poi_id: hash of its layers in layers} for every POI with at least one of them."""
+        found = {}
+        with self._lock:
+            for poi_id, layer, digest in self.conn.execute(
+                    f"SELECT poi_id, layer, hash FROM layers WHERE layer IN ({', '.join('?' * len(layers))})",
+                    tuple(layers)):
+                found.setdefault(poi_id, {})[layer] = digest
+        return {poi_id: _layers_key([(layer, hashes[layer]) for layer in layers if layer in hashes])
+                for poi_id, hashes in found.items()}
+
+    # ------------------------------------------------------------
+    # Writing (R2 generate_fact_sheets)
+    # ------------------------------------------------------------
+    def put(self, sheet, position, layers=None):
+        """Insert or replace a sheet (a plain dict); commit() makes it visible to readers.
+
+        layers are the sheet's R2 source layers (see set_layers). Without them
+        (legacy JSON import) source_text_for_llm is kept as the 'legacy' layer.
+        """
+        poi_id = sheet['poi_id']
+        if layers is None:
+            layers = {'legacy': sheet.get('source_text_for_llm', '')}
+        self.set_layers(poi_id, layers, R2_LAYERS)
+        if self.cache_writes and 'source_text_for_llm' in sheet:
+            with self._lock:
+                key = _layers_key(self._layer_hashes(poi_id, R2_LAYERS))
+                self._cache_text(poi_id, 'r2', key, sheet['source_text_for_llm'])
+        small = {k: v for k, v in sheet.items() if k not in LARGE_FIELDS}
+        with self._lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO sheets (poi_id, position, destination_id, data_quality,
+                                               category, keys, small)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (poi_id, position, sheet.get('destination_id'), sheet.get('data_quality'),
+                  sheet.get('category'), json.dumps(list(sheet)),
+                  json.dumps(small, ensure_ascii=False)))
+            self.conn.execute('DELETE FROM large_fields WHERE poi_id = ?', (poi_id,))
+            self.conn.executemany(
+                'INSERT INTO large_fields (poi_id, field, value) VALUES (?, ?, ?)',
+                [(poi_id, k, json.dumps(sheet[k], ensure_ascii=False))
+                 for k in LARGE_FIELDS if k in sheet and k != 'source_text_for_llm'])
+
+    def set_positions(self, positions):
+        """positions: [(position, poi_id)] for sheets kept as they are."""
+        with self._lock:
+            self.conn.executemany('UPDATE sheets SET position = ? WHERE poi_id = ?', positions)
+
+    def delete(self, poi_ids):
+        poi_ids = [int(pid) for pid in poi_ids]
+        with self._lock:
+            self.conn.executemany('DELETE FROM sheets WHERE poi_id = ?', [(p,) for p in poi_ids])
+            for table in ('large_fields', 'layers', 'source_texts'):
+                self.conn.executemany(f'DELETE FROM {table} WHERE poi_id = ?', [(p,) for p in poi_ids])
+
+    def commit(self):
+        with self._lock:
+            self.conn.commit()
+
+    # ------------------------------------------------------------
+    # JSON import / export
+    # ------------------------------------------------------------
+    def import_json(self, json_path=LEGACY_JSON):
+        """Load a legacy fact-sheet JSON array into the store. Returns the sheet count."""
+        with open(json_path, 'r', encoding='utf-8') as f:
+            sheets = json.load(f)
+        for position, sheet in enumerate(sheets):
+            self.put(sheet, position)
+        self.commit()
+        return len(sheets)
+
+    def export_json(self, json_path=LEGACY_JSON):
+        """Write all sheets as the legacy indented JSON array (one sheet in memory at a time)."""
+        with open(json_path, 'w', encoding='utf-8') as f:
+            f.write('[')
+            for i, poi_id in enumerate(self.poi_ids()):
+                f.write(',\n' if i else '\n')
+                sheet = json.dumps(self.get(poi_id).to_dict(), indent=2, ensure_ascii=False)
+                f.write('\n'.join('  ' + line for line in sheet.split('\n')))
+            f.write('\n]' if len(self) else ']')
+
+
+# ============================================================
+# REPORTING
+# ============================================================
+def layer_stats():
+    with _lock:
+        return dict(_stats)
+
+
+def format_layer_stats():
+    """One-line summary for run logs."""
+    ls = layer_stats()
+    return (f'{ls["texts"]} source texts ({ls["cache_hits"]} cached, {ls["built"]} built), '
+            f'{ls["layers_written"]} layers written, {ls["layers_unchanged"]} unchanged')
+
+
+def open_fact_sheets(path=FACTSHEET_STORE, legacy_json=LEGACY_JSON, cache_writes=False, readonly=False):
+    """Open the store; a missing store is created from legacy_json when that file exists.
+
+    readonly: never write to disk. A missing store is then imported from
+    legacy_json into memory (empty without it).
+    """
+    exists = os.path.exists(path)
+    if readonly and exists:
+        return FactSheetStore(path, readonly=True)
+    store = FactSheetStore(':memory:' if readonly else path, cache_writes)
+    if not exists and legacy_json and os.path.exists(legacy_json):
+        store.import_json(legacy_json)
+    return store
@@ -14,6 +14,10 @@ Usage: python3 -u fase_r1_damage_assessment.py [--phase PHASE]
   --phase scrape    : Only run website scraping (requires select output)
   --phase factcheck : Only run LLM fact-check (requires scrape output)
   --phase report    : Only generate report (requires factcheck output)
+  --no-page-cache   : Do not revalidate against the shared page cache
+  --no-host-registry: Do not skip hosts known dead from earlier scrapes
+  --fixed-timeouts  : Do not derive per-host timeouts from latency history
+  --ignore-robots   : Do not read robots.txt or pace per host (fixed sleeps instead)
   (no --phase)      : Run all phases sequentially
 """
 
@@ -29,7 +33,16 @@ from urllib.parse import urlparse, urljoin
 
 import mysql.connector
 import requests
-from bs4 import BeautifulSoup
+
+from scrape_http import (http_get, enable_page_cache, enable_host_registry,
+                         enable_adaptive_timeouts, enable_robots, format_connection_stats,
+                         response_text, page_charset, format_charset_stats,
+                         format_download_stats, RejectedContent)
+from scrape_cache import format_cache_stats
+from scrape_hosts import HostUnavailable, format_host_stats
+from scrape_latency import format_latency_stats, timeout_seconds
+from scrape_robots import RobotsBlocked, format_robots_stats, is_enabled as polite
+from scrape_extract import extract_page
 
 # ============================================================
 # CONFIG
@@ -46,11 +59,14 @@ MISTRAL_API_KEY = 'pMPOgK7TmI7oe6rxPEXiCCPKDMk8pTUg'
 MISTRAL_API_URL = 'https://api.mistral.ai/v1/chat/completions'
 MISTRAL_MODEL = 'mistral-medium-latest'
 
-# Rate limiting
+# Rate limiting (fixed sleeps only with --ignore-robots; otherwise scrape_robots
+# paces each host by its Crawl-delay)
 SCRAPE_DELAY = 0.5          # 2 req/sec
 DOMAIN_DELAY = 3.0          # 3s between different domains
 SCRAPE_TIMEOUT = 10         # 10s per request
 SCRAPE_MAX_RETRIES = 3
+MAIN_MAX_WORDS = 5000       # Main page text kept (extraction stops here)
+SUBPAGE_MAX_WORDS = 2000    # Text kept per subpage
 LLM_DELAY = 0.2             # 5 req/sec
 LLM_MAX_RETRIES = 3
 LLM_TIMEOUT = 60
@@ -260,7 +276,7 @@ def scrape_websites(pois, dest_name, output_file):
 
         # Domain-based delay
         domain = urlparse(url).netloc
-        if last_domain and domain != last_domain:
+        if not polite() and last_domain and domain != last_domain:
             time.sleep(DOMAIN_DELAY)
         last_domain = domain
 
@@ -277,11 +293,19 @@ def scrape_websites(pois, dest_name, output_file):
             fail_count += 1
             log(f'    -> FAILED: {result.get("error", "unknown")}')
 
-        time.sleep(SCRAPE_DELAY)
+        if not polite():
+            time.sleep(SCRAPE_DELAY)
 
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
     log(f'{dest_name} scraping complete: {success_count} OK, {fail_count} failed -> {output_file}')
+    log(f'  Connections: {format_connection_stats()}')
+    log(f'  Page cache: {format_cache_stats()}')
+    log(f'  Charset: {format_charset_stats()}')
+    log(f'  Downloads: {format_download_stats()}')
+    log(f'  Dead hosts: {format_host_stats()}')
+    log(f'  Latency: {format_latency_stats()}')
+    log(f'  Politeness: {format_robots_stats()}')
     return results
 
 
@@ -296,6 +320,7 @@ def scrape_single_poi(poi_id, url, poi_name):
         'meta_description': '',
         'main_content': '',
         'subpages': {},
+        'charsets': {},
         'extracted_facts': {
             'opening_hours': None,
             'prices_found': [],
@@ -313,37 +338,21 @@ def scrape_single_poi(poi_id, url, poi_name):
 
     for attempt in range(SCRAPE_MAX_RETRIES):
         try:
-            resp = requests.get(url, headers=headers, timeout=SCRAPE_TIMEOUT,
-                              allow_redirects=True, verify=True)
+            resp = http_get(url, page_type='main', headers=headers, timeout=SCRAPE_TIMEOUT,
+                          allow_redirects=True, verify=True)
             resp.raise_for_status()
 
-            soup = BeautifulSoup(resp.text, 'html.parser')
-
-            # Extract title
-            title_tag = soup.find('title')
-            result['page_title'] = title_tag.get_text(strip=True) if title_tag else ''
-
-            # Extract meta description
-            meta = soup.find('meta', attrs={'name': 'description'})
-            if meta:
-                result['meta_description'] = meta.get('content', '')
-
-            # Extract main content
-            # Remove script, style, nav, footer, header
-            for tag in soup.find_all(['script', 'style', 'nav', 'footer', 'header', 'noscript']):
-                tag.decompose()
-
-            main_content = soup.get_text(separator='\n', strip=True)
-            # Clean up excessive whitespace
-            main_content = re.sub(r'\n{3,}', '\n\n', main_content)
-            # Limit to 5000 words
-            words = main_content.split()
-            if len(words) > 5000:
-                main_content = ' '.join(words[:5000])
+            # Single pass: title, meta description, visible text (max 5000 words), <li> items
+            page = extract_page(response_text(resp), max_words=MAIN_MAX_WORDS)
+            result['charsets']['main'] = page_charset(resp)
+            result['page_title'] = page['title']
+            result['meta_description'] = page['meta_description']
+
+            main_content = page['text']
             result['main_content'] = main_content
 
             # Extract structured data
-            extract_facts(soup, result, main_content)
+            extract_facts(page, result, main_content)
 
             result['scrape_success'] = True
 
@@ -352,29 +361,25 @@ def scrape_single_poi(poi_id, url, poi_name):
             for subpage in SUBPAGES:
                 try:
                     sub_url = urljoin(base_url, subpage)
-                    sub_resp = requests.get(sub_url, headers=headers,
-                                          timeout=SCRAPE_TIMEOUT,
-                                          allow_redirects=True)
+                    sub_resp = http_get(sub_url, page_type='subpage', headers=headers,
+                                      timeout=SCRAPE_TIMEOUT,
+                                      allow_redirects=True)
                     if sub_resp.status_code == 200:
-                        sub_soup = BeautifulSoup(sub_resp.text, 'html.parser')
-                        for tag in sub_soup.find_all(['script', 'style', 'nav', 'footer', 'header', 'noscript']):
-                            tag.decompose()
-                        sub_text = sub_soup.get_text(separator='\n', strip=True)
-                        sub_text = re.sub(r'\n{3,}', '\n\n', sub_text)
-                        words = sub_text.split()
-                        if len(words) > 2000:
-                            sub_text = ' '.join(words[:2000])
+                        sub_text = extract_page(response_text(sub_resp),
+                                                max_words=SUBPAGE_MAX_WORDS)['text']
                         # Only add if content is meaningfully different from main
                         if len(sub_text) > 100 and sub_text[:200] != main_content[:200]:
                             result['subpages'][subpage] = sub_text
-                    time.sleep(0.3)  # Small delay between subpages
+                            result['charsets'][subpage] = page_charset(sub_resp)
+                    if not polite():
+                        time.sleep(0.3)  # Small delay between subpages
                 except Exception:
                     pass  # Subpage failures are OK
 
             break  # Success, exit retry loop
 
-        except requests.exceptions.Timeout:
-            result['error'] = f'Timeout after {SCRAPE_TIMEOUT}s (attempt {attempt+1})'
+        except requests.exceptions.Timeout as e:
+            result['error'] = f'Timeout after {timeout_seconds(e, SCRAPE_TIMEOUT):g}s (attempt {attempt+1})'
             if attempt < SCRAPE_MAX_RETRIES - 1:
                 time.sleep(2 ** attempt)
         except requests.exceptions.HTTPError as e:
@@ -383,22 +388,24 @@ def scrape_single_poi(poi_id, url, poi_name):
                 break  # Don't retry 403/404
             if attempt < SCRAPE_MAX_RETRIES - 1:
                 time.sleep(2 ** attempt)
+        except RejectedContent as e:
+            result['error'] = f'Not a web page: {str(e)}'
+            break  # A PDF/image homepage will not turn into HTML on retry
+        except HostUnavailable as e:
+            result['error'] = f'Skipped: {str(e)}'
+            break  # Known dead (registry / circuit breaker)
+        except RobotsBlocked as e:
+            result['error'] = f'Skipped: {str(e)}'
+            break  # Disallowed by robots.txt, or Crawl-delay beyond MAX_WAIT
         except requests.exceptions.SSLError:
             # Retry without SSL verification
             try:
-                resp = requests.get(url, headers=headers, timeout=SCRAPE_TIMEOUT,
-                                  allow_redirects=True, verify=False)
-                soup = BeautifulSoup(resp.text, 'html.parser')
-                title_tag = soup.find('title')
-                result['page_title'] = title_tag.get_text(strip=True) if title_tag else ''
-                for tag in soup.find_all(['script', 'style', 'nav', 'footer', 'header', 'noscript']):
-                    tag.decompose()
-                main_content = soup.get_text(separator='\n', strip=True)
-                main_content = re.sub(r'\n{3,}', '\n\n', main_content)
-                words = main_content.split()
-                if len(words) > 5000:
-                    main_content = ' '.join(words[:5000])
-                result['main_content'] = main_content
+                resp = http_get(url, page_type='main', headers=headers, timeout=SCRAPE_TIMEOUT,
+                              allow_redirects=True, verify=False)
+                page = extract_page(response_text(resp), max_words=MAIN_MAX_WORDS)
+                result['charsets']['main'] = page_charset(resp)
+                result['page_title'] = page['title']
+                result['main_content'] = page['text']
                 result['scrape_success'] = True
                 result['error'] = 'SSL error (bypassed verification)'
             except Exception as e2:
@@ -412,8 +419,8 @@ def scrape_single_poi(poi_id, url, poi_name):
     return result
 
 
-def extract_facts(soup, result, text):
-    """Extract structured facts from scraped content."""
+def extract_facts(page, result, text):
+    """Extract structured facts from scraped content (page = extract_page() output)."""
     text_lower = text.lower()
 
     # Opening hours patterns (Dutch + English + Spanish)
@@ -449,8 +456,7 @@ def extract_facts(soup, result, text):
 
     # Key features (look for lists, USPs)
     features = []
-    for li in soup.find_all('li'):
-        li_text = li.get_text(strip=True)
+    for li_text in page['list_items']:
         if 10 < len(li_text) < 200:
             features.append(li_text)
     result['extracted_facts']['key_features'] = features[:15]
@@ -1378,6 +1384,14 @@ def main():
     parser = argparse.ArgumentParser(description='Fase R1: Damage Assessment')
     parser.add_argument('--phase', choices=['select', 'scrape', 'factcheck', 'report'],
                        help='Run only a specific phase')
+    parser.add_argument('--no-page-cache', action='store_true',
+                       help='Do not reuse/revalidate cached pages from earlier scrapes')
+    parser.add_argument('--no-host-registry', action='store_true',
+                       help='Also try hosts that earlier scrapes found dead')
+    parser.add_argument('--fixed-timeouts', action='store_true',
+                       help='Use SCRAPE_TIMEOUT for every host')
+    parser.add_argument('--ignore-robots', action='store_true',
+                       help='Do not read robots.txt; use fixed SCRAPE_DELAY/DOMAIN_DELAY sleeps')
     args = parser.parse_args()
 
     start_time = time.time()
@@ -1398,6 +1412,14 @@ def main():
             log(f'Loaded {len(texel_pois)} Texel + {len(calpe_pois)} Calpe POIs from files')
 
         if args.phase is None or args.phase == 'scrape':
+            if not args.no_page_cache:
+                enable_page_cache()
+            if not args.no_host_registry:
+                enable_host_registry()
+            if not args.fixed_timeouts:
+                enable_adaptive_timeouts()
+            if not args.ignore_robots:
+                enable_robots()
             texel_wd = scrape_websites(texel_pois, 'Texel', WEBSITE_TEXEL)
             calpe_wd = scrape_websites(calpe_pois, 'Calpe', WEBSITE_CALPE)
             save_checkpoint('scrape', {
@@ -6,7 +6,9 @@ HolidaiButler Content Repair Pipeline
 This script:
 1. Scrapes ALL 1,923 POI websites (from fase_r2_scrape_targets.json)
 2. Queries DB for fallback data (description, highlights) for ALL POIs with content
-3. Builds structured "fact sheets" per POI combining all sources
+3. Builds structured "fact sheets" per POI combining all sources (incremental:
+   only POIs whose row, website content or R6b facts changed are rebuilt) and
+   stores them in the indexed fact-sheet store (fase_r2_fact_sheets.sqlite)
 4. Generates a coverage report
 
 Usage: python3 -u fase_r2_source_data_enrichment.py [--phase PHASE] [--batch-size N] [--resume]
@@ -17,23 +19,59 @@ Usage: python3 -u fase_r2_source_data_enrichment.py [--phase PHASE] [--batch-siz
   --batch-size N     : POIs per checkpoint batch (default 25)
   --resume           : Resume scraping from last checkpoint
   --dest texel|calpe : Only process one destination
+  --async-scrape     : Scrape concurrently (global cap + per-domain politeness)
+  --concurrency N    : Global concurrency cap for --async-scrape (default POLITE_MAX_WORKERS,
+                       or MAX_WORKERS with --ignore-robots)
+  --parse-workers N  : Parser processes fed by the fetch threads (default: CPU count
+                       with --async-scrape, 0 = parse in the fetch thread otherwise)
+  --no-page-cache    : Do not revalidate against the shared page cache
+  --no-host-registry : Do not skip hosts known dead from earlier scrapes
+  --fixed-timeouts   : Do not derive per-host timeouts from latency history
+  --ignore-robots    : Do not read robots.txt or pace per host (fixed SCRAPE_DELAY /
+                       DOMAIN_DELAY sleeps instead)
+  --fsync POLICY     : Result log durability: always | batch (default) | never
+  --export-json      : Also write the legacy JSON arrays (fase_r2_scraped_data.json,
+                       fase_r2_fact_sheets.json) and the page block dump
+                       (fase_r2_page_blocks.json, for inspecting dedupe)
+  --rebuild-all      : Rebuild every fact sheet (default: only changed fingerprints,
+                       see factsheet_manifest)
 """
 
 import json
 import time
-import re
 import os
 import sys
 import argparse
+import asyncio
 import traceback
 from datetime import datetime, timezone
-from urllib.parse import urlparse, urljoin
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
 import threading
 
 import mysql.connector
 import requests
-from bs4 import BeautifulSoup
+
+from scrape_http import (http_get, enable_page_cache, enable_host_registry,
+                         enable_adaptive_timeouts, enable_robots, connection_stats, format_connection_stats,
+                         page_charset, charset_stats, format_charset_stats,
+                         download_stats, format_download_stats, RejectedContent)
+from scrape_cache import cache_stats, format_cache_stats
+from scrape_hosts import HostUnavailable, host_stats, format_host_stats, url_key
+from scrape_latency import latency_stats, format_latency_stats, timeout_seconds
+from scrape_robots import RobotsBlocked, robots_stats, format_robots_stats, is_enabled as polite
+from scrape_facts import scan_facts, group_fact_matches, first_pattern_hits
+from scrape_structured import structured_facts, facts_complete
+from scrape_pipeline import (parse_response, enable_parse_pool, close_parse_pool,
+                             pipeline_stats, format_pipeline_stats, PARSE_WORKERS)
+from scrape_discovery import discover_subpages, fetch_subpages
+from scrape_results import ResultLog, FSYNC_POLICIES
+from scrape_dedupe import build_block_store, format_dedupe_stats, MAIN_PAGE
+from factsheet_manifest import (Manifest, POI_COLUMNS, ROW_HASH_SQL, content_hash, fingerprint,
+                                facts_hash, format_build_stats)
+from factsheet_store import open_fact_sheets, render_source_text, R6B_LAYERS
+from db_stream import fetch_unbuffered, prefetched
+from source_packer import pack_text
 
 # ============================================================
 # CONFIG
@@ -46,28 +84,42 @@ DB_CONFIG = {
     'charset': 'utf8mb4'
 }
 
-# Rate limiting
+# Rate limiting (fixed sleeps only with --ignore-robots; otherwise scrape_robots
+# paces each host by its Crawl-delay)
 SCRAPE_DELAY = 0.3          # 0.3s between requests
 DOMAIN_DELAY = 1.5          # 1.5s between different domains
 SCRAPE_TIMEOUT = 8          # 8s per request
 SUBPAGE_TIMEOUT = 5         # 5s per subpage request (faster fail)
 SCRAPE_MAX_RETRIES = 2      # 2 retries (3 was too slow for 1923 POIs)
 MAX_WORKERS = 3             # Concurrent scraping threads (conservative)
+POLITE_MAX_WORKERS = 12     # Concurrent threads when hosts are paced per Crawl-delay
+PER_DOMAIN_CONCURRENCY = 1  # Async mode: max in-flight URLs per domain
 SKIP_SUBPAGES_THRESHOLD = 2000  # Skip subpages if main content > N words
 MAX_SUBPAGES_SUCCESS = 3    # Stop trying subpages after N successes
+SUBPAGE_TOP_N = 4           # Discovered subpages fetched per POI (in rank order)
+MAIN_MAX_WORDS = 5000       # Main page text kept per POI (extraction stops here)
+SUBPAGE_MAX_WORDS = 2000    # Text kept per subpage
+WEBSITE_SOURCE_TOKENS = 4000   # source_text_for_llm budget for the main page (~2,500 words)
+SUBPAGE_SOURCE_TOKENS = 1300   # ... and per subpage (~800 words)
 
 USER_AGENT = 'HolidaiButler Content Verification Bot/2.0'
 
 # Output files
 OUTPUT_DIR = '/root'
 SCRAPE_TARGETS = f'{OUTPUT_DIR}/fase_r2_scrape_targets.json'
-SCRAPE_OUTPUT = f'{OUTPUT_DIR}/fase_r2_scraped_data.json'
+SCRAPE_LOG = f'{OUTPUT_DIR}/fase_r2_scraped_data.jsonl'     # Append-only result log
+SCRAPE_OUTPUT = f'{OUTPUT_DIR}/fase_r2_scraped_data.json'    # Optional JSON export
 SCRAPE_CHECKPOINT = f'{OUTPUT_DIR}/fase_r2_scrape_checkpoint.json'
-FACT_SHEETS = f'{OUTPUT_DIR}/fase_r2_fact_sheets.json'
+FACT_SHEET_STORE = f'{OUTPUT_DIR}/fase_r2_fact_sheets.sqlite'   # Indexed store (factsheet_store)
+FACT_SHEETS = f'{OUTPUT_DIR}/fase_r2_fact_sheets.json'    # Optional JSON export
+PAGE_BLOCKS = f'{OUTPUT_DIR}/fase_r2_page_blocks.json'     # Optional dump: unique blocks + page refs
+# Page texts already in the result log are written as references (see scrape_results)
+SCRAPE_SHARED_FIELDS = ('main_content', 'subpages')
 COVERAGE_REPORT = f'{OUTPUT_DIR}/fase_r2_coverage_report.md'
 SUMMARY_FILE = f'{OUTPUT_DIR}/fase_r2_summary_for_frank.md'
 
-# Subpages to try scraping (reduced from 22 to 10 most useful)
+# Fallback subpage guesses when discovery finds no internal URLs
+# (robots.txt/sitemap/homepage links are tried first, see scrape_discovery)
 SUBPAGES = ['/over-ons', '/about', '/menu', '/openingstijden',
             '/contact', '/diensten', '/prijzen', '/about-us',
             '/nuestra-carta', '/horarios']
@@ -87,27 +139,48 @@ def log(msg):
 # ============================================================
 # CHECKPOINT MANAGEMENT
 # ============================================================
-def save_scrape_checkpoint(scraped_data, failed_ids, stats):
-    """Save scraping progress for resume capability."""
+def save_scrape_checkpoint(result_log, stats):
+    """Make logged results durable and write a small progress summary.
+
+    Results live in the append-only SCRAPE_LOG (plus its ID index); the
+    checkpoint file only holds counts and stats, so it stays small.
+    """
+    result_log.checkpoint()
     checkpoint = {
         'timestamp': datetime.now(timezone.utc).isoformat(),
-        'scraped_count': len(scraped_data),
-        'failed_count': len(failed_ids),
-        'scraped_poi_ids': [d['poi_id'] for d in scraped_data],
-        'failed_poi_ids': list(failed_ids),
+        'scraped_count': len(result_log),
+        'failed_count': len(result_log.keys(ok=False)),
+        'result_log': SCRAPE_LOG,
         'stats': stats
     }
-    with open(SCRAPE_CHECKPOINT, 'w') as f:
+    tmp = f'{SCRAPE_CHECKPOINT}.tmp'
+    with open(tmp, 'w') as f:
         json.dump(checkpoint, f, indent=2)
-    # Also save scraped data incrementally
-    with open(SCRAPE_OUTPUT, 'w', encoding='utf-8') as f:
-        json.dump(scraped_data, f, indent=2, ensure_ascii=False)
-
-
-def load_scrape_checkpoint():
-    """Load scraping checkpoint for resume."""
-    if os.path.exists(SCRAPE_CHECKPOINT):
-        with open(SCRAPE_CHECKPOINT, 'r') as f:
+    os.replace(tmp, SCRAPE_CHECKPOINT)
+
+
+def open_scrape_log(resume, fsync='batch'):
+    """Open the result log: replayed on resume, started fresh otherwise."""
+    if resume and not os.path.exists(SCRAPE_LOG) and os.path.exists(SCRAPE_OUTPUT):
+        # Run started before the JSONL log existed: import its JSON dataset once
+        result_log = ResultLog(SCRAPE_LOG, fsync=fsync, truncate=True,
+                               shared_fields=SCRAPE_SHARED_FIELDS)
+        with open(SCRAPE_OUTPUT, 'r', encoding='utf-8') as f:
+            for d in json.load(f):
+                result_log.append(d, key=d['poi_id'], ok=d['scrape_success'])
+        result_log.checkpoint()
+        log(f'Imported {len(result_log)} results from {SCRAPE_OUTPUT} into {SCRAPE_LOG}')
+        return result_log
+    return ResultLog(SCRAPE_LOG, fsync=fsync, truncate=not resume, shared_fields=SCRAPE_SHARED_FIELDS)
+
+
+def load_scraped_data():
+    """Scraped results from the result log, else from a JSON export. None if absent."""
+    if os.path.exists(SCRAPE_LOG):
+        with ResultLog(SCRAPE_LOG) as result_log:
+            return list(result_log.replay())
+    if os.path.exists(SCRAPE_OUTPUT):
+        with open(SCRAPE_OUTPUT, 'r', encoding='utf-8') as f:
             return json.load(f)
     return None
 
@@ -115,7 +188,9 @@ def load_scrape_checkpoint():
 # ============================================================
 # PHASE 1: WEBSITE SCRAPING
 # ============================================================
-def scrape_all_websites(targets, batch_size=25, resume=False, dest_filter=None):
+def scrape_all_websites(targets, batch_size=25, resume=False, dest_filter=None,
+                        async_mode=False, concurrency=None, fsync='batch', export_json=False,
+                        parse_workers=0):
     """Scrape websites for all target POIs with checkpointing."""
     log('=' * 70)
     log('PHASE 1: WEBSITE SCRAPING — Full POI Website Scrape')
@@ -127,22 +202,12 @@ def scrape_all_websites(targets, batch_size=25, resume=False, dest_filter=None):
         targets = [t for t in targets if t['destination_id'] == dest_id]
         log(f'Filtered to {dest_filter}: {len(targets)} POIs')
 
-    # Load existing scraped data if resuming
-    scraped_data = []
-    scraped_ids = set()
-    failed_ids = set()
-
+    # Open the result log (resume: IDs come from its index, no full reload)
+    result_log = open_scrape_log(resume, fsync)
+    scraped_ids = result_log.keys()
     if resume:
-        checkpoint = load_scrape_checkpoint()
-        if checkpoint:
-            scraped_ids = set(checkpoint.get('scraped_poi_ids', []))
-            failed_ids = set(checkpoint.get('failed_poi_ids', []))
-            log(f'Resuming: {len(scraped_ids)} already scraped, {len(failed_ids)} failed')
-            # Load existing scraped data
-            if os.path.exists(SCRAPE_OUTPUT):
-                with open(SCRAPE_OUTPUT, 'r', encoding='utf-8') as f:
-                    scraped_data = json.load(f)
-                log(f'Loaded {len(scraped_data)} existing scrape results')
+        log(f'Resuming: {len(scraped_ids)} already scraped, '
+            f'{len(result_log.keys(ok=False))} failed ({SCRAPE_LOG})')
 
     # Filter out already-scraped POIs
     remaining = [t for t in targets if t['poi_id'] not in scraped_ids]
@@ -150,92 +215,243 @@ def scrape_all_websites(targets, batch_size=25, resume=False, dest_filter=None):
 
     if not remaining:
         log('All POIs already scraped. Nothing to do.')
+        scraped_data = list(result_log.replay())
+        result_log.close()
         return scraped_data
 
-    # Group by domain for efficient rate limiting
-    domain_groups = {}
-    for t in remaining:
-        url = t['website']
-        if not url.startswith('http'):
-            url = 'https://' + url
-        domain = urlparse(url).netloc
-        domain_groups.setdefault(domain, []).append(t)
-
-    log(f'Unique domains: {len(domain_groups)}')
+    # POIs sharing a website (chains, municipalities, marinas) are scraped once
+    url_groups = group_targets_by_url(remaining)
+    domains = {urlparse(_target_url(group[0])).netloc for group in url_groups}
+    log(f'Unique URLs: {len(url_groups)} ({len(remaining) - len(url_groups)} POIs coalesced), '
+        f'unique domains: {len(domains)}')
 
     # Stats
     stats = {
         'total': len(remaining),
+        'unique_urls': len(url_groups),
         'success': 0,
         'failed': 0,
         'skipped': 0,
         'total_content_chars': 0,
         'total_subpages': 0,
+        'subpage_requests': 0,
+        'discovery_requests': 0,
+        'discovery_sources': {},
+        'subpages_skipped_facts': 0,
+        'structured_facts': {},
         'start_time': time.time()
     }
 
-    # Process POIs sequentially with domain-aware rate limiting
+    if parse_workers:
+        enable_parse_pool(parse_workers)
+        log(f'Parse pool: {parse_workers} processes')
+    try:
+        if async_mode:
+            asyncio.run(_scrape_remaining_async(
+                url_groups, result_log, stats, batch_size,
+                concurrency or (POLITE_MAX_WORKERS if polite() else MAX_WORKERS)))
+        else:
+            _scrape_remaining_sequential(url_groups, result_log, stats, batch_size)
+    finally:
+        close_parse_pool()
+
+    # Final save
+    elapsed = time.time() - stats['start_time']
+    stats['elapsed_minutes'] = elapsed / 60
+    stats['connections'] = connection_stats()
+    stats['page_cache'] = cache_stats()
+    stats['charset_sources'] = charset_stats()
+    stats['downloads'] = download_stats()
+    stats['hosts'] = host_stats()
+    stats['latency'] = latency_stats()
+    stats['politeness'] = robots_stats()
+    stats['requests_avoided'] = _estimate_requests_avoided(stats)
+    stats['pipeline'] = pipeline_stats()
+    save_scrape_checkpoint(result_log, stats)
+    if export_json:
+        result_log.export_json(SCRAPE_OUTPUT)
+    scraped_data = list(result_log.replay())
+    result_log.close()
+
+    log(f'\nScraping complete:')
+    log(f'  Success: {stats["success"]}/{stats["total"]}')
+    log(f'  Failed: {stats["failed"]}/{stats["total"]}')
+    log(f'  Unique URLs scraped: {stats["unique_urls"]} for {stats["total"]} POIs')
+    log(f'  Total content: {stats["total_content_chars"]:,} chars')
+    log(f'  Total subpages: {stats["total_subpages"]} '
+        f'({stats["subpage_requests"]} subpage + {stats["discovery_requests"]} discovery requests)')
+    log(f'  Subpage discovery: {stats["discovery_sources"]}')
+    log(f'  Structured data: {stats["structured_facts"]}; subpages skipped for '
+        f'{stats["subpages_skipped_facts"]} URLs with complete facts '
+        f'(~{stats["requests_avoided"]} requests avoided)')
+    log(f'  Elapsed: {stats["elapsed_minutes"]:.1f} minutes')
+    log(f'  Connections: {format_connection_stats()}')
+    log(f'  Page cache: {format_cache_stats()}')
+    log(f'  Charset: {format_charset_stats()}')
+    log(f'  Downloads: {format_download_stats()}')
+    log(f'  Dead hosts: {format_host_stats()}')
+    log(f'  Latency: {format_latency_stats()}')
+    log(f'  Politeness: {format_robots_stats()}')
+    log(f'  Pipeline: {format_pipeline_stats()}')
+    log(f'  Repeated pages: {result_log.shared_chars:,} chars stored by reference')
+    log(f'  Output: {SCRAPE_LOG}' + (f' (exported to {SCRAPE_OUTPUT})' if export_json else ''))
+
+    return scraped_data
+
+
+def _target_url(target):
+    """Normalize a target's website to an absolute URL."""
+    url = target['website']
+    if not url.startswith('http'):
+        url = 'https://' + url
+    return url
+
+
+def _estimate_requests_avoided(stats):
+    """Requests a facts-complete URL would have cost: this run's mean per discovering URL."""
+    discovered = sum(stats['discovery_sources'].values())
+    if discovered:
+        per_url = (stats['subpage_requests'] + stats['discovery_requests']) / discovered
+    else:
+        per_url = 1 + SUBPAGE_TOP_N  # robots.txt + top-N subpages
+    return round(stats['subpages_skipped_facts'] * per_url)
+
+
+def group_targets_by_url(targets):
+    """Group targets by normalized website URL, in order of first appearance."""
+    groups = {}
+    for t in targets:
+        groups.setdefault(url_key(_target_url(t)), []).append(t)
+    return list(groups.values())
+
+
+def _record_scrape_result(group, result, result_log, stats):
+    """Append the scrape result of a URL to the result log; the other POIs in its group reference it."""
+    first = group[0]
+    offset = result_log.append(result, key=first['poi_id'], ok=result['scrape_success'])
+    for target in group[1:]:
+        # Same fetch and extraction: a reference to the first POI's record (content stored once)
+        result_log.append_ref(target['poi_id'], offset,
+                              {'poi_id': target['poi_id'], 'website': _target_url(target),
+                               'coalesced_from': first['poi_id']},
+                              ok=result['scrape_success'])
+
+    shared = f' (shared by {len(group)} POIs)' if len(group) > 1 else ''
+    if result['scrape_success']:
+        stats['success'] += len(group)
+        content_len = len(result.get('main_content', ''))
+        subpages_count = len(result.get('subpages', {}))
+        stats['total_content_chars'] += content_len * len(group)
+        stats['total_subpages'] += subpages_count * len(group)
+        discovery = result.get('subpage_discovery')
+        if discovery:
+            stats['subpage_requests'] += discovery['fetched']
+            stats['discovery_requests'] += discovery['requests']
+            sources = stats['discovery_sources']
+            sources[discovery['source']] = sources.get(discovery['source'], 0) + 1
+        if result.get('subpages_skipped') == 'facts_complete':
+            stats['subpages_skipped_facts'] += 1
+        for name in result.get('structured_facts', []):
+            stats['structured_facts'][name] = stats['structured_facts'].get(name, 0) + 1
+        log(f'    -> OK: {content_len} chars, {subpages_count} subpages{shared}')
+    else:
+        stats['failed'] += len(group)
+        log(f'    -> FAILED: {result.get("error", "unknown")}{shared}')
+
+
+def _log_checkpoint(result_log, stats):
+    """Log progress and write a checkpoint."""
+    elapsed = time.time() - stats['start_time']
+    rate = (stats['success'] + stats['failed']) / elapsed * 60 if elapsed > 0 else 0
+    log(f'  --- CHECKPOINT: {stats["success"]} OK, {stats["failed"]} failed, '
+        f'{rate:.0f} POIs/min, {elapsed/60:.1f} min elapsed ---')
+    save_scrape_checkpoint(result_log, stats)
+
+
+def _scrape_remaining_sequential(url_groups, result_log, stats, batch_size):
+    """Process URL groups sequentially with domain-aware rate limiting."""
+    fixed_sleeps = not polite()   # Else http_get paces per host
     last_domain = None
     batch_count = 0
 
-    for i, target in enumerate(remaining):
-        poi_id = target['poi_id']
-        url = target['website']
-        if not url.startswith('http'):
-            url = 'https://' + url
-
+    for i, group in enumerate(url_groups):
+        target = group[0]
+        url = _target_url(target)
         domain = urlparse(url).netloc
 
         # Domain-based delay
-        if last_domain and domain != last_domain:
+        if fixed_sleeps and last_domain and domain != last_domain:
             time.sleep(DOMAIN_DELAY)
         last_domain = domain
 
         dest_name = 'Texel' if target['destination_id'] == 2 else 'Calpe'
-        log(f'  [{i+1}/{len(remaining)}] [{dest_name}] {target["name"]} ({domain})')
-
-        result = scrape_single_poi(poi_id, url, target['name'])
-        scraped_data.append(result)
-        scraped_ids.add(poi_id)
-
-        if result['scrape_success']:
-            stats['success'] += 1
-            content_len = len(result.get('main_content', ''))
-            subpages_count = len(result.get('subpages', {}))
-            stats['total_content_chars'] += content_len
-            stats['total_subpages'] += subpages_count
-            log(f'    -> OK: {content_len} chars, {subpages_count} subpages')
-        else:
-            stats['failed'] += 1
-            failed_ids.add(poi_id)
-            log(f'    -> FAILED: {result.get("error", "unknown")}')
+        log(f'  [{i+1}/{len(url_groups)}] [{dest_name}] {target["name"]} ({domain})')
 
-        time.sleep(SCRAPE_DELAY)
+        result = scrape_single_poi(target['poi_id'], url, target['name'])
+        _record_scrape_result(group, result, result_log, stats)
+
+        if fixed_sleeps:
+            time.sleep(SCRAPE_DELAY)
 
         # Checkpoint every batch_size POIs
         batch_count += 1
         if batch_count >= batch_size:
             batch_count = 0
-            elapsed = time.time() - stats['start_time']
-            rate = (stats['success'] + stats['failed']) / elapsed * 60 if elapsed > 0 else 0
-            log(f'  --- CHECKPOINT: {stats["success"]} OK, {stats["failed"]} failed, '
-                f'{rate:.0f} POIs/min, {elapsed/60:.1f} min elapsed ---')
-            save_scrape_checkpoint(scraped_data, failed_ids, stats)
-
-    # Final save
-    elapsed = time.time() - stats['start_time']
-    stats['elapsed_minutes'] = elapsed / 60
-    save_scrape_checkpoint(scraped_data, failed_ids, stats)
+            _log_checkpoint(result_log, stats)
+
+
+async def _scrape_remaining_async(url_groups, result_log, stats, batch_size, concurrency):
+    """Process URL groups concurrently: global cap plus per-domain politeness.
+
+    At most `concurrency` URLs are in flight overall and at most
+    PER_DOMAIN_CONCURRENCY per domain, with DOMAIN_DELAY between two scrapes
+    of the same domain (with robots.txt politeness on, http_get spaces the
+    requests by the host's Crawl-delay instead). Domains only wait on
+    themselves, so a crawl where almost every domain is hit once runs at
+    full concurrency. Results are streamed into the existing checkpoint
+    format as they complete; result log appends and checkpoint fsyncs run on
+    a single writer thread (in completion order), never on the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    global_sem = asyncio.Semaphore(concurrency)
+    domain_sems = {}
+    domain_last = {}
+    domain_delay = 0 if polite() else DOMAIN_DELAY
+    log(f'Async scrape: concurrency={concurrency}, '
+        f'per-domain={PER_DOMAIN_CONCURRENCY}, domain delay='
+        + (f'{domain_delay}s' if domain_delay else 'per host (robots.txt Crawl-delay)'))
+
+    async def scrape_target(i, group):
+        target = group[0]
+        url = _target_url(target)
+        domain = urlparse(url).netloc
+        domain_sem = domain_sems.setdefault(domain, asyncio.Semaphore(PER_DOMAIN_CONCURRENCY))
+
+        # Take the domain slot first so politeness waits never hold a global slot
+        async with domain_sem:
+            wait = domain_last.get(domain, 0) + domain_delay - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            async with global_sem:
+                dest_name = 'Texel' if target['destination_id'] == 2 else 'Calpe'
+                log(f'  [{i+1}/{len(url_groups)}] [{dest_name}] {target["name"]} ({domain})')
+                result = await loop.run_in_executor(
+                    executor, scrape_single_poi, target['poi_id'], url, target['name'])
+            domain_last[domain] = time.monotonic()
+        return group, result
 
-    log(f'\nScraping complete:')
-    log(f'  Success: {stats["success"]}/{stats["total"]}')
-    log(f'  Failed: {stats["failed"]}/{stats["total"]}')
-    log(f'  Total content: {stats["total_content_chars"]:,} chars')
-    log(f'  Total subpages: {stats["total_subpages"]}')
-    log(f'  Elapsed: {stats["elapsed_minutes"]:.1f} minutes')
-    log(f'  Output: {SCRAPE_OUTPUT}')
+    batch_count = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor, \
+            ThreadPoolExecutor(max_workers=1) as writer:
+        tasks = [asyncio.ensure_future(scrape_target(i, g)) for i, g in enumerate(url_groups)]
+        for fut in asyncio.as_completed(tasks):
+            group, result = await fut
+            await loop.run_in_executor(writer, _record_scrape_result, group, result, result_log, stats)
 
-    return scraped_data
+            batch_count += 1
+            if batch_count >= batch_size:
+                batch_count = 0
+                await loop.run_in_executor(writer, _log_checkpoint, result_log, stats)
 
 
 def scrape_single_poi(poi_id, url, poi_name):
@@ -249,12 +465,15 @@ def scrape_single_poi(poi_id, url, poi_name):
         'meta_description': '',
         'main_content': '',
         'subpages': {},
+        'charsets': {},
         'extracted_facts': {
             'opening_hours': None,
             'prices_found': [],
             'address': None,
             'phone': None,
             'email': None,
+            'price_range': None,
+            'geo': None,
             'key_features': [],
             'social_media': []
         },
@@ -270,81 +489,49 @@ def scrape_single_poi(poi_id, url, poi_name):
 
     for attempt in range(SCRAPE_MAX_RETRIES):
         try:
-            resp = requests.get(url, headers=headers, timeout=SCRAPE_TIMEOUT,
-                              allow_redirects=True, verify=True)
+            resp = http_get(url, page_type='main', headers=headers, timeout=SCRAPE_TIMEOUT,
+                          allow_redirects=True, verify=True)
             resp.raise_for_status()
 
-            soup = BeautifulSoup(resp.text, 'html.parser')
-
-            # Detect language
-            html_tag = soup.find('html')
-            if html_tag and html_tag.get('lang'):
-                result['content_language'] = html_tag['lang'][:2]
-
-            # Extract title
-            title_tag = soup.find('title')
-            result['page_title'] = title_tag.get_text(strip=True) if title_tag else ''
-
-            # Extract meta description
-            meta = soup.find('meta', attrs={'name': 'description'})
-            if meta:
-                result['meta_description'] = meta.get('content', '')
-
-            # Remove non-content tags
-            for tag in soup.find_all(['script', 'style', 'nav', 'footer',
-                                      'header', 'noscript', 'iframe', 'svg']):
-                tag.decompose()
-
-            # Extract main content
-            main_content = soup.get_text(separator='\n', strip=True)
-            main_content = re.sub(r'\n{3,}', '\n\n', main_content)
-            # Limit to 5000 words
-            words = main_content.split()
-            if len(words) > 5000:
-                main_content = ' '.join(words[:5000])
-            result['main_content'] = main_content
-
-            # Extract structured data
-            extract_facts_enhanced(soup, result, main_content)
-
+            page = parse_response(resp, max_words=MAIN_MAX_WORDS)
+            main_content = _apply_main_page(result, page)
+            result['charsets']['main'] = page_charset(resp)
             result['scrape_success'] = True
 
-            # Try subpages (skip if main content is already extensive)
+            # Discover and fetch subpages (skip if main content is already extensive,
+            # or the main page's structured data already gives hours/address/phone;
+            # facts from text patterns alone do not skip them)
             main_word_count = len(main_content.split())
-            if main_word_count < SKIP_SUBPAGES_THRESHOLD:
-                base_url = f'{urlparse(url).scheme}://{urlparse(url).netloc}'
+            if main_word_count < SKIP_SUBPAGES_THRESHOLD and facts_complete(
+                    result['extracted_facts'], result.get('structured_facts', ())):
+                result['subpages_skipped'] = 'facts_complete'
+            elif main_word_count < SKIP_SUBPAGES_THRESHOLD:
+                candidates, discovery = discover_subpages(
+                    resp.url, page['links'], headers, fallback_paths=SUBPAGES,
+                    top_n=SUBPAGE_TOP_N, user_agent=USER_AGENT, timeout=SUBPAGE_TIMEOUT)
+                discovery['fetched'] = len(candidates)
+                result['subpage_discovery'] = discovery
                 subpage_successes = 0
-                for subpage in SUBPAGES:
+                for cand, sub_resp in fetch_subpages(candidates, headers, SUBPAGE_TIMEOUT):
                     if subpage_successes >= MAX_SUBPAGES_SUCCESS:
                         break  # Got enough subpages
                     try:
-                        sub_url = urljoin(base_url, subpage)
-                        sub_resp = requests.get(sub_url, headers=headers,
-                                              timeout=SUBPAGE_TIMEOUT,
-                                              allow_redirects=True)
-                        if sub_resp.status_code == 200 and sub_resp.url != resp.url:
-                            sub_soup = BeautifulSoup(sub_resp.text, 'html.parser')
-                            for tag in sub_soup.find_all(['script', 'style', 'nav',
-                                                          'footer', 'header', 'noscript',
-                                                          'iframe', 'svg']):
-                                tag.decompose()
-                            sub_text = sub_soup.get_text(separator='\n', strip=True)
-                            sub_text = re.sub(r'\n{3,}', '\n\n', sub_text)
-                            words_sub = sub_text.split()
-                            if len(words_sub) > 2000:
-                                sub_text = ' '.join(words_sub[:2000])
+                        if sub_resp is not None and sub_resp.status_code == 200 \
+                                and sub_resp.url != resp.url:
+                            sub_page = parse_response(sub_resp, max_words=SUBPAGE_MAX_WORDS)
+                            sub_text = sub_page['text']
                             if len(sub_text) > 100 and sub_text[:200] != main_content[:200]:
-                                result['subpages'][subpage] = sub_text
-                                extract_facts_enhanced(sub_soup, result, sub_text)
+                                result['subpages'][cand['path']] = sub_text
+                                result['charsets'][cand['path']] = page_charset(sub_resp)
+                                extract_facts_enhanced(sub_page, result, sub_text)
                                 subpage_successes += 1
-                        time.sleep(0.2)
                     except Exception:
                         pass
 
             break  # Success, exit retry loop
 
-        except requests.exceptions.Timeout:
-            result['error'] = f'Timeout after {SCRAPE_TIMEOUT}s (attempt {attempt+1})'
+        except requests.exceptions.Timeout as e:
+            result['error'] = f'Timeout after {timeout_seconds(e, SCRAPE_TIMEOUT):g}s (attempt {attempt+1})'
             if attempt < SCRAPE_MAX_RETRIES - 1:
                 time.sleep(1)
         except requests.exceptions.HTTPError as e:
@@ -353,24 +540,22 @@ def scrape_single_poi(poi_id, url, poi_name):
                 break  # Don't retry permanent errors
             if attempt < SCRAPE_MAX_RETRIES - 1:
                 time.sleep(1)
+        except RejectedContent as e:
+            result['error'] = f'Not a web page: {str(e)[:100]}'
+            break  # A PDF/image homepage will not turn into HTML on retry
+        except HostUnavailable as e:
+            result['error'] = f'Skipped: {str(e)[:100]}'
+            break  # Known dead (registry / circuit breaker)
+        except RobotsBlocked as e:
+            result['error'] = f'Skipped: {str(e)[:100]}'
+            break  # Disallowed by robots.txt, or Crawl-delay beyond MAX_WAIT
         except requests.exceptions.SSLError:
             # Retry without SSL verification
             try:
-                resp = requests.get(url, headers=headers, timeout=SCRAPE_TIMEOUT,
-                                  allow_redirects=True, verify=False)
-                soup = BeautifulSoup(resp.text, 'html.parser')
-                title_tag = soup.find('title')
-                result['page_title'] = title_tag.get_text(strip=True) if title_tag else ''
-                for tag in soup.find_all(['script', 'style', 'nav', 'footer',
-                                          'header', 'noscript', 'iframe', 'svg']):
-                    tag.decompose()
-                main_content = soup.get_text(separator='\n', strip=True)
-                main_content = re.sub(r'\n{3,}', '\n\n', main_content)
-                words = main_content.split()
-                if len(words) > 5000:
-                    main_content = ' '.join(words[:5000])
-                result['main_content'] = main_content
-                extract_facts_enhanced(soup, result, main_content)
+                resp = http_get(url, page_type='main', headers=headers, timeout=SCRAPE_TIMEOUT,
+                              allow_redirects=True, verify=False)
+                _apply_main_page(result, parse_response(resp, max_words=MAIN_MAX_WORDS))
+                result['charsets']['main'] = page_charset(resp)
                 result['scrape_success'] = True
                 result['error'] = 'SSL error (bypassed verification)'
             except Exception as e2:
@@ -388,340 +573,408 @@ def scrape_single_poi(poi_id, url, poi_name):
     return result
 
 
-def extract_facts_enhanced(soup, result, text):
-    """Extract structured facts from scraped content. Enhanced version of R1."""
-    text_lower = text.lower()
+def _apply_main_page(result, page):
+    """Fill title/meta/language/main content from an extracted main page."""
+    if page['language']:
+        result['content_language'] = page['language']
+    result['page_title'] = page['title']
+    result['meta_description'] = page['meta_description']
+
+    # Already capped at MAIN_MAX_WORDS by extract_page
+    main_content = page['text']
+    result['main_content'] = main_content
+
+    extract_facts_enhanced(page, result, main_content)
+    return main_content
+
+
+def extract_facts_enhanced(page, result, text):
+    """Extract structured facts from scraped content. Enhanced version of R1.
+
+    `page` is the scrape_extract.extract_page() output for the same document.
+    Schema.org JSON-LD / OpenGraph facts come first; text patterns fill the gaps.
+    """
     facts = result['extracted_facts']
 
-    # Opening hours patterns (Dutch + English + Spanish)
+    # Structured data first (see scrape_structured): whole graphs, not just the first node
+    sd = structured_facts(page['json_ld'], page['opengraph'])
+    for name in ('opening_hours', 'address', 'phone', 'email', 'price_range', 'geo'):
+        if sd.get(name) and not facts.get(name):
+            facts[name] = sd[name]
+            result.setdefault('structured_facts', []).append(name)
+
+    # One pass over the text for all fact patterns (see scrape_facts.FACT_PATTERNS);
+    # already done by the parser stage when text is the page text
+    if 'fact_matches' in page and text is page['text']:
+        found = group_fact_matches(page['fact_matches'])
+    else:
+        found = group_fact_matches(scan_facts(text))
+
+    # Opening hours (Dutch + English + Spanish): first pattern that matches wins
     if not facts.get('opening_hours'):
-        hours_patterns = [
-            r'(?:maandag|dinsdag|woensdag|donderdag|vrijdag|zaterdag|zondag|ma|di|wo|do|vr|za|zo)[\s\-:]+\d{1,2}[:.]\d{2}\s*[-–]\s*\d{1,2}[:.]\d{2}',
-            r'(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday|mon|tue|wed|thu|fri|sat|sun)[\s\-:]+\d{1,2}[:.]\d{2}\s*[-–]\s*\d{1,2}[:.]\d{2}',
-            r'(?:lunes|martes|miércoles|jueves|viernes|sábado|domingo)[\s\-:]+\d{1,2}[:.]\d{2}\s*[-–]\s*\d{1,2}[:.]\d{2}',
-            r'open(?:ingstijden|ing hours|ed)[:\s]+([^\n]+)',
-            r'geopend[:\s]+([^\n]+)',
-            r'horario[:\s]+([^\n]+)',
-        ]
-        for pattern in hours_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                facts['opening_hours'] = '; '.join(matches[:7])
-                break
+        hours = first_pattern_hits(found, 'opening_hours')
+        if hours:
+            facts['opening_hours'] = '; '.join(m['value'] for m in hours[:7])
 
     # Prices (EUR/€)
-    price_patterns = re.findall(r'[€]\s*\d+[.,]?\d*|\d+[.,]\d{2}\s*(?:euro|EUR|€)', text)
-    if price_patterns:
+    prices = [m['value'] for m in first_pattern_hits(found, 'price')]
+    if prices:
         existing = set(facts.get('prices_found', []))
-        existing.update(price_patterns[:15])
+        existing.update(prices[:15])
         facts['prices_found'] = list(existing)[:20]
 
     # Address (enhanced)
     if not facts.get('address'):
-        addr_patterns = [
-            r'(?:adres|address|dirección|ubicación)[:\s]+([^\n]{10,80})',
-            r'(\d{4}\s*[A-Z]{2}\s+\w[\w\s,]{5,50})',  # Dutch postal code + city
-            r'(\d{5}\s+(?:Calpe|Calp|Alicante|Benissa)[\w\s,]*)',  # Spanish postal code
-            r'((?:Calle|Carrer|Avenida|Avda|Paseo|Pl\.?)\s+[^\n]{5,60})',  # Spanish street
-        ]
-        for pattern in addr_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                facts['address'] = match.group(0).strip()[:120]
-                break
+        addresses = first_pattern_hits(found, 'address')
+        if addresses:
+            facts['address'] = text[addresses[0]['start']:addresses[0]['end']].strip()[:120]
 
     # Phone numbers
     if not facts.get('phone'):
-        phone_patterns = [
-            r'(?:tel|telefoon|phone|llamar)[.:\s]+([+\d\s\-()]{8,20})',
-            r'(\+31\s*\d[\d\s\-]{7,15})',  # Dutch
-            r'(\+34\s*\d[\d\s\-]{7,15})',  # Spanish
-            r'(0\d{2,3}[\s\-]?\d{3,4}[\s\-]?\d{2,4})',  # Dutch local
-            r'(9\d{2}[\s\-]?\d{2}[\s\-]?\d{2}[\s\-]?\d{2})',  # Spanish local
-        ]
-        for pattern in phone_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                phone = match.group(1) if match.lastindex else match.group(0)
-                phone = phone.strip()
-                if len(phone) >= 8:
-                    facts['phone'] = phone
-                    break
+        for _, phones in found.get('phone', []):
+            phone = phones[0]['value'].strip()
+            if len(phone) >= 8:
+                facts['phone'] = phone
+                break
 
     # Email
     if not facts.get('email'):
-        email_match = re.search(r'[\w.+-]+@[\w-]+\.[\w.-]+', text)
-        if email_match:
-            facts['email'] = email_match.group(0)
+        emails = first_pattern_hits(found, 'email')
+        if emails:
+            facts['email'] = emails[0]['value']
 
     # Key features (from list items)
     features = facts.get('key_features', [])
     existing_features = set(f.lower() for f in features)
-    for li in soup.find_all('li'):
-        li_text = li.get_text(strip=True)
+    for li_text in page['list_items']:
         if 10 < len(li_text) < 200 and li_text.lower() not in existing_features:
             features.append(li_text)
             existing_features.add(li_text.lower())
     facts['key_features'] = features[:25]
 
     # Social media links
-    social_patterns = {
-        'facebook': r'facebook\.com/[\w.]+',
-        'instagram': r'instagram\.com/[\w.]+',
-        'twitter': r'(?:twitter|x)\.com/[\w]+',
-        'tripadvisor': r'tripadvisor\.[\w]+/[\w/\-]+',
-    }
     existing_social = set(s.get('platform', '') for s in facts.get('social_media', []))
-    for platform, pattern in social_patterns.items():
+    for platform, links in found.get('social', []):
         if platform not in existing_social:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                facts['social_media'].append({
-                    'platform': platform,
-                    'url': match.group(0)
-                })
-
-    # JSON-LD structured data (schema.org)
-    for script_tag in soup.find_all('script', type='application/ld+json'):
-        try:
-            ld_data = json.loads(script_tag.string)
-            if isinstance(ld_data, list):
-                ld_data = ld_data[0] if ld_data else {}
-            # Extract opening hours from schema.org
-            if not facts.get('opening_hours') and 'openingHours' in ld_data:
-                facts['opening_hours'] = str(ld_data['openingHours'])
-            if not facts.get('address') and 'address' in ld_data:
-                addr = ld_data['address']
-                if isinstance(addr, dict):
-                    parts = [addr.get('streetAddress', ''), addr.get('postalCode', ''),
-                             addr.get('addressLocality', '')]
-                    facts['address'] = ', '.join(p for p in parts if p)
-                elif isinstance(addr, str):
-                    facts['address'] = addr
-            if not facts.get('phone') and 'telephone' in ld_data:
-                facts['phone'] = ld_data['telephone']
-        except (json.JSONDecodeError, TypeError, AttributeError):
-            pass
+            facts['social_media'].append({
+                'platform': platform,
+                'url': links[0]['value']
+            })
 
 
 # ============================================================
 # PHASE 2: FACT SHEET GENERATION
 # ============================================================
-def generate_fact_sheets(scraped_data, dest_filter=None):
-    """Build structured fact sheets combining scraped data + DB data for ALL POIs."""
-    log('=' * 70)
-    log('PHASE 2: FACT SHEET GENERATION')
-    log('=' * 70)
-
-    # Build scraped data lookup
-    scraped_lookup = {}
-    for sd in scraped_data:
-        scraped_lookup[sd['poi_id']] = sd
-
-    log(f'Scraped data available for {len(scraped_lookup)} POIs')
+# Scraped extracted_facts key -> fact sheet verified_facts key
+WEBSITE_FACTS = (('opening_hours', 'opening_hours'), ('prices_found', 'prices'),
+                 ('address', 'address'), ('phone', 'phone'), ('email', 'email'),
+                 ('price_range', 'price_range'), ('geo', 'geo'),
+                 ('key_features', 'features'), ('social_media', 'social_media'))
+ROW_FETCH_CHUNK = 500       # POI ids per full-row query
 
-    # Query ALL POIs with content from DB
-    conn = mysql.connector.connect(**DB_CONFIG)
-    cursor = conn.cursor(dictionary=True)
 
+def _fact_sheet_where(dest_filter):
+    """WHERE clause + params of the POIs that get a fact sheet."""
     dest_clause = ''
     params = []
     if dest_filter:
         dest_id = 2 if dest_filter == 'texel' else 1
         dest_clause = 'AND destination_id = %s'
         params = [dest_id]
-
-    cursor.execute(f"""
-        SELECT id, name, category, subcategory, rating, review_count,
-               website, description, enriched_highlights,
-               enriched_detail_description, city, address,
-               latitude, longitude, destination_id, google_placeid,
-               google_price_level
-        FROM POI
+    return f"""
         WHERE is_active = 1
           AND enriched_detail_description IS NOT NULL
           AND enriched_detail_description != ''
           {dest_clause}
+    """, params
+
+
+def fetch_poi_row_hashes(conn, dest_filter=None):
+    """[(poi_id, row_hash)] of all fact-sheet POIs, in fact-sheet order (no text columns)."""
+    where, params = _fact_sheet_where(dest_filter)
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT id, {ROW_HASH_SQL}
+        FROM POI
+        {where}
         ORDER BY destination_id, rating DESC, review_count DESC
     """, params)
-
-    all_pois = cursor.fetchall()
+    rows = [(poi_id, row_hash.decode() if isinstance(row_hash, (bytes, bytearray)) else row_hash)
+            for poi_id, row_hash in cursor.fetchall()]
     cursor.close()
-    conn.close()
+    return rows
+
+
+def fetch_poi_rows(conn, poi_ids):
+    """Pages of (chunk ids, {poi_id: full POI row}) for poi_ids, ROW_FETCH_CHUNK ids each.
+
+    A generator: with db_stream.prefetched the next page is read while the
+    current one is built, and only those pages are in memory.
+    """
+    poi_ids = list(poi_ids)
+    for i in range(0, len(poi_ids), ROW_FETCH_CHUNK):
+        chunk = poi_ids[i:i + ROW_FETCH_CHUNK]
+        rows = {}
+        for poi in fetch_unbuffered(conn, f"""
+            SELECT {', '.join(POI_COLUMNS)}
+            FROM POI
+            WHERE id IN ({', '.join(['%s'] * len(chunk))})
+        """, chunk):
+            poi_id = poi['id']
+            # Normalize Decimal/bytes types
+            for k, v in poi.items():
+                if hasattr(v, 'as_integer_ratio'):
+                    poi[k] = float(v)
+                elif isinstance(v, bytes):
+                    poi[k] = v.decode('utf-8', errors='replace')
+            rows[poi_id] = poi
+        yield set(chunk), rows
+
+
+def website_section(poi_id, scraped, block_store):
+    """Website part of a POI's fact sheet (after cross-POI dedupe), or None without a scrape."""
+    if not scraped.get('scrape_success', False):
+        return None
+    # Without domain boilerplate; every block once per POI
+    seen_blocks = set()
+    section = {
+        'website_content': block_store.clean_text(poi_id, MAIN_PAGE, seen_blocks),
+        'website_subpages': {},
+        'shared_page_poi_ids': sorted({
+            other_poi for other_poi, _ in block_store.near_duplicates(poi_id, MAIN_PAGE)
+            if other_poi != poi_id}),
+        'page_title': scraped.get('page_title', ''),
+        'meta_description': scraped.get('meta_description', ''),
+        'content_language': scraped.get('content_language'),
+    }
+    for page in scraped.get('subpages', {}):
+        if any(other == (poi_id, MAIN_PAGE)
+               for other in block_store.near_duplicates(poi_id, page)):
+            continue  # Subpage is the homepage again
+        cleaned = block_store.clean_text(poi_id, page, seen_blocks)
+        if cleaned:
+            section['website_subpages'][page] = cleaned
+
+    # Extracted facts that make it into verified_facts
+    ext_facts = scraped.get('extracted_facts', {})
+    section['facts'] = {key: ext_facts[src] for src, key in WEBSITE_FACTS if ext_facts.get(src)}
+    return section
+
+
+def generate_fact_sheets(scraped_data, dest_filter=None, rebuild_all=False, export_json=False):
+    """Build structured fact sheets combining scraped data + DB data for ALL POIs.
+
+    Incremental: each sheet is fingerprinted from its POI row, its website
+    content and its R6b source layers (see factsheet_manifest). Sheets whose
+    fingerprint did not change since the last build stay in FACT_SHEET_STORE
+    untouched; only the rows of the other POIs are fetched and rewritten.
+    Returns the destination's sheets as lazy FactSheets (large fields on access).
+    """
+    log('=' * 70)
+    log('PHASE 2: FACT SHEET GENERATION')
+    log('=' * 70)
 
-    log(f'Total POIs with content from DB: {len(all_pois)}')
-
-    # Build fact sheets
-    fact_sheets = []
-    quality_counts = {'rich': 0, 'moderate': 0, 'minimal': 0, 'none': 0}
-
-    for poi in all_pois:
-        poi_id = poi['id']
-        # Normalize Decimal/bytes types
-        for k, v in poi.items():
-            if hasattr(v, 'as_integer_ratio'):
-                poi[k] = float(v)
-            elif isinstance(v, bytes):
-                poi[k] = v.decode('utf-8', errors='replace')
-
-        scraped = scraped_lookup.get(poi_id, {})
-        has_scrape = scraped.get('scrape_success', False)
-
-        # Build the fact sheet
-        fs = {
-            'poi_id': poi_id,
-            'name': poi['name'],
-            'category': poi['category'],
-            'subcategory': poi.get('subcategory'),
-            'destination_id': poi['destination_id'],
-            'destination': 'Texel' if poi['destination_id'] == 2 else 'Calpe',
-            'rating': poi.get('rating'),
-            'review_count': poi.get('review_count', 0),
-            'google_placeid': poi.get('google_placeid'),
-            'google_price_level': poi.get('google_price_level'),
-            'city': poi.get('city'),
-            'website': poi.get('website'),
-            'current_content': poi.get('enriched_detail_description', ''),
-
-            # Source data quality
-            'data_sources': [],
-            'data_quality': 'none',
-
-            # Combined fact sheet content
-            'website_content': '',
-            'website_subpages': {},
-            'verified_facts': {
-                'opening_hours': None,
-                'prices': [],
-                'address': poi.get('address'),
-                'phone': None,
-                'email': None,
-                'features': [],
-                'social_media': []
-            },
-            'google_description': poi.get('description', ''),
-            'highlights': poi.get('enriched_highlights', ''),
-
-            # For LLM prompt in R4
-            'source_text_for_llm': ''
-        }
-
-        # Add scraped website data
-        if has_scrape:
-            fs['data_sources'].append('website_scrape')
-            fs['website_content'] = scraped.get('main_content', '')
-            fs['website_subpages'] = scraped.get('subpages', {})
-            fs['page_title'] = scraped.get('page_title', '')
-            fs['meta_description'] = scraped.get('meta_description', '')
-            fs['content_language'] = scraped.get('content_language')
-
-            # Merge extracted facts
-            ext_facts = scraped.get('extracted_facts', {})
-            if ext_facts.get('opening_hours'):
-                fs['verified_facts']['opening_hours'] = ext_facts['opening_hours']
-            if ext_facts.get('prices_found'):
-                fs['verified_facts']['prices'] = ext_facts['prices_found']
-            if ext_facts.get('address'):
-                fs['verified_facts']['address'] = ext_facts['address']
-            if ext_facts.get('phone'):
-                fs['verified_facts']['phone'] = ext_facts['phone']
-            if ext_facts.get('email'):
-                fs['verified_facts']['email'] = ext_facts['email']
-            if ext_facts.get('key_features'):
-                fs['verified_facts']['features'] = ext_facts['key_features']
-            if ext_facts.get('social_media'):
-                fs['verified_facts']['social_media'] = ext_facts['social_media']
-
-        # Add Google Places description
-        if poi.get('description') and poi['description'].strip():
-            fs['data_sources'].append('google_places')
-
-        # Add highlights
-        if poi.get('enriched_highlights') and poi['enriched_highlights'].strip():
-            fs['data_sources'].append('highlights')
-
-        # Determine data quality
-        website_words = len(fs['website_content'].split()) if fs['website_content'] else 0
-        subpage_words = sum(len(v.split()) for v in fs['website_subpages'].values())
-        google_words = len(fs['google_description'].split()) if fs['google_description'] else 0
-        highlight_words = len(fs['highlights'].split()) if fs['highlights'] else 0
-        total_source_words = website_words + subpage_words + google_words + highlight_words
-
-        if website_words >= 100 and len(fs['data_sources']) >= 2:
-            fs['data_quality'] = 'rich'
-            quality_counts['rich'] += 1
-        elif website_words >= 50 or (google_words >= 20 and highlight_words >= 10):
-            fs['data_quality'] = 'moderate'
-            quality_counts['moderate'] += 1
-        elif total_source_words >= 10:
-            fs['data_quality'] = 'minimal'
-            quality_counts['minimal'] += 1
-        else:
-            fs['data_quality'] = 'none'
-            quality_counts['none'] += 1
+    # Build scraped data lookup
+    scraped_lookup = {}
+    for sd in scraped_data:
+        scraped_lookup[sd['poi_id']] = sd
+
+    log(f'Scraped data available for {len(scraped_lookup)} POIs')
 
-        # Build the combined source text for LLM (R4 will use this)
-        source_parts = []
+    # Store each text block once; find boilerplate and near-duplicate pages
+    block_store = build_block_store(scraped_data)
+    if export_json:
+        block_store.save(PAGE_BLOCKS)
+    log(f'Page dedupe: {format_dedupe_stats(block_store.stats())}')
 
-        if fs['website_content']:
-            # Truncate to 3000 words for LLM context
-            wc = fs['website_content'].split()
-            if len(wc) > 3000:
-                source_parts.append('WEBSITE CONTENT:\n' + ' '.join(wc[:3000]) + '...[truncated]')
-            else:
-                source_parts.append('WEBSITE CONTENT:\n' + fs['website_content'])
-
-        if fs['website_subpages']:
-            subpage_text = []
-            for page, content in fs['website_subpages'].items():
-                wc = content.split()
-                if len(wc) > 1000:
-                    content = ' '.join(wc[:1000]) + '...[truncated]'
-                subpage_text.append(f'--- {page} ---\n{content}')
-            source_parts.append('SUBPAGES:\n' + '\n'.join(subpage_text))
-
-        if fs['google_description']:
-            source_parts.append(f'GOOGLE PLACES DESCRIPTION:\n{fs["google_description"]}')
-
-        if fs['highlights']:
-            source_parts.append(f'HIGHLIGHTS:\n{fs["highlights"]}')
-
-        # Add verified facts
-        vf_parts = []
-        vf = fs['verified_facts']
-        if vf.get('opening_hours'):
-            vf_parts.append(f'Opening hours: {vf["opening_hours"]}')
-        if vf.get('prices'):
-            vf_parts.append(f'Prices found: {", ".join(vf["prices"][:10])}')
-        if vf.get('address'):
-            vf_parts.append(f'Address: {vf["address"]}')
-        if vf.get('phone'):
-            vf_parts.append(f'Phone: {vf["phone"]}')
-        if vf.get('email'):
-            vf_parts.append(f'Email: {vf["email"]}')
-        if vf_parts:
-            source_parts.append('VERIFIED FACTS:\n' + '\n'.join(vf_parts))
-
-        fs['source_text_for_llm'] = '\n\n'.join(source_parts)
-        fs['source_word_count'] = total_source_words
-
-        fact_sheets.append(fs)
-
-    # Save fact sheets
-    with open(FACT_SHEETS, 'w', encoding='utf-8') as f:
-        json.dump(fact_sheets, f, indent=2, ensure_ascii=False)
+    store = open_fact_sheets(FACT_SHEET_STORE, FACT_SHEETS, cache_writes=True)
+    enhanced_hashes = store.layers_hashes(R6B_LAYERS)   # R6b source layers; part of the fingerprint
+    stored = set() if rebuild_all else set(store.poi_ids())
+    manifest = Manifest()
+
+    # Fingerprint ALL POIs with content; full rows only for the changed ones
+    conn = mysql.connector.connect(**DB_CONFIG)
+    row_hashes = fetch_poi_row_hashes(conn, dest_filter)
+    log(f'Total POIs with content from DB: {len(row_hashes)}')
+
+    plan = []   # (poi_id, website section, hashes, fingerprint, reuse)
+    for poi_id, row_hash in row_hashes:
+        site = website_section(poi_id, scraped_lookup.get(poi_id, {}), block_store)
+        hashes = {'row': row_hash, 'scrape': content_hash(site),
+                  'enhanced': enhanced_hashes.get(poi_id, '')}
+        fp = fingerprint(hashes['row'], hashes['scrape'], hashes['enhanced'])
+        reuse = poi_id in stored and manifest.fingerprint(poi_id) == fp
+        plan.append((poi_id, site, hashes, fp, reuse))
+
+    stale = [poi_id for poi_id, _, _, _, reuse in plan if not reuse]
+    log(f'Fingerprints: {len(plan) - len(stale)} unchanged, {len(stale)} to build')
+
+    # Build fact sheets (only the rebuilt ones are written; the rest keep their row).
+    # Rows of the stale POIs arrive a page at a time, in plan order.
+    pages = prefetched(fetch_poi_rows(conn, stale))
+    chunk, rows = set(), {}
+    built = set()
+    positions = []
+    build = {'sheets': 0, 'rebuilt': 0, 'facts_changed': 0, 'removed': 0, 'rows_fetched': 0}
+
+    for poi_id, site, hashes, fp, reuse in plan:
+        if not reuse and poi_id not in chunk:
+            chunk, rows = next(pages)
+            build['rows_fetched'] += len(rows)
+        if reuse:
+            positions.append((len(built), poi_id))
+        elif poi_id in rows:
+            fs, layers = build_fact_sheet(poi_id, rows[poi_id], site)
+            store.put(fs, len(built), layers)
+            build['rebuilt'] += 1
+            build['facts_changed'] += manifest.record(poi_id, fp, hashes,
+                                                      facts_hash(fs, hashes['enhanced']))
+        else:
+            continue  # Deactivated between the two queries
+        built.add(poi_id)
+    pages.close()
+    conn.close()
+    store.set_positions(positions)
+    build['sheets'] = len(built)
+    if not dest_filter:
+        build['removed'] = manifest.mark_removed(built)
+        store.delete([poi_id for poi_id in store.stored_poi_ids() if poi_id not in built])
+    store.commit()
+    manifest.finish_build(build)
+    manifest.close()
+
+    dest_id = None if not dest_filter else 2 if dest_filter == 'texel' else 1
+    fact_sheets = store.iter_sheets(destination_id=dest_id)
+    quality_counts = store.quality_counts(destination_id=dest_id)
+    if export_json:
+        store.export_json(FACT_SHEETS)
 
     log(f'\nFact sheets generated: {len(fact_sheets)}')
+    log(f'  Build: {format_build_stats(build)}')
     log(f'  Quality distribution:')
     log(f'    Rich (website + other): {quality_counts["rich"]}')
     log(f'    Moderate (some data): {quality_counts["moderate"]}')
     log(f'    Minimal (little data): {quality_counts["minimal"]}')
     log(f'    None (no source data): {quality_counts["none"]}')
-    log(f'  Output: {FACT_SHEETS}')
+    log(f'  Output: {FACT_SHEET_STORE}' + (f' (exported to {FACT_SHEETS})' if export_json else ''))
 
     return fact_sheets, quality_counts
 
 
+def build_fact_sheet(poi_id, poi, site):
+    """(fact sheet, R2 source layers) of one POI from its DB row and website section."""
+    fs = {
+        'poi_id': poi_id,
+        'name': poi['name'],
+        'category': poi['category'],
+        'subcategory': poi.get('subcategory'),
+        'destination_id': poi['destination_id'],
+        'destination': 'Texel' if poi['destination_id'] == 2 else 'Calpe',
+        'rating': poi.get('rating'),
+        'review_count': poi.get('review_count', 0),
+        'google_placeid': poi.get('google_placeid'),
+        'google_price_level': poi.get('google_price_level'),
+        'city': poi.get('city'),
+        'website': poi.get('website'),
+        'current_content': poi.get('enriched_detail_description', ''),
+
+        # Source data quality
+        'data_sources': [],
+        'data_quality': 'none',
+
+        # Combined fact sheet content
+        'website_content': '',
+        'website_subpages': {},
+        'shared_page_poi_ids': [],
+        'verified_facts': {
+            'opening_hours': None,
+            'prices': [],
+            'address': poi.get('address'),
+            'phone': None,
+            'email': None,
+            'features': [],
+            'social_media': []
+        },
+        'google_description': poi.get('description', ''),
+        'highlights': poi.get('enriched_highlights', ''),
+
+        # For LLM prompt in R4
+        'source_text_for_llm': ''
+    }
+
+    # Add scraped website data
+    if site is not None:
+        fs['data_sources'].append('website_scrape')
+        fs['website_content'] = site['website_content']
+        fs['website_subpages'] = dict(site['website_subpages'])
+        fs['shared_page_poi_ids'] = site['shared_page_poi_ids']
+        fs['page_title'] = site['page_title']
+        fs['meta_description'] = site['meta_description']
+        fs['content_language'] = site['content_language']
+        fs['verified_facts'].update(site['facts'])
+
+    # Add Google Places description
+    if poi.get('description') and poi['description'].strip():
+        fs['data_sources'].append('google_places')
+
+    # Add highlights
+    if poi.get('enriched_highlights') and poi['enriched_highlights'].strip():
+        fs['data_sources'].append('highlights')
+
+    # Determine data quality
+    website_words = len(fs['website_content'].split()) if fs['website_content'] else 0
+    subpage_words = sum(len(v.split()) for v in fs['website_subpages'].values())
+    google_words = len(fs['google_description'].split()) if fs['google_description'] else 0
+    highlight_words = len(fs['highlights'].split()) if fs['highlights'] else 0
+    total_source_words = website_words + subpage_words + google_words + highlight_words
+
+    if website_words >= 100 and len(fs['data_sources']) >= 2:
+        fs['data_quality'] = 'rich'
+    elif website_words >= 50 or (google_words >= 20 and highlight_words >= 10):
+        fs['data_quality'] = 'moderate'
+    elif total_source_words >= 10:
+        fs['data_quality'] = 'minimal'
+    else:
+        fs['data_quality'] = 'none'
+
+    # Source layers of the LLM text (R4 reads them combined, see factsheet_store)
+    layers = {}
+
+    if fs['website_content']:
+        # Most fact-dense passages within the LLM context budget (see source_packer)
+        layers['website'] = pack_text(fs['website_content'], WEBSITE_SOURCE_TOKENS, fs['category'])
+
+    if fs['website_subpages']:
+        subpage_text = []
+        for page, content in fs['website_subpages'].items():
+            content = pack_text(content, SUBPAGE_SOURCE_TOKENS, fs['category'])
+            subpage_text.append(f'--- {page} ---\n{content}')
+        layers['subpages'] = '\n'.join(subpage_text)
+
+    layers['google'] = fs['google_description']
+    layers['highlights'] = fs['highlights']
+
+    # Add verified facts
+    vf_parts = []
+    vf = fs['verified_facts']
+    if vf.get('opening_hours'):
+        vf_parts.append(f'Opening hours: {vf["opening_hours"]}')
+    if vf.get('prices'):
+        vf_parts.append(f'Prices found: {", ".join(vf["prices"][:10])}')
+    if vf.get('address'):
+        vf_parts.append(f'Address: {vf["address"]}')
+    if vf.get('phone'):
+        vf_parts.append(f'Phone: {vf["phone"]}')
+    if vf.get('email'):
+        vf_parts.append(f'Email: {vf["email"]}')
+    layers['verified_facts'] = '\n'.join(vf_parts)
+
+    fs['source_text_for_llm'] = render_source_text(layers)
+    fs['source_word_count'] = total_source_words
+
+    return fs, layers
+
+
 # ============================================================
 # PHASE 3: COVERAGE REPORT
 # ============================================================
@@ -954,6 +1207,29 @@ def main():
                        help='Resume scraping from last checkpoint')
     parser.add_argument('--dest', choices=['texel', 'calpe'],
                        help='Only process one destination')
+    parser.add_argument('--async-scrape', action='store_true',
+                       help='Scrape concurrently with per-domain politeness')
+    parser.add_argument('--concurrency', type=int, default=None,
+                       help=f'Global concurrency cap for --async-scrape (default '
+                            f'{POLITE_MAX_WORKERS}, or {MAX_WORKERS} with --ignore-robots)')
+    parser.add_argument('--parse-workers', type=int, default=None,
+                       help=f'Parser processes (default {PARSE_WORKERS} with --async-scrape, '
+                            f'else 0 = parse in the fetcher thread)')
+    parser.add_argument('--no-page-cache', action='store_true',
+                       help='Do not reuse/revalidate cached pages from earlier scrapes')
+    parser.add_argument('--no-host-registry', action='store_true',
+                       help='Also try hosts that earlier scrapes found dead')
+    parser.add_argument('--fixed-timeouts', action='store_true',
+                       help='Use SCRAPE_TIMEOUT/SUBPAGE_TIMEOUT for every host')
+    parser.add_argument('--ignore-robots', action='store_true',
+                       help='Do not read robots.txt; use fixed SCRAPE_DELAY/DOMAIN_DELAY sleeps')
+    parser.add_argument('--fsync', choices=FSYNC_POLICIES, default='batch',
+                       help='Result log fsync policy (default: batch = every checkpoint)')
+    parser.add_argument('--export-json', action='store_true',
+                       help=f'Also export scrape results and fact sheets as JSON arrays '
+                            f'({SCRAPE_OUTPUT}, {FACT_SHEETS}) and the page blocks ({PAGE_BLOCKS})')
+    parser.add_argument('--rebuild-all', action='store_true',
+                       help='Rebuild all fact sheets, not only those whose inputs changed')
     args = parser.parse_args()
 
     start_time = time.time()
@@ -973,37 +1249,47 @@ def main():
 
         # Phase 1: Scraping
         if args.phase is None or args.phase == 'scrape':
+            if not args.no_page_cache:
+                enable_page_cache()
+            if not args.no_host_registry:
+                enable_host_registry()
+            if not args.fixed_timeouts:
+                enable_adaptive_timeouts()
+            if not args.ignore_robots:
+                enable_robots()
             scraped_data = scrape_all_websites(
                 targets,
                 batch_size=args.batch_size,
                 resume=args.resume,
-                dest_filter=args.dest
+                dest_filter=args.dest,
+                async_mode=args.async_scrape,
+                concurrency=args.concurrency,
+                parse_workers=(args.parse_workers if args.parse_workers is not None
+                               else PARSE_WORKERS if args.async_scrape else 0),
+                fsync=args.fsync,
+                export_json=args.export_json
             )
         else:
             # Load existing scraped data
-            if os.path.exists(SCRAPE_OUTPUT):
-                with open(SCRAPE_OUTPUT, 'r', encoding='utf-8') as f:
-                    scraped_data = json.load(f)
-                log(f'Loaded {len(scraped_data)} scraped POIs from {SCRAPE_OUTPUT}')
+            scraped_data = load_scraped_data()
+            if scraped_data is not None:
+                log(f'Loaded {len(scraped_data)} scraped POIs')
             else:
-                log(f'WARNING: No scraped data found at {SCRAPE_OUTPUT}')
+                scraped_data = []
+                log(f'WARNING: No scraped data found at {SCRAPE_LOG} or {SCRAPE_OUTPUT}')
 
         # Phase 2: Fact sheets
         if args.phase is None or args.phase == 'factsheets':
             fact_sheets, quality_counts = generate_fact_sheets(
-                scraped_data, dest_filter=args.dest
+                scraped_data, dest_filter=args.dest, rebuild_all=args.rebuild_all,
+                export_json=args.export_json
             )
         else:
-            if os.path.exists(FACT_SHEETS):
-                with open(FACT_SHEETS, 'r', encoding='utf-8') as f:
-                    fact_sheets = json.load(f)
-                log(f'Loaded {len(fact_sheets)} fact sheets from {FACT_SHEETS}')
-                quality_counts = {
-                    'rich': sum(1 for fs in fact_sheets if fs['data_quality'] == 'rich'),
-                    'moderate': sum(1 for fs in fact_sheets if fs['data_quality'] == 'moderate'),
-                    'minimal': sum(1 for fs in fact_sheets if fs['data_quality'] == 'minimal'),
-                    'none': sum(1 for fs in fact_sheets if fs['data_quality'] == 'none'),
-                }
+            if os.path.exists(FACT_SHEET_STORE) or os.path.exists(FACT_SHEETS):
+                store = open_fact_sheets(FACT_SHEET_STORE, FACT_SHEETS)
+                fact_sheets = store.iter_sheets()
+                quality_counts = store.quality_counts()
+                log(f'Loaded {len(fact_sheets)} fact sheets from {FACT_SHEET_STORE}')
 
         # Phase 3: Report
         if args.phase is None or args.phase == 'report':
@@ -1021,8 +1307,14 @@ def main():
         log(f'FASE R2 COMPLETE in {elapsed/60:.1f} minutes')
         log(f'{"=" * 70}')
         log(f'Output files:')
-        log(f'  {SCRAPE_OUTPUT} — Scraped website data')
-        log(f'  {FACT_SHEETS} — Structured fact sheets')
+        log(f'  {SCRAPE_LOG} — Scraped website data (JSONL result log)')
+        if args.export_json:
+            log(f'  {SCRAPE_OUTPUT} — Scraped website data (JSON export)')
+        log(f'  {FACT_SHEET_STORE} — Structured fact sheets (indexed store)')
+        if args.export_json:
+            log(f'  {FACT_SHEETS} — Structured fact sheets (JSON export)')
+        if args.export_json:
+            log(f'  {PAGE_BLOCKS} — Unique page blocks (dedupe/boilerplate)')
         log(f'  {COVERAGE_REPORT} — Coverage report')
         log(f'  {SUMMARY_FILE} — Summary for Frank')
 
@@ -19,6 +19,7 @@ Key changes from Fase 4 prompts:
 6. ADDED: Category-specific guardrails
 7. ADDED: Second-pass verification prompt
 8. ADDED: 4 quality-tier strategies (rich/moderate/minimal/none)
+9. ADDED: Source data packed by fact density within a per-tier token budget (source_packer)
 
 Usage:
     from fase_r3_prompt_templates import build_generation_prompt, build_verification_prompt
@@ -33,6 +34,8 @@ Date: 13 februari 2026
 import json
 import re
 
+from source_packer import pack_source_text, estimate_tokens, SOURCE_TOKEN_BUDGETS
+
 # =============================================================================
 # CONSTANTS
 # =============================================================================
@@ -378,13 +381,9 @@ You have NO website content, NO scraped data, and NO detailed information about
 Write ONLY a generic description based on the POI name, category, and location above.
 Do NOT attempt to describe specific offerings, atmosphere, menu items, or experiences."""
 
-    # Truncate very long source text to avoid token waste
-    # Rich POIs can have 3000+ words of scraped content — keep the most relevant parts
-    if len(source_text) > 6000:
-        # Keep first 5500 chars (main content) + note about truncation
-        source_text = source_text[:5500] + "\n\n[Source data truncated for length — use the information above]"
-
-    return source_text
+    # Long source text: keep the most fact-dense passages within the quality tier's
+    # token budget (hours, prices, features) instead of the first 5500 chars
+    return pack_source_text(fact_sheet)
 
 
 def _get_quality_guidance(data_quality: str) -> str:
@@ -507,9 +506,9 @@ def build_verification_prompt(fact_sheet: dict, generated_text: str) -> tuple:
     review_count = fact_sheet.get('review_count', 0)
     highlights = fact_sheet.get('highlights', '')
 
-    # Truncate source text for verification (same as generation)
-    if len(source_text) > 6000:
-        source_text = source_text[:5500] + "\n\n[Source data truncated]"
+    # Same packed source text as the generation prompt
+    if source_text.strip():
+        source_text = pack_source_text(fact_sheet)
 
     rating_str = f"{float(rating):.1f}/5 ({int(review_count)} reviews)" if rating else "N/A"
 
@@ -557,9 +556,11 @@ def get_prompt_stats(fact_sheets: list) -> dict:
     total_source_chars = sum(len(fs.get('source_text_for_llm', '')) for fs in fact_sheets)
     avg_source_chars = total_source_chars / len(fact_sheets) if fact_sheets else 0
 
-    # System prompt ~800 tokens, user prompt overhead ~200 tokens, source data varies
+    # System prompt ~800 tokens, user prompt overhead ~200 tokens, source data up to its tier budget
     est_input_tokens = sum(
-        800 + 200 + min(len(fs.get('source_text_for_llm', '')), 6000) // 4
+        800 + 200 + min(estimate_tokens(fs.get('source_text_for_llm', '')),
+                        SOURCE_TOKEN_BUDGETS.get(fs.get('data_quality', 'none'),
+                                                 SOURCE_TOKEN_BUDGETS['minimal']))
         for fs in fact_sheets
     )
 
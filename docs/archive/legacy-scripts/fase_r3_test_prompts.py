@@ -30,12 +30,13 @@ from fase_r3_prompt_templates import (
     build_verification_prompt,
     WORD_TARGETS,
 )
+from factsheet_store import open_fact_sheets
 
 # =============================================================================
 # CONFIG
 # =============================================================================
 
-FACT_SHEETS_PATH = '/root/fase_r2_fact_sheets.json'
+FACT_SHEETS_PATH = '/root/fase_r2_fact_sheets.sqlite'   # factsheet_store
 RESULTS_PATH = '/root/fase_r3_test_results.json'
 REPORT_PATH = '/root/fase_r3_test_report.md'
 
@@ -374,12 +375,13 @@ def main():
 
     # Load fact sheets
     print(f"Loading fact sheets from {FACT_SHEETS_PATH}...")
-    with open(FACT_SHEETS_PATH, 'r', encoding='utf-8') as f:
-        fact_sheets = json.load(f)
+    store = open_fact_sheets(FACT_SHEETS_PATH)
+    fact_sheets = store.iter_sheets()   # Large fields are read for the samples only
     print(f"Loaded {len(fact_sheets)} fact sheets")
 
     # Run tests
     results = run_test(fact_sheets)
+    store.close()
 
     # Save results JSON
     print(f"\nSaving results to {RESULTS_PATH}...")
@@ -18,6 +18,7 @@ Phases:
 
 Usage:
     python3 -u fase_r4_regeneration.py [--phase 1|2|3|4|all] [--limit N] [--offset N]
+    python3 -u fase_r4_regeneration.py --changed-since 2026-03-01   # Only POIs with new facts
 
 Output:
     poi_content_staging table (MySQL)
@@ -47,12 +48,15 @@ from fase_r3_prompt_templates import (
     build_verification_prompt,
     WORD_TARGETS,
 )
+from factsheet_manifest import changed_poi_ids
+from factsheet_store import open_fact_sheets
+from source_packer import format_packer_stats
 
 # =============================================================================
 # CONFIG
 # =============================================================================
 
-FACT_SHEETS_PATH = '/root/fase_r2_fact_sheets.json'
+FACT_SHEETS_PATH = '/root/fase_r2_fact_sheets.sqlite'   # factsheet_store
 CHECKPOINT_PATH = '/root/fase_r4_checkpoint.json'
 RESULTS_PATH = '/root/fase_r4_results.json'
 TRIAGE_REPORT_PATH = '/root/fase_r4_triage_report.md'
@@ -486,6 +490,7 @@ def run_generation_and_verification(fact_sheets: list, old_content_map: dict,
         # Process this POI
         old_content = old_content_map.get(poi_id, '')
         result = process_single_poi(fs, old_content)
+        fs.unload()   # Large fields are read per POI; memory stays flat over the run
         results.append(result)
         completed_ids.add(poi_id)
 
@@ -766,6 +771,8 @@ def main():
     parser.add_argument('--resume', action='store_true', help='Resume from checkpoint')
     parser.add_argument('--clear-staging', action='store_true', help='Clear R4 staging entries before starting')
     parser.add_argument('--report-only', action='store_true', help='Generate reports from existing results')
+    parser.add_argument('--changed-since', default=None,
+                        help='Only POIs whose fact-sheet facts changed after this date (YYYY-MM-DD)')
     args = parser.parse_args()
 
     start_time = time.time()
@@ -789,9 +796,13 @@ def main():
 
     # Load fact sheets
     log(f"Loading fact sheets from {FACT_SHEETS_PATH}...")
-    with open(FACT_SHEETS_PATH, 'r', encoding='utf-8') as f:
-        fact_sheets = json.load(f)
-    log(f"Loaded {len(fact_sheets)} fact sheets")
+    store = open_fact_sheets(FACT_SHEETS_PATH)
+    if args.changed_since:
+        fact_sheets = store.get_many(changed_poi_ids(args.changed_since))
+        log(f"Facts changed since {args.changed_since}: {len(fact_sheets)} POIs")
+    else:
+        fact_sheets = store.iter_sheets()
+        log(f"Loaded {len(fact_sheets)} fact sheets")
 
     # Quality distribution
     quality_dist = Counter(fs.get('data_quality', 'none') for fs in fact_sheets)
@@ -825,6 +836,7 @@ def main():
         fact_sheets, old_content_map, checkpoint,
         limit=args.limit, offset=args.offset
     )
+    store.close()
 
     # Generate reports
     generate_reports(results)
@@ -833,6 +845,7 @@ def main():
     log("")
     log("=" * 70)
     log(f"FASE R4 COMPLETE — {elapsed:.0f}s elapsed ({elapsed/60:.0f} min)")
+    log(f"Source packing: {format_packer_stats()}")
     log(f"Results: {RESULTS_PATH}")
     log(f"Triage:  {TRIAGE_REPORT_PATH}")
     log(f"Summary: {SUMMARY_PATH}")
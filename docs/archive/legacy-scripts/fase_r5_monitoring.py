@@ -12,6 +12,7 @@ Usage:
 
 import argparse
 import json
+import os
 import random
 import sys
 import time
@@ -209,6 +210,7 @@ def quarterly_audit(conn, sample_size=50):
         return
 
     import requests
+    from factsheet_store import open_fact_sheets, FACTSHEET_STORE, LEGACY_JSON
 
     MISTRAL_API_KEY = 'pMPOgK7TmI7oe6rxPEXiCCPKDMk8pTUg'
     MISTRAL_URL = 'https://api.mistral.ai/v1/chat/completions'
@@ -236,21 +238,18 @@ def quarterly_audit(conn, sample_size=50):
 
     log(f"Selected {len(samples)} POIs for audit ({per_dest} per destination)")
 
-    # Load fact sheets for verification
-    try:
-        with open('/root/fase_r2_fact_sheets.json', 'r', encoding='utf-8') as f:
-            all_fact_sheets = json.load(f)
-        fact_sheet_map = {fs['poi_id']: fs for fs in all_fact_sheets}
-    except FileNotFoundError:
-        log("ERROR: /root/fase_r2_fact_sheets.json not found")
+    # Fact sheets for verification (read per sample from the indexed store)
+    if not os.path.exists(FACTSHEET_STORE) and not os.path.exists(LEGACY_JSON):
+        log(f"ERROR: {FACTSHEET_STORE} not found")
         return
+    store = open_fact_sheets()
 
     results = []
 
     for i, sample in enumerate(samples):
         poi_id = sample['poi_id']
         content = sample['current_content']
-        fact_sheet = fact_sheet_map.get(poi_id, {})
+        fact_sheet = store.get(poi_id) or {}
 
         if not content or not fact_sheet:
             log(f"  [{i+1}/{len(samples)}] Skipping POI {poi_id} (no content or fact sheet)")
@@ -307,6 +306,7 @@ def quarterly_audit(conn, sample_size=50):
         })
 
         time.sleep(0.5)
+    store.close()
 
     # Generate audit summary
     valid_results = [r for r in results if r['audit_hall_rate'] >= 0]
@@ -19,12 +19,14 @@ import sys
 import time
 import threading
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 
 import mysql.connector
 from mysql.connector import pooling
 import requests
 
+from db_stream import stream_rows
+
 DB_CONFIG = {
     'host': 'jotx.your-database.de',
     'user': 'pxoziy_1',
@@ -38,6 +40,7 @@ MISTRAL_API_KEY = 'pMPOgK7TmI7oe6rxPEXiCCPKDMk8pTUg'
 MISTRAL_URL = 'https://api.mistral.ai/v1/chat/completions'
 MISTRAL_MODEL = 'mistral-medium-latest'
 MAX_WORKERS = 10
+MAX_IN_FLIGHT = MAX_WORKERS * 4   # POIs submitted ahead of the workers (rows in memory)
 CHECKPOINT_FILE = '/root/fase_r6_translations_checkpoint.json'
 CHECKPOINT_INTERVAL = 100  # POIs between checkpoints
 
@@ -194,21 +197,26 @@ def save_checkpoint(checkpoint):
         json.dump(checkpoint, f)
 
 
-def fetch_targets(conn):
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("""
-        SELECT id, destination_id, name, enriched_detail_description
-        FROM POI
-        WHERE is_active = 1
+TARGET_WHERE = """is_active = 1
           AND enriched_detail_description IS NOT NULL
-          AND enriched_detail_description != ''
-        ORDER BY destination_id, id
-    """)
+          AND enriched_detail_description != ''"""
+
+
+def fetch_target_ids(conn):
+    """[(id, destination_id)] of all POIs with EN content (no text columns)."""
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT id, destination_id FROM POI WHERE {TARGET_WHERE} ORDER BY id")
     rows = cursor.fetchall()
     cursor.close()
     return rows
 
 
+def fetch_targets(conn):
+    """POIs with EN content, streamed in id order (keyset pages, see db_stream)."""
+    return stream_rows(conn, 'id, destination_id, name, enriched_detail_description',
+                       'POI', TARGET_WHERE)
+
+
 def main():
     parser = argparse.ArgumentParser(description='Fase R6 Stap C: Translations (parallel)')
     parser.add_argument('--dry-run', action='store_true', default=True)
@@ -225,11 +233,11 @@ def main():
     log(f"Workers: {MAX_WORKERS}")
 
     conn = get_connection()
-    targets = fetch_targets(conn)
+    targets = fetch_target_ids(conn)
     log(f"Totaal POIs met EN content: {len(targets)}")
 
-    calpe = [t for t in targets if t['destination_id'] == 1]
-    texel = [t for t in targets if t['destination_id'] == 2]
+    calpe = [t for t in targets if t[1] == 1]
+    texel = [t for t in targets if t[1] == 2]
     log(f"  Calpe: {len(calpe)}")
     log(f"  Texel: {len(texel)}")
     log(f"Verwachte API calls: {len(targets)} x 3 talen = {len(targets) * 3}")
@@ -248,12 +256,11 @@ def main():
             f"{len(checkpoint['processed'])} POIs")
 
     # Filter out already-completed POIs (all 3 langs done)
-    todo = []
-    for poi in targets:
-        pid = str(poi['id'])
-        done = set(checkpoint['processed'].get(pid, []))
+    todo = set()
+    for poi_id, _ in targets:
+        done = set(checkpoint['processed'].get(str(poi_id), []))
         if len(done) < 3:
-            todo.append(poi)
+            todo.add(poi_id)
 
     log(f"POIs to process: {len(todo)} (skipping {len(targets) - len(todo)} fully done)")
 
@@ -262,46 +269,56 @@ def main():
     db_cursor = db_write_conn.cursor()
     processed_count = 0
 
-    # Process in parallel using ThreadPoolExecutor
+    def finish(future, poi):
+        nonlocal processed_count
+        poi_id_str = str(poi['id'])
+
+        try:
+            results = future.result()
+
+            for r in results:
+                if r['success']:
+                    db_cursor.execute(f"""
+                        UPDATE POI SET {r['column']} = %s WHERE id = %s
+                    """, (r['translation'], r['poi_id']))
+
+                    if poi_id_str not in checkpoint['processed']:
+                        checkpoint['processed'][poi_id_str] = []
+                    checkpoint['processed'][poi_id_str].append(r['lang'])
+
+            processed_count += 1
+
+            # Commit + checkpoint periodically
+            if processed_count % CHECKPOINT_INTERVAL == 0:
+                db_write_conn.commit()
+                save_checkpoint(checkpoint)
+                elapsed = (time.time() - start_time) / 60
+                rate = stats['translations'] / elapsed if elapsed > 0 else 0
+                remaining = (len(todo) * 3 - stats['translations']) / rate if rate > 0 else 0
+                log(f"  Progress: {processed_count}/{len(todo)} POIs | "
+                    f"Translations: {stats['translations']} | "
+                    f"Failed: {stats['failed']} | "
+                    f"Rate: {rate:.0f}/min | ETA: {remaining:.0f} min")
+
+        except Exception as e:
+            log(f"  ERROR processing POI {poi['id']}: {e}")
+
+    # Process in parallel using ThreadPoolExecutor; rows are streamed from the DB
+    # and at most MAX_IN_FLIGHT POIs wait for a worker
     with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
         futures = {}
-        for poi in todo:
+        for poi in fetch_targets(conn):
+            if poi['id'] not in todo:
+                continue
             future = executor.submit(translate_poi, poi, checkpoint['processed'])
             futures[future] = poi
+            if len(futures) >= MAX_IN_FLIGHT:
+                completed, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    finish(future, futures.pop(future))
 
         for future in as_completed(futures):
-            poi = futures[future]
-            poi_id_str = str(poi['id'])
-
-            try:
-                results = future.result()
-
-                for r in results:
-                    if r['success']:
-                        db_cursor.execute(f"""
-                            UPDATE POI SET {r['column']} = %s WHERE id = %s
-                        """, (r['translation'], r['poi_id']))
-
-                        if poi_id_str not in checkpoint['processed']:
-                            checkpoint['processed'][poi_id_str] = []
-                        checkpoint['processed'][poi_id_str].append(r['lang'])
-
-                processed_count += 1
-
-                # Commit + checkpoint periodically
-                if processed_count % CHECKPOINT_INTERVAL == 0:
-                    db_write_conn.commit()
-                    save_checkpoint(checkpoint)
-                    elapsed = (time.time() - start_time) / 60
-                    rate = stats['translations'] / elapsed if elapsed > 0 else 0
-                    remaining = (len(todo) * 3 - stats['translations']) / rate if rate > 0 else 0
-                    log(f"  Progress: {processed_count}/{len(todo)} POIs | "
-                        f"Translations: {stats['translations']} | "
-                        f"Failed: {stats['failed']} | "
-                        f"Rate: {rate:.0f}/min | ETA: {remaining:.0f} min")
-
-            except Exception as e:
-                log(f"  ERROR processing POI {poi['id']}: {e}")
+            finish(future, futures[future])
 
     # Final commit
     db_write_conn.commit()
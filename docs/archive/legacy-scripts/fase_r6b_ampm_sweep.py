@@ -16,6 +16,8 @@ from datetime import datetime
 
 import mysql.connector
 
+from db_stream import stream_rows
+
 DB_CONFIG = {
     'host': 'jotx.your-database.de',
     'user': 'pxoziy_1',
@@ -88,29 +90,24 @@ def main():
     conn = mysql.connector.connect(**DB_CONFIG)
     cursor = conn.cursor(dictionary=True)
 
-    # Selecteer ALLE actieve POIs met content
-    cursor.execute("""
-        SELECT id, destination_id,
-               enriched_detail_description,
-               enriched_detail_description_nl,
-               enriched_detail_description_de,
-               enriched_detail_description_es
-        FROM POI
-        WHERE is_active = 1
+    # Selecteer ALLE actieve POIs met content (gestreamd per pagina, zie db_stream)
+    pois = stream_rows(conn, f"id, destination_id, {', '.join(COLUMNS)}", 'POI', """
+        is_active = 1
           AND enriched_detail_description IS NOT NULL
           AND enriched_detail_description != ''
     """)
-    pois = cursor.fetchall()
-    log(f"Scanning {len(pois)} POIs voor AM/PM notatie...")
+    log("Scanning POIs voor AM/PM notatie...")
 
     # ─── Scan fase ──────────────────────────────────────────────────────
 
     total_fixes = 0
+    scanned = 0
     pois_with_ampm = []
     fixes_per_lang = {col: 0 for col in COLUMNS}
     fixes_per_dest = {}
 
     for poi in pois:
+        scanned += 1
         poi_fixes = {}
 
         for col in COLUMNS:
@@ -134,7 +131,7 @@ def main():
             })
             total_fixes += sum(poi_fixes.values())
 
-    log(f"\nScan resultaat:")
+    log(f"\nScan resultaat ({scanned} POIs gescand):")
     log(f"  POIs met AM/PM: {len(pois_with_ampm)}")
     log(f"  Totaal AM/PM notaties: {total_fixes}")
     log(f"  Per taal:")
@@ -23,6 +23,10 @@ from datetime import datetime
 import requests
 import mysql.connector
 
+sys.path.insert(0, '/root')
+from factsheet_store import open_fact_sheets, format_layer_stats
+from source_packer import pack_text, PACKED_NOTE
+
 # ─── CONFIGURATIE ───────────────────────────────────────────────────────────
 
 MISTRAL_API_KEY = "pMPOgK7TmI7oe6rxPEXiCCPKDMk8pTUg"
@@ -41,6 +45,8 @@ DB_CONFIG = {
 CHECKPOINT_FILE = '/root/fase_r6b_strip_checkpoint.json'
 RESULTS_FILE = '/root/fase_r6b_stripped_results.json'
 ENHANCED_FACTS_FILE = '/root/fase_r6b_enhanced_facts.json'
+R2_FACT_SHEETS = '/root/fase_r2_fact_sheets.sqlite'   # Source layers + fallback (factsheet_store)
+SOURCE_TOKENS = 1500        # Enhanced source text per prompt (was: first 6,000 characters)
 
 # Rate limiting
 REQUESTS_PER_SECOND = 4
@@ -252,18 +258,8 @@ def main():
         log(f"Enhanced facts geladen: {len(enhanced_facts)} POIs")
     except FileNotFoundError:
         log("ERROR: Enhanced fact sheets niet gevonden. Voer eerst STAP 1 uit.")
-        log("Fallback: laden R2 fact sheets...")
-        with open('/root/fase_r2_fact_sheets.json', 'r') as f:
-            r2_facts = json.load(f)
-        enhanced_facts = {}
-        for item in (r2_facts if isinstance(r2_facts, list) else r2_facts.values()):
-            pid = str(item.get('poi_id', ''))
-            enhanced_facts[pid] = {
-                'poi_id': pid,
-                'source_text_for_llm': item.get('source_text_for_llm', ''),
-                'new_quality': item.get('data_quality', 'none')
-            }
-        log(f"R2 facts geladen als fallback: {len(enhanced_facts)} POIs")
+        log("Fallback: R2 fact sheets (alleen voor de targets, zie hieronder)")
+        enhanced_facts = None
 
     # ─── Laad target POIs ──────────────────────────────────────────────
 
@@ -297,6 +293,18 @@ def main():
         targets = targets[:args.limit]
         log(f"Beperkt tot {args.limit} POIs")
 
+    # Brontekst per target uit de fact-sheet store: R2 + R6b lagen, op aanvraag samengesteld
+    store = open_fact_sheets(R2_FACT_SHEETS)
+    if enhanced_facts is None:
+        enhanced_facts = {}
+        for item in store.get_many(t['id'] for t in targets):
+            pid = str(item.get('poi_id', ''))
+            enhanced_facts[pid] = {
+                'poi_id': pid,
+                'new_quality': item.get('data_quality', 'none')
+            }
+        log(f"R2 facts geladen als fallback: {len(enhanced_facts)} POIs")
+
     # ─── Dry-run mode ──────────────────────────────────────────────────
 
     if args.dry_run:
@@ -323,6 +331,7 @@ def main():
             dests[d] = dests.get(d, 0) + 1
         log(f"  Destination verdeling: {dests}")
 
+        store.close()
         cursor.close()
         conn.close()
         return
@@ -332,6 +341,7 @@ def main():
     if args.apply_db:
         log("Mode: APPLY — stripped resultaten toepassen op database")
         apply_results_to_db(conn, cursor)
+        store.close()
         cursor.close()
         conn.close()
         return
@@ -376,7 +386,8 @@ def main():
 
         # Enhanced brondata
         facts = enhanced_facts.get(pid, {})
-        source_text = facts.get('source_text_for_llm', '')
+        source_text = pack_text(store.source_text(pid, 'enhanced'), SOURCE_TOKENS,
+                                poi.get('category'), PACKED_NOTE)
         quality = facts.get('new_quality', 'none')
         location = "on Texel" if poi['destination_id'] == 2 else "in Calpe"
 
@@ -390,7 +401,7 @@ def main():
             rating=poi.get('rating', 'N/A'),
             review_count=poi.get('review_count', 0),
             current_en=poi['current_en'] or '',
-            source_text=source_text[:6000]  # Cap at 6000 chars
+            source_text=source_text
         )
 
         try:
@@ -497,6 +508,7 @@ def main():
     log(f"Skipped (checkpoint): {skipped}")
     log(f"Doorlooptijd: {elapsed / 60:.1f} min")
     log(f"AM/PM → 24h fixes: {ampm_fixes_total}")
+    log(f"Brontekst: {format_layer_stats()}")
 
     if word_counts_new:
         log(f"\nWoordenaantal OUD: gem {sum(word_counts_old)/len(word_counts_old):.0f}, "
@@ -524,6 +536,7 @@ def main():
     log(f"Checkpoint opgeslagen: {CHECKPOINT_FILE}")
     log(f"\nVolgende stap: python3 fase_r6b_claim_stripping.py --apply-db")
 
+    store.close()
     cursor.close()
     conn.close()
 
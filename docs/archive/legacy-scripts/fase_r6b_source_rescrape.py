@@ -4,28 +4,54 @@ Fase R6b STAP 1: Bron Re-scrape (Facebook + Instagram + Diepere Website)
 HolidaiButler Content Quality Hardening
 
 Scrapes Facebook, Instagram en diepere website-pagina's voor de 2.047 target POIs.
-Combineert met R2 fact sheets tot enhanced fact sheets.
+Schrijft ze als bronlagen (R6B_LAYERS) naast de R2 lagen in de fact-sheet store;
+de enhanced brontekst wordt daaruit op aanvraag samengesteld (factsheet_store).
+ENHANCED_FILE bevat alleen de quality- en bronvlaggen per POI.
 
 Freshness filter: bronnen ouder dan 4 maanden = STALE (alleen statische info).
 
 Usage:
     python3 -u fase_r6b_source_rescrape.py --dry-run          # Preview targets
     python3 -u fase_r6b_source_rescrape.py --execute           # Full scrape
-    python3 -u fase_r6b_source_rescrape.py --execute --resume  # Resume from checkpoint
+    python3 -u fase_r6b_source_rescrape.py --execute --resume  # Resume from RESULT_LOG
+    python3 -u fase_r6b_source_rescrape.py --execute --no-page-cache  # Ignore shared page cache
+    python3 -u fase_r6b_source_rescrape.py --execute --no-host-registry  # Retry known-dead hosts
+    python3 -u fase_r6b_source_rescrape.py --execute --fixed-timeouts  # No per-host timeouts
+    python3 -u fase_r6b_source_rescrape.py --execute --web-workers 8   # More sites in parallel
+    python3 -u fase_r6b_source_rescrape.py --execute --ignore-robots  # No robots.txt / Crawl-delay
+
+Facebook, Instagram en de deep website scrape draaien tegelijk, elk binnen
+een eigen rate budget (FACEBOOK_RATE, INSTAGRAM_RATE, SUBPAGE_RATE per host).
+Websites volgen robots.txt en de Crawl-delay per host (scrape_robots); met
+--ignore-robots geldt alleen SUBPAGE_RATE.
+Resultaten gaan incrementeel naar RESULT_LOG; de per-platform JSON files
+worden aan het eind geschreven.
 """
 
 import argparse
 import json
 import os
-import re
 import sys
 import time
 from datetime import datetime, timedelta
 from urllib.parse import urljoin
 
 import mysql.connector
-import requests
-from bs4 import BeautifulSoup
+
+from scrape_http import (http_get, enable_page_cache, enable_host_registry,
+                         enable_adaptive_timeouts, enable_robots, format_connection_stats,
+                         response_text, page_charset, format_charset_stats,
+                         format_download_stats)
+from scrape_cache import format_cache_stats
+from scrape_dates import latest_date
+from scrape_extract import CODE_TAGS, extract_page
+from scrape_hosts import HostUnavailable, format_host_stats
+from scrape_latency import format_latency_stats
+from scrape_ratelimit import (TokenBucket, HostBuckets, Crawl, run_crawls,
+                              format_ratelimit_stats)
+from scrape_results import ResultLog
+from scrape_robots import format_robots_stats, is_enabled as polite
+from factsheet_store import open_fact_sheets, R6B_LAYERS, format_layer_stats
 
 DB_CONFIG = {
     'host': 'jotx.your-database.de',
@@ -47,12 +73,20 @@ HEADERS_DESKTOP = {
 
 FRESHNESS_CUTOFF = datetime(2025, 10, 18)  # 4 maanden voor vandaag (18 feb 2026)
 
-CHECKPOINT_FILE = '/root/fase_r6b_scrape_checkpoint.json'
+RESULT_LOG = '/root/fase_r6b_source_results.jsonl'
 TARGETS_FILE = '/root/fase_r6b_targets.json'
 FACEBOOK_FILE = '/root/fase_r6b_facebook_data.json'
 INSTAGRAM_FILE = '/root/fase_r6b_instagram_data.json'
 DEEP_SCRAPE_FILE = '/root/fase_r6b_deep_rescrape.json'
 ENHANCED_FILE = '/root/fase_r6b_enhanced_facts.json'
+PLATFORM_FILES = {'facebook': FACEBOOK_FILE, 'instagram': INSTAGRAM_FILE, 'website': DEEP_SCRAPE_FILE}
+
+# Politeness budget per platform: requests/sec and concurrent workers
+FACEBOOK_RATE, FACEBOOK_WORKERS = 2.0, 2
+INSTAGRAM_RATE, INSTAGRAM_WORKERS = 1.0, 1
+SUBPAGE_RATE = 1 / 0.3     # Per website host
+WEBSITE_WORKERS = 4        # Sites crawled at the same time
+SUBPAGE_BUCKETS = HostBuckets(SUBPAGE_RATE, name='website')
 
 WEBSITE_SUBPAGES = [
     '', '/over-ons', '/about', '/about-us', '/info',
@@ -78,84 +112,11 @@ def get_connection():
 
 def detect_freshness_from_text(text):
     """Detect freshness from page text. Returns (status, last_activity_date)."""
-    if not text:
+    last = latest_date(text)
+    if last is None:
         return 'unknown', None
-
-    found_dates = []
-
-    # Pattern 1: "January 15, 2026"
-    for m in re.finditer(
-        r'(January|February|March|April|May|June|July|August|'
-        r'September|October|November|December)\s+(\d{1,2}),?\s+(\d{4})',
-        text, re.IGNORECASE
-    ):
-        try:
-            d = datetime.strptime(f"{m.group(1)} {m.group(2)} {m.group(3)}", "%B %d %Y")
-            found_dates.append(d)
-        except ValueError:
-            pass
-
-    # Pattern 2: "15 jan 2026" / "3 feb 2025"
-    month_map = {
-        'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
-        'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
-        'mrt': 3, 'mei': 5, 'okt': 10,  # Dutch
-        'ene': 1, 'abr': 4, 'ago': 8, 'dic': 12,  # Spanish
-    }
-    for m in re.finditer(
-        r'(\d{1,2})\s+(jan|feb|mar|mrt|apr|may|mei|jun|jul|aug|sep|oct|okt|nov|dec|'
-        r'ene|abr|ago|dic)[a-z]*\.?\s+(\d{4})',
-        text, re.IGNORECASE
-    ):
-        mn = month_map.get(m.group(2)[:3].lower())
-        if mn:
-            try:
-                found_dates.append(datetime(int(m.group(3)), mn, int(m.group(1))))
-            except ValueError:
-                pass
-
-    # Pattern 3: ISO dates "2025-12-03"
-    for m in re.finditer(r'(\d{4})-(\d{2})-(\d{2})', text):
-        try:
-            d = datetime(int(m.group(1)), int(m.group(2)), int(m.group(3)))
-            if 2020 <= d.year <= 2027:
-                found_dates.append(d)
-        except ValueError:
-            pass
-
-    # Pattern 4: Recent indicators
-    recent_indicators = [
-        'hour ago', 'hours ago', 'minute ago', 'minutes ago',
-        'yesterday', 'just now', 'uur geleden', 'minuten geleden',
-        'gisteren', 'hace un momento', 'hace una hora',
-    ]
-    for indicator in recent_indicators:
-        if indicator.lower() in text.lower():
-            found_dates.append(datetime.now())
-            break
-
-    # Pattern 5: Copyright years
-    for m in re.finditer(r'[©®]\s*(\d{4})', text):
-        try:
-            yr = int(m.group(1))
-            if 2020 <= yr <= 2027:
-                found_dates.append(datetime(yr, 6, 1))
-        except ValueError:
-            pass
-    for m in re.finditer(r'copyright\s+(\d{4})', text, re.IGNORECASE):
-        try:
-            yr = int(m.group(1))
-            if 2020 <= yr <= 2027:
-                found_dates.append(datetime(yr, 6, 1))
-        except ValueError:
-            pass
-
-    if found_dates:
-        last = max(found_dates)
-        status = 'fresh' if last >= FRESHNESS_CUTOFF else 'stale'
-        return status, last
-
-    return 'unknown', None
+    status = 'fresh' if last >= FRESHNESS_CUTOFF else 'stale'
+    return status, last
 
 
 # ── FACEBOOK SCRAPING ─────────────────────────────────────────────────────
@@ -175,11 +136,11 @@ def scrape_facebook(url, poi_name):
         fb_url = 'https://' + fb_url
 
     try:
-        resp = requests.get(fb_url, headers=HEADERS_MOBILE, timeout=10,
-                           allow_redirects=True)
+        resp = http_get(fb_url, page_type='social', headers=HEADERS_MOBILE, timeout=10,
+                       allow_redirects=True)
         if resp.status_code == 200:
-            soup = BeautifulSoup(resp.text, 'html.parser')
-            page_text = soup.get_text(separator='\n', strip=True)[:3000]
+            # Header/footer kept: post timestamps and copyright years date the page
+            page_text = extract_page(response_text(resp), strip_tags=CODE_TAGS)['text'][:3000]
 
             # Check for login wall
             if 'log in' in page_text.lower()[:500] and len(page_text) < 500:
@@ -191,6 +152,7 @@ def scrape_facebook(url, poi_name):
                 'status': 'success',
                 'url': fb_url,
                 'text': page_text,
+                'charset': page_charset(resp),
                 'freshness_status': freshness,
                 'last_activity_date': last_date.isoformat() if last_date else None,
                 'usable_for_claims': freshness == 'fresh',
@@ -218,17 +180,14 @@ def scrape_instagram(url, poi_name):
             ig_url = 'https://' + ig_url
 
     try:
-        resp = requests.get(ig_url, headers=HEADERS_DESKTOP, timeout=10,
-                           allow_redirects=True)
+        resp = http_get(ig_url, page_type='social', headers=HEADERS_DESKTOP, timeout=10,
+                       allow_redirects=True)
         if resp.status_code == 200:
-            soup = BeautifulSoup(resp.text, 'html.parser')
+            opengraph = extract_page(response_text(resp))['opengraph']
 
             # Bio is in og:description
-            meta_desc = soup.find('meta', attrs={'property': 'og:description'})
-            bio = meta_desc['content'] if meta_desc and meta_desc.get('content') else ''
-
-            meta_title = soup.find('meta', attrs={'property': 'og:title'})
-            title = meta_title['content'] if meta_title and meta_title.get('content') else ''
+            bio = opengraph.get('og:description', '')
+            title = opengraph.get('og:title', '')
 
             if not bio and not title:
                 return {'status': 'empty', 'url': ig_url}
@@ -238,6 +197,7 @@ def scrape_instagram(url, poi_name):
                 'url': ig_url,
                 'bio': bio,
                 'title': title,
+                'charset': page_charset(resp),
                 'freshness_status': 'unknown',  # Instagram bio = statisch
                 'usable_for_claims': False,  # Bio alleen voor naam/type/adres
                 'usable_for_static': bool(bio),
@@ -265,41 +225,39 @@ def scrape_website_deep(url, poi_name):
         'pages': {},
         'structured_data': {},
         'meta_data': {},
+        'charsets': {},
         'extracted_facts': {},
     }
 
     for subpage in WEBSITE_SUBPAGES:
         page_url = website + subpage
+        if not polite():
+            SUBPAGE_BUCKETS.acquire(page_url)   # Else http_get paces by Crawl-delay
         try:
-            resp = requests.get(page_url, headers=HEADERS_DESKTOP, timeout=8,
-                               allow_redirects=True)
-            if resp.status_code == 200 and len(resp.text) > 500:
-                soup = BeautifulSoup(resp.text, 'html.parser')
-
-                # Schema.org / JSON-LD
-                for script in soup.find_all('script', type='application/ld+json'):
-                    try:
-                        ld_data = json.loads(script.string)
-                        result['structured_data'][subpage or '/'] = ld_data
-                    except (json.JSONDecodeError, TypeError):
-                        pass
+            resp = http_get(page_url, page_type='subpage' if subpage else 'main',
+                           headers=HEADERS_DESKTOP, timeout=8, allow_redirects=True)
+            if resp.status_code == 200 and len(response_text(resp)) > 500:
+                page = extract_page(response_text(resp), strip_tags=CODE_TAGS)   # Keeps footer years
+                result['charsets'][subpage or '/'] = page_charset(resp)
+
+                # Schema.org / JSON-LD (laatste geldige blok per pagina)
+                if page['json_ld']:
+                    result['structured_data'][subpage or '/'] = page['json_ld'][-1]
 
                 # OpenGraph meta tags
-                og_tags = {}
-                for meta in soup.find_all('meta', attrs={'property': re.compile(r'^og:')}):
-                    og_tags[meta.get('property', '')] = meta.get('content', '')
+                og_tags = {k: v for k, v in page['opengraph'].items() if k.startswith('og:')}
                 if og_tags:
                     result['meta_data'][subpage or '/'] = og_tags
 
                 # Page text (beperkt tot 2000 tekens)
-                page_text = soup.get_text(separator='\n', strip=True)[:2000]
+                page_text = page['text'][:2000]
                 result['pages'][subpage or '/'] = page_text
 
+        except HostUnavailable:
+            break  # Known dead host: skip the remaining subpages
         except Exception:
             pass
 
-        time.sleep(0.3)
-
     # Extract structured facts
     for page, ld in result['structured_data'].items():
         items = [ld] if isinstance(ld, dict) else (ld if isinstance(ld, list) else [])
@@ -355,17 +313,44 @@ def scrape_website_deep(url, poi_name):
 
 # ── MAIN ──────────────────────────────────────────────────────────────────
 
-def load_checkpoint():
-    if os.path.exists(CHECKPOINT_FILE):
-        with open(CHECKPOINT_FILE, 'r') as f:
-            return json.load(f)
-    return {'fb_done': [], 'ig_done': [], 'web_done': [], 'phase': 'facebook'}
+def open_result_log(resume):
+    """One incremental store for all platforms (key '<platform>:<poi_id>').
+
+    On the first --resume after an older run, the per-platform JSON files are
+    imported so finished POIs are not scraped again.
+    """
+    if resume and not os.path.exists(RESULT_LOG):
+        result_log = ResultLog(RESULT_LOG, truncate=True)
+        for platform, path in PLATFORM_FILES.items():
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    for pid, result in json.load(f).items():
+                        result_log.append(dict(result, platform=platform), key=f'{platform}:{pid}',
+                                          ok=result.get('status') == 'success')
+        result_log.checkpoint()
+        return result_log
+    return ResultLog(RESULT_LOG, truncate=not resume)
+
+
+def load_results(result_log):
+    """{platform: {poi_id: result}} from the result log."""
+    results = {platform: {} for platform in PLATFORM_FILES}
+    for record in result_log.replay():
+        results[record.pop('platform')][str(record['poi_id'])] = record
+    return results
+
+
+def load_r2_lookup(r2_store, targets):
+    """{poi_id (str): R2 fact sheet} of the targets; source text is read on use."""
+    return {str(item.get('poi_id', '')): item
+            for item in r2_store.get_many(t['poi_id'] for t in targets)}
 
 
-def save_checkpoint(ckpt):
-    ckpt['last_updated'] = datetime.now().isoformat()
-    with open(CHECKPOINT_FILE, 'w') as f:
-        json.dump(ckpt, f)
+def export_platform_files(results):
+    """Write the per-platform JSON deliverables (read by stap 2 and for review)."""
+    for platform, path in PLATFORM_FILES.items():
+        with open(path, 'w') as f:
+            json.dump(results[platform], f, indent=2, ensure_ascii=False)
 
 
 def main():
@@ -373,6 +358,12 @@ def main():
     parser.add_argument('--dry-run', action='store_true', default=True)
     parser.add_argument('--execute', action='store_true')
     parser.add_argument('--resume', action='store_true')
+    parser.add_argument('--no-page-cache', action='store_true')
+    parser.add_argument('--no-host-registry', action='store_true')
+    parser.add_argument('--fixed-timeouts', action='store_true')
+    parser.add_argument('--ignore-robots', action='store_true')
+    parser.add_argument('--web-workers', type=int, default=WEBSITE_WORKERS,
+                        help='Websites deep-scraped at the same time (each host stays paced)')
     args = parser.parse_args()
     dry_run = not args.execute
 
@@ -422,11 +413,8 @@ def main():
 
     # Load R2 fact sheets voor quality levels
     log("\nLaden R2 fact sheets...")
-    with open('/root/fase_r2_fact_sheets.json', 'r') as f:
-        r2_facts = json.load(f)
-    r2_lookup = {}
-    for item in r2_facts:
-        r2_lookup[str(item.get('poi_id', ''))] = item
+    r2_store = open_fact_sheets(readonly=True)   # Writer opened on the execute path
+    r2_lookup = load_r2_lookup(r2_store, targets)
 
     # Quality distribution for targets
     quality_dist = {}
@@ -445,61 +433,73 @@ def main():
     if dry_run:
         log("\n--- DRY-RUN: geen scraping ---")
         log(f"\nBij execute:")
-        log(f"  Facebook: {len(has_fb)} pagina's (rate: 2/sec)")
-        log(f"  Instagram: {len(has_ig)} profielen (rate: 1/sec)")
+        log(f"  Facebook: {len(has_fb)} pagina's (rate: {FACEBOOK_RATE:g}/sec)")
+        log(f"  Instagram: {len(has_ig)} profielen (rate: {INSTAGRAM_RATE:g}/sec)")
         log(f"  Deep website: {len(deep_targets)} sites ({len(WEBSITE_SUBPAGES)} subpages elk)")
-        est_fb = len(has_fb) * 0.5 / 60
-        est_ig = len(has_ig) * 1.0 / 60
-        est_web = len(deep_targets) * len(WEBSITE_SUBPAGES) * 0.3 / 60
-        log(f"  Geschatte doorlooptijd: {est_fb:.0f} + {est_ig:.0f} + {est_web:.0f} = {est_fb+est_ig+est_web:.0f} min")
+        est_fb = len(has_fb) / FACEBOOK_RATE / 60
+        est_ig = len(has_ig) / INSTAGRAM_RATE / 60
+        est_web = len(deep_targets) * len(WEBSITE_SUBPAGES) / SUBPAGE_RATE / args.web_workers / 60
+        log(f"  Geschatte doorlooptijd (parallel): max({est_fb:.0f}, {est_ig:.0f}, {est_web:.0f}) "
+            f"= {max(est_fb, est_ig, est_web):.0f} min")
+        r2_store.close()
         return
 
     # ── EXECUTE MODE ──
-    checkpoint = load_checkpoint() if args.resume else {'fb_done': [], 'ig_done': [], 'web_done': [], 'phase': 'facebook'}
+    r2_store.close()
+    r2_store = open_fact_sheets(cache_writes=True)   # Writes the R6b layers below
+    r2_lookup = load_r2_lookup(r2_store, targets)
+    if not args.no_page_cache:
+        enable_page_cache()
+    if not args.no_host_registry:
+        enable_host_registry()
+    if not args.fixed_timeouts:
+        enable_adaptive_timeouts()
+    if not args.ignore_robots:
+        enable_robots()
+    result_log = open_result_log(args.resume)
+    results = load_results(result_log)
+    fb_results, ig_results, deep_results = (results['facebook'], results['instagram'],
+                                            results['website'])
+    if args.resume:
+        log(f"Resumed: {len(fb_results)} Facebook, {len(ig_results)} Instagram, "
+            f"{len(deep_results)} deep scrape results ({RESULT_LOG})")
     start_time = time.time()
 
-    # ── Phase 1: Facebook ──
+    def store(platform):
+        def on_result(poi, result):
+            result['poi_id'] = poi['poi_id']
+            result['name'] = poi['name']
+            result['destination_id'] = poi['destination_id']
+            if platform == 'website':
+                result['category'] = poi['category']
+            results[platform][str(poi['poi_id'])] = result
+            result_log.append(dict(result, platform=platform), key=f"{platform}:{poi['poi_id']}",
+                              ok=result['status'] == 'success')
+        return on_result
+
+    # ── Phase 1-3: Facebook, Instagram en deep website tegelijk ──
+    crawls = [
+        Crawl('facebook', [t for t in has_fb if str(t['poi_id']) not in fb_results],
+              lambda poi: scrape_facebook(poi['facebook_url'], poi['name']), store('facebook'),
+              bucket=TokenBucket(FACEBOOK_RATE, name='facebook'), workers=FACEBOOK_WORKERS),
+        Crawl('instagram', [t for t in has_ig if str(t['poi_id']) not in ig_results],
+              lambda poi: scrape_instagram(poi['instagram_url'], poi['name']), store('instagram'),
+              bucket=TokenBucket(INSTAGRAM_RATE, name='instagram'), workers=INSTAGRAM_WORKERS),
+        # Website pacing is per host, inside scrape_website_deep (SUBPAGE_BUCKETS)
+        Crawl('website', [t for t in deep_targets if str(t['poi_id']) not in deep_results],
+              lambda poi: scrape_website_deep(poi['website'], poi['name']), store('website'),
+              workers=args.web_workers),
+    ]
     log(f"\n{'='*50}")
-    log(f"FASE 1/3: FACEBOOK SCRAPING ({len(has_fb)} targets)")
+    log(f"FASE 1-3: FACEBOOK ({len(crawls[0].items)}) + INSTAGRAM ({len(crawls[1].items)}) "
+        f"+ DEEP WEBSITE ({len(crawls[2].items)}) PARALLEL")
     log(f"{'='*50}")
+    run_crawls(crawls, progress_every=50, log=log)
+    result_log.close()
+    export_platform_files(results)
 
-    fb_results = {}
-    if os.path.exists(FACEBOOK_FILE) and args.resume:
-        with open(FACEBOOK_FILE, 'r') as f:
-            fb_results = json.load(f)
-        log(f"Resumed: {len(fb_results)} Facebook results loaded")
-
-    fb_done_ids = set(str(k) for k in fb_results.keys())
     fb_success = sum(1 for v in fb_results.values() if v.get('status') == 'success')
     fb_failed = sum(1 for v in fb_results.values() if v.get('status') in ('failed', 'login_wall'))
-
-    for i, poi in enumerate(has_fb):
-        pid = str(poi['poi_id'])
-        if pid in fb_done_ids:
-            continue
-
-        result = scrape_facebook(poi['facebook_url'], poi['name'])
-        if result:
-            result['poi_id'] = poi['poi_id']
-            result['name'] = poi['name']
-            result['destination_id'] = poi['destination_id']
-            fb_results[pid] = result
-
-            if result['status'] == 'success':
-                fb_success += 1
-            else:
-                fb_failed += 1
-
-        time.sleep(0.5)  # Rate limiting
-
-        if (i + 1) % 50 == 0:
-            with open(FACEBOOK_FILE, 'w') as f:
-                json.dump(fb_results, f, indent=2, ensure_ascii=False)
-            log(f"  FB Progress: {i+1}/{len(has_fb)} (success: {fb_success}, failed: {fb_failed})")
-
-    with open(FACEBOOK_FILE, 'w') as f:
-        json.dump(fb_results, f, indent=2, ensure_ascii=False)
-
     fb_fresh = sum(1 for v in fb_results.values() if v.get('freshness_status') == 'fresh')
     fb_stale = sum(1 for v in fb_results.values() if v.get('freshness_status') == 'stale')
     fb_unknown = sum(1 for v in fb_results.values() if v.get('freshness_status') == 'unknown')
@@ -509,91 +509,12 @@ def main():
     log(f"  Success: {fb_success}, Failed: {fb_failed}, Login wall: {fb_login}")
     log(f"  Fresh (<4 mnd): {fb_fresh}, Stale (>4 mnd): {fb_stale}, Unknown: {fb_unknown}")
 
-    # ── Phase 2: Instagram ──
-    log(f"\n{'='*50}")
-    log(f"FASE 2/3: INSTAGRAM SCRAPING ({len(has_ig)} targets)")
-    log(f"{'='*50}")
-
-    ig_results = {}
-    if os.path.exists(INSTAGRAM_FILE) and args.resume:
-        with open(INSTAGRAM_FILE, 'r') as f:
-            ig_results = json.load(f)
-        log(f"Resumed: {len(ig_results)} Instagram results loaded")
-
-    ig_done_ids = set(str(k) for k in ig_results.keys())
     ig_success = sum(1 for v in ig_results.values() if v.get('status') == 'success')
     ig_failed = sum(1 for v in ig_results.values() if v.get('status') in ('failed', 'empty'))
-
-    for i, poi in enumerate(has_ig):
-        pid = str(poi['poi_id'])
-        if pid in ig_done_ids:
-            continue
-
-        result = scrape_instagram(poi['instagram_url'], poi['name'])
-        if result:
-            result['poi_id'] = poi['poi_id']
-            result['name'] = poi['name']
-            result['destination_id'] = poi['destination_id']
-            ig_results[pid] = result
-
-            if result['status'] == 'success':
-                ig_success += 1
-            else:
-                ig_failed += 1
-
-        time.sleep(1.0)  # Instagram is strenger
-
-        if (i + 1) % 50 == 0:
-            with open(INSTAGRAM_FILE, 'w') as f:
-                json.dump(ig_results, f, indent=2, ensure_ascii=False)
-            log(f"  IG Progress: {i+1}/{len(has_ig)} (success: {ig_success}, failed: {ig_failed})")
-
-    with open(INSTAGRAM_FILE, 'w') as f:
-        json.dump(ig_results, f, indent=2, ensure_ascii=False)
-
     log(f"\nInstagram resultaat: success={ig_success}, failed={ig_failed}")
 
-    # ── Phase 3: Deep Website Re-scrape ──
-    log(f"\n{'='*50}")
-    log(f"FASE 3/3: DEEP WEBSITE RE-SCRAPE ({len(deep_targets)} targets)")
-    log(f"{'='*50}")
-
-    deep_results = {}
-    if os.path.exists(DEEP_SCRAPE_FILE) and args.resume:
-        with open(DEEP_SCRAPE_FILE, 'r') as f:
-            deep_results = json.load(f)
-        log(f"Resumed: {len(deep_results)} deep scrape results loaded")
-
-    deep_done_ids = set(str(k) for k in deep_results.keys())
     deep_success = sum(1 for v in deep_results.values() if v.get('status') == 'success')
     deep_empty = sum(1 for v in deep_results.values() if v.get('status') == 'empty')
-
-    for i, poi in enumerate(deep_targets):
-        pid = str(poi['poi_id'])
-        if pid in deep_done_ids:
-            continue
-
-        result = scrape_website_deep(poi['website'], poi['name'])
-        if result:
-            result['poi_id'] = poi['poi_id']
-            result['name'] = poi['name']
-            result['destination_id'] = poi['destination_id']
-            result['category'] = poi['category']
-            deep_results[pid] = result
-
-            if result['status'] == 'success':
-                deep_success += 1
-            else:
-                deep_empty += 1
-
-        if (i + 1) % 25 == 0:
-            with open(DEEP_SCRAPE_FILE, 'w') as f:
-                json.dump(deep_results, f, indent=2, ensure_ascii=False)
-            log(f"  Deep Progress: {i+1}/{len(deep_targets)} (data: {deep_success}, empty: {deep_empty})")
-
-    with open(DEEP_SCRAPE_FILE, 'w') as f:
-        json.dump(deep_results, f, indent=2, ensure_ascii=False)
-
     has_structured = sum(1 for v in deep_results.values() if v.get('extracted_facts'))
     has_hours = sum(1 for v in deep_results.values()
                     if v.get('extracted_facts', {}).get('opening_hours'))
@@ -612,54 +533,43 @@ def main():
     for poi in targets:
         pid = str(poi['poi_id'])
 
-        # Start met R2 data
+        # R2 data blijft in de store; alleen de R6b bronlagen worden geschreven
         r2 = r2_lookup.get(pid, {})
-        source_text = r2.get('source_text_for_llm', '')
         old_quality = r2.get('data_quality', 'none')
+        layers = {}
 
-        # Voeg Facebook toe (met freshness filter)
+        # Facebook (header en waarschuwing volgen de freshness, zie factsheet_store.render_layer)
         fb = fb_results.get(pid, {})
         has_fresh_social = False
         if fb.get('status') == 'success' and fb.get('text'):
             fb_fresh_status = fb.get('freshness_status', 'unknown')
-            fb_date = fb.get('last_activity_date', 'unknown')
-
-            if fb_fresh_status == 'fresh':
-                source_text += f"\n\n--- FACEBOOK PAGE DATA (FRESH — last active: {fb_date}) ---"
-                source_text += f"\n{fb['text']}"
-                has_fresh_social = True
-            elif fb_fresh_status == 'stale':
-                source_text += f"\n\n--- FACEBOOK PAGE DATA (STALE — last active: {fb_date}) ---"
-                source_text += f"\nWARNING: This Facebook page has not been updated in >4 months."
-                source_text += f"\nONLY use for: business name confirmation, address, phone number."
-                source_text += f"\nDO NOT use for: opening hours, menu, prices, services, facilities."
-                source_text += f"\n{fb['text']}"
-            else:
-                source_text += f"\n\n--- FACEBOOK PAGE DATA (FRESHNESS UNKNOWN) ---"
-                source_text += f"\nWARNING: Cannot determine if this page is current."
-                source_text += f"\nONLY use for: business name confirmation, address, phone number."
-                source_text += f"\n{fb['text']}"
-
-        # Voeg Instagram toe (bio = statisch)
+            layers['facebook'] = (fb['text'], fb_fresh_status, fb.get('last_activity_date'))
+            has_fresh_social = fb_fresh_status == 'fresh'
+
+        # Instagram (bio = statisch)
         ig = ig_results.get(pid, {})
         if ig.get('status') == 'success' and ig.get('bio'):
-            source_text += f"\n\n--- INSTAGRAM BIO (STATIC — use for name/type only) ---"
-            source_text += f"\n{ig['bio']}"
+            layers['instagram'] = ig['bio']
 
-        # Voeg deep re-scrape toe
+        # Deep re-scrape
         deep = deep_results.get(pid, {})
         if deep and deep.get('status') == 'success':
             if deep.get('extracted_facts'):
-                facts = deep['extracted_facts']
-                source_text += "\n\n--- STRUCTURED DATA (SCHEMA.ORG) ---"
-                for key, val in facts.items():
-                    source_text += f"\n{key}: {json.dumps(val, ensure_ascii=False)}"
+                layers['structured_data'] = '\n'.join(
+                    f"{key}: {json.dumps(val, ensure_ascii=False)}"
+                    for key, val in deep['extracted_facts'].items())
 
             if deep.get('combined_source_text'):
                 deep_text = deep['combined_source_text']
-                r2_text_len = len(r2.get('source_text_for_llm', ''))
+                r2_text_len = len(r2.get('source_text_for_llm', '') or '')
                 if len(deep_text) > r2_text_len + 500:
-                    source_text += f"\n\n--- DEEP WEBSITE RE-SCRAPE ---\n{deep_text}"
+                    layers['deep_scrape'] = (deep_text, deep.get('freshness_status'),
+                                             deep.get('last_activity_date'))
+
+        r2_store.set_layers(pid, layers, R6B_LAYERS)
+        r2_store.source_text(pid, 'enhanced')   # Cached for claim stripping
+        if r2:
+            r2.unload()
 
         # Bepaal nieuwe quality level
         new_quality = old_quality
@@ -681,7 +591,7 @@ def main():
             'category': poi['category'],
             'old_quality': old_quality,
             'new_quality': new_quality,
-            'source_text_for_llm': source_text[:8000],
+            'source_layers': [layer for layer in R6B_LAYERS if layer in layers],
             'has_facebook': fb.get('status') == 'success',
             'facebook_fresh': fb.get('freshness_status', 'none'),
             'has_instagram': ig.get('status') == 'success',
@@ -689,6 +599,7 @@ def main():
             'has_structured_data': has_structured_data,
         }
 
+    r2_store.close()
     with open(ENHANCED_FILE, 'w') as f:
         json.dump(enhanced_facts, f, indent=2, ensure_ascii=False)
 
@@ -717,8 +628,18 @@ def main():
     log(f"  Facebook success: {fb_success} (fresh: {fb_fresh}, stale: {fb_stale}, login: {fb_login})")
     log(f"  Instagram success: {ig_success}")
     log(f"  Deep scrape data: {deep_success} (structured: {has_structured})")
+    log(f"  Connections: {format_connection_stats()}")
+    log(f"  Page cache: {format_cache_stats()}")
+    log(f"  Charset: {format_charset_stats()}")
+    log(f"  Downloads: {format_download_stats()}")
+    log(f"  Dead hosts: {format_host_stats()}")
+    log(f"  Latency: {format_latency_stats()}")
+    log(f"  Rate limits: {format_ratelimit_stats()}")
+    log(f"  Politeness: {format_robots_stats()}")
+    log(f"  Source layers: {format_layer_stats()}")
     log(f"\nDeliverables:")
     log(f"  {TARGETS_FILE}")
+    log(f"  {RESULT_LOG}")
     log(f"  {FACEBOOK_FILE}")
     log(f"  {INSTAGRAM_FILE}")
     log(f"  {DEEP_SCRAPE_FILE}")
@@ -2,9 +2,12 @@
 """Scan and fix markdown leakage in POI enriched_detail_description fields."""
 import pymysql
 import json
+import os
 import re
 from datetime import datetime
 
+from db_stream import keyset_pages
+
 # Connect
 conn = pymysql.connect(
     host='jotx.your-database.de',
@@ -89,86 +92,90 @@ for pattern_name, like_pat in other_patterns:
         row = cursor.fetchone()
         print(f"  {pattern_name} in {dest_name}: {row['cnt']} POIs")
 
-# STEP 3: Get all affected POI IDs for the fix
+# STEP 3: Stream all affected POIs for the fix (keyset pages, see db_stream)
 print("\n" + "=" * 60)
-print("FETCHING ALL AFFECTED POIs FOR FIX...")
+print("STREAMING ALL AFFECTED POIs FOR FIX...")
 print("=" * 60)
 
-cursor.execute("""
-    SELECT id, name, destination_id,
+# Not prefetched: the UPDATEs below run on the same connection between pages
+affected_pages = keyset_pages(conn, """id, name, destination_id,
         enriched_detail_description,
         enriched_detail_description_nl,
         enriched_detail_description_de,
-        enriched_detail_description_es
-    FROM POI
-    WHERE is_active = 1
+        enriched_detail_description_es""", 'POI', """
+    is_active = 1
     AND (enriched_detail_description LIKE %s
          OR enriched_detail_description_nl LIKE %s
          OR enriched_detail_description_de LIKE %s
          OR enriched_detail_description_es LIKE %s)
-    ORDER BY destination_id, id
 """, (like_pattern, like_pattern, like_pattern, like_pattern))
 
-affected_pois = cursor.fetchall()
-print(f"Fetched {len(affected_pois)} POIs for processing")
-
 # Regex: [text](http...) -> text
 md_link_re = re.compile(r'\[([^\]]+)\]\(https?://[^\)]+\)')
 
-# STEP 4: BACKUP first
-backup = []
-for poi in affected_pois:
-    backup.append({
-        'id': poi['id'],
-        'name': poi['name'],
-        'destination_id': poi['destination_id'],
-        'enriched_detail_description': poi['enriched_detail_description'],
-        'enriched_detail_description_nl': poi['enriched_detail_description_nl'],
-        'enriched_detail_description_de': poi['enriched_detail_description_de'],
-        'enriched_detail_description_es': poi['enriched_detail_description_es'],
-    })
-
-with open('/root/markdown_fix_backup_20260219.json', 'w') as f:
-    json.dump(backup, f, ensure_ascii=False, indent=2)
-print(f"Backup saved: /root/markdown_fix_backup_20260219.json ({len(backup)} POIs)")
-
-# STEP 5: FIX all markdown links
+# STEP 4+5: per page, BACKUP first (written before the page is fixed), then FIX all markdown links
+backup_path = '/root/markdown_fix_backup_20260219.json'
+backup_file = open(backup_path, 'w')
+backup_file.write('[')
+affected_ids = set()
 fix_count = 0
 field_fix_counts = {'en': 0, 'nl': 0, 'de': 0, 'es': 0}
 fix_log = []
 
-for poi in affected_pois:
-    poi_fixed = False
-    field_map = {
-        'en': ('enriched_detail_description', poi['enriched_detail_description']),
-        'nl': ('enriched_detail_description_nl', poi['enriched_detail_description_nl']),
-        'de': ('enriched_detail_description_de', poi['enriched_detail_description_de']),
-        'es': ('enriched_detail_description_es', poi['enriched_detail_description_es']),
-    }
-
-    updates = {}
-    for lang, (col, text) in field_map.items():
-        if text and md_link_re.search(text):
-            # Find all matches for logging
-            matches = md_link_re.findall(text)
-            new_text = md_link_re.sub(r'\1', text)
-            updates[col] = new_text
-            field_fix_counts[lang] += 1
-            poi_fixed = True
-            fix_log.append({
-                'poi_id': poi['id'],
-                'name': poi['name'],
-                'destination_id': poi['destination_id'],
-                'lang': lang,
-                'matches_removed': matches,
-                'field': col
-            })
-
-    if updates:
-        fix_count += 1
-        set_clause = ', '.join(f"{col} = %s" for col in updates.keys())
-        values = list(updates.values()) + [poi['id']]
-        cursor.execute(f"UPDATE POI SET {set_clause} WHERE id = %s", values)
+for affected_pois in affected_pages:
+    for poi in affected_pois:
+        entry = json.dumps({
+            'id': poi['id'],
+            'name': poi['name'],
+            'destination_id': poi['destination_id'],
+            'enriched_detail_description': poi['enriched_detail_description'],
+            'enriched_detail_description_nl': poi['enriched_detail_description_nl'],
+            'enriched_detail_description_de': poi['enriched_detail_description_de'],
+            'enriched_detail_description_es': poi['enriched_detail_description_es'],
+        }, ensure_ascii=False, indent=2)
+        backup_file.write(',\n' if affected_ids else '\n')
+        backup_file.write('\n'.join('  ' + line for line in entry.split('\n')))
+        affected_ids.add(poi['id'])
+    backup_file.flush()
+    os.fsync(backup_file.fileno())
+
+    for poi in affected_pois:
+        poi_fixed = False
+        field_map = {
+            'en': ('enriched_detail_description', poi['enriched_detail_description']),
+            'nl': ('enriched_detail_description_nl', poi['enriched_detail_description_nl']),
+            'de': ('enriched_detail_description_de', poi['enriched_detail_description_de']),
+            'es': ('enriched_detail_description_es', poi['enriched_detail_description_es']),
+        }
+
+        updates = {}
+        for lang, (col, text) in field_map.items():
+            if text and md_link_re.search(text):
+                # Find all matches for logging
+                matches = md_link_re.findall(text)
+                new_text = md_link_re.sub(r'\1', text)
+                updates[col] = new_text
+                field_fix_counts[lang] += 1
+                poi_fixed = True
+                fix_log.append({
+                    'poi_id': poi['id'],
+                    'name': poi['name'],
+                    'destination_id': poi['destination_id'],
+                    'lang': lang,
+                    'matches_removed': matches,
+                    'field': col
+                })
+
+        if updates:
+            fix_count += 1
+            set_clause = ', '.join(f"{col} = %s" for col in updates.keys())
+            values = list(updates.values()) + [poi['id']]
+            cursor.execute(f"UPDATE POI SET {set_clause} WHERE id = %s", values)
+
+backup_file.write('\n]' if affected_ids else ']')
+backup_file.close()
+print(f"Fetched {len(affected_ids)} POIs for processing")
+print(f"Backup saved: {backup_path} ({len(affected_ids)} POIs)")
 
 conn.commit()
 
@@ -238,7 +245,7 @@ print("RAPPORT: MARKDOWN FIX POST-R6b")
 print("=" * 60)
 print(f"| Metric                          | Waarde |")
 print(f"|---------------------------------|--------|")
-print(f"| POI 2279 gefixed                | {'YES' if 2279 in [p['id'] for p in affected_pois] else 'NO (not affected)'} |")
+print(f"| POI 2279 gefixed                | {'YES' if 2279 in affected_ids else 'NO (not affected)'} |")
 print(f"| Totaal POIs met markdown (voor) | {total} |")
 print(f"| POIs gefixed                    | {fix_count} |")
 print(f"| EN velden gefixed               | {field_fix_counts['en']} |")
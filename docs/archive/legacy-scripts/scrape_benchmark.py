@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Scraper micro-benchmarks on a recorded HTML corpus (no live websites).
+
+A corpus is either a directory of *.html / *.htm files or the shared page
+cache directory (scrape_cache.PAGE_CACHE_DIR), whose zlib-compressed bodies
+are read directly.
+
+Usage:
+    python3 scrape_benchmark.py extract --corpus /root/scrape_page_cache
+    python3 scrape_benchmark.py extract --corpus ./html --backends lxml,bs4 --repeat 3
+    python3 scrape_benchmark.py facts --corpus /root/scrape_page_cache --repeat 5
+    python3 scrape_benchmark.py pipeline --corpus /root/scrape_page_cache --threads 8 --workers 4
+    python3 scrape_benchmark.py dates --corpus /root/fase_r6b_deep_rescrape.json --repeat 5
+    python3 scrape_benchmark.py scrape --archive /root/scrape_replay.sqlite --threads 8
+
+The scrape benchmark runs R2's scrape_single_poi end to end (fetch, discovery,
+subpages, parsing) against a scrape_replay archive served from a local
+process. It reports pages/s, CPU per page and peak memory, so scraper changes
+can be compared on the same recorded traffic.
+
+The dates benchmark also reads the R6b result files (fase_r6b_facebook_data.json,
+fase_r6b_deep_rescrape.json): the texts detect_freshness_from_text() sees.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+from scrape_dates import latest_date, latest_date_per_pattern
+from scrape_extract import EXTRACTORS, extract_page
+from scrape_facts import scan_facts, scan_facts_per_pattern
+import scrape_pipeline
+import scrape_replay
+from scrape_http import connection_stats, enable_replay
+
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}", flush=True)
+
+
+# ============================================================
+# CORPUS
+# ============================================================
+def load_html_corpus(path, limit=None, raw=False):
+    """Load HTML documents (as str, or bytes with raw=True) from a directory or page cache."""
+    docs = []
+    for dirpath, _, filenames in os.walk(path):
+        for name in sorted(filenames):
+            full = os.path.join(dirpath, name)
+            if name.endswith(('.html', '.htm')):
+                with open(full, 'rb') as f:
+                    body = f.read()
+            elif os.path.basename(os.path.dirname(dirpath)) == 'bodies':
+                try:
+                    with open(full, 'rb') as f:
+                        body = zlib.decompress(f.read())
+                except zlib.error:
+                    continue
+            else:
+                continue
+            docs.append(body if raw else body.decode('utf-8', errors='replace'))
+            if limit and len(docs) >= limit:
+                return docs
+    return docs
+
+
+def load_r6b_texts(path, limit=None):
+    """Texts from an R6b result file: Facebook 'text' and the joined deep-scrape 'pages'."""
+    with open(path, 'r', encoding='utf-8') as f:
+        results = json.load(f)
+    texts = []
+    for result in results.values():
+        if result.get('text'):
+            texts.append(result['text'])
+        if result.get('pages'):
+            texts.append('\n'.join(result['pages'].values()))
+        if limit and len(texts) >= limit:
+            break
+    return texts
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[idx]
+
+
+def summarize_timings(label, timings_ms, baseline_mean=None):
+    mean = sum(timings_ms) / len(timings_ms) if timings_ms else 0
+    speedup = f'{baseline_mean / mean:5.1f}x' if baseline_mean and mean else '    -'
+    log(f'  {label:12s} mean {mean:7.2f} ms  p50 {percentile(timings_ms, 50):7.2f} ms  '
+        f'p95 {percentile(timings_ms, 95):7.2f} ms  speedup {speedup}')
+    return mean
+
+
+# ============================================================
+# BENCHMARKS
+# ============================================================
+def bench_extract(docs, backends, repeat):
+    """Per-page CPU time of each extractor backend (bs4 = previous pipeline)."""
+    log(f'Extractor benchmark: {len(docs)} pages, {repeat} run(s), '
+        f'{sum(len(d) for d in docs) / 1_048_576:.1f} MB HTML')
+
+    results = {}
+    for backend in backends:
+        timings = []
+        for _ in range(repeat):
+            for html in docs:
+                t0 = time.process_time()
+                extract_page(html, backend)
+                timings.append((time.process_time() - t0) * 1000)
+        results[backend] = timings
+
+    baseline = None
+    if 'bs4' in results:
+        baseline = sum(results['bs4']) / len(results['bs4'])
+    for backend, timings in results.items():
+        summarize_timings(backend, timings, baseline if backend != 'bs4' else None)
+
+    # Output parity against the reference pipeline
+    if 'bs4' in results:
+        for backend in results:
+            if backend == 'bs4':
+                continue
+            same = sum(1 for html in docs
+                       if extract_page(html, backend)['text'] == extract_page(html, 'bs4')['text'])
+            log(f'  {backend:12s} text identical to bs4 on {same}/{len(docs)} pages')
+    return results
+
+
+def bench_facts(docs, repeat):
+    """Fact scanning: compiled guarded scanner vs. one re.IGNORECASE regex per pattern."""
+    texts = [extract_page(html)['text'] for html in docs]
+    log(f'Fact scanner benchmark: {len(texts)} texts, {repeat} run(s), '
+        f'{sum(len(t.split()) for t in texts) / max(len(texts), 1):.0f} words/text avg')
+
+    results = {}
+    for label, scanner in (('per-pattern', scan_facts_per_pattern), ('compiled', scan_facts)):
+        timings = []
+        for _ in range(repeat):
+            for text in texts:
+                t0 = time.process_time()
+                scanner(text)
+                timings.append((time.process_time() - t0) * 1000)
+        results[label] = timings
+
+    baseline = summarize_timings('per-pattern', results['per-pattern'])
+    summarize_timings('compiled', results['compiled'], baseline)
+
+    def keyset(matches):
+        return {(m['pattern'], m['start'], m['value']) for m in matches}
+
+    same = sum(1 for text in texts
+               if keyset(scan_facts(text)) == keyset(scan_facts_per_pattern(text)))
+    log(f'  compiled matches identical to per-pattern on {same}/{len(texts)} texts')
+    return results
+
+
+def bench_pipeline(bodies, threads, workers, repeat):
+    """Parse stage throughput: fetcher threads parsing inline vs. feeding a process pool."""
+    log(f'Pipeline benchmark: {len(bodies)} bodies x {repeat}, {threads} fetcher threads, '
+        f'{sum(len(b) for b in bodies) / 1_048_576:.1f} MB')
+
+    def fake_response(body):
+        resp = requests.Response()
+        resp._content = body
+        resp.status_code = 200
+        resp.headers['Content-Type'] = 'text/html'
+        return resp
+
+    jobs = [body for _ in range(repeat) for body in bodies]
+    results = {}
+    for label, pool_workers in (('threads', 0), (f'{workers} procs', workers)):
+        if pool_workers:
+            scrape_pipeline.enable_parse_pool(pool_workers)
+            # Warm up the worker processes before timing
+            list(ThreadPoolExecutor(pool_workers).map(
+                lambda b: scrape_pipeline.parse_response(fake_response(b)), bodies[:pool_workers]))
+        t0 = time.monotonic()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            pages = list(executor.map(
+                lambda b: scrape_pipeline.parse_response(fake_response(b), max_words=5000), jobs))
+        wall = time.monotonic() - t0
+        scrape_pipeline.close_parse_pool()
+        results[label] = (wall, pages)
+        log(f'  {label:12s} {len(jobs) / wall:7.1f} pages/s  ({wall:.2f}s wall)')
+
+    inline, pooled = (pages for _, pages in results.values())
+    same = sum(1 for a, b in zip(inline, pooled) if a == b)
+    log(f'  pool output identical to inline on {same}/{len(jobs)} pages')
+    log(f'  {scrape_pipeline.format_pipeline_stats()}')
+    return results
+
+
+def bench_dates(texts, repeat):
+    """Freshness date search: single-pass scanner vs. the previous five-pass search."""
+    log(f'Date scanner benchmark: {len(texts)} texts, {repeat} run(s), '
+        f'{sum(len(t) for t in texts) / max(len(texts), 1):.0f} chars/text avg')
+
+    results = {}
+    for label, scanner in (('per-pattern', latest_date_per_pattern), ('single-pass', latest_date)):
+        timings = []
+        for _ in range(repeat):
+            for text in texts:
+                t0 = time.process_time()
+                scanner(text)
+                timings.append((time.process_time() - t0) * 1000)
+        results[label] = timings
+
+    baseline = summarize_timings('per-pattern', results['per-pattern'])
+    summarize_timings('single-pass', results['single-pass'], baseline)
+
+    # Relative phrases resolve to "now", which differs per call: compare dates only
+    same = newer = older = 0
+    for text in texts:
+        new, old = latest_date(text), latest_date_per_pattern(text)
+        new, old = new and new.date(), old and old.date()
+        if new == old:
+            same += 1
+        elif old is None or (new is not None and new > old):
+            newer += 1
+        else:
+            older += 1
+    log(f'  single-pass latest date identical on {same}/{len(texts)} texts, '
+        f'more recent on {newer} (Dutch/Spanish/relative forms), older on {older}')
+    return results
+
+
+def bench_scrape(archive, threads, latency_scale, parse_workers, limit=None):
+    """End-to-end R2 POI scrape throughput against a replayed archive."""
+    # Imported here: R2 needs the DB driver, which the other benchmarks do not
+    from fase_r2_source_data_enrichment import scrape_single_poi
+
+    urls = scrape_replay.archive_urls(archive)[:limit]
+    if not urls:
+        log(f'No recorded main pages in {archive}')
+        sys.exit(1)
+    log(f'Scrape benchmark: {len(urls)} POI websites from {archive}, {threads} threads, '
+        f'latency x{latency_scale}, {parse_workers or "no"} parser processes')
+
+    ready = multiprocessing.Queue()
+    server = multiprocessing.Process(target=scrape_replay.serve,
+                                     args=(archive, 0, latency_scale, ready), daemon=True)
+    server.start()
+    try:
+        enable_replay(ready.get(timeout=30))
+        if parse_workers:
+            scrape_pipeline.enable_parse_pool(parse_workers)
+        requests_before = connection_stats()['requests']
+        self_before = resource.getrusage(resource.RUSAGE_SELF)
+        children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(lambda job: scrape_single_poi(job[0], job[1], ''),
+                                    enumerate(urls)))
+        wall = time.monotonic() - started
+        pages = connection_stats()['requests'] - requests_before
+        scrape_pipeline.close_parse_pool()   # Parser processes exit: their CPU is counted below
+        self_after = resource.getrusage(resource.RUSAGE_SELF)
+        children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    finally:
+        server.terminate()
+
+    cpu = ((self_after.ru_utime + self_after.ru_stime) - (self_before.ru_utime + self_before.ru_stime)
+           + (children_after.ru_utime + children_after.ru_stime)
+           - (children_before.ru_utime + children_before.ru_stime))
+    ok = sum(1 for r in results if r['scrape_success'])
+    log(f'  {ok}/{len(urls)} POIs OK, {pages} requests in {wall:.1f}s wall')
+    log(f'  throughput   {pages / wall:7.1f} pages/s  {len(urls) / wall:6.1f} POIs/s')
+    log(f'  CPU          {cpu / max(pages, 1) * 1000:7.2f} ms/page  ({cpu:.1f}s total, '
+        f'{cpu / wall * 100:.0f}% of one core)')
+    log(f'  memory       {self_after.ru_maxrss / 1024:7.1f} MB peak RSS')
+    return {'pages': pages, 'wall': wall, 'cpu': cpu, 'ok': ok,
+            'peak_rss_mb': self_after.ru_maxrss / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scraper benchmarks on a recorded corpus')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_extract = sub.add_parser('extract', help='HTML extraction CPU time per page')
+    p_extract.add_argument('--corpus', required=True, help='HTML directory or page cache dir')
+    p_extract.add_argument('--backends', default=','.join(EXTRACTORS),
+                           help='Comma-separated extractor backends')
+    p_extract.add_argument('--repeat', type=int, default=1)
+    p_extract.add_argument('--limit', type=int, default=None, help='Max pages to load')
+
+    p_facts = sub.add_parser('facts', help='Fact pattern scanning CPU time per text')
+    p_facts.add_argument('--corpus', required=True, help='HTML directory or page cache dir')
+    p_facts.add_argument('--repeat', type=int, default=3)
+    p_facts.add_argument('--limit', type=int, default=None, help='Max pages to load')
+
+    p_pipeline = sub.add_parser('pipeline', help='Threaded parsing vs. parser process pool')
+    p_pipeline.add_argument('--corpus', required=True, help='HTML directory or page cache dir')
+    p_pipeline.add_argument('--threads', type=int, default=8, help='Fetcher threads')
+    p_pipeline.add_argument('--workers', type=int, default=scrape_pipeline.PARSE_WORKERS,
+                            help='Parser processes')
+    p_pipeline.add_argument('--repeat', type=int, default=3)
+    p_pipeline.add_argument('--limit', type=int, default=None, help='Max pages to load')
+
+    p_dates = sub.add_parser('dates', help='Freshness date scanning CPU time per text')
+    p_dates.add_argument('--corpus', required=True,
+                         help='R6b result JSON, HTML directory or page cache dir')
+    p_dates.add_argument('--repeat', type=int, default=3)
+    p_dates.add_argument('--limit', type=int, default=None, help='Max texts to load')
+
+    p_scrape = sub.add_parser('scrape', help='End-to-end POI scrape against a replay archive')
+    p_scrape.add_argument('--archive', default=scrape_replay.REPLAY_ARCHIVE,
+                          help='Archive recorded with scrape_replay.py record')
+    p_scrape.add_argument('--threads', type=int, default=8, help='Concurrent POI scrapes')
+    p_scrape.add_argument('--latency-scale', type=float, default=1.0,
+                          help='Multiply recorded delays (0 = CPU-bound run)')
+    p_scrape.add_argument('--parse-workers', type=int, default=0, help='Parser processes')
+    p_scrape.add_argument('--limit', type=int, default=None, help='Max POIs')
+
+    args = parser.parse_args()
+
+    if args.command == 'scrape':
+        bench_scrape(args.archive, args.threads, args.latency_scale, args.parse_workers, args.limit)
+        return
+    if args.command == 'dates':
+        if os.path.isfile(args.corpus):
+            texts = load_r6b_texts(args.corpus, limit=args.limit)
+        else:
+            texts = [extract_page(html)['text']
+                     for html in load_html_corpus(args.corpus, limit=args.limit)]
+        if not texts:
+            log(f'No texts found in {args.corpus}')
+            sys.exit(1)
+        bench_dates(texts, args.repeat)
+        return
+
+    docs = load_html_corpus(args.corpus, limit=args.limit, raw=args.command == 'pipeline')
+    if not docs:
+        log(f'No HTML documents found in {args.corpus}')
+        sys.exit(1)
+
+    if args.command == 'extract':
+        bench_extract(docs, [b.strip() for b in args.backends.split(',') if b.strip()],
+                      args.repeat)
+    elif args.command == 'facts':
+        bench_facts(docs, args.repeat)
+    elif args.command == 'pipeline':
+        bench_pipeline(docs, args.threads, args.workers, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
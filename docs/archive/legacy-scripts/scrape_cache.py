@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Persistent conditional-GET page cache shared by the R1, R2 and R6b scrapers.
+
+Pages are stored content-addressed (sha256 of the body, zlib-compressed under
+bodies/ab/abcd...), so identical pages are kept once. A small SQLite index maps
+each requested URL to its validators (ETag / Last-Modified) and body hash.
+On a re-scrape `scrape_http.http_get` sends If-None-Match / If-Modified-Since
+and serves a 304 from disk, so only pages that actually changed are downloaded.
+
+Usage:
+    from scrape_http import enable_page_cache
+    enable_page_cache()                       # default: PAGE_CACHE_DIR
+    ...
+    log(f'Page cache: {format_cache_stats()}')
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timezone
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# ============================================================
+# CONFIG
+# ============================================================
+PAGE_CACHE_DIR = '/root/scrape_page_cache'
+
+# ============================================================
+# STATE
+# ============================================================
+_lock = threading.Lock()
+_state = {'conn': None, 'dir': None}
+_stats = {'lookups': 0, 'revalidated': 0, 'stored': 0, 'bytes_saved': 0}
+
+
+def open_cache(cache_dir=PAGE_CACHE_DIR):
+    """Open (or create) the cache at cache_dir and make it the active cache."""
+    os.makedirs(os.path.join(cache_dir, 'bodies'), exist_ok=True)
+    conn = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite'),
+                           check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pages (
+            url TEXT PRIMARY KEY,
+            final_url TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            content_type TEXT,
+            body_sha256 TEXT NOT NULL,
+            body_size INTEGER,
+            fetched_at TEXT,
+            validated_at TEXT
+        )
+    """)
+    conn.commit()
+    with _lock:
+        if _state['conn'] is not None:
+            _state['conn'].close()
+        _state['conn'] = conn
+        _state['dir'] = cache_dir
+
+
+def is_enabled():
+    return _state['conn'] is not None
+
+
+def _body_path(sha):
+    return os.path.join(_state['dir'], 'bodies', sha[:2], sha)
+
+
+def lookup(url):
+    """Return the cache entry for url as a dict, or None."""
+    with _lock:
+        _stats['lookups'] += 1
+        row = _state['conn'].execute(
+            'SELECT url, final_url, etag, last_modified, content_type, body_sha256, '
+            'body_size FROM pages WHERE url = ?', (url,)).fetchone()
+    if not row:
+        return None
+    keys = ('url', 'final_url', 'etag', 'last_modified', 'content_type',
+            'body_sha256', 'body_size')
+    return dict(zip(keys, row))
+
+
+def conditional_headers(entry):
+    """Validator headers to revalidate a cached entry."""
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+def store(url, resp):
+    """Store a 200 response that carries validators. Returns True if stored."""
+    etag = resp.headers.get('ETag')
+    last_modified = resp.headers.get('Last-Modified')
+    if not etag and not last_modified:
+        return False  # Nothing to revalidate with next time
+
+    body = resp.content
+    sha = hashlib.sha256(body).hexdigest()
+    path = _body_path(sha)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(zlib.compress(body, 6))
+        os.replace(tmp, path)
+
+    now = datetime.now(timezone.utc).isoformat()
+    with _lock:
+        _state['conn'].execute("""
+            INSERT OR REPLACE INTO pages
+                (url, final_url, etag, last_modified, content_type,
+                 body_sha256, body_size, fetched_at, validated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (url, resp.url, etag, last_modified, resp.headers.get('Content-Type'),
+              sha, len(body), now, now))
+        _state['conn'].commit()
+        _stats['stored'] += 1
+    return True
+
+
+def forget(url):
+    with _lock:
+        _state['conn'].execute('DELETE FROM pages WHERE url = ?', (url,))
+        _state['conn'].commit()
+
+
+def cached_response(entry, not_modified_resp):
+    """Build a 200 Response from a cache entry after a 304. None if body is gone."""
+    try:
+        with open(_body_path(entry['body_sha256']), 'rb') as f:
+            body = zlib.decompress(f.read())
+    except (OSError, zlib.error):
+        return None
+
+    resp = requests.Response()
+    resp.status_code = 200
+    resp.reason = 'OK (revalidated)'
+    resp._content = body
+    resp.url = entry['final_url'] or entry['url']
+    resp.request = not_modified_resp.request
+    resp.history = not_modified_resp.history
+    resp.elapsed = not_modified_resp.elapsed
+    resp.headers = CaseInsensitiveDict(not_modified_resp.headers)
+    if entry.get('content_type'):
+        resp.headers['Content-Type'] = entry['content_type']
+    resp.from_cache = True
+
+    with _lock:
+        _state['conn'].execute('UPDATE pages SET validated_at = ? WHERE url = ?',
+                               (datetime.now(timezone.utc).isoformat(), entry['url']))
+        _state['conn'].commit()
+        _stats['revalidated'] += 1
+        _stats['bytes_saved'] += len(body)
+    return resp
+
+
+def cache_stats():
+    with _lock:
+        return dict(_stats)
+
+
+def format_cache_stats():
+    """One-line summary for scraper logs."""
+    cs = cache_stats()
+    return (f'{cs["revalidated"]}/{cs["lookups"]} pages unchanged (304), '
+            f'{cs["stored"]} stored, {cs["bytes_saved"] / 1_048_576:.1f} MB not re-downloaded')
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Single-pass date scanner for freshness detection (R6b Facebook and website text).
+
+`latest_date(text)` returns the most recent date mentioned in text, or None.
+It lower-cases the text once and makes one pass over it, recognizing:
+
+    month forms  : 'January 15, 2026', '15 jan 2026', '3 maart 2025',
+                   '15 de enero de 2026', '1. okt. 2024'   (EN / NL / ES)
+    ISO dates    : '2025-12-03'
+    copyright    : '© 2024', '®2023', 'copyright 2025'     (-> 1 June of that year)
+    relative     : 'yesterday', '3 hours ago', 'gisteren', '2 weken geleden',
+                   'hace 5 días', 'hace un momento'         (-> relative to now)
+
+Every absolute form carries a year, so the pass is a scan for 4-digit years
+(YEAR_REGEX). Each year is classified by what follows it (ISO_TAIL) or by
+what stands right before it (YEAR_CONTEXT, one compiled alternation matched
+on a short window). Only the running maximum is kept. A year older than the
+current maximum is skipped without looking at its context, and a datetime is
+built only for a candidate that beats the maximum. Relative phrases are
+scanned only when one of their guard words occurs in the text.
+
+A single regex with one branch per date form was measured too. In CPython's
+re it is barely faster than the separate passes, because it tries every
+branch at every offset (see scrape_facts).
+
+ISO and copyright years outside [MIN_YEAR, MAX_YEAR] are ignored, as before.
+These are page furniture such as '© 1998' or version strings.
+
+`latest_date_per_pattern(text)` is the previous approach (five re.finditer
+passes, a datetime per match, text.lower() per recent-activity indicator),
+kept for parity checks and benchmarking. The scanner finds the same latest
+date on English month names, 'DD mon YYYY', ISO, copyright and the fixed
+recent-activity phrases. It also recognizes Dutch / Spanish full month
+names, 'de' forms and numeric 'N days ago' phrases, which the old scanner
+missed.
+
+Benchmark: python3 scrape_benchmark.py dates --corpus /root/fase_r6b_deep_rescrape.json
+"""
+
+import re
+from datetime import datetime, timedelta
+
+# ============================================================
+# CONFIG
+# ============================================================
+MIN_YEAR = 2020
+MAX_YEAR = datetime.now().year + 1
+COPYRIGHT_MONTH_DAY = (6, 1)      # '© 2024' counts as mid-year
+
+# Month name prefixes (first three letters) -> month number
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+    'mrt': 3, 'maa': 3, 'mei': 5, 'okt': 10,                        # Dutch
+    'ene': 1, 'abr': 4, 'ago': 8, 'set': 9, 'dic': 12,              # Spanish
+}
+ENGLISH_MONTHS = ('january', 'february', 'march', 'april', 'may', 'june', 'july',
+                  'august', 'september', 'october', 'november', 'december')
+
+# Phrases that mean "now" (within the last day)
+RECENT_PHRASES = ('hour ago', 'hours ago', 'minute ago', 'minutes ago', 'yesterday', 'just now',
+                  'uur geleden', 'minuten geleden', 'gisteren',
+                  'hace un momento', 'hace una hora')
+
+# Relative units -> days
+RELATIVE_UNITS = {
+    'day': 1, 'days': 1, 'dag': 1, 'dagen': 1, 'día': 1, 'días': 1, 'dia': 1, 'dias': 1,
+    'week': 7, 'weeks': 7, 'weken': 7, 'semana': 7, 'semanas': 7,
+    'month': 30, 'months': 30, 'maand': 30, 'maanden': 30, 'mes': 30, 'meses': 30,
+}
+
+_MONTH_PREFIX = '|'.join(sorted(MONTHS, key=len, reverse=True))
+_UNITS = '|'.join(sorted(RELATIVE_UNITS, key=len, reverse=True))
+
+# The scan: every absolute date form carries a year, so candidates are the
+# 4-digit years. The regex starts with a literal digit, so re skips ahead
+# with a fast character-set search.
+YEAR_REGEX = re.compile(r'(?:19|20)\d\d')
+ISO_TAIL = re.compile(r'-(\d\d)-(\d\d)')
+# What may stand right before a year (matched on a short window ending at the year)
+YEAR_CONTEXT = re.compile(
+    # 'january 15, 2026'
+    r'(?:(?P<en_m>' + '|'.join(ENGLISH_MONTHS) + r')\s+(?P<en_d>\d{1,2}),?\s+'
+    # '15 jan 2026', '3 maart 2025', '15 de enero de 2026', '1. okt. 2024'
+    r'|(?<!\d)(?P<dm_d>\d{1,2})\.?\s+(?:de\s+)?(?P<dm_m>' + _MONTH_PREFIX + r')[a-z]*\.?,?\s+(?:de\s+)?'
+    # '© 2024', 'copyright 2024'
+    r'|(?P<copy>[©®]\s*|copyright\s+))$'
+)
+CONTEXT_WINDOW = 40   # Chars before a year searched for its month/day or copyright sign
+
+# Relative phrases, only scanned when a guard word occurs in the text
+RELATIVE_GUARDS = ('ago', 'geleden', 'hace', 'yesterday', 'gisteren', 'just now')
+RELATIVE_REGEX = re.compile(
+    # '3 days ago', '2 weken geleden', 'hace 5 días'
+    r'(?P<rel_n>\d{1,3})\s+(?P<rel_u>' + _UNITS + r')\s+(?:ago|geleden)'
+    r'|hace\s+(?P<es_n>\d{1,3})\s+(?P<es_u>' + _UNITS + r')\b'
+    # 'yesterday', 'uur geleden', ...
+    r'|(?P<recent>' + '|'.join(re.escape(p) for p in RECENT_PHRASES) + r')'
+)
+
+
+# ============================================================
+# SCANNING
+# ============================================================
+def _relative_latest(lowered, now):
+    """Most recent date among the relative phrases in lowered text, or None."""
+    latest = None
+    for m in RELATIVE_REGEX.finditer(lowered):
+        if m.group('recent'):
+            return now
+        n, unit = (m.group('rel_n'), m.group('rel_u')) if m.group('rel_n') else (m.group('es_n'),
+                                                                                 m.group('es_u'))
+        when = now - timedelta(days=int(n) * RELATIVE_UNITS[unit])
+        if latest is None or when > latest:
+            latest = when
+    return latest
+
+
+def latest_date(text, now=None):
+    """Most recent date mentioned in text (datetime), or None."""
+    if not text:
+        return None
+    lowered = text.lower()
+
+    best = None
+    best_key = (0, 0, 0)
+    for m in YEAR_REGEX.finditer(lowered):
+        start, end = m.span()
+        year = int(m.group())
+        if year < best_key[0]:
+            continue        # Cannot beat the running maximum, whatever its month/day
+        if start and lowered[start - 1].isdigit():
+            continue        # Inside a longer number
+        if lowered[end:end + 1].isdigit():
+            continue
+
+        key = None
+        iso = ISO_TAIL.match(lowered, end) if lowered[end:end + 1] == '-' else None
+        if iso:
+            if not MIN_YEAR <= year <= MAX_YEAR:
+                continue
+            key = (year, int(iso.group(1)), int(iso.group(2)))
+        else:
+            context = YEAR_CONTEXT.search(lowered, max(start - CONTEXT_WINDOW, 0), start)
+            if context is None:
+                continue
+            if context.group('en_m'):
+                key = (year, ENGLISH_MONTHS.index(context.group('en_m')) + 1,
+                       int(context.group('en_d')))
+            elif context.group('dm_m'):
+                key = (year, MONTHS[context.group('dm_m')], int(context.group('dm_d')))
+            elif MIN_YEAR <= year <= MAX_YEAR:
+                key = (year,) + COPYRIGHT_MONTH_DAY
+        if key is None or key <= best_key:
+            continue
+        try:
+            best = datetime(*key)
+        except ValueError:
+            continue
+        best_key = key
+
+    if any(guard in lowered for guard in RELATIVE_GUARDS):
+        relative = _relative_latest(lowered, now or datetime.now())
+        if relative is not None and (best is None or relative >= best):
+            best = relative
+    return best
+
+
+def latest_date_per_pattern(text):
+    """Reference scanner: the previous five-pass detect_freshness_from_text() date search.
+
+    Returns the latest date like latest_date(); used for benchmarking and parity checks.
+    """
+    if not text:
+        return None
+
+    found_dates = []
+
+    # Pattern 1: "January 15, 2026"
+    for m in re.finditer(
+        r'(January|February|March|April|May|June|July|August|'
+        r'September|October|November|December)\s+(\d{1,2}),?\s+(\d{4})',
+        text, re.IGNORECASE
+    ):
+        try:
+            d = datetime.strptime(f"{m.group(1)} {m.group(2)} {m.group(3)}", "%B %d %Y")
+            found_dates.append(d)
+        except ValueError:
+            pass
+
+    # Pattern 2: "15 jan 2026" / "3 feb 2025"
+    month_map = {
+        'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+        'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+        'mrt': 3, 'mei': 5, 'okt': 10,  # Dutch
+        'ene': 1, 'abr': 4, 'ago': 8, 'dic': 12,  # Spanish
+    }
+    for m in re.finditer(
+        r'(\d{1,2})\s+(jan|feb|mar|mrt|apr|may|mei|jun|jul|aug|sep|oct|okt|nov|dec|'
+        r'ene|abr|ago|dic)[a-z]*\.?\s+(\d{4})',
+        text, re.IGNORECASE
+    ):
+        mn = month_map.get(m.group(2)[:3].lower())
+        if mn:
+            try:
+                found_dates.append(datetime(int(m.group(3)), mn, int(m.group(1))))
+            except ValueError:
+                pass
+
+    # Pattern 3: ISO dates "2025-12-03"
+    for m in re.finditer(r'(\d{4})-(\d{2})-(\d{2})', text):
+        try:
+            d = datetime(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+            if MIN_YEAR <= d.year <= MAX_YEAR:
+                found_dates.append(d)
+        except ValueError:
+            pass
+
+    # Pattern 4: Recent indicators
+    for indicator in RECENT_PHRASES:
+        if indicator.lower() in text.lower():
+            found_dates.append(datetime.now())
+            break
+
+    # Pattern 5: Copyright years
+    for m in re.finditer(r'[©®]\s*(\d{4})', text):
+        yr = int(m.group(1))
+        if MIN_YEAR <= yr <= MAX_YEAR:
+            found_dates.append(datetime(yr, *COPYRIGHT_MONTH_DAY))
+    for m in re.finditer(r'copyright\s+(\d{4})', text, re.IGNORECASE):
+        yr = int(m.group(1))
+        if MIN_YEAR <= yr <= MAX_YEAR:
+            found_dates.append(datetime(yr, *COPYRIGHT_MONTH_DAY))
+
+    return max(found_dates) if found_dates else None
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Cross-POI page deduplication and boilerplate stripping for scraped pages.
+
+Scraped page text (one line per text node, see scrape_extract) is split into
+blocks. Each block is content-hashed and stored once in a BlockStore; pages
+are lists of block references. With all pages loaded, `finalize()` finds:
+
+    near-duplicate pages : 64-bit SimHash over a page's blocks; pages within
+                           SIMHASH_MAX_DISTANCE bits are clustered (chains,
+                           shared booking platforms, subpages that are the
+                           homepage again). Candidates come from 4x16-bit
+                           band buckets (no pairwise scan) and are confirmed
+                           by block-set Jaccard, so short pages that share
+                           one long block (a cookie banner) are not merged.
+    domain boilerplate   : blocks present on at least BOILERPLATE_MIN_PAGES
+                           distinct pages (near-duplicates count once) and on
+                           at least BOILERPLATE_MIN_SHARE of a domain's pages
+                           (cookie banners, menus that survive tag stripping).
+    global boilerplate   : blocks of at least GLOBAL_BOILERPLATE_MIN_CHARS seen
+                           on GLOBAL_BOILERPLATE_DOMAINS or more domains (CMS /
+                           booking widget / cookie plugin text). Short lines
+                           such as 'Dinsdag: gesloten' are common to many
+                           sites without being boilerplate.
+
+Blocks with a fact (scrape_facts.scan_facts: opening hours, prices, phone,
+address, ...) are never boilerplate. 'Maandag: 10:00 - 17:00' on six sites
+is six POIs' opening hours.
+
+`clean_text()` then rebuilds a page without boilerplate and without blocks the
+same POI already emitted on an earlier page. Repeats within one page are kept
+(an opening-hours table says '10:00 - 17:00' or 'Gesloten' on several days),
+and so are short and fact-bearing blocks repeated on a later page.
+
+Usage:
+    store = build_block_store(scraped_data)
+    seen = set()
+    main = store.clean_text(poi_id, 'main', seen)
+    about = store.clean_text(poi_id, '/over-ons', seen)
+    store.save(path)
+"""
+
+import hashlib
+import json
+import math
+import os
+from collections import Counter
+from urllib.parse import urlparse
+
+from scrape_facts import scan_facts
+
+# ============================================================
+# CONFIG
+# ============================================================
+SIMHASH_BITS = 64
+SIMHASH_MAX_DISTANCE = 3            # Hamming distance for near-duplicate pages
+SIMHASH_BANDS = 4                   # > MAX_DISTANCE, so a match shares >= 1 band
+NEAR_DUPLICATE_MIN_JACCARD = 0.7    # SimHash candidates must also share 70% of blocks
+BOILERPLATE_MIN_PAGES = 3
+BOILERPLATE_MIN_SHARE = 0.5
+GLOBAL_BOILERPLATE_DOMAINS = 5
+GLOBAL_BOILERPLATE_MIN_CHARS = 40   # Shorter blocks are only stripped per domain
+REPEAT_MIN_CHARS = 40               # Shorter blocks repeat across a POI's pages freely
+
+MAIN_PAGE = 'main'
+
+
+# ============================================================
+# HASHING
+# ============================================================
+def split_blocks(text):
+    """Non-empty, stripped lines of a page text."""
+    return [line.strip() for line in (text or '').split('\n') if line.strip()]
+
+
+def block_key(block):
+    """Stable 64-bit key of a block (case and whitespace insensitive)."""
+    normalized = ' '.join(block.lower().split())
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+
+# SimHash bit counting without a Python loop per bit: each hash is "spread"
+# into one big int with a FIELD-bit counter per hash bit (via a per-byte
+# table), so summing weighted spreads counts all 64 bits at once.
+_FIELD = 48
+_FIELD_MASK = (1 << _FIELD) - 1
+_BYTE_SPREAD = [sum(((b >> i) & 1) << (_FIELD * i) for i in range(8)) for b in range(256)]
+_spread_cache = {}
+
+
+def _spread(key):
+    spread = _spread_cache.get(key)
+    if spread is None:
+        h = int(key, 16)
+        spread = 0
+        for byte in range(SIMHASH_BITS // 8):
+            spread |= _BYTE_SPREAD[h >> (8 * byte) & 0xFF] << (_FIELD * 8 * byte)
+        _spread_cache[key] = spread
+    return spread
+
+
+def simhash(weighted_keys):
+    """SimHash of [(hex_key, weight)] features."""
+    counts = 0
+    total = 0
+    for key, weight in weighted_keys:
+        counts += _spread(key) * weight
+        total += weight
+    result = 0
+    for bit in range(SIMHASH_BITS):
+        if 2 * (counts >> (_FIELD * bit) & _FIELD_MASK) > total:
+            result |= 1 << bit
+    return result
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def _domain(url):
+    host = urlparse(url if '//' in (url or '') else f'//{url}').netloc.lower().split(':')[0]
+    return host[4:] if host.startswith('www.') else host
+
+
+# ============================================================
+# BLOCK STORE
+# ============================================================
+class BlockStore:
+    """Unique blocks + per-page block references; see module docstring."""
+
+    def __init__(self):
+        self.blocks = {}         # key -> text (first occurrence)
+        self.pages = {}          # (poi_id, page) -> [keys]
+        self.page_domain = {}    # (poi_id, page) -> domain
+        self.raw_chars = 0
+        self.boilerplate = {}    # domain -> {keys}
+        self.global_boilerplate = set()
+        self.cluster_of = {}     # (poi_id, page) -> cluster id
+        self.clusters = {}       # cluster id -> [(poi_id, page)]
+
+    def add_page(self, poi_id, page, domain, text):
+        keys = []
+        for block in split_blocks(text):
+            key = block_key(block)
+            self.blocks.setdefault(key, block)
+            keys.append(key)
+            self.raw_chars += len(block)
+        self.pages[(poi_id, page)] = keys
+        self.page_domain[(poi_id, page)] = domain
+
+    def finalize(self):
+        """Cluster near-duplicate pages, then mark boilerplate blocks."""
+        self._cluster_pages()
+
+        # Only blocks on several pages can be boilerplate (facts never); count those first
+        page_counts = Counter()
+        for keys in self.pages.values():
+            page_counts.update(set(keys))
+        min_pages = min(BOILERPLATE_MIN_PAGES, GLOBAL_BOILERPLATE_DOMAINS)
+        repeated = {key for key, count in page_counts.items()
+                    if count >= min_pages and not scan_facts(self.blocks[key])}
+
+        # Distinct page clusters per domain, and per (domain, repeated block)
+        domain_clusters = {}
+        block_clusters = {}
+        block_domains = {}
+        for page_id, keys in self.pages.items():
+            domain = self.page_domain[page_id]
+            cluster = self.cluster_of[page_id]
+            domain_clusters.setdefault(domain, set()).add(cluster)
+            for key in repeated.intersection(keys):
+                block_clusters.setdefault((domain, key), set()).add(cluster)
+                block_domains.setdefault(key, set()).add(domain)
+
+        for (domain, key), clusters in block_clusters.items():
+            needed = max(BOILERPLATE_MIN_PAGES,
+                         math.ceil(BOILERPLATE_MIN_SHARE * len(domain_clusters[domain])))
+            if len(clusters) >= needed:
+                self.boilerplate.setdefault(domain, set()).add(key)
+        self.global_boilerplate = {key for key, domains in block_domains.items()
+                                   if len(domains) >= GLOBAL_BOILERPLATE_DOMAINS
+                                   and len(self.blocks[key]) >= GLOBAL_BOILERPLATE_MIN_CHARS}
+
+    def _cluster_pages(self):
+        band_bits = SIMHASH_BITS // SIMHASH_BANDS
+        band_mask = (1 << band_bits) - 1
+        hashes = {}
+        key_sets = {}
+        buckets = {}
+        parent = {}
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for page_id, keys in self.pages.items():
+            parent[page_id] = page_id
+            if not keys:
+                continue
+            weights = {}
+            for key in keys:
+                weights[key] = weights.get(key, 0) + len(self.blocks[key])
+            h = simhash(weights.items())
+            hashes[page_id] = h
+            key_sets[page_id] = key_set = set(weights)
+            for band in range(SIMHASH_BANDS):
+                band_value = h >> (band * band_bits) & band_mask
+                for other in buckets.setdefault((band, band_value), []):
+                    if hamming(h, hashes[other]) > SIMHASH_MAX_DISTANCE:
+                        continue
+                    other_set = key_sets[other]
+                    shared = len(key_set & other_set)
+                    if shared >= NEAR_DUPLICATE_MIN_JACCARD * (len(key_set) + len(other_set) - shared):
+                        parent[find(page_id)] = find(other)
+                buckets[(band, band_value)].append(page_id)
+
+        self.cluster_of = {page_id: find(page_id) for page_id in self.pages}
+        self.clusters = {}
+        for page_id, root in self.cluster_of.items():
+            self.clusters.setdefault(root, []).append(page_id)
+
+    # ------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------
+    def is_boilerplate(self, domain, key):
+        return key in self.global_boilerplate or key in self.boilerplate.get(domain, ())
+
+    def near_duplicates(self, poi_id, page):
+        """Other pages in the same near-duplicate cluster."""
+        page_id = (poi_id, page)
+        cluster = self.clusters.get(self.cluster_of.get(page_id), [])
+        return [other for other in cluster if other != page_id]
+
+    def clean_text(self, poi_id, page, seen=None):
+        """Page text without boilerplate and without blocks already in `seen`.
+
+        `seen` (a set of block keys) is updated once the page is done, so
+        passing the same set for a POI's main page and subpages emits a long,
+        fact-free block on the first page only. Repeats within the page itself
+        are kept. A main page that is entirely boilerplate is returned
+        unstripped.
+        """
+        page_id = (poi_id, page)
+        keys = self.pages.get(page_id, [])
+        domain = self.page_domain.get(page_id)
+        seen = set() if seen is None else seen
+        lines = []
+        for key in keys:
+            if self.is_boilerplate(domain, key) or key in seen and self._drops_on_repeat(key):
+                continue
+            lines.append(self.blocks[key])
+        seen.update(keys)
+        if not lines and page == MAIN_PAGE:
+            lines = [self.blocks[key] for key in keys]
+        return '\n'.join(lines)
+
+    def _drops_on_repeat(self, key):
+        """True if a repeat of this block on a later page may be dropped."""
+        block = self.blocks[key]
+        return len(block) >= REPEAT_MIN_CHARS and not scan_facts(block)
+
+    def stats(self):
+        unique_chars = sum(len(b) for b in self.blocks.values())
+        boilerplate_keys = set(self.global_boilerplate)
+        for keys in self.boilerplate.values():
+            boilerplate_keys |= keys
+        return {
+            'pages': len(self.pages),
+            'blocks_total': sum(len(k) for k in self.pages.values()),
+            'blocks_unique': len(self.blocks),
+            'boilerplate_blocks': len(boilerplate_keys),
+            'near_duplicate_pages': sum(len(c) - 1 for c in self.clusters.values()),
+            'raw_chars': self.raw_chars,
+            'unique_chars': unique_chars,
+        }
+
+    def save(self, path):
+        """Write blocks once + page references, boilerplate and clusters as JSON."""
+        data = {
+            'blocks': self.blocks,
+            'pages': {f'{poi_id}|{page}': keys for (poi_id, page), keys in self.pages.items()},
+            'boilerplate': {domain: sorted(keys) for domain, keys in self.boilerplate.items()},
+            'global_boilerplate': sorted(self.global_boilerplate),
+            'near_duplicates': [[f'{poi_id}|{page}' for poi_id, page in cluster]
+                                for cluster in self.clusters.values() if len(cluster) > 1],
+        }
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+def build_block_store(scraped_data):
+    """BlockStore over the main page and subpages of all successful scrapes."""
+    store = BlockStore()
+    for sd in scraped_data:
+        if not sd.get('scrape_success'):
+            continue
+        domain = _domain(sd.get('website', ''))
+        store.add_page(sd['poi_id'], MAIN_PAGE, domain, sd.get('main_content', ''))
+        for page, text in (sd.get('subpages') or {}).items():
+            store.add_page(sd['poi_id'], page, domain, text)
+    store.finalize()
+    return store
+
+
+def format_dedupe_stats(stats):
+    """One-line summary for logs."""
+    saved = stats['raw_chars'] - stats['unique_chars']
+    pct = saved / stats['raw_chars'] * 100 if stats['raw_chars'] else 0
+    return (f'{stats["pages"]} pages, {stats["blocks_unique"]}/{stats["blocks_total"]} unique blocks, '
+            f'{stats["boilerplate_blocks"]} boilerplate, {stats["near_duplicate_pages"]} '
+            f'near-duplicate pages, {saved:,} chars stored once ({pct:.0f}%)')
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Subpage discovery for the POI website scrapers.
+
+Instead of guessing fixed paths (/over-ons, /menu, /prijzen ...) one after
+another, `discover_subpages()` collects candidate URLs from:
+
+    1. the homepage's internal links (already extracted, no extra request)
+    2. robots.txt (Disallow rules for our user agent and Sitemap: lines; the
+       scrape_robots cache when crawl politeness is enabled)
+    3. the sitemap (only when the homepage links give fewer than top_n
+       keyword hits; one level of sitemap index is followed)
+
+Candidates are ranked by topic keywords (hours, prices, menu, about, services,
+contact; NL/EN/ES/DE) in their path and anchor text. The best page per topic
+is picked first, then the rest by score. `fetch_subpages()` downloads the
+top N on the calling thread: its keep-alive session already holds the
+connection the homepage opened, and a Crawl-delay wait only holds up this
+POI. Without crawl politeness (--ignore-robots) requests to one host are
+spaced by SUBPAGE_DELAY instead. Concurrency comes from the scrapers running
+POIs in parallel. The fixed
+guesses are only used when the site exposes no internal URLs at all (e.g. a
+JavaScript-only homepage).
+
+Usage:
+    candidates, discovery = discover_subpages(resp.url, page['links'], headers,
+                                              fallback_paths=SUBPAGES)
+    for cand, sub_resp in fetch_subpages(candidates, headers, timeout=5):
+        ...
+"""
+
+import gzip
+import html
+import os
+import re
+import time
+import unicodedata
+from urllib.parse import urljoin, urlparse, urldefrag
+from urllib.robotparser import RobotFileParser
+
+from scrape_hosts import HostUnavailable, host_of
+from scrape_http import get_robots, http_get, response_text
+from scrape_robots import is_enabled as polite
+
+# ============================================================
+# CONFIG
+# ============================================================
+DISCOVERY_TOP_N = 4         # Subpages fetched per POI
+SUBPAGE_DELAY = 0.2         # Seconds between subpage requests to a host (only with --ignore-robots)
+DISCOVERY_TIMEOUT = 5       # robots.txt / sitemap request timeout
+SITEMAP_MAX_FILES = 3       # Sitemap documents fetched per site (index + children)
+SITEMAP_MAX_URLS = 2000     # URLs read from sitemaps per site
+
+# Topic -> (weight, keywords). Keywords are matched as whole, hyphen-separated
+# words in the lower-cased, accent-stripped path and anchor text.
+TOPIC_KEYWORDS = {
+    'hours': (5, ('openingstijden', 'openingsuren', 'opening hours', 'hours',
+                  'horario', 'horarios', 'oeffnungszeiten', 'offnungszeiten')),
+    'prices': (5, ('prijzen', 'prijslijst', 'tarieven', 'prices', 'pricing', 'rates',
+                   'precios', 'tarifas', 'preise')),
+    'menu': (4, ('menu', 'menukaart', 'kaart', 'carta', 'nuestra carta',
+                 'speisekarte', 'gerechten')),
+    'about': (3, ('over ons', 'over', 'about', 'about us', 'wie zijn wij', 'sobre nosotros',
+                  'nosotros', 'quienes somos', 'ueber uns', 'uber uns')),
+    'services': (3, ('diensten', 'services', 'servicios', 'activiteiten', 'activities',
+                     'actividades', 'arrangementen', 'faciliteiten', 'facilities')),
+    'contact': (2, ('contact', 'contacto', 'kontakt', 'bereikbaarheid', 'route',
+                    'locatie', 'location', 'ubicacion')),
+}
+
+PAGE_EXTENSIONS = frozenset(['', '.html', '.htm', '.php', '.asp', '.aspx'])
+
+_LOC_RE = re.compile(r'<loc>\s*([^<]+?)\s*</loc>', re.IGNORECASE)
+_SEPARATORS_RE = re.compile(r'[^a-z0-9]+')
+
+# ============================================================
+# SCORING
+# ============================================================
+def _normalize_words(s):
+    """'/nl/Over-Ons/' -> '-nl-over-ons-' (lower-case, accents stripped)."""
+    s = unicodedata.normalize('NFKD', s or '')
+    s = ''.join(c for c in s if not unicodedata.combining(c)).lower()
+    return '-' + _SEPARATORS_RE.sub('-', s).strip('-') + '-'
+
+
+_TOPIC_TOKENS = {
+    topic: (weight, tuple(_normalize_words(kw) for kw in keywords))
+    for topic, (weight, keywords) in TOPIC_KEYWORDS.items()
+}
+
+
+def score_candidate(url, anchor_text=''):
+    """(score, topic) for a candidate URL; topic is None when no keyword hits."""
+    parsed = urlparse(url)
+    path_words = _normalize_words(parsed.path)
+    anchor_words = _normalize_words(anchor_text)
+
+    best_topic, score = None, 0
+    for topic, (weight, tokens) in _TOPIC_TOKENS.items():
+        in_path = any(t in path_words for t in tokens)
+        in_anchor = any(t in anchor_words for t in tokens)
+        if not (in_path or in_anchor):
+            continue
+        topic_score = weight + (1 if in_path and in_anchor else 0)
+        if topic_score > score:
+            best_topic, score = topic, topic_score
+    if best_topic is None:
+        return 0, None
+
+    depth = len([seg for seg in parsed.path.split('/') if seg])
+    score -= max(depth - 2, 0)
+    if parsed.query:
+        score -= 2
+    return score, best_topic
+
+
+def _bare_host(netloc):
+    host = netloc.lower().split(':')[0]
+    return host[4:] if host.startswith('www.') else host
+
+
+def _page_key(url):
+    """Normalized URL used to drop duplicates and the homepage itself."""
+    parsed = urlparse(urldefrag(url)[0])
+    return (_bare_host(parsed.netloc), parsed.path.rstrip('/') or '/', parsed.query)
+
+
+def rank_candidates(home_url, raw_candidates, robots=None, user_agent='*'):
+    """Score, filter and de-duplicate [(url, anchor_text, source)] candidates.
+
+    Returns (ranked, internal_urls): ranked is a list of candidate dicts sorted
+    by score; internal_urls is the number of distinct same-site page URLs seen
+    (scored or not).
+    """
+    home_host = _bare_host(urlparse(home_url).netloc)
+    seen = {_page_key(home_url)}
+    internal = 0
+    ranked = []
+    for href, text, source in raw_candidates:
+        try:
+            url = urldefrag(urljoin(home_url, href))[0]
+            parsed = urlparse(url)
+        except ValueError:
+            continue  # Malformed href (e.g. broken IPv6 literal)
+        if parsed.scheme not in ('http', 'https') or _bare_host(parsed.netloc) != home_host:
+            continue
+        if os.path.splitext(parsed.path)[1].lower() not in PAGE_EXTENSIONS:
+            continue
+        key = _page_key(url)
+        if key in seen:
+            continue
+        seen.add(key)
+        internal += 1
+
+        score, topic = score_candidate(url, text)
+        if topic is None or score <= 0:
+            continue
+        if robots is not None and not robots.can_fetch(user_agent, url):
+            continue
+        if source == 'link':
+            score += 1  # Linked from the homepage: a page visitors actually reach
+        ranked.append({'url': url, 'path': parsed.path or '/', 'topic': topic,
+                       'score': score, 'source': source})
+
+    ranked.sort(key=lambda c: -c['score'])
+    return ranked, internal
+
+
+def select_top(ranked, top_n):
+    """Best page per topic first (in score order), then fill up by score."""
+    picked, topics = [], set()
+    for cand in ranked:
+        if len(picked) >= top_n:
+            break
+        if cand['topic'] not in topics:
+            picked.append(cand)
+            topics.add(cand['topic'])
+    for cand in ranked:
+        if len(picked) >= top_n:
+            break
+        if cand not in picked:
+            picked.append(cand)
+    picked.sort(key=lambda c: -c['score'])
+    return picked
+
+
+# ============================================================
+# ROBOTS.TXT + SITEMAPS
+# ============================================================
+def fetch_robots(base_url, headers, timeout=DISCOVERY_TIMEOUT):
+    """Parsed robots.txt for base_url (None when absent/unreadable). Returns (robots, requests_made)."""
+    robots = get_robots(base_url, headers)   # Already read by the politeness engine when on
+    if robots is not None:
+        return robots, 0
+    try:
+        resp = http_get(urljoin(base_url, '/robots.txt'), page_type='robots', headers=headers,
+                        timeout=timeout, allow_redirects=True)
+    except HostUnavailable:
+        return None, 0
+    except Exception:
+        return None, 1
+    if resp.status_code != 200:
+        return None, 1
+    text = response_text(resp)
+    if '<html' in text[:500].lower():
+        return None, 1
+    robots = RobotFileParser()
+    robots.parse(text.splitlines())
+    return robots, 1
+
+
+def _sitemap_locs(resp):
+    body = resp.content
+    if body[:2] == b'\x1f\x8b':
+        try:
+            body = gzip.decompress(body)
+        except OSError:
+            return False, []
+    text = body.decode('utf-8', errors='replace')
+    is_index = '<sitemapindex' in text[:2000].lower()
+    return is_index, [html.unescape(loc) for loc in _LOC_RE.findall(text)]
+
+
+def read_sitemaps(base_url, robots, headers, timeout=DISCOVERY_TIMEOUT):
+    """Page URLs from the site's sitemap(s). Returns (urls, requests_made)."""
+    queue = list((robots.site_maps() if robots else None) or [urljoin(base_url, '/sitemap.xml')])
+    urls, requests_made = [], 0
+    while queue and requests_made < SITEMAP_MAX_FILES and len(urls) < SITEMAP_MAX_URLS:
+        sitemap_url = queue.pop(0)
+        try:
+            resp = http_get(sitemap_url, page_type='sitemap', headers=headers, timeout=timeout,
+                            allow_redirects=True)
+        except HostUnavailable:
+            continue   # Known dead host: nothing was sent
+        except Exception:
+            requests_made += 1
+            continue
+        requests_made += 1
+        if resp.status_code != 200:
+            continue
+        is_index, locs = _sitemap_locs(resp)
+        if is_index:
+            # WordPress & co. split per type; page sitemaps hold the static pages
+            queue.extend(sorted(locs, key=lambda u: 'page' not in u.lower()))
+        else:
+            urls.extend(locs[:SITEMAP_MAX_URLS - len(urls)])
+    return urls, requests_made
+
+
+# ============================================================
+# DISCOVERY + FETCH
+# ============================================================
+def discover_subpages(home_url, links, headers, fallback_paths=(), top_n=DISCOVERY_TOP_N,
+                      user_agent='*', timeout=DISCOVERY_TIMEOUT):
+    """Pick the top_n most promising subpages of a site.
+
+    links: [(href, anchor_text)] from the homepage (scrape_extract 'links').
+    Returns (candidates, discovery) where discovery summarizes where the
+    candidates came from and how many extra requests discovery cost.
+    """
+    robots, robots_requests = fetch_robots(home_url, headers, timeout)
+    discovery = {'source': 'links', 'requests': robots_requests, 'internal_urls': 0, 'candidates': 0}
+
+    raw = [(href, text, 'link') for href, text in links]
+    ranked, internal = rank_candidates(home_url, raw, robots, user_agent)
+
+    if len(ranked) < top_n:
+        sitemap_urls, sitemap_requests = read_sitemaps(home_url, robots, headers, timeout)
+        discovery['requests'] += sitemap_requests
+        if sitemap_urls:
+            raw += [(url, '', 'sitemap') for url in sitemap_urls]
+            ranked, internal = rank_candidates(home_url, raw, robots, user_agent)
+            discovery['source'] = 'links+sitemap' if links else 'sitemap'
+
+    if not internal and fallback_paths:
+        # Nothing to go on (JS-only homepage, no sitemap): fall back to guessing
+        raw = [(path, '', 'guess') for path in fallback_paths]
+        ranked, _ = rank_candidates(home_url, raw, robots, user_agent)
+        discovery['source'] = 'guess'
+
+    discovery['internal_urls'] = internal
+    discovery['candidates'] = len(ranked)
+    return select_top(ranked, top_n), discovery
+
+
+def _fetch_one(url, headers, timeout):
+    try:
+        return http_get(url, page_type='subpage', headers=headers, timeout=timeout,
+                        allow_redirects=True)
+    except Exception:
+        return None
+
+
+def fetch_subpages(candidates, headers, timeout):
+    """Fetch candidates in rank order on the calling thread; yield (candidate, response|None).
+
+    Lazy: a caller that stops iterating sends no further requests. Without
+    crawl politeness, requests to one host are at least SUBPAGE_DELAY apart.
+    """
+    last_request = {}   # host -> monotonic time of its previous request
+    for cand in candidates:
+        if not polite():
+            host = host_of(cand['url'])
+            if host in last_request:
+                time.sleep(max(0.0, last_request[host] + SUBPAGE_DELAY - time.monotonic()))
+            last_request[host] = time.monotonic()
+        yield cand, _fetch_one(cand['url'], headers, timeout)
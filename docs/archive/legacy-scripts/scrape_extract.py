@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Single-pass HTML extraction for the HolidaiButler scrapers.
+
+`extract_page(html)` walks the document once and returns everything the
+scrapers need from a page:
+
+    {
+        'title': str,              # first <title>
+        'meta_description': str,   # <meta name="description">
+        'language': str | None,    # <html lang> (2 letters)
+        'text': str,               # visible text, one line per text node
+        'list_items': [str],       # <li> texts in document order
+        'json_ld': [obj],          # parsed application/ld+json blocks
+        'opengraph': {str: str},   # og:*, place:*, business:* meta properties
+        'links': [(href, text)],   # <a href> with anchor text, incl. nav/header/footer
+    }
+
+With max_words, visible text stops growing once that many words are collected
+(the scrapers' 5,000 / 2,000 word caps), instead of building the full text and
+cutting it afterwards; lines keep their breaks. Title, meta, JSON-LD and links
+are still read from the whole document.
+
+Visible text skips STRIP_TAGS (script, style, nav, footer, header, ...), the
+same tags the scrapers used to decompose before BeautifulSoup.get_text().
+extract_page(html, strip_tags=CODE_TAGS) keeps header, footer and nav text.
+JSON-LD and links are collected during the same walk, before those tags are
+dropped (menus in <nav>/<footer> are the best source of subpage links).
+
+Backends (pluggable via extract_page(html, backend=...) or DEFAULT_BACKEND):
+    lxml       : lxml.html tree, walked once (default when lxml is installed)
+    htmlparser : stdlib html.parser event stream (no extra dependency)
+    bs4        : the previous BeautifulSoup html.parser pipeline (reference)
+
+Benchmark: python3 scrape_benchmark.py extract --corpus DIR
+"""
+
+import json
+from html.parser import HTMLParser
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+# ============================================================
+# CONFIG
+# ============================================================
+STRIP_TAGS = frozenset(['script', 'style', 'nav', 'footer', 'header',
+                        'noscript', 'iframe', 'svg'])
+# Only tags without readable text: keeps header/footer/nav (copyright years,
+# post timestamps) for freshness scans (R6b)
+CODE_TAGS = frozenset(['script', 'style', 'noscript', 'svg'])
+
+# OpenGraph properties kept (place:/business: carry geo, address and phone)
+OPENGRAPH_PREFIXES = ('og:', 'place:', 'business:')
+
+DEFAULT_BACKEND = 'lxml' if lxml is not None else 'htmlparser'
+
+
+# ============================================================
+# SHARED HELPERS
+# ============================================================
+def _empty_page():
+    return {
+        'title': '',
+        'meta_description': '',
+        'language': None,
+        'text': '',
+        'list_items': [],
+        'json_ld': [],
+        'opengraph': {},
+        'links': [],
+    }
+
+
+def _add_json_ld(page, raw):
+    """Parse one ld+json block; unparsable blocks are ignored."""
+    if not raw:
+        return
+    raw = raw.strip()
+    if raw.startswith('<!--'):
+        raw = raw[4:].rsplit('-->', 1)[0]
+    try:
+        page['json_ld'].append(json.loads(raw))
+    except (json.JSONDecodeError, TypeError):
+        pass
+
+
+def _add_meta(page, name, prop, content):
+    content = content or ''
+    if name and name.lower() == 'description' and not page['meta_description']:
+        page['meta_description'] = content
+    if prop and prop.startswith(OPENGRAPH_PREFIXES):
+        page['opengraph'][prop] = content
+
+
+def _add_link(page, href, text):
+    href = (href or '').strip()
+    if href and not href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+        page['links'].append((href, ' '.join(text.split())))
+
+
+def _is_json_ld(type_attr):
+    return (type_attr or '').strip().lower() == 'application/ld+json'
+
+
+class _TextCollector:
+    """Visible text and <li> buffers shared by the streaming backends."""
+
+    def __init__(self, page, max_words=None):
+        self.page = page
+        self.lines = []
+        self.open_li = []   # [(slot index in list_items, parts), ...]
+        self.words_left = max_words
+
+    def text(self, s):
+        s = s.strip()
+        if not s:
+            return
+        for _, parts in self.open_li:   # <li> items are read from the whole document
+            parts.append(s)
+        if self.words_left is not None:
+            if self.words_left <= 0:
+                return
+            words = s.split()
+            if len(words) >= self.words_left:
+                s = ' '.join(words[:self.words_left])
+            self.words_left -= len(words)
+        self.lines.append(s)
+
+    def li_start(self):
+        self.page['list_items'].append(None)
+        self.open_li.append((len(self.page['list_items']) - 1, []))
+
+    def li_end(self):
+        if self.open_li:
+            slot, parts = self.open_li.pop()
+            self.page['list_items'][slot] = ''.join(parts)
+
+    def finish(self):
+        while self.open_li:
+            self.li_end()
+        self.page['text'] = '\n'.join(self.lines)
+        self.page['list_items'] = [li for li in self.page['list_items'] if li]
+        return self.page
+
+
+# ============================================================
+# BACKEND: lxml
+# ============================================================
+def _extract_lxml(html, max_words=None, strip_tags=STRIP_TAGS):
+    page = _empty_page()
+    collector = _TextCollector(page, max_words)
+    parser = lxml.html.HTMLParser(encoding='utf-8')
+    try:
+        root = lxml.html.document_fromstring(html.encode('utf-8', 'replace'), parser=parser)
+    except (etree.ParserError, ValueError):
+        return collector.finish()
+
+    lang = root.get('lang')
+    if lang:
+        page['language'] = lang[:2]
+
+    # Children are walked directly (not iterwalk), so text after a comment
+    # or processing instruction (its tail) is kept. Explicit stack: no recursion limit.
+    stack = [(root, False)]
+    while stack:
+        el, closing = stack.pop()
+        tag = el.tag if isinstance(el.tag, str) else None  # None: comment / PI / entity
+        if closing:
+            if tag == 'li':
+                collector.li_end()
+        elif tag is None:
+            pass
+        elif tag in strip_tags:
+            if tag == 'script' and _is_json_ld(el.get('type')):
+                _add_json_ld(page, el.text)
+            else:
+                for a in el.iter('a'):
+                    _add_link(page, a.get('href'), a.text_content())
+        else:
+            if tag == 'title' and not page['title']:
+                page['title'] = ''.join(s.strip() for s in el.itertext())
+            elif tag == 'meta':
+                _add_meta(page, el.get('name'), el.get('property'), el.get('content'))
+            elif tag == 'li':
+                collector.li_start()
+            elif tag == 'a':
+                _add_link(page, el.get('href'), el.text_content())
+            if el.text:
+                collector.text(el.text)
+            stack.append((el, True))
+            stack.extend((child, False) for child in reversed(el))
+            continue
+        if el.tail and el is not root:
+            collector.text(el.tail)
+
+    return collector.finish()
+
+
+# ============================================================
+# BACKEND: stdlib html.parser
+# ============================================================
+class _SinglePassParser(HTMLParser):
+    """Event-driven extractor; never builds a tree."""
+
+    def __init__(self, max_words=None, strip_tags=STRIP_TAGS):
+        super().__init__(convert_charrefs=True)
+        self.strip_tags = strip_tags
+        self.page = _empty_page()
+        self.collector = _TextCollector(self.page, max_words)
+        self.skip_depth = 0
+        self.json_ld_buf = None
+        self.title_buf = None
+        self.list_depth = 0
+        self.li_depths = []
+        self.link_bufs = []  # open <a href> as [(href, parts)]; at most one
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'a':
+            self._close_links()  # <a> does not nest
+            if attrs.get('href'):
+                self.link_bufs.append((attrs['href'], []))
+        if tag in self.strip_tags:
+            if tag == 'script' and self.skip_depth == 0 and _is_json_ld(attrs.get('type')):
+                self.json_ld_buf = []
+            self.skip_depth += 1
+            return
+        if self.skip_depth:
+            return
+        if tag == 'html' and attrs.get('lang') and self.page['language'] is None:
+            self.page['language'] = attrs['lang'][:2]
+        elif tag == 'title' and not self.page['title'] and self.title_buf is None:
+            self.title_buf = []
+        elif tag == 'meta':
+            _add_meta(self.page, attrs.get('name'), attrs.get('property'), attrs.get('content'))
+        elif tag in ('ul', 'ol'):
+            self.list_depth += 1
+        elif tag == 'li':
+            # An unclosed <li> ends at the next sibling <li>
+            while self.li_depths and self.li_depths[-1] == self.list_depth:
+                self._close_li()
+            self.li_depths.append(self.list_depth)
+            self.collector.li_start()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in self.strip_tags:
+            return
+        self.handle_starttag(tag, attrs)
+        if tag in ('ul', 'ol', 'li', 'title'):
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag == 'a':
+            self._close_links()
+        if tag in self.strip_tags:
+            if self.skip_depth:
+                self.skip_depth -= 1
+            if tag == 'script' and self.json_ld_buf is not None and self.skip_depth == 0:
+                _add_json_ld(self.page, ''.join(self.json_ld_buf))
+                self.json_ld_buf = None
+            return
+        if self.skip_depth:
+            return
+        if tag == 'title' and self.title_buf is not None:
+            self.page['title'] = ''.join(s.strip() for s in self.title_buf)
+            self.title_buf = None
+        elif tag == 'li':
+            if self.li_depths:
+                self._close_li()
+        elif tag in ('ul', 'ol') and self.list_depth:
+            while self.li_depths and self.li_depths[-1] == self.list_depth:
+                self._close_li()
+            self.list_depth -= 1
+
+    def _close_links(self):
+        while self.link_bufs:
+            href, parts = self.link_bufs.pop()
+            _add_link(self.page, href, ''.join(parts))
+
+    def _close_li(self):
+        self.li_depths.pop()
+        self.collector.li_end()
+
+    def handle_data(self, data):
+        for _, parts in self.link_bufs:
+            parts.append(data)
+        if self.skip_depth:
+            if self.json_ld_buf is not None:
+                self.json_ld_buf.append(data)
+            return
+        if self.title_buf is not None:
+            self.title_buf.append(data)
+        self.collector.text(data)
+
+
+def _extract_htmlparser(html, max_words=None, strip_tags=STRIP_TAGS):
+    parser = _SinglePassParser(max_words, strip_tags)
+    parser.feed(html)
+    parser.close()
+    parser._close_links()
+    return parser.collector.finish()
+
+
+# ============================================================
+# BACKEND: BeautifulSoup (previous pipeline, kept as reference)
+# ============================================================
+def _extract_bs4(html, max_words=None, strip_tags=STRIP_TAGS):
+    from bs4 import BeautifulSoup
+
+    page = _empty_page()
+    soup = BeautifulSoup(html, 'html.parser')
+
+    html_tag = soup.find('html')
+    if html_tag and html_tag.get('lang'):
+        page['language'] = html_tag['lang'][:2]
+    title_tag = soup.find('title')
+    page['title'] = title_tag.get_text(strip=True) if title_tag else ''
+    for meta in soup.find_all('meta'):
+        _add_meta(page, meta.get('name'), meta.get('property'), meta.get('content'))
+    for script_tag in soup.find_all('script', type='application/ld+json'):
+        _add_json_ld(page, script_tag.string)
+    for a in soup.find_all('a', href=True):
+        if not a.find_parent('script'):
+            _add_link(page, a['href'], a.get_text())
+
+    for tag in soup.find_all(list(strip_tags)):
+        tag.decompose()
+
+    page['list_items'] = [t for t in (li.get_text(strip=True) for li in soup.find_all('li')) if t]
+    page['text'] = soup.get_text(separator='\n', strip=True)
+    if max_words is not None:
+        collector = _TextCollector(_empty_page(), max_words)
+        for line in page['text'].split('\n'):
+            collector.text(line)
+        page['text'] = '\n'.join(collector.lines)
+    return page
+
+
+EXTRACTORS = {
+    'lxml': _extract_lxml,
+    'htmlparser': _extract_htmlparser,
+    'bs4': _extract_bs4,
+}
+
+
+def extract_page(html, backend=None, max_words=None, strip_tags=STRIP_TAGS):
+    """Extract title, meta, language, visible text, <li>, JSON-LD, OG and links in one pass.
+
+    strip_tags: tags whose text is left out of 'text' and 'list_items'
+    (STRIP_TAGS or CODE_TAGS; must include script).
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend == 'lxml' and lxml is None:
+        backend = 'htmlparser'
+    return EXTRACTORS[backend](html or '', max_words, strip_tags)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Dead-host registry and per-host circuit breaker shared by the R1, R2 and R6b scrapers.
+
+Without it every phase (and every retry) rediscovers the same dead sites:
+domains that no longer resolve, servers that refuse or time out, homepages
+that answer 403/410. Two layers, both consulted by `scrape_http.http_get`
+before a request is sent:
+
+    circuit breaker : in-run, per host. BREAKER_THRESHOLD consecutive
+                      network failures open the breaker; requests to the host
+                      fail fast for BREAKER_COOLDOWN seconds, then one trial
+                      request is let through (half-open) while the others
+                      keep failing fast. A success closes it, a failure
+                      reopens it; a trial without outcome is replaced after
+                      BREAKER_TRIAL_TIMEOUT seconds. The trial still honours
+                      the registry, apart from the entry its own breaker
+                      wrote.
+    registry        : persistent SQLite (HOST_REGISTRY), shared across phases
+                      and runs; loaded into memory when opened and written
+                      through on change. A host is registered when its
+                      breaker opens (or on the first DNS failure), a homepage
+                      URL when it answers 403/404/410/451. Entries expire
+                      after the TTL of their error class (ERROR_TTLS); any
+                      success clears them.
+
+Skipped requests raise HostUnavailable. SSL errors are not counted: the
+scrapers retry those without verification.
+
+Time saved is estimated per skip as the average duration of the failed
+requests recorded for that host or URL (a lower bound: the scrapers' retry
+sleeps are not counted).
+
+Usage:
+    from scrape_http import enable_host_registry
+    enable_host_registry()                    # default: HOST_REGISTRY
+    ...
+    except HostUnavailable as e: ...          # known dead, skipped
+    log(f'Dead hosts: {format_host_stats()}')
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+
+import requests
+
+# ============================================================
+# CONFIG
+# ============================================================
+HOST_REGISTRY = '/root/scrape_host_registry.sqlite'
+
+BREAKER_THRESHOLD = 3       # Consecutive network failures before a host is skipped
+BREAKER_COOLDOWN = 300      # Seconds before a half-open trial request
+BREAKER_TRIAL_TIMEOUT = 120 # Seconds a trial may stay in flight before another is let through
+
+# Error class -> how long a registered failure is trusted (seconds)
+ERROR_TTLS = {
+    'dns': 7 * 86400,          # Domain does not resolve
+    'refused': 86400,          # Connection refused / reset
+    'connection': 12 * 3600,   # Other connection-level failures
+    'timeout': 6 * 3600,       # Connect / read timeouts
+    'http_403': 3 * 86400,     # Homepage forbidden (bot blocking)
+    'http_404': 7 * 86400,     # Homepage gone
+    'http_410': 30 * 86400,
+    'http_451': 30 * 86400,
+}
+INSTANT_CLASSES = frozenset(['dns'])   # Registered on the first failure
+
+_DNS_MARKERS = ('name or service not known', 'nodename nor servname', 'nameresolutionerror',
+                'getaddrinfo failed', 'no address associated', 'temporary failure in name resolution',
+                'failed to resolve')
+_REFUSED_MARKERS = ('connection refused', 'connection reset', 'errno 111', 'errno 104')
+
+
+class HostUnavailable(requests.RequestException):
+    """Request skipped: the host or URL is known to be failing."""
+
+
+# ============================================================
+# STATE
+# ============================================================
+_lock = threading.Lock()
+_state = {'conn': None}
+_breakers = {}   # host -> {'failures', 'open_until', 'trial_until', 'error_class', 'seconds', 'entry'}
+_known = {}      # target -> (error_class, avg_seconds, expires_at)
+_stats = {'skipped_registry': 0, 'skipped_breaker': 0, 'breakers_opened': 0,
+          'registered': 0, 'cleared': 0, 'seconds_saved': 0.0}
+
+
+def open_registry(path=HOST_REGISTRY):
+    """Open (or create) the registry at path; expired entries are dropped."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS failures (
+            target TEXT PRIMARY KEY,
+            error_class TEXT NOT NULL,
+            last_error TEXT,
+            failures INTEGER,
+            avg_seconds REAL,
+            first_failed TEXT,
+            last_failed TEXT,
+            expires_at REAL
+        )
+    """)
+    conn.execute('DELETE FROM failures WHERE expires_at <= ?', (time.time(),))
+    conn.commit()
+    rows = conn.execute('SELECT target, error_class, avg_seconds, expires_at FROM failures')
+    with _lock:
+        if _state['conn'] is not None:
+            _state['conn'].close()
+        _state['conn'] = conn
+        _breakers.clear()
+        _known.clear()
+        _known.update((row[0], row[1:]) for row in rows)
+
+
+def is_enabled():
+    return _state['conn'] is not None
+
+
+def host_of(url):
+    parsed = urlparse(url)
+    host = (parsed.hostname or '').lower()
+    host = host[4:] if host.startswith('www.') else host
+    default_port = {'http': 80, 'https': 443}.get(parsed.scheme)
+    return f'{host}:{parsed.port}' if parsed.port and parsed.port != default_port else host
+
+
+def url_key(url):
+    """Registry key of a page URL (scheme, www. and trailing slash ignored)."""
+    parsed = urlparse(url)
+    return f'{host_of(url)}{parsed.path.rstrip("/")}' + (f'?{parsed.query}' if parsed.query else '')
+
+
+def classify_error(exc):
+    """Error class of a request exception, or None when it says nothing about the host."""
+    if isinstance(exc, (requests.exceptions.SSLError, HostUnavailable)):
+        return None
+    if isinstance(exc, requests.exceptions.Timeout):
+        return 'timeout'
+    if isinstance(exc, requests.exceptions.ConnectionError):
+        message = str(exc).lower()
+        if any(m in message for m in _DNS_MARKERS):
+            return 'dns'
+        if any(m in message for m in _REFUSED_MARKERS):
+            return 'refused'
+        return 'connection'
+    return None
+
+
+# ============================================================
+# CHECK / RECORD (called by scrape_http.http_get)
+# ============================================================
+def check(url):
+    """Raise HostUnavailable when url's host (or url itself) should be skipped."""
+    if _state['conn'] is None:
+        return
+    host = host_of(url)
+    now = time.time()
+    with _lock:
+        breaker = _breakers.get(host)
+        trial = bool(breaker and breaker['open_until'])
+        if trial and (breaker['open_until'] > now or breaker['trial_until'] > now):
+            _stats['skipped_breaker'] += 1
+            _stats['seconds_saved'] += breaker['seconds'] / max(breaker['failures'], 1)
+            raise HostUnavailable(f'{host}: circuit open ({breaker["error_class"]})')
+        for target in (host, url_key(url)):
+            entry = _known.get(target)
+            if entry and entry[2] > now and not (trial and entry is breaker['entry']):
+                _stats['skipped_registry'] += 1
+                _stats['seconds_saved'] += entry[1] or 0
+                raise HostUnavailable(f'{target}: known dead ({entry[0]})')
+        if trial:
+            breaker['trial_until'] = now + BREAKER_TRIAL_TIMEOUT   # Half-open: only this request goes through
+
+
+def record_failure(url, exc, seconds):
+    """Count a failed request against its host; may open the breaker and register it."""
+    error_class = classify_error(exc)
+    if error_class is None or _state['conn'] is None:
+        return
+    host = host_of(url)
+    with _lock:
+        breaker = _breakers.setdefault(host, {'failures': 0, 'open_until': 0, 'trial_until': 0,
+                                              'error_class': None, 'seconds': 0.0, 'entry': None})
+        breaker['failures'] += 1
+        breaker['seconds'] += seconds
+        breaker['error_class'] = error_class
+        if breaker['failures'] < BREAKER_THRESHOLD and error_class not in INSTANT_CLASSES:
+            return
+        breaker['open_until'] = time.time() + BREAKER_COOLDOWN
+        breaker['trial_until'] = 0
+        _stats['breakers_opened'] += 1
+        breaker['entry'] = _register(host, error_class, str(exc), breaker['failures'],
+                                     breaker['seconds'] / breaker['failures'])
+
+
+def record_status(url, status_code, seconds):
+    """Register a homepage URL that answered with a dead-site status (403/404/410/451)."""
+    error_class = f'http_{status_code}'
+    if error_class not in ERROR_TTLS or _state['conn'] is None:
+        return
+    with _lock:
+        _register(url_key(url), error_class, f'HTTP {status_code}', 1, seconds)
+
+
+def record_success(url):
+    """A response arrived: close the host's breaker and clear registry entries."""
+    if _state['conn'] is None:
+        return
+    host = host_of(url)
+    with _lock:
+        _breakers.pop(host, None)
+        for target in (host, url_key(url)):
+            if _known.pop(target, None) is not None:
+                _state['conn'].execute('DELETE FROM failures WHERE target = ?', (target,))
+                _state['conn'].commit()
+                _stats['cleared'] += 1
+
+
+def _register(target, error_class, error, failures, avg_seconds):
+    """Insert/refresh a registry entry and return it (caller holds _lock)."""
+    now = datetime.now(timezone.utc)
+    expires_at = (now + timedelta(seconds=ERROR_TTLS[error_class])).timestamp()
+    _known[target] = (error_class, avg_seconds, expires_at)
+    _state['conn'].execute("""
+        INSERT INTO failures (target, error_class, last_error, failures, avg_seconds,
+                              first_failed, last_failed, expires_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(target) DO UPDATE SET
+            error_class = excluded.error_class,
+            last_error = excluded.last_error,
+            failures = failures + excluded.failures,
+            avg_seconds = excluded.avg_seconds,
+            last_failed = excluded.last_failed,
+            expires_at = excluded.expires_at
+    """, (target, error_class, error[:200], failures, avg_seconds, now.isoformat(),
+          now.isoformat(), expires_at))
+    _state['conn'].commit()
+    _stats['registered'] += 1
+    return _known[target]
+
+
+# ============================================================
+# REPORTING
+# ============================================================
+def host_stats():
+    """Skips, breaker trips and estimated seconds saved in this run."""
+    with _lock:
+        stats = dict(_stats)
+        now = time.time()
+        stats['known_dead'] = {}
+        for error_class, _, expires_at in _known.values():
+            if expires_at > now:
+                stats['known_dead'][error_class] = stats['known_dead'].get(error_class, 0) + 1
+    stats['skipped'] = stats['skipped_registry'] + stats['skipped_breaker']
+    return stats
+
+
+def format_host_stats():
+    """One-line summary for scraper logs."""
+    hs = host_stats()
+    known = ', '.join(f'{k} {v}' for k, v in sorted(hs['known_dead'].items())) or 'none'
+    return (f'{hs["skipped"]} requests skipped ({hs["skipped_registry"]} registry, '
+            f'{hs["skipped_breaker"]} circuit breaker), ~{hs["seconds_saved"]:.0f}s saved, '
+            f'{hs["breakers_opened"]} breakers opened, {hs["cleared"]} recovered; '
+            f'known dead: {known}')
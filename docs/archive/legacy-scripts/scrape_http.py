@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP layer for the HolidaiButler scrapers (R1, R2, R6b).
+
+Every scraper fetches through `http_get`, which reuses a pooled keep-alive
+`requests.Session` per worker thread. A POI's main page and its subpages
+therefore share one TCP+TLS connection per host instead of paying for a new
+handshake on every request. Compression is negotiated (gzip/deflate, plus
+brotli when the brotli package is installed).
+
+When the page cache is enabled (see scrape_cache), GETs are revalidated with
+If-None-Match / If-Modified-Since and 304s are served from disk.
+
+With `page_type=` ('main', 'subpage', 'social', 'robots', 'sitemap') the body
+is streamed under a byte budget (BYTE_BUDGETS). HTML page types are refused
+before the body is read when the Content-Type is not HTML (PDFs, images,
+downloads), raising RejectedContent. Bodies over budget are cut off,
+marked resp.truncated = True, and not cached.
+
+With the host registry enabled (see scrape_hosts), requests to known-dead
+hosts and homepages raise scrape_hosts.HostUnavailable without being sent,
+and network failures feed the per-host circuit breaker.
+
+With adaptive timeouts enabled (see scrape_latency), connect and first-byte
+latency are recorded per host, and a caller's fixed timeout is replaced by
+one derived from the host's latency history.
+
+With crawl politeness enabled (see scrape_robots), website requests are
+checked against the site's cached robots.txt (disallowed URLs raise
+scrape_robots.RobotsBlocked without being sent) and paced per host by
+Crawl-delay; 429/503 answers hold the host back for its Retry-After.
+
+With recording enabled (see scrape_replay), every response and network
+failure is saved to a replay archive. With replay enabled, sessions send
+every request to a local scrape_replay.ReplayServer instead of the live
+site; responses keep their original URL.
+
+`response_text(resp)` replaces `resp.text`. requests decodes text/* without a
+charset as ISO-8859-1, and runs full-body statistical detection when there is
+no content type at all. Instead the encoding is taken from, in order:
+    bom        : byte order mark (authoritative, checked first as in the HTML spec)
+    header     : Content-Type charset
+    meta       : <meta charset> / http-equiv / <?xml encoding> in the first SNIFF_BYTES
+    utf8-valid : body decodes as strict UTF-8
+    detected   : statistical detection on the first DETECT_BYTES only
+    default    : windows-1252
+The source used is stored on the response (resp.charset_source) and counted.
+
+Usage:
+    from scrape_http import http_get, connection_stats, enable_page_cache
+
+    enable_page_cache()
+    resp = http_get(url, page_type='main', headers=headers, timeout=8, allow_redirects=True)
+    html = response_text(resp)   # resp.encoding / resp.charset_source are set
+    cs = connection_stats()   # {'requests': .., 'new_connections': .., 'reused': ..}
+"""
+
+import codecs
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.compat import chardet
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import scrape_cache
+import scrape_hosts
+import scrape_latency
+import scrape_replay
+import scrape_robots
+
+# ============================================================
+# CONFIG
+# ============================================================
+POOL_HOSTS = 50             # Host pools kept alive per session
+POOL_MAXSIZE = 4            # Connections kept alive per host
+
+try:
+    import brotli  # noqa: F401  (urllib3 decodes br when available)
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+# Streaming byte budgets (decompressed bytes) per page type
+BYTE_BUDGETS = {
+    'main': 2_000_000,
+    'subpage': 1_000_000,
+    'social': 1_500_000,
+    'robots': 256_000,
+    'sitemap': 10_000_000,
+}
+HTML_PAGE_TYPES = frozenset(['main', 'subpage', 'social'])
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+STREAM_CHUNK = 64 * 1024
+
+SNIFF_BYTES = 4096          # Bytes searched for <meta charset>
+DETECT_BYTES = 65536        # Bytes given to statistical detection (last resort)
+FALLBACK_ENCODING = 'windows-1252'
+
+# ============================================================
+# SESSION POOL
+# ============================================================
+_local = threading.local()
+_sessions_lock = threading.Lock()
+_adapters = []
+_retired = {'requests': 0, 'new_connections': 0}
+_download_stats = {'bytes': 0, 'truncated': 0, 'rejected': 0, 'bytes_skipped': 0}
+_replay = {'server': None}
+
+
+class RejectedContent(requests.RequestException):
+    """Response refused before its body was downloaded (e.g. a PDF)."""
+
+
+def _retire_pool(pool):
+    """Keep counters of host pools evicted from a session, then close them."""
+    with _sessions_lock:
+        _retired['requests'] += getattr(pool, 'num_requests', 0)
+        _retired['new_connections'] += getattr(pool, 'num_connections', 0)
+    pool.close()
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        started = time.monotonic()
+        super().connect()
+        _local.connect_seconds = time.monotonic() - started
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        started = time.monotonic()
+        super().connect()   # TCP + TLS handshake
+        _local.connect_seconds = time.monotonic() - started
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _ReplayAdapter(HTTPAdapter):
+    """Sends every request to the replay server; the original URL goes in a header."""
+
+    def send(self, request, **kwargs):
+        original = request.url
+        request.url = _replay['server']
+        request.headers[scrape_replay.REPLAY_HEADER] = original
+        try:
+            resp = super().send(request, **kwargs)
+        finally:
+            request.url = original   # Redirect handling copies this request
+            del request.headers[scrape_replay.REPLAY_HEADER]
+        resp.url = original
+        return resp
+
+
+def _new_session():
+    """Build a keep-alive session with per-host connection pools."""
+    session = requests.Session()
+    session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+    adapter_cls = _ReplayAdapter if _replay['server'] else HTTPAdapter
+    adapter = adapter_cls(pool_connections=POOL_HOSTS, pool_maxsize=POOL_MAXSIZE,
+                          max_retries=0)
+    adapter.poolmanager.pools.dispose_func = _retire_pool
+    adapter.poolmanager.pool_classes_by_scheme = {'http': _TimedHTTPConnectionPool,
+                                                  'https': _TimedHTTPSConnectionPool}
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    with _sessions_lock:
+        _adapters.append(adapter)
+    return session
+
+
+def get_session():
+    """Return this thread's pooled session (created on first use)."""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _new_session()
+        _local.session = session
+    return session
+
+
+def enable_page_cache(cache_dir=scrape_cache.PAGE_CACHE_DIR):
+    """Turn on the persistent conditional-GET cache for all http_get calls."""
+    scrape_cache.open_cache(cache_dir)
+
+
+def enable_host_registry(path=scrape_hosts.HOST_REGISTRY):
+    """Turn on the dead-host registry and circuit breaker for all http_get calls."""
+    scrape_hosts.open_registry(path)
+
+
+def enable_adaptive_timeouts(path=scrape_latency.LATENCY_STORE):
+    """Record per-host latency and derive http_get timeouts from it."""
+    scrape_latency.open_store(path)
+
+
+def enable_robots(path=scrape_robots.ROBOTS_CACHE):
+    """Honor robots.txt (cached) and per-host Crawl-delay for all http_get calls."""
+    scrape_robots.open_cache(path)
+
+
+def get_robots(url, headers=None):
+    """Cached robots.txt parser for url's site, or None when politeness is off."""
+    if not scrape_robots.is_enabled():
+        return None
+    return scrape_robots.robots_for(url, headers, _fetch_robots)
+
+
+def _fetch_robots(url, headers, timeout):
+    """(status, text) of a robots.txt URL, for scrape_robots."""
+    resp = http_get(url, page_type='robots', headers=headers, timeout=timeout,
+                    allow_redirects=True)
+    return resp.status_code, response_text(resp) if resp.status_code == 200 else None
+
+
+def enable_recording(path=scrape_replay.REPLAY_ARCHIVE):
+    """Save every http_get response and network failure to a replay archive."""
+    scrape_replay.open_recorder(path)
+
+
+def enable_replay(server_url):
+    """Send all requests to a scrape_replay.ReplayServer (call before any http_get)."""
+    _replay['server'] = server_url
+    _local.session = None
+
+
+def http_get(url, page_type=None, **kwargs):
+    """Drop-in replacement for requests.get() over the pooled session.
+
+    page_type: stream the body under BYTE_BUDGETS[page_type] (see module doc).
+    """
+    scrape_hosts.check(url)
+    scrape_robots.admit(url, page_type, kwargs.get('headers'), _fetch_robots)
+    if 'timeout' in kwargs:
+        kwargs['timeout'] = scrape_latency.timeout_for(url, kwargs['timeout'])
+    started = time.monotonic()
+    try:
+        resp = _cached_get(url, page_type, kwargs)
+    except requests.RequestException as e:
+        e.timeout = kwargs.get('timeout')   # What was sent; see scrape_latency.timeout_seconds
+        scrape_hosts.record_failure(url, e, time.monotonic() - started)
+        scrape_latency.record_timeout(url, e, kwargs.get('timeout'))
+        scrape_replay.record_error(url, e, page_type, time.monotonic() - started)
+        raise
+    scrape_replay.record_response(url, resp, page_type, time.monotonic() - started)
+    scrape_robots.record_response(url, resp)
+    if page_type == 'main' and f'http_{resp.status_code}' in scrape_hosts.ERROR_TTLS:
+        scrape_hosts.record_status(url, resp.status_code, time.monotonic() - started)
+    else:
+        scrape_hosts.record_success(url)
+    return resp
+
+
+def _cached_get(url, page_type, kwargs):
+    """GET through the conditional-GET page cache when it is enabled."""
+    session = get_session()
+    if not scrape_cache.is_enabled() or kwargs.get('stream'):
+        return _send(session, url, page_type, kwargs)
+
+    entry = scrape_cache.lookup(url)
+    if entry is None:
+        resp = _send(session, url, page_type, kwargs)
+    else:
+        headers = dict(kwargs.get('headers') or {})
+        headers.update(scrape_cache.conditional_headers(entry))
+        resp = _send(session, url, page_type, dict(kwargs, headers=headers))
+        if resp.status_code == 304:
+            cached = scrape_cache.cached_response(entry, resp)
+            if cached is not None:
+                return cached
+            # Body missing from disk: drop the entry and fetch unconditionally
+            scrape_cache.forget(url)
+            resp = _send(session, url, page_type, kwargs)
+
+    if resp.status_code == 200 and not getattr(resp, 'truncated', False):
+        scrape_cache.store(url, resp)
+    return resp
+
+
+def _send(session, url, page_type, kwargs):
+    """GET, streamed under a byte budget when page_type is given."""
+    if page_type is None or kwargs.get('stream'):
+        return _timed_get(session, url, kwargs)
+
+    resp = _timed_get(session, url, dict(kwargs, stream=True))
+    content_length = int(resp.headers.get('Content-Length') or 0)
+    if resp.status_code == 200 and page_type in HTML_PAGE_TYPES:
+        content_type = (resp.headers.get('Content-Type') or '').split(';')[0].strip().lower()
+        if content_type and content_type not in HTML_CONTENT_TYPES:
+            resp.close()
+            with _sessions_lock:
+                _download_stats['rejected'] += 1
+                _download_stats['bytes_skipped'] += content_length
+            raise RejectedContent(f'Not HTML: {content_type}', response=resp)
+
+    budget = BYTE_BUDGETS[page_type]
+    chunks, size = [], 0
+    resp.truncated = False
+    for chunk in resp.iter_content(STREAM_CHUNK):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > budget:
+            resp.truncated = True
+            break
+    resp._content = b''.join(chunks)[:budget]
+    resp._content_consumed = True
+    if resp.truncated:
+        resp.close()  # Drop the rest; this connection is not reused
+    with _sessions_lock:
+        _download_stats['bytes'] += len(resp._content)
+        if resp.truncated:
+            _download_stats['truncated'] += 1
+            _download_stats['bytes_skipped'] += max(content_length - budget, 0)
+    return resp
+
+
+def _timed_get(session, url, kwargs):
+    """session.get() that records connect / first-byte latency for the response's host."""
+    _local.connect_seconds = None
+    resp = session.get(url, **kwargs)
+    connect = _local.connect_seconds
+    elapsed = resp.elapsed.total_seconds()
+    scrape_latency.record(resp.url or url, connect, max(elapsed - (connect or 0), 0.0))
+    return resp
+
+
+def connection_stats():
+    """Requests sent vs. connections opened across all scraper sessions."""
+    with _sessions_lock:
+        total_requests = _retired['requests']
+        new_connections = _retired['new_connections']
+        adapters = list(_adapters)
+    for adapter in adapters:
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                total_requests += getattr(pool, 'num_requests', 0)
+                new_connections += getattr(pool, 'num_connections', 0)
+    return {
+        'requests': total_requests,
+        'new_connections': new_connections,
+        'reused': max(total_requests - new_connections, 0),
+    }
+
+
+def format_connection_stats():
+    """One-line summary for scraper logs."""
+    cs = connection_stats()
+    pct = cs['reused'] / cs['requests'] * 100 if cs['requests'] else 0
+    return (f'{cs["requests"]} requests, {cs["new_connections"]} new connections, '
+            f'{cs["reused"]} reused ({pct:.0f}%)')
+
+
+def download_stats():
+    """Bytes read under page_type budgets, truncations and early rejections."""
+    with _sessions_lock:
+        return dict(_download_stats)
+
+
+def format_download_stats():
+    """One-line summary for scraper logs."""
+    ds = download_stats()
+    return (f'{ds["bytes"] / 1_048_576:.1f} MB read, {ds["truncated"]} truncated at budget, '
+            f'{ds["rejected"]} non-HTML rejected, {ds["bytes_skipped"] / 1_048_576:.1f} MB not downloaded')
+
+
+# ============================================================
+# CHARSET SNIFFING
+# ============================================================
+_BOMS = ((codecs.BOM_UTF8, 'utf-8-sig'),
+         (codecs.BOM_UTF16_LE, 'utf-16'),
+         (codecs.BOM_UTF16_BE, 'utf-16'))
+_HEADER_CHARSET_RE = re.compile(r'charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+_META_CHARSET_RE = re.compile(
+    rb'<meta[^>]+?charset\s*=\s*["\']?\s*([\w.:-]+)'
+    rb'|<\?xml[^>]+?encoding\s*=\s*["\']([\w.:-]+)', re.IGNORECASE)
+
+_charset_lock = threading.Lock()
+_charset_counts = {}
+
+
+def _codec(name):
+    """Canonical codec name, or None when Python does not know it.
+
+    Like browsers, latin-1 and ascii labels decode as windows-1252.
+    """
+    if isinstance(name, bytes):
+        name = name.decode('ascii', errors='ignore')
+    try:
+        encoding = codecs.lookup(name.strip()).name
+    except (LookupError, AttributeError):
+        return None
+    return 'cp1252' if encoding in ('iso8859-1', 'latin-1', 'ascii') else encoding
+
+
+def sniff_encoding(content, content_type=None):
+    """(encoding, source) for a response body; see module docstring for the order."""
+    for bom, encoding in _BOMS:
+        if content.startswith(bom):
+            return encoding, 'bom'
+
+    m = _HEADER_CHARSET_RE.search(content_type or '')
+    if m and _codec(m.group(1)):
+        return _codec(m.group(1)), 'header'
+
+    m = _META_CHARSET_RE.search(content[:SNIFF_BYTES])
+    if m:
+        encoding = _codec(m.group(1) or m.group(2))
+        if encoding and encoding.startswith('utf-16'):
+            encoding = 'utf-8'  # A byte-level meta tag cannot really be UTF-16
+        if encoding:
+            return encoding, 'meta'
+
+    try:
+        content.decode('utf-8')
+        return 'utf-8', 'utf8-valid'
+    except UnicodeDecodeError:
+        pass
+
+    if chardet is not None:
+        encoding = _codec(chardet.detect(content[:DETECT_BYTES]).get('encoding') or '')
+        if encoding:
+            return encoding, 'detected'
+    return FALLBACK_ENCODING, 'default'
+
+
+def decode_body(content, content_type=None):
+    """(text, encoding, source) for raw response bytes."""
+    encoding, source = sniff_encoding(content or b'', content_type)
+    count_charset(source)
+    return (content or b'').decode(encoding, errors='replace'), encoding, source
+
+
+def count_charset(source):
+    """Count a decoded page for charset_stats() (also for pages decoded in a parse worker)."""
+    with _charset_lock:
+        _charset_counts[source] = _charset_counts.get(source, 0) + 1
+
+
+def response_text(resp):
+    """resp.text without requests' encoding guess; sets resp.charset_source."""
+    cached = getattr(resp, '_sniffed_text', None)
+    if cached is not None:
+        return cached
+    text, encoding, source = decode_body(resp.content, resp.headers.get('Content-Type'))
+    resp.encoding = encoding
+    resp.charset_source = source
+    resp._sniffed_text = text
+    return text
+
+
+def page_charset(resp):
+    """{'encoding', 'source'} recorded for a page after response_text(resp)."""
+    return {'encoding': resp.encoding, 'source': getattr(resp, 'charset_source', None)}
+
+
+def charset_stats():
+    with _charset_lock:
+        return dict(_charset_counts)
+
+
+def format_charset_stats():
+    """One-line summary for scraper logs."""
+    counts = charset_stats()
+    if not counts:
+        return 'no pages decoded'
+    return ', '.join(f'{source} {n}' for source, n in
+                     sorted(counts.items(), key=lambda item: -item[1]))
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Per-domain latency history and adaptive request timeouts for the scrapers.
+
+Every response fetched through `scrape_http.http_get` records two samples
+for its host: connect time (TCP + TLS, only when a new connection was
+opened) and first-byte time (request sent -> response headers). The last
+HISTORY_SIZE samples per host are kept in a small SQLite store
+(LATENCY_STORE), shared by R1, R2 and R6b and across runs. Samples are
+written in batches and at exit.
+
+With history for a host, the fixed timeout passed by the scraper is
+replaced by a (connect, read) tuple derived from the host's p95:
+
+    connect = clamp(p95 connect    * TIMEOUT_FACTOR + TIMEOUT_MARGIN)
+    read    = clamp(p95 first byte * TIMEOUT_FACTOR + TIMEOUT_MARGIN)
+
+clamped to [MIN_TIMEOUT, MAX_TIMEOUT]. Slow-but-alive hosts get more time
+than the fixed 8 s / 5 s, and fast hosts that hang release the worker
+sooner. A timed-out request is recorded as a sample of the timeout it had,
+so a host that keeps timing out gets a longer timeout next time (up to
+MAX_TIMEOUT). Hosts with fewer than MIN_SAMPLES samples keep the fixed
+timeout.
+
+Usage:
+    from scrape_http import enable_adaptive_timeouts
+    enable_adaptive_timeouts()                # default: LATENCY_STORE
+    ...
+    log(f'Latency: {format_latency_stats()}')
+"""
+
+import atexit
+import sqlite3
+import threading
+import time
+from collections import deque
+
+import requests
+
+from scrape_hosts import host_of
+
+# ============================================================
+# CONFIG
+# ============================================================
+LATENCY_STORE = '/root/scrape_host_latency.sqlite'
+
+HISTORY_SIZE = 50           # Samples kept per host
+MIN_SAMPLES = 3             # Samples needed before a host gets its own timeouts
+TIMEOUT_PERCENTILE = 95
+TIMEOUT_FACTOR = 3.0        # Headroom over the host's p95
+TIMEOUT_MARGIN = 0.5        # Seconds added on top (jitter on very fast hosts)
+MIN_TIMEOUT = 1.5
+MAX_TIMEOUT = 20.0
+FLUSH_EVERY = 50            # Buffered samples written per transaction
+
+# ============================================================
+# STATE
+# ============================================================
+_lock = threading.Lock()
+_state = {'conn': None}
+_history = {}    # host -> {'connect': deque, 'first_byte': deque}
+_timeouts = {}   # host -> (connect, read), invalidated on new samples
+_pending = []    # Samples not yet written: (host, kind, seconds, recorded_at)
+_run = {'connect': [], 'first_byte': [], 'timeouts': 0, 'adaptive': 0, 'fixed': 0,
+        'read_timeouts': []}
+
+
+def open_store(path=LATENCY_STORE):
+    """Open (or create) the latency store and load the recent history per host."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS samples (
+            host TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            seconds REAL NOT NULL,
+            recorded_at REAL NOT NULL
+        )
+    """)
+    conn.execute('CREATE INDEX IF NOT EXISTS samples_host ON samples (host, kind, recorded_at)')
+    conn.commit()
+    rows = conn.execute('SELECT host, kind, seconds FROM samples ORDER BY recorded_at')
+    with _lock:
+        if _state['conn'] is not None:
+            _flush_locked()
+            _state['conn'].close()
+        _state['conn'] = conn
+        _history.clear()
+        _timeouts.clear()
+        for host, kind, seconds in rows:
+            _host_history(host)[kind].append(seconds)
+        if not _state.get('atexit'):
+            atexit.register(flush)
+            _state['atexit'] = True
+
+
+def is_enabled():
+    return _state['conn'] is not None
+
+
+def _host_history(host):
+    history = _history.get(host)
+    if history is None:
+        history = _history[host] = {'connect': deque(maxlen=HISTORY_SIZE),
+                                    'first_byte': deque(maxlen=HISTORY_SIZE)}
+    return history
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[idx]
+
+
+def _clamp(seconds):
+    return round(min(max(seconds, MIN_TIMEOUT), MAX_TIMEOUT), 1)
+
+
+# ============================================================
+# TIMEOUTS (called by scrape_http.http_get)
+# ============================================================
+def timeout_for(url, default):
+    """(connect, read) timeout for url's host, or default without enough history."""
+    if _state['conn'] is None or default is None or isinstance(default, tuple):
+        return default
+    host = host_of(url)
+    with _lock:
+        timeout = _timeouts.get(host)
+        if timeout is None:
+            history = _history.get(host)
+            if not history or len(history['first_byte']) < MIN_SAMPLES:
+                _run['fixed'] += 1
+                return default
+            first_byte = percentile(history['first_byte'], TIMEOUT_PERCENTILE)
+            # Reused connections give no connect samples: fall back to first byte
+            connect = percentile(history['connect'] or history['first_byte'], TIMEOUT_PERCENTILE)
+            timeout = _timeouts[host] = (
+                _clamp(connect * TIMEOUT_FACTOR + TIMEOUT_MARGIN),
+                _clamp(first_byte * TIMEOUT_FACTOR + TIMEOUT_MARGIN))
+        _run['adaptive'] += 1
+        _run['read_timeouts'].append(timeout[1])
+    return timeout
+
+
+def record(url, connect_seconds, first_byte_seconds):
+    """Record the latency of a response (connect_seconds None on a reused connection)."""
+    if _state['conn'] is None:
+        return
+    host = host_of(url)
+    now = time.time()
+    with _lock:
+        history = _host_history(host)
+        if connect_seconds is not None:
+            history['connect'].append(connect_seconds)
+            _run['connect'].append(connect_seconds)
+            _pending.append((host, 'connect', connect_seconds, now))
+        history['first_byte'].append(first_byte_seconds)
+        _run['first_byte'].append(first_byte_seconds)
+        _pending.append((host, 'first_byte', first_byte_seconds, now))
+        _timeouts.pop(host, None)
+        if len(_pending) >= FLUSH_EVERY:
+            _flush_locked()
+
+
+def record_timeout(url, exc, timeout):
+    """A timed-out request counts as a sample of the timeout it was given."""
+    if _state['conn'] is None or not isinstance(exc, requests.exceptions.Timeout) or not timeout:
+        return
+    connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    with _lock:
+        _run['timeouts'] += 1
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        record(url, connect_timeout, connect_timeout)
+    else:
+        record(url, None, read_timeout)
+
+
+def timeout_seconds(exc, default):
+    """Seconds of the timeout that expired for exc, rounded to 0.1 s.
+
+    scrape_http.http_get sets exc.timeout to the timeout it actually sent
+    (adaptive or fixed); default is used for exceptions raised elsewhere.
+    """
+    timeout = getattr(exc, 'timeout', None) or default
+    if isinstance(timeout, tuple):
+        connect_timeout, read_timeout = timeout
+        timeout = connect_timeout if isinstance(exc, requests.exceptions.ConnectTimeout) else read_timeout
+    return round(timeout, 1)
+
+
+def flush():
+    """Write buffered samples and trim each host's history to HISTORY_SIZE."""
+    with _lock:
+        _flush_locked()
+
+
+def _flush_locked():
+    if not _pending or _state['conn'] is None:
+        return
+    conn = _state['conn']
+    conn.executemany('INSERT INTO samples (host, kind, seconds, recorded_at) VALUES (?, ?, ?, ?)',
+                     _pending)
+    for host, kind in {(host, kind) for host, kind, _, _ in _pending}:
+        conn.execute("""
+            DELETE FROM samples WHERE host = ? AND kind = ? AND recorded_at < (
+                SELECT MIN(recorded_at) FROM (
+                    SELECT recorded_at FROM samples WHERE host = ? AND kind = ?
+                    ORDER BY recorded_at DESC LIMIT ?))
+        """, (host, kind, host, kind, HISTORY_SIZE))
+    conn.commit()
+    _pending.clear()
+
+
+# ============================================================
+# REPORTING
+# ============================================================
+def latency_stats():
+    """This run's latency distribution and how timeouts were chosen."""
+    with _lock:
+        connect = list(_run['connect'])
+        first_byte = list(_run['first_byte'])
+        read_timeouts = list(_run['read_timeouts'])
+        stats = {k: _run[k] for k in ('timeouts', 'adaptive', 'fixed')}
+        stats['hosts_known'] = sum(1 for h in _history.values()
+                                   if len(h['first_byte']) >= MIN_SAMPLES)
+    for name, values in (('connect', connect), ('first_byte', first_byte),
+                         ('read_timeout', read_timeouts)):
+        stats[name] = {'n': len(values), 'p50': percentile(values, 50),
+                       'p90': percentile(values, 90), 'p99': percentile(values, 99),
+                       'max': max(values, default=0.0)}
+    return stats
+
+
+def format_latency_stats():
+    """One-line summary for scraper logs."""
+    ls = latency_stats()
+
+    def dist(d):
+        return f'p50 {d["p50"]:.2f}s / p90 {d["p90"]:.2f}s / p99 {d["p99"]:.2f}s'
+
+    return (f'connect {dist(ls["connect"])} (n={ls["connect"]["n"]}), '
+            f'first byte {dist(ls["first_byte"])} (n={ls["first_byte"]["n"]}); '
+            f'{ls["adaptive"]} adaptive timeouts (read {dist(ls["read_timeout"])}), '
+            f'{ls["fixed"]} fixed, {ls["timeouts"]} timed out, {ls["hosts_known"]} hosts with history')
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Two-stage scrape pipeline: fetcher threads hand raw bodies to a parser process pool.
+
+Decoding, extract_page() and the fact pattern scan are CPU-bound. In the
+threaded / async scrapers they serialize on the GIL as soon as the network
+is fast. With a parse pool enabled, `parse_response(resp)` ships the raw
+bytes to a worker process and the fetcher thread waits on the result with
+the GIL released:
+
+    fetcher threads --(bounded queue: PARSE_QUEUE_FACTOR x workers)--> parser processes
+
+The queue bound is the backpressure. When all slots are taken, fetchers
+block before submitting, so downloaded bodies never pile up in memory
+faster than the parsers can take them. Without a pool, parse_response()
+parses in the calling thread (same result, same counters).
+
+Per-stage counters (pipeline_stats / format_pipeline_stats):
+    fetch : bodies handed to the parser stage and their bytes
+    queue : peak depth, backpressure waits and time spent waiting
+    parse : pages parsed, worker CPU seconds, pages per CPU second
+
+Usage:
+    enable_parse_pool(workers=4)
+    page = parse_response(resp, max_words=5000)   # resp.encoding/charset_source set
+    log(f'Pipeline: {format_pipeline_stats()}')
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from scrape_extract import extract_page
+from scrape_facts import scan_facts
+from scrape_http import decode_body, count_charset
+
+# ============================================================
+# CONFIG
+# ============================================================
+PARSE_WORKERS = os.cpu_count() or 2
+PARSE_QUEUE_FACTOR = 2      # In-flight bodies per parser process
+# Workers must not be forked from a process whose fetcher threads may hold
+# locks (scrape_http's charset lock, logging, sqlite, urllib3): the child
+# would inherit a held lock and hang on it.
+PARSE_START_METHOD = 'forkserver'
+
+# ============================================================
+# STATE
+# ============================================================
+_lock = threading.Lock()
+_state = {'executor': None, 'slots': None, 'workers': 0, 'queue_size': 0, 'started': None}
+_stats = {'fetched': 0, 'fetched_bytes': 0, 'in_queue': 0, 'queue_peak': 0,
+          'backpressure_waits': 0, 'backpressure_seconds': 0.0,
+          'parsed': 0, 'parse_cpu_seconds': 0.0, 'parse_errors': 0}
+
+
+def parse_body(content, content_type=None, max_words=None):
+    """Parser stage (runs in a worker process): decode, extract, scan facts.
+
+    Returns (page, encoding, charset_source, cpu_seconds). page carries the
+    scrape_facts matches of its text under 'fact_matches'.
+    """
+    started = time.thread_time()
+    text, encoding, source = decode_body(content, content_type)
+    page = extract_page(text, max_words=max_words)
+    page['fact_matches'] = scan_facts(page['text'])
+    return page, encoding, source, time.thread_time() - started
+
+
+def enable_parse_pool(workers=PARSE_WORKERS, queue_factor=PARSE_QUEUE_FACTOR):
+    """Start the parser process pool used by parse_response().
+
+    Call before any fetcher threads start. The worker processes are started
+    here, not on the first submit() from a fetcher thread.
+    """
+    close_parse_pool()
+    queue_size = max(workers * queue_factor, 1)
+    executor = ProcessPoolExecutor(max_workers=workers,
+                                   mp_context=multiprocessing.get_context(PARSE_START_METHOD))
+    wait([executor.submit(os.getpid) for _ in range(workers)])
+    with _lock:
+        _state['executor'] = executor
+        _state['slots'] = threading.BoundedSemaphore(queue_size)
+        _state['workers'] = workers
+        _state['queue_size'] = queue_size
+        _state['started'] = time.monotonic()
+
+
+def close_parse_pool():
+    with _lock:
+        executor, _state['executor'] = _state['executor'], None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def _slot_releaser(slots):
+    def release(_future=None):
+        with _lock:
+            _stats['in_queue'] -= 1
+        slots.release()
+    return release
+
+
+def parse_response(resp, max_words=None):
+    """extract_page() of a response, parsed in the pool when one is enabled.
+
+    Sets resp.encoding / resp.charset_source like scrape_http.response_text().
+    """
+    content = resp.content or b''
+    content_type = resp.headers.get('Content-Type')
+    with _lock:
+        _stats['fetched'] += 1
+        _stats['fetched_bytes'] += len(content)
+        executor = _state['executor']
+        if _state['started'] is None:
+            _state['started'] = time.monotonic()
+
+    if executor is None:
+        # No pool: parse in the fetcher thread
+        page, encoding, source, cpu = parse_body(content, content_type, max_words)
+    else:
+        slots = _state['slots']
+        if not slots.acquire(blocking=False):
+            waited = time.monotonic()
+            slots.acquire()
+            with _lock:
+                _stats['backpressure_waits'] += 1
+                _stats['backpressure_seconds'] += time.monotonic() - waited
+        with _lock:
+            _stats['in_queue'] += 1
+            _stats['queue_peak'] = max(_stats['queue_peak'], _stats['in_queue'])
+        release = _slot_releaser(slots)
+        try:
+            future = executor.submit(parse_body, content, content_type, max_words)
+        except Exception:
+            release()
+            raise
+        future.add_done_callback(release)
+        try:
+            page, encoding, source, cpu = future.result()
+        except Exception:
+            with _lock:
+                _stats['parse_errors'] += 1
+            raise
+        count_charset(source)   # Counted in the worker's copy of scrape_http
+
+    resp.encoding = encoding
+    resp.charset_source = source
+    with _lock:
+        _stats['parsed'] += 1
+        _stats['parse_cpu_seconds'] += cpu
+    return page
+
+
+# ============================================================
+# REPORTING
+# ============================================================
+def pipeline_stats():
+    """Per-stage throughput counters (see module docstring)."""
+    with _lock:
+        stats = dict(_stats)
+        stats['workers'] = _state['workers']
+        stats['queue_size'] = _state['queue_size']
+        started = _state['started']
+    stats['elapsed_seconds'] = time.monotonic() - started if started else 0.0
+    elapsed = stats['elapsed_seconds'] or 1.0
+    stats['fetch_pages_per_sec'] = stats['fetched'] / elapsed
+    stats['parse_pages_per_cpu_sec'] = (stats['parsed'] / stats['parse_cpu_seconds']
+                                        if stats['parse_cpu_seconds'] else 0.0)
+    return stats
+
+
+def format_pipeline_stats():
+    """One-line summary for scraper logs."""
+    ps = pipeline_stats()
+    where = f'on {ps["workers"]} processes' if ps['workers'] else 'in fetcher threads'
+    return (f'fetch {ps["fetched"]} bodies ({ps["fetched_bytes"] / 1_048_576:.1f} MB, '
+            f'{ps["fetch_pages_per_sec"]:.1f}/s); queue peak {ps["queue_peak"]}/{ps["queue_size"]}, '
+            f'{ps["backpressure_waits"]} backpressure waits ({ps["backpressure_seconds"]:.1f}s); '
+            f'parse {ps["parsed"]} pages {where}, {ps["parse_cpu_seconds"]:.1f}s CPU '
+            f'({ps["parse_pages_per_cpu_sec"]:.0f} pages/CPU-s)')
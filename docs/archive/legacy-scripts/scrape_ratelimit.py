@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Token-bucket rate limits and a concurrent per-platform crawl runner.
+
+R6b used to crawl Facebook, Instagram and the deep website pages one after
+the other, each with its own sleep() between requests, so a run took the
+sum of all three. Each platform has its own politeness budget, and the
+budgets do not depend on each other. run_crawls() runs the platforms side
+by side, so a run takes about as long as the slowest platform:
+
+    facebook  : bucket 2/s  -> workers -> fetch -> on_result
+    instagram : bucket 1/s  -> workers -> fetch -> on_result
+    website   : per-host buckets (HostBuckets) inside fetch
+
+A TokenBucket hands out `rate` tokens per second with bursts of at most
+`burst`. acquire() blocks until a token is free. A crawl's workers share
+its bucket, so request latency overlaps with the wait instead of adding to
+it (a fixed sleep after each request gives less than the nominal rate).
+HostBuckets keeps one bucket per host for crawls that go to many sites.
+
+on_result is called from the worker threads and must be thread-safe
+(scrape_results.ResultLog is).
+
+Usage:
+    crawls = [Crawl('facebook', fb_targets, fetch_fb, bucket=TokenBucket(2), workers=2,
+                    on_result=store)]
+    run_crawls(crawls, log=log)
+    log(f'Rate limits: {format_ratelimit_stats()}')
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scrape_hosts import host_of
+
+# ============================================================
+# STATE
+# ============================================================
+_lock = threading.Lock()
+_stats = {}   # bucket name -> {'acquired', 'waits', 'wait_seconds'}
+
+
+def _bucket_stats(name):
+    return _stats.setdefault(name, {'acquired': 0, 'waits': 0, 'wait_seconds': 0.0})
+
+
+# ============================================================
+# TOKEN BUCKETS
+# ============================================================
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `burst` banked."""
+
+    def __init__(self, rate, burst=1, name=None):
+        if rate <= 0:
+            raise ValueError(f'rate must be positive, got {rate!r}')
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.name = name or f'{rate:g}/s'
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now; a negative balance is the queue of waiters
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        with _lock:
+            stats = _bucket_stats(self.name)
+            stats['acquired'] += 1
+            if wait:
+                stats['waits'] += 1
+                stats['wait_seconds'] += wait
+        return wait
+
+
+class HostBuckets:
+    """One TokenBucket per host (www. and default ports ignored, see scrape_hosts.host_of)."""
+
+    def __init__(self, rate, burst=1, name='per-host'):
+        self.rate = rate
+        self.burst = burst
+        self.name = name
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url):
+        host = host_of(url)
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst, name=self.name)
+            return bucket
+
+    def acquire(self, url):
+        return self.bucket(url).acquire()
+
+
+# ============================================================
+# CONCURRENT CRAWLS
+# ============================================================
+class Crawl:
+    """One platform's work list: fetch(item) per item, paced by bucket, on workers threads."""
+
+    def __init__(self, name, items, fetch, on_result, bucket=None, workers=1):
+        self.name = name
+        self.items = list(items)
+        self.fetch = fetch
+        self.on_result = on_result
+        self.bucket = bucket
+        self.workers = max(workers, 1)
+        self.done = 0
+        self.failed = 0
+        self.elapsed = 0.0
+
+
+def _run_crawl(crawl, progress_every, log):
+    started = time.monotonic()
+    lock = threading.Lock()
+
+    def work(item):
+        if crawl.bucket is not None:
+            crawl.bucket.acquire()
+        try:
+            result = crawl.fetch(item)
+        except Exception as e:
+            log(f'  {crawl.name}: fetch failed: {str(e)[:200]}')
+            result = None
+        if result is not None:
+            crawl.on_result(item, result)
+        with lock:
+            crawl.done += 1
+            crawl.failed += result is None
+            done = crawl.done
+        if progress_every and done % progress_every == 0:
+            rate = done / max(time.monotonic() - started, 1e-9)
+            log(f'  {crawl.name} progress: {done}/{len(crawl.items)} ({rate:.2f}/s)')
+
+    with ThreadPoolExecutor(max_workers=crawl.workers,
+                            thread_name_prefix=f'crawl-{crawl.name}') as pool:
+        list(pool.map(work, crawl.items))
+    crawl.elapsed = time.monotonic() - started
+
+
+def run_crawls(crawls, progress_every=50, log=print):
+    """Run all crawls concurrently; returns when the slowest one is done.
+
+    After the run each Crawl carries done / failed / elapsed.
+    """
+    started = time.monotonic()
+    threads = [threading.Thread(target=_run_crawl, args=(crawl, progress_every, log),
+                                name=f'crawl-{crawl.name}', daemon=True)
+               for crawl in crawls if crawl.items]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    for crawl in crawls:
+        log(f'  {crawl.name}: {crawl.done} items in {crawl.elapsed:.0f}s '
+            f'({crawl.done / crawl.elapsed if crawl.elapsed else 0:.2f}/s, '
+            f'{crawl.workers} workers)')
+    log(f'  All platforms: {elapsed:.0f}s wall clock '
+        f'(sequential would be ~{sum(c.elapsed for c in crawls):.0f}s)')
+    return elapsed
+
+
+# ============================================================
+# REPORTING
+# ============================================================
+def ratelimit_stats():
+    """Tokens handed out and time spent waiting, per bucket name."""
+    with _lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
+
+
+def format_ratelimit_stats():
+    """One-line summary for scraper logs."""
+    parts = [f'{name} {s["acquired"]} requests, {s["waits"]} waits ({s["wait_seconds"]:.0f}s)'
+             for name, s in sorted(ratelimit_stats().items())]
+    return '; '.join(parts) or 'no rate-limited requests'
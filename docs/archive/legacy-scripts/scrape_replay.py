@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Offline record / replay of scraper HTTP traffic, for benchmarks without live websites.
+
+Recording: with `scrape_http.enable_recording()` every response fetched
+through http_get is saved in a compact SQLite archive (REPLAY_ARCHIVE):
+URL, status, headers, the decoded body (zlib), time to headers and body
+transfer time. Redirect hops are saved as their own entries (status +
+Location). Network failures are saved too (error class and how long they
+took), so a replay reproduces dead hosts and timeouts.
+
+Replay: `ReplayServer(archive)` is a local keep-alive HTTP server. With
+`scrape_http.enable_replay(server.url)` every request of the scrapers goes
+to it: the original URL travels in the X-Replay-URL header, and responses
+keep their original URL, so redirects, subpage discovery and per-host
+bookkeeping behave as live. Each response is delayed by its recorded time
+to headers and transfer time (times latency_scale). Bodies are sent
+deflate-encoded straight from the archive when the client accepts it.
+Recorded failures are replayed by closing the connection after the
+recorded delay. URLs missing from the archive answer 404.
+
+Usage:
+    python3 -u scrape_replay.py record --targets /root/fase_r2_scrape_targets.json --limit 300
+    python3 -u scrape_replay.py serve --port 8765 --latency-scale 1.0
+    python3 scrape_benchmark.py scrape --archive /root/scrape_replay.sqlite --threads 8
+"""
+
+import argparse
+import atexit
+import json
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# ============================================================
+# CONFIG
+# ============================================================
+REPLAY_ARCHIVE = '/root/scrape_replay.sqlite'
+REPLAY_HEADER = 'X-Replay-URL'
+FLUSH_EVERY = 50            # Recorded responses written per transaction
+
+# Not replayed: the body is stored decoded, and the server frames it itself
+_SKIP_HEADERS = frozenset(['content-encoding', 'content-length', 'transfer-encoding', 'connection',
+                           'keep-alive', 'set-cookie', 'alt-svc', 'strict-transport-security',
+                           'date', 'server'])
+
+# ============================================================
+# STATE
+# ============================================================
+_lock = threading.Lock()
+_state = {'conn': None}
+_pending = []
+_stats = {'recorded': 0, 'errors': 0, 'bytes': 0, 'stored_bytes': 0}
+
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}", flush=True)
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS responses (
+            url TEXT PRIMARY KEY,
+            page_type TEXT,
+            status INTEGER,
+            headers TEXT,
+            body BLOB,
+            elapsed_seconds REAL,
+            transfer_seconds REAL,
+            error TEXT,
+            recorded_at REAL
+        )
+    """)
+    conn.commit()
+    return conn
+
+
+# ============================================================
+# RECORDING (called by scrape_http.http_get)
+# ============================================================
+def open_recorder(path=REPLAY_ARCHIVE):
+    """Start recording into the archive at path (entries for the same URL are replaced)."""
+    conn = _connect(path)
+    with _lock:
+        if _state['conn'] is not None:
+            _flush_locked()
+            _state['conn'].close()
+        _state['conn'] = conn
+        if not _state.get('atexit'):
+            atexit.register(flush)
+            _state['atexit'] = True
+
+
+def is_recording():
+    return _state['conn'] is not None
+
+
+def _headers(resp):
+    return json.dumps({k: v for k, v in resp.headers.items() if k.lower() not in _SKIP_HEADERS})
+
+
+def record_response(url, resp, page_type, seconds):
+    """Save resp (and its redirect hops); seconds = wall time of the whole http_get."""
+    if _state['conn'] is None:
+        return
+    now = time.time()
+    rows = []
+    hops = list(resp.history)
+    for i, hop in enumerate(hops):
+        rows.append((hop.url, page_type if i == 0 else None, hop.status_code, _headers(hop), None,
+                     hop.elapsed.total_seconds(), 0.0, None, now))
+        seconds -= hop.elapsed.total_seconds()
+    body = (resp._content or b'') if getattr(resp, '_content_consumed', False) else b''
+    elapsed = resp.elapsed.total_seconds()
+    stored = zlib.compress(body, 6)
+    rows.append((resp.url or url, None if hops else page_type, resp.status_code, _headers(resp),
+                 stored, elapsed, max(seconds - elapsed, 0.0), None, now))
+    with _lock:
+        _pending.extend(rows)
+        _stats['recorded'] += len(rows)
+        _stats['bytes'] += len(body)
+        _stats['stored_bytes'] += len(stored)
+        if len(_pending) >= FLUSH_EVERY:
+            _flush_locked()
+
+
+def record_error(url, exc, page_type, seconds):
+    """Save a failed request: its error class and how long it took to fail."""
+    if _state['conn'] is None:
+        return
+    if getattr(exc, 'response', None) is not None:
+        record_response(url, exc.response, page_type, seconds)   # e.g. RejectedContent (a PDF)
+        return
+    if isinstance(exc, requests.exceptions.Timeout):
+        error = 'timeout'
+    elif isinstance(exc, requests.exceptions.ConnectionError):
+        error = 'connection'
+    else:
+        return   # Skipped hosts: not a network outcome
+    url = requests.Request('GET', url).prepare().url   # As the replay adapter will send it
+    with _lock:
+        _pending.append((url, page_type, 0, '{}', None, seconds, 0.0, error, time.time()))
+        _stats['errors'] += 1
+        if len(_pending) >= FLUSH_EVERY:
+            _flush_locked()
+
+
+def flush():
+    with _lock:
+        _flush_locked()
+
+
+def _flush_locked():
+    if not _pending or _state['conn'] is None:
+        return
+    _state['conn'].executemany("""
+        INSERT INTO responses (url, page_type, status, headers, body, elapsed_seconds,
+                               transfer_seconds, error, recorded_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(url) DO UPDATE SET
+            page_type = COALESCE(page_type, excluded.page_type),
+            status = excluded.status,
+            headers = excluded.headers,
+            body = excluded.body,
+            elapsed_seconds = excluded.elapsed_seconds,
+            transfer_seconds = excluded.transfer_seconds,
+            error = excluded.error,
+            recorded_at = excluded.recorded_at
+    """, _pending)
+    _state['conn'].commit()
+    _pending.clear()
+
+
+def recording_stats():
+    with _lock:
+        return dict(_stats)
+
+
+def format_recording_stats():
+    """One-line summary for scraper logs."""
+    rs = recording_stats()
+    ratio = rs['stored_bytes'] / rs['bytes'] * 100 if rs['bytes'] else 0
+    return (f'{rs["recorded"]} responses + {rs["errors"]} failures recorded, '
+            f'{rs["bytes"] / 1_048_576:.1f} MB bodies stored in {rs["stored_bytes"] / 1_048_576:.1f} MB '
+            f'({ratio:.0f}%)')
+
+
+# ============================================================
+# ARCHIVE READING
+# ============================================================
+def archive_urls(path=REPLAY_ARCHIVE, page_type='main'):
+    """URLs recorded as the first request of page_type (e.g. the POI homepages)."""
+    conn = _connect(path)
+    try:
+        return [row[0] for row in conn.execute(
+            'SELECT url FROM responses WHERE page_type = ? ORDER BY recorded_at', (page_type,))]
+    finally:
+        conn.close()
+
+
+# ============================================================
+# REPLAY SERVER
+# ============================================================
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # Keep-alive, like the live sites
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        url = self.headers.get(REPLAY_HEADER) or self.path
+        row = server.lookup(url)
+        if row is None:
+            server.count('missing')
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        status, headers, body, elapsed, transfer, error = row
+        delay = elapsed * server.latency_scale
+        if error:
+            server.count('errors')
+            time.sleep(delay)
+            self.close_connection = True
+            return   # No response: the client sees a dropped connection or its own timeout
+
+        body = body or b''
+        deflate = body and 'deflate' in (self.headers.get('Accept-Encoding') or '')
+        payload = body if deflate else zlib.decompress(body) if body else b''
+        time.sleep(delay)
+        self.send_response(status)
+        for name, value in json.loads(headers).items():
+            self.send_header(name, value)
+        if deflate:
+            self.send_header('Content-Encoding', 'deflate')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if transfer:
+            time.sleep(transfer * server.latency_scale)
+        self.wfile.write(payload)
+        server.count('served')
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Local HTTP server answering from a record archive; see module docstring."""
+
+    daemon_threads = True
+
+    def __init__(self, archive=REPLAY_ARCHIVE, port=0, latency_scale=1.0):
+        super().__init__(('127.0.0.1', port), _ReplayHandler)
+        self.latency_scale = latency_scale
+        self._db = _connect(archive)
+        self._db_lock = threading.Lock()
+        self.stats = {'served': 0, 'errors': 0, 'missing': 0}
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/'
+
+    def lookup(self, url):
+        with self._db_lock:
+            return self._db.execute("""
+                SELECT status, headers, body, elapsed_seconds, transfer_seconds, error
+                FROM responses WHERE url = ?
+            """, (url,)).fetchone()
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+        # Clients dropping connections (timeouts, truncated bodies) are expected
+
+    def count(self, key):
+        with self._db_lock:
+            self.stats[key] += 1
+
+    def start(self):
+        """Serve in a background thread; returns self."""
+        threading.Thread(target=self.serve_forever, name='replay-server', daemon=True).start()
+        return self
+
+
+def serve(archive=REPLAY_ARCHIVE, port=0, latency_scale=1.0, ready=None):
+    """Run a ReplayServer in the foreground; ready (a multiprocessing queue) receives its URL."""
+    server = ReplayServer(archive, port, latency_scale)
+    if ready is not None:
+        ready.put(server.url)
+    else:
+        log(f'Replaying {archive} on {server.url} (latency x{latency_scale})')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        log(f'Replay server: {server.stats}')
+
+
+# ============================================================
+# CLI
+# ============================================================
+def record_targets(targets_path, archive, limit=None, threads=4):
+    """Scrape R2 targets live (scrape_single_poi) with recording on."""
+    # Imported here: scrape_http imports this module, and as __main__ the recorder state
+    # must be read from the scrape_replay instance scrape_http records into
+    from concurrent.futures import ThreadPoolExecutor
+
+    import scrape_replay
+    from fase_r2_source_data_enrichment import scrape_single_poi
+    from scrape_http import enable_recording, format_connection_stats
+
+    with open(targets_path, 'r', encoding='utf-8') as f:
+        targets = [t for t in json.load(f) if t.get('website')][:limit]
+    enable_recording(archive)
+    log(f'Recording {len(targets)} POI websites into {archive}')
+
+    def scrape(target):
+        url = target['website'] if target['website'].startswith('http') else 'https://' + target['website']
+        return scrape_single_poi(target['poi_id'], url, target.get('name', ''))
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        ok = sum(1 for result in pool.map(scrape, targets) if result['scrape_success'])
+    scrape_replay.flush()
+    log(f'Scraped {ok}/{len(targets)} OK; {scrape_replay.format_recording_stats()}')
+    log(f'Connections: {format_connection_stats()}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record / replay scraper HTTP traffic')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_record = sub.add_parser('record', help='Scrape R2 targets live and record the responses')
+    p_record.add_argument('--targets', default='/root/fase_r2_scrape_targets.json')
+    p_record.add_argument('--archive', default=REPLAY_ARCHIVE)
+    p_record.add_argument('--limit', type=int, default=None, help='Max POIs to record')
+    p_record.add_argument('--threads', type=int, default=4)
+
+    p_serve = sub.add_parser('serve', help='Serve an archive on a local port')
+    p_serve.add_argument('--archive', default=REPLAY_ARCHIVE)
+    p_serve.add_argument('--port', type=int, default=8765)
+    p_serve.add_argument('--latency-scale', type=float, default=1.0,
+                         help='Multiply recorded delays (0 = no delay)')
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        record_targets(args.targets, args.archive, args.limit, args.threads)
+    elif args.command == 'serve':
+        serve(args.archive, args.port, args.latency_scale)
+
+
+if __name__ == '__main__':
+    main()
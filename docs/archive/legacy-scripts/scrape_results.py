@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Append-only JSONL result log for long scrape runs.
+
+Every finished result is appended as one JSON line, so a checkpoint costs
+O(batch) instead of re-serializing the whole dataset. Next to the log, a
+compact ID index (<log>.ids, one "id offset ok" line per record) lets a resume
+rebuild the scraped/failed ID sets without parsing the log.
+
+    log = ResultLog('/root/fase_r2_scraped_data.jsonl', fsync='batch')
+    log.append(result, key=result['poi_id'], ok=result['scrape_success'])
+    log.checkpoint()                      # flush (+ fsync for 'batch')
+    for record in log.replay(): ...       # latest record per key, in log order
+    log.export_json('/root/fase_r2_scraped_data.json')
+
+fsync policies:
+    always : fsync after every append (survives power loss, slowest)
+    batch  : fsync on checkpoint() and close() (default)
+    never  : flush only; the OS decides when data reaches disk
+
+A torn last line (crash mid-write) is cut off when the log is reopened.
+
+Shared content is written once. Records point back into the log by byte
+offset, which is stable in an append-only file (superseded lines are not
+removed), and replay() / export_json() resolve the pointers, so readers
+see complete records:
+
+    append_ref(key, offset, overrides) : the record at offset plus overrides
+                                         (POIs that share one fetched URL).
+    shared_fields                      : text values of these fields (str, or
+                                         dict of str such as subpages) already
+                                         written since the log was opened are
+                                         stored as {'__text': [offset, field,
+                                         (subkey)]} (chains and booking
+                                         platforms serving the same page).
+"""
+
+import copy
+import hashlib
+import json
+import os
+import textwrap
+import threading
+
+FSYNC_POLICIES = ('always', 'batch', 'never')
+SHARED_TEXT_MIN_CHARS = 200     # Shorter texts are cheaper inline than as a reference
+_READ_CACHE_SIZE = 64           # Referenced lines kept parsed during replay()
+
+
+class ResultLog:
+    """Append-only JSONL log with an ID index; see module docstring."""
+
+    def __init__(self, path, fsync='batch', truncate=False, shared_fields=()):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f'fsync must be one of {FSYNC_POLICIES}, got {fsync!r}')
+        self.path = path
+        self.index_path = f'{path}.ids'
+        self.fsync = fsync
+        self.shared_fields = tuple(shared_fields)
+        self.shared_chars = 0   # Characters written as references instead of copies
+        self._texts = {}        # text digest -> [offset, field(, subkey)] of its first copy
+        self._lock = threading.Lock()
+        self._index = {}   # key -> (offset, ok) of the latest record
+        self._index_rebuilt = False
+
+        if not truncate:
+            self._repair_tail()
+        self._log = open(self.path, 'wb' if truncate else 'ab')
+        if not truncate:
+            self._index = self._load_index()
+        self._idx = open(self.index_path, 'w' if truncate or self._index_rebuilt else 'a',
+                         encoding='utf-8')
+        if self._index_rebuilt:
+            for key, (offset, ok) in self._index.items():
+                self._idx.write(f'{key} {offset} {int(ok)}\n')
+            self._idx.flush()
+
+    # ------------------------------------------------------------
+    # Opening / recovery
+    # ------------------------------------------------------------
+    def _repair_tail(self):
+        """Cut off a partial last line left by a crash mid-append."""
+        if not os.path.exists(self.path):
+            return
+        size = os.path.getsize(self.path)
+        if size == 0:
+            return
+        with open(self.path, 'rb+') as f:
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            # Walk back to the last complete line
+            pos = size
+            while pos > 0:
+                step = min(65536, pos)
+                pos -= step
+                f.seek(pos)
+                chunk = f.read(step)
+                nl = chunk.rfind(b'\n')
+                if nl != -1:
+                    f.truncate(pos + nl + 1)
+                    return
+            f.truncate(0)
+
+    def _load_index(self):
+        """Read <log>.ids; rebuild it from the log when missing or stale."""
+        log_size = os.path.getsize(self.path)
+        index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                raw = f.read()
+            if not raw or raw.endswith('\n'):   # a torn index line means: rebuild
+                for line in raw.splitlines():
+                    key, offset, ok = line.split(' ')
+                    if int(offset) < log_size:
+                        index[_parse_key(key)] = (int(offset), ok == '1')
+                last = max((offset for offset, _ in index.values()), default=-1)
+                if self._next_line_offset(last) == log_size:
+                    return index
+
+        # Index missing or behind the log: rebuild by scanning the log once
+        index = {}
+        offset = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                record = json.loads(line)
+                index[record['__key']] = (offset, bool(record['__ok']))
+                offset += len(line)
+        self._index_rebuilt = True
+        return index
+
+    def _next_line_offset(self, offset):
+        if offset < 0:
+            return 0
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return offset + len(f.readline())
+
+    # ------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------
+    def append(self, record, key, ok=True):
+        """Append one result; returns its offset. A later record with the same key supersedes it."""
+        with self._lock:
+            offset = self._log.tell()
+            if self.shared_fields:
+                record = self._share_texts(record, offset)
+            line = json.dumps(dict(record, __key=key, __ok=bool(ok)), ensure_ascii=False)
+            self._log.write((line + '\n').encode('utf-8'))
+            self._idx.write(f'{key} {offset} {int(bool(ok))}\n')
+            self._index[key] = (offset, bool(ok))
+            self._log.flush()
+            self._idx.flush()
+            if self.fsync == 'always':
+                os.fsync(self._log.fileno())
+        return offset
+
+    def append_ref(self, key, offset, overrides=None, ok=True):
+        """Append a record that is the one at offset (see append) with overrides applied."""
+        return self.append(dict(overrides or {}, __ref=offset), key, ok)
+
+    def _share_texts(self, record, offset):
+        """record with shared_fields texts seen before replaced by references (caller holds the lock)."""
+        record = dict(record)
+        for field in self.shared_fields:
+            value = record.get(field)
+            if isinstance(value, str):
+                record[field] = self._share_text(value, [offset, field])
+            elif isinstance(value, dict):
+                record[field] = {sub: self._share_text(text, [offset, field, sub])
+                                 if isinstance(text, str) else text
+                                 for sub, text in value.items()}
+        return record
+
+    def _share_text(self, text, where):
+        if len(text) < SHARED_TEXT_MIN_CHARS:
+            return text
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+        first = self._texts.setdefault(digest, where)
+        if first is where:
+            return text
+        self.shared_chars += len(text)
+        return {'__text': first}
+
+    def checkpoint(self):
+        """Make appended records durable according to the fsync policy."""
+        with self._lock:
+            self._log.flush()
+            self._idx.flush()
+            if self.fsync in ('always', 'batch'):
+                os.fsync(self._log.fileno())
+                os.fsync(self._idx.fileno())
+
+    def close(self):
+        self.checkpoint()
+        with self._lock:
+            self._log.close()
+            self._idx.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------
+    def keys(self, ok=None):
+        """Keys in the log; ok=True/False filters on the recorded status."""
+        with self._lock:
+            return {k for k, (_, rec_ok) in self._index.items() if ok is None or rec_ok == ok}
+
+    def __len__(self):
+        return len(self._index)
+
+    def replay(self):
+        """Yield the latest record per key, in log order."""
+        with self._lock:
+            self._log.flush()
+            wanted = {offset for offset, _ in self._index.values()}
+        offset = 0
+        cache = {}
+        with open(self.path, 'rb') as f, open(self.path, 'rb') as reader:
+            for line in f:
+                if offset in wanted:
+                    yield self._resolve(json.loads(line), reader, cache)
+                offset += len(line)
+
+    # ------------------------------------------------------------
+    # References
+    # ------------------------------------------------------------
+    def _raw_at(self, reader, offset, cache):
+        record = cache.get(offset)
+        if record is None:
+            reader.seek(offset)
+            record = json.loads(reader.readline())
+            if len(cache) >= _READ_CACHE_SIZE:
+                cache.pop(next(iter(cache)))
+            cache[offset] = record
+        return record
+
+    def _text_at(self, reader, where, cache):
+        value = self._raw_at(reader, where[0], cache)[where[1]]
+        return value[where[2]] if len(where) > 2 else value
+
+    def _resolve(self, record, reader, cache):
+        """record without log metadata, with __ref and __text pointers replaced by their content."""
+        ref = record.pop('__ref', None)
+        if ref is not None:
+            # A copy: records sharing a base must not share its nested dicts
+            base = self._resolve(copy.deepcopy(self._raw_at(reader, ref, cache)), reader, cache)
+            record = dict(base, **record)
+        record.pop('__key', None)
+        record.pop('__ok', None)
+        for field, value in record.items():
+            if isinstance(value, dict):
+                if set(value) == {'__text'}:
+                    record[field] = self._text_at(reader, value['__text'], cache)
+                elif any(isinstance(v, dict) and set(v) == {'__text'} for v in value.values()):
+                    record[field] = {sub: self._text_at(reader, v['__text'], cache)
+                                     if isinstance(v, dict) and set(v) == {'__text'} else v
+                                     for sub, v in value.items()}
+        return record
+
+    def export_json(self, out_path):
+        """Write the replayed records as one indented JSON array (legacy format)."""
+        tmp = f'{out_path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write('[')
+            for i, record in enumerate(self.replay()):
+                f.write(',\n' if i else '\n')
+                f.write(textwrap.indent(json.dumps(record, indent=2, ensure_ascii=False), '  '))
+            f.write('\n]' if len(self) else ']')
+        os.replace(tmp, out_path)
+        return out_path
+
+
+def _parse_key(raw):
+    """Index keys are written with str() (no spaces); restore ints (POI IDs)."""
+    try:
+        return int(raw)
+    except ValueError:
+        return raw
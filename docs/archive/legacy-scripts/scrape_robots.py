@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Crawl politeness for the R1, R2 and R6b scrapers: cached robots.txt and per-host pacing.
+
+The scrapers used to ignore robots.txt and pace themselves with global
+sleeps (SCRAPE_DELAY after every POI, DOMAIN_DELAY when the domain
+changed). Those sleeps slow down the whole crawl but do not stop one host
+from getting requests in quick succession (a POI's subpages, two POIs on
+one site under --async-scrape). Raising concurrency therefore meant
+more 403/429 answers. With the engine enabled, `scrape_http.http_get`
+consults it before every website request:
+
+    robots.txt : fetched once per origin (scheme + host + port) and cached in
+                 SQLite (ROBOTS_CACHE), shared across phases and runs, for
+                 ROBOTS_TTL. Concurrent first requests to one origin wait for
+                 a single fetch. A disallowed URL raises RobotsBlocked
+                 without being sent.
+    pacing     : one schedule per host (www. ignored, see scrape_hosts.host_of).
+                 Requests to a host are spaced by its interval:
+                 DEFAULT_HOST_INTERVAL, or the Crawl-delay / Request-rate
+                 for our user agent when larger. A request whose slot is
+                 more than MAX_WAIT seconds away is not queued but raises
+                 RobotsBlocked, so one slow host cannot tie up the workers.
+    back-off   : a 429 or 503 pushes the host's next slot back by its
+                 Retry-After (RETRY_AFTER_DEFAULT when absent, at most
+                 RETRY_AFTER_MAX).
+
+Different hosts never wait on each other, so the scrapers can run more
+workers without raising the load on any single site.
+
+robots.txt answers are read like urllib.robotparser does: 401/403 disallow
+the whole site, other 4xx (and HTML soft-404 pages) allow everything. 5xx
+and network failures also allow everything, but are cached only for
+ERROR_TTL, so a transient outage does not drop a POI for a day.
+
+Only POLITE_PAGE_TYPES are checked and paced. Social pages are left to the
+per-platform budgets of scrape_ratelimit: facebook.com and instagram.com
+disallow every generic crawler, so R6b keeps its existing rate limits there.
+
+Usage:
+    from scrape_http import enable_robots
+    enable_robots()                           # default: ROBOTS_CACHE
+    ...
+    except RobotsBlocked as e: ...            # disallowed, or Crawl-delay too long
+    log(f'Politeness: {format_robots_stats()}')
+"""
+
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from scrape_hosts import host_of
+
+# ============================================================
+# CONFIG
+# ============================================================
+ROBOTS_CACHE = '/root/scrape_robots.sqlite'
+ROBOTS_TTL = 86400            # Seconds a fetched robots.txt is trusted
+ERROR_TTL = 3600              # Seconds a 5xx / unreachable robots.txt is trusted
+ROBOTS_TIMEOUT = 5            # robots.txt request timeout
+
+DEFAULT_HOST_INTERVAL = 0.3   # Seconds between two requests to one host
+MAX_WAIT = 30                 # Skip (do not queue) requests whose slot is further away
+RETRY_AFTER_DEFAULT = 30      # Back-off after a 429/503 without Retry-After
+RETRY_AFTER_MAX = 300
+
+POLITE_PAGE_TYPES = frozenset(['main', 'subpage', 'sitemap'])
+BACKOFF_STATUSES = frozenset([429, 503])
+
+
+class RobotsBlocked(requests.RequestException):
+    """Request not sent: disallowed by robots.txt, or its host's next slot is too far away."""
+
+
+# ============================================================
+# STATE
+# ============================================================
+_lock = threading.Lock()
+_state = {'conn': None}
+_robots = {}     # origin -> (RobotFileParser, expires_at)
+_fetching = {}   # origin -> threading.Event while its robots.txt is being fetched
+_hosts = {}      # host -> {'next_slot', 'interval'}
+_stats = {'robots_fetched': 0, 'robots_cached': 0, 'robots_errors': 0, 'disallowed': 0,
+          'paced': 0, 'waits': 0, 'wait_seconds': 0.0, 'too_slow': 0, 'backoffs': 0,
+          'crawl_delay_hosts': 0}
+
+
+def open_cache(path=ROBOTS_CACHE):
+    """Open (or create) the robots.txt cache at path and turn the engine on."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS robots (
+            origin TEXT PRIMARY KEY,
+            status INTEGER,
+            body TEXT,
+            fetched_at REAL,
+            expires_at REAL
+        )
+    """)
+    conn.execute('DELETE FROM robots WHERE expires_at <= ?', (time.time(),))
+    conn.commit()
+    with _lock:
+        if _state['conn'] is not None:
+            _state['conn'].close()
+        _state['conn'] = conn
+        _robots.clear()
+        _hosts.clear()
+
+
+def is_enabled():
+    return _state['conn'] is not None
+
+
+def origin_of(url):
+    parsed = urlparse(url)
+    return f'{parsed.scheme}://{parsed.netloc.lower()}'
+
+
+def user_agent_of(headers):
+    return (headers or {}).get('User-Agent') or '*'
+
+
+# ============================================================
+# ROBOTS.TXT CACHE
+# ============================================================
+def _parse(status, body):
+    """RobotFileParser for a robots.txt answer (status 0 = network failure)."""
+    robots = RobotFileParser()
+    if status in (401, 403):
+        robots.disallow_all = True
+    elif status == 200 and '<html' not in (body or '')[:500].lower():
+        robots.parse((body or '').splitlines())
+    else:
+        robots.allow_all = True
+    robots.modified()
+    return robots
+
+
+def _load(origin):
+    """(parser, expires_at) from the SQLite cache, or None (caller holds _lock)."""
+    row = _state['conn'].execute('SELECT status, body, expires_at FROM robots WHERE origin = ?',
+                                 (origin,)).fetchone()
+    if row is None or row[2] <= time.time():
+        return None
+    return _parse(row[0], row[1]), row[2]
+
+
+def _download(origin, headers, fetch):
+    """(status, body) of origin's robots.txt; fetch(url, headers, timeout) -> (status, text)."""
+    try:
+        return fetch(f'{origin}/robots.txt', headers, ROBOTS_TIMEOUT)
+    except requests.RequestException:
+        return 0, None
+
+
+def robots_for(url, headers, fetch):
+    """Cached RobotFileParser for url's origin (fetched on first use or after expiry)."""
+    origin = origin_of(url)
+    while True:
+        with _lock:
+            entry = _robots.get(origin)
+            if entry is not None and entry[1] > time.time():
+                return entry[0]
+            entry = _load(origin)
+            if entry is not None:
+                _robots[origin] = entry
+                _stats['robots_cached'] += 1
+                _apply_crawl_delay(url, entry[0], user_agent_of(headers))
+                return entry[0]
+            pending = _fetching.get(origin)
+            if pending is None:
+                pending = _fetching[origin] = threading.Event()
+                break
+        pending.wait(ROBOTS_TIMEOUT * 2)   # Another thread is fetching it
+
+    try:
+        status, body = _download(origin, headers, fetch)
+        ttl = ERROR_TTL if status == 0 or status >= 500 else ROBOTS_TTL
+        robots = _parse(status, body)
+        now = time.time()
+        with _lock:
+            _robots[origin] = (robots, now + ttl)
+            _stats['robots_fetched'] += 1
+            _stats['robots_errors'] += status == 0 or status >= 500
+            _state['conn'].execute("""
+                INSERT OR REPLACE INTO robots (origin, status, body, fetched_at, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (origin, status, body, now, now + ttl))
+            _state['conn'].commit()
+            _apply_crawl_delay(url, robots, user_agent_of(headers))
+        return robots
+    finally:
+        with _lock:
+            _fetching.pop(origin, None)
+        pending.set()
+
+
+def _apply_crawl_delay(url, robots, user_agent):
+    """Set url's host interval from Crawl-delay / Request-rate (caller holds _lock)."""
+    delay = robots.crawl_delay(user_agent)
+    rate = robots.request_rate(user_agent)
+    if rate is not None and rate.requests:
+        delay = max(delay or 0, rate.seconds / rate.requests)
+    if not delay:
+        return
+    host = _host_slot(host_of(url))
+    interval = max(float(delay), DEFAULT_HOST_INTERVAL)
+    if interval > host['interval']:
+        _stats['crawl_delay_hosts'] += host['interval'] == DEFAULT_HOST_INTERVAL
+        host['interval'] = interval
+
+
+# ============================================================
+# PER-HOST SCHEDULER (called by scrape_http.http_get)
+# ============================================================
+def _host_slot(host):
+    return _hosts.setdefault(host, {'next_slot': 0.0, 'interval': DEFAULT_HOST_INTERVAL})
+
+
+def admit(url, page_type, headers, fetch):
+    """Check url against robots.txt and wait for its host's next slot.
+
+    Raises RobotsBlocked instead of sending. Returns seconds waited.
+    """
+    if _state['conn'] is None or page_type not in POLITE_PAGE_TYPES:
+        return 0.0
+    user_agent = user_agent_of(headers)
+    robots = robots_for(url, headers, fetch)
+    if page_type != 'sitemap' and not robots.can_fetch(user_agent, url):
+        with _lock:
+            _stats['disallowed'] += 1
+        raise RobotsBlocked(f'{url}: disallowed by robots.txt')
+
+    host = host_of(url)
+    with _lock:
+        slot = _host_slot(host)
+        now = time.monotonic()
+        start = max(now, slot['next_slot'])
+        wait = start - now
+        if wait > MAX_WAIT:
+            _stats['too_slow'] += 1
+            raise RobotsBlocked(f'{host}: next slot in {wait:.0f}s (crawl-delay '
+                                f'{slot["interval"]:g}s)')
+        slot['next_slot'] = start + slot['interval']   # Reserve the slot, then sleep
+        _stats['paced'] += 1
+        if wait:
+            _stats['waits'] += 1
+            _stats['wait_seconds'] += wait
+    if wait:
+        time.sleep(wait)
+    return wait
+
+
+def _retry_after(value):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+
+def record_response(url, resp):
+    """On 429/503, hold back url's host for its Retry-After."""
+    if _state['conn'] is None or resp.status_code not in BACKOFF_STATUSES:
+        return
+    seconds = _retry_after(resp.headers.get('Retry-After'))
+    seconds = min(max(seconds if seconds is not None else RETRY_AFTER_DEFAULT, 0), RETRY_AFTER_MAX)
+    with _lock:
+        slot = _host_slot(host_of(url))
+        slot['next_slot'] = max(slot['next_slot'], time.monotonic() + seconds)
+        _stats['backoffs'] += 1
+
+
+# ============================================================
+# REPORTING
+# ============================================================
+def robots_stats():
+    """robots.txt fetches, disallowed URLs and per-host pacing in this run."""
+    with _lock:
+        return dict(_stats)
+
+
+def format_robots_stats():
+    """One-line summary for scraper logs."""
+    rs = robots_stats()
+    if not is_enabled():
+        return 'robots.txt ignored (fixed sleeps)'
+    return (f'robots.txt {rs["robots_fetched"]} fetched ({rs["robots_errors"]} unreachable), '
+            f'{rs["robots_cached"]} from cache; {rs["disallowed"]} disallowed, '
+            f'{rs["too_slow"]} over crawl-delay limit; {rs["paced"]} requests paced, '
+            f'{rs["waits"]} waited ({rs["wait_seconds"]:.0f}s); '
+            f'{rs["crawl_delay_hosts"]} hosts with Crawl-delay, {rs["backoffs"]} 429/503 back-offs')
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Incremental re-scrape scheduler: keep high-visibility POIs fresh within a nightly request budget.
+
+R2 (all 1,923 websites) and R6b (2,047 targets) are all-or-nothing crawls.
+This scheduler instead re-scrapes a few POIs every night, picked by priority:
+
+    interval = MAX_INTERVAL_DAYS - (MAX_INTERVAL_DAYS - MIN_INTERVAL_DAYS) * visibility
+    priority = days since last scrape / interval * FRESHNESS_FACTORS[freshness]
+
+visibility is the score of fase_r6_excel_generator.fetch_top_pois
+(VISIBILITY_SCORE_SQL: rating and log review count, ~0-1). The most visible
+POIs come due every MIN_INTERVAL_DAYS and the long tail every
+MAX_INTERVAL_DAYS. freshness is the status detect_freshness_from_text() gave
+the POI's sources last time. A source that was active recently changes more
+often, so it comes due sooner. A stale one comes due later.
+
+POIs with priority >= 1 are due. POIs never scraped by the scheduler come
+first, ordered by visibility. Due POIs are taken in priority order until the
+estimated request cost reaches the budget. The cost estimate is each POI's
+last measured request count, or DEFAULT_REQUESTS per source. While running,
+the budget is charged with real network requests (scrape_http
+connection_stats), so cache hits are free.
+
+A re-scrape reuses the phase scrapers and appends to their result logs, so
+the next fact-sheet build picks up the new records:
+    website   : fase_r2_source_data_enrichment.scrape_single_poi -> R2 SCRAPE_LOG
+    facebook  : fase_r6b_source_rescrape.scrape_facebook         -> R6b RESULT_LOG
+    instagram : fase_r6b_source_rescrape.scrape_instagram        -> R6b RESULT_LOG
+
+State per POI (last scrape, freshness, requests used) lives in
+SCHEDULE_STORE (SQLite).
+
+Usage:
+    python3 -u scrape_schedule.py                       # Dry-run: tonight's plan
+    python3 -u scrape_schedule.py --execute             # Re-scrape within the budget
+    python3 -u scrape_schedule.py --execute --budget 500 --dest texel
+"""
+
+import argparse
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import mysql.connector
+
+from fase_r2_source_data_enrichment import (DB_CONFIG, SCRAPE_LOG, SCRAPE_SHARED_FIELDS,
+                                             scrape_single_poi)
+from fase_r6b_source_rescrape import (RESULT_LOG, scrape_facebook, scrape_instagram,
+                                      detect_freshness_from_text)
+from scrape_hosts import url_key
+from scrape_http import (connection_stats, enable_page_cache, enable_host_registry,
+                         enable_adaptive_timeouts, enable_robots, format_connection_stats)
+from scrape_robots import format_robots_stats
+from scrape_results import ResultLog
+
+# ============================================================
+# CONFIG
+# ============================================================
+SCHEDULE_STORE = '/root/scrape_schedule.sqlite'
+
+NIGHTLY_REQUEST_BUDGET = 3000
+MIN_INTERVAL_DAYS = 7       # Re-scrape interval of the most visible POIs
+MAX_INTERVAL_DAYS = 90      # ... and of the long tail
+FRESHNESS_FACTORS = {'fresh': 1.5, 'unknown': 1.0, 'stale': 0.6}
+NEVER_SCRAPED_PRIORITY = 100.0
+
+# Estimated requests per source until a POI has a measured count
+DEFAULT_REQUESTS = {'website': 6, 'facebook': 1, 'instagram': 1}   # website: main + robots + 4 subpages
+
+# Same expression as fase_r6_excel_generator.fetch_top_pois
+VISIBILITY_SCORE_SQL = ('ROUND((COALESCE(p.rating, 0)/5 * 0.4) + '
+                        '(LOG10(COALESCE(p.review_count, 0)+1)/3 * 0.6), 4)')
+
+# ============================================================
+# STATE
+# ============================================================
+_lock = threading.Lock()
+_state = {'conn': None}
+_stats = {'planned': 0, 'scraped': 0, 'coalesced': 0, 'requests': 0, 'budget': 0,
+          'fresh': 0, 'stale': 0, 'unknown': 0}
+
+
+def log(msg):
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}", flush=True)
+
+
+def get_connection():
+    return mysql.connector.connect(**DB_CONFIG)
+
+
+def open_store(path=SCHEDULE_STORE):
+    """Open (or create) the schedule store."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS poi_schedule (
+            poi_id INTEGER PRIMARY KEY,
+            last_scraped REAL,
+            freshness TEXT,
+            last_activity TEXT,
+            requests INTEGER,
+            scrapes INTEGER DEFAULT 0
+        )
+    """)
+    conn.commit()
+    with _lock:
+        if _state['conn'] is not None:
+            _state['conn'].close()
+        _state['conn'] = conn
+    return conn
+
+
+def load_schedule():
+    """{poi_id: (last_scraped, freshness, requests)} from the store."""
+    rows = _state['conn'].execute('SELECT poi_id, last_scraped, freshness, requests FROM poi_schedule')
+    return {row[0]: row[1:] for row in rows}
+
+
+def record_scrape(poi_id, freshness, last_activity, requests_used):
+    with _lock:
+        _state['conn'].execute("""
+            INSERT INTO poi_schedule (poi_id, last_scraped, freshness, last_activity, requests, scrapes)
+            VALUES (?, ?, ?, ?, ?, 1)
+            ON CONFLICT(poi_id) DO UPDATE SET
+                last_scraped = excluded.last_scraped,
+                freshness = excluded.freshness,
+                last_activity = excluded.last_activity,
+                requests = excluded.requests,
+                scrapes = scrapes + 1
+        """, (poi_id, time.time(), freshness, last_activity, requests_used))
+        _state['conn'].commit()
+
+
+# ============================================================
+# PLANNING
+# ============================================================
+def fetch_candidate_pois(conn, dest_id=None):
+    """Active POIs with at least one online source, with their visibility score."""
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(f"""
+        SELECT p.id as poi_id, p.name, p.destination_id, p.category,
+               p.website, p.facebook_url, p.instagram_url,
+               {VISIBILITY_SCORE_SQL} as visibility_score
+        FROM POI p
+        WHERE p.is_active = 1
+          AND (p.website IS NOT NULL AND p.website != ''
+               OR p.facebook_url IS NOT NULL AND p.facebook_url != ''
+               OR p.instagram_url IS NOT NULL AND p.instagram_url != '')
+          AND (%s IS NULL OR p.destination_id = %s)
+    """, (dest_id, dest_id))
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+
+def poi_sources(poi):
+    return [source for source, column in (('website', 'website'), ('facebook', 'facebook_url'),
+                                          ('instagram', 'instagram_url'))
+            if poi.get(column)]
+
+
+def refresh_interval_days(visibility):
+    visibility = min(max(float(visibility or 0), 0.0), 1.0)
+    return MAX_INTERVAL_DAYS - (MAX_INTERVAL_DAYS - MIN_INTERVAL_DAYS) * visibility
+
+
+def priority(poi, entry, now=None):
+    """Re-scrape priority of poi given its schedule entry (None = never scraped)."""
+    if entry is None or entry[0] is None:
+        return NEVER_SCRAPED_PRIORITY + float(poi['visibility_score'] or 0)
+    last_scraped, freshness, _ = entry
+    age_days = ((now or time.time()) - last_scraped) / 86400
+    return (age_days / refresh_interval_days(poi['visibility_score'])
+            * FRESHNESS_FACTORS.get(freshness or 'unknown', 1.0))
+
+
+def estimated_requests(poi, entry):
+    if entry is not None and entry[2]:
+        return entry[2]
+    return sum(DEFAULT_REQUESTS[source] for source in poi_sources(poi))
+
+
+def plan_rescrape(pois, schedule, budget, now=None):
+    """Due POIs in priority order whose estimated cost fits the budget.
+
+    Returns [(poi, priority, estimated_requests)].
+    """
+    due = []
+    for poi in pois:
+        entry = schedule.get(poi['poi_id'])
+        prio = priority(poi, entry, now)
+        if prio >= 1:
+            due.append((poi, prio, estimated_requests(poi, entry)))
+    due.sort(key=lambda item: item[1], reverse=True)
+
+    plan, remaining = [], budget
+    for poi, prio, cost in due:
+        if cost <= remaining:
+            plan.append((poi, prio, cost))
+            remaining -= cost
+    return plan, len(due)
+
+
+# ============================================================
+# EXECUTION
+# ============================================================
+def _network_requests():
+    return connection_stats()['requests']
+
+
+def rescrape_poi(poi, r2_log, r6b_log, site_results):
+    """Re-scrape poi's sources into the R2 / R6b result logs; returns (freshness, last_date).
+
+    site_results caches this run's website results per URL as (result, log offset).
+    Like R2, a POI sharing a site that was already scraped is written as a
+    reference to that record (content stored once).
+    """
+    dates = []
+    statuses = []
+    if poi.get('website'):
+        url = poi['website'].strip()
+        url = url if url.startswith('http') else 'https://' + url
+        key = url_key(url)
+        if key not in site_results:
+            result = scrape_single_poi(poi['poi_id'], url, poi['name'])
+            offset = r2_log.append(result, key=poi['poi_id'], ok=result['scrape_success'])
+            site_results[key] = (result, offset)
+        else:
+            result, offset = site_results[key]
+            r2_log.append_ref(poi['poi_id'], offset,
+                              {'poi_id': poi['poi_id'], 'website': url,
+                               'coalesced_from': result['poi_id']},
+                              ok=result['scrape_success'])
+            with _lock:
+                _stats['coalesced'] += 1
+        if result['scrape_success']:
+            text = '\n'.join([result.get('main_content', '')] + list(result.get('subpages', {}).values()))
+            status, last = detect_freshness_from_text(text)
+            statuses.append(status)
+            dates.append(last)
+
+    for platform, column, scrape in (('facebook', 'facebook_url', scrape_facebook),
+                                     ('instagram', 'instagram_url', scrape_instagram)):
+        if not poi.get(column):
+            continue
+        result = scrape(poi[column], poi['name'])
+        if result is None:
+            continue
+        result.update(poi_id=poi['poi_id'], name=poi['name'], destination_id=poi['destination_id'])
+        r6b_log.append(dict(result, platform=platform), key=f"{platform}:{poi['poi_id']}",
+                       ok=result['status'] == 'success')
+        statuses.append(result.get('freshness_status', 'unknown'))
+        if result.get('last_activity_date'):
+            dates.append(datetime.fromisoformat(result['last_activity_date']))
+
+    freshness = ('fresh' if 'fresh' in statuses else 'stale' if 'stale' in statuses else 'unknown')
+    last = max((d for d in dates if d), default=None)
+    return freshness, last
+
+
+def run_plan(plan, budget):
+    """Re-scrape the planned POIs until the budget of network requests is spent."""
+    site_results = {}
+    started = _network_requests()
+    r2_log = ResultLog(SCRAPE_LOG, shared_fields=SCRAPE_SHARED_FIELDS)   # As R2 writes it
+    with r2_log, ResultLog(RESULT_LOG) as r6b_log:
+        for i, (poi, prio, estimate) in enumerate(plan):
+            spent = _network_requests() - started
+            if spent + estimate > budget:
+                log(f'  Budget reached: {spent}/{budget} requests, {len(plan) - i} planned POIs left')
+                break
+            before = _network_requests()
+            freshness, last = rescrape_poi(poi, r2_log, r6b_log, site_results)
+            used = _network_requests() - before
+            record_scrape(poi['poi_id'], freshness, last.isoformat() if last else None,
+                          used or estimate)
+            with _lock:
+                _stats['scraped'] += 1
+                _stats[freshness] += 1
+            log(f"  [{i + 1}/{len(plan)}] {poi['name'][:40]:40s} prio {prio:6.2f} "
+                f"vis {float(poi['visibility_score'] or 0):.2f} -> {freshness}, {used} requests")
+            if (i + 1) % 25 == 0:
+                r2_log.checkpoint()
+                r6b_log.checkpoint()
+    with _lock:
+        _stats['requests'] = _network_requests() - started
+
+
+# ============================================================
+# REPORTING
+# ============================================================
+def schedule_stats():
+    """This run's planned / scraped POIs and requests spent."""
+    with _lock:
+        return dict(_stats)
+
+
+def format_schedule_stats():
+    """One-line summary for scraper logs."""
+    ss = schedule_stats()
+    return (f'{ss["scraped"]}/{ss["planned"]} planned POIs re-scraped ({ss["coalesced"]} shared a site), '
+            f'{ss["requests"]}/{ss["budget"]} requests; fresh {ss["fresh"]}, stale {ss["stale"]}, '
+            f'unknown {ss["unknown"]}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incremental re-scrape within a nightly budget')
+    parser.add_argument('--execute', action='store_true', help='Re-scrape (default: dry-run plan)')
+    parser.add_argument('--budget', type=int, default=NIGHTLY_REQUEST_BUDGET,
+                        help=f'Network requests per run (default {NIGHTLY_REQUEST_BUDGET})')
+    parser.add_argument('--dest', choices=['texel', 'calpe'], help='Only one destination')
+    parser.add_argument('--no-page-cache', action='store_true')
+    parser.add_argument('--no-host-registry', action='store_true')
+    parser.add_argument('--fixed-timeouts', action='store_true')
+    parser.add_argument('--ignore-robots', action='store_true')
+    args = parser.parse_args()
+
+    log('=' * 70)
+    log(f"RE-SCRAPE SCHEDULER — {'EXECUTE' if args.execute else 'DRY-RUN'}, "
+        f'budget {args.budget} requests')
+    log('=' * 70)
+
+    open_store()
+    conn = get_connection()
+    pois = fetch_candidate_pois(conn, {'texel': 2, 'calpe': 1}.get(args.dest))
+    conn.close()
+    schedule = load_schedule()
+    plan, due = plan_rescrape(pois, schedule, args.budget)
+    estimate = sum(cost for _, _, cost in plan)
+    never = sum(1 for poi in pois if poi['poi_id'] not in schedule)
+    log(f'Candidates: {len(pois)} POIs with an online source ({never} never re-scraped)')
+    log(f'Due: {due}, planned tonight: {len(plan)} (~{estimate} requests)')
+    with _lock:
+        _stats['planned'] = len(plan)
+        _stats['budget'] = args.budget
+
+    for poi, prio, cost in plan[:20]:
+        log(f"  prio {prio:7.2f}  vis {float(poi['visibility_score'] or 0):.2f}  ~{cost:3d} req  "
+            f"{poi['name'][:50]} ({', '.join(poi_sources(poi))})")
+    if len(plan) > 20:
+        log(f'  ... {len(plan) - 20} more')
+    if not args.execute:
+        return
+
+    if not args.no_page_cache:
+        enable_page_cache()
+    if not args.no_host_registry:
+        enable_host_registry()
+    if not args.fixed_timeouts:
+        enable_adaptive_timeouts()
+    if not args.ignore_robots:
+        enable_robots()
+
+    start = time.time()
+    run_plan(plan, args.budget)
+    log(f'\nSchedule: {format_schedule_stats()}')
+    log(f'Connections: {format_connection_stats()}')
+    log(f'Politeness: {format_robots_stats()}')
+    log(f'Doorlooptijd: {(time.time() - start) / 60:.1f} min')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Structured-data fact extraction (schema.org JSON-LD + OpenGraph) for scraped pages.
+
+`structured_facts(page['json_ld'], page['opengraph'])` walks every JSON-LD
+block, including lists, @graph arrays and nested entities (location,
+mainEntity, ...). It picks the business node and returns the facts it carries:
+
+    {'opening_hours': 'Monday 09:00-17:00; Tuesday 09:00-17:00; ... Saturday closed',
+     'price_range': '€€', 'address': 'Dorpsstraat 1, 1791 AA, Den Burg',
+     'phone': '+31 222 123456', 'email': 'info@...', 'geo': {'lat': 53.05, 'lon': 4.79},
+     'name': '...', 'schema_type': 'Restaurant'}
+
+Only facts that are present are returned. Nodes typed as a LocalBusiness /
+Restaurant / TouristAttraction kind (BUSINESS_TYPES) are preferred. A generic
+Organization or Place is used only when no business node exists. Missing
+address, phone and geo fall back to OpenGraph place:/business: properties.
+
+`facts_complete(facts, structured_names)` tells a scraper when REQUIRED_FACTS
+are known from structured data, so subpage crawling can be skipped. Facts the
+text patterns found do not count: one 'Maandag 10:00' line on a homepage is
+not the opening-hours table on /openingstijden.
+"""
+
+# ============================================================
+# CONFIG
+# ============================================================
+REQUIRED_FACTS = ('opening_hours', 'address', 'phone')
+
+BUSINESS_TYPES = frozenset([
+    'LocalBusiness', 'Restaurant', 'FoodEstablishment', 'CafeOrCoffeeShop', 'BarOrPub',
+    'Bakery', 'FastFoodRestaurant', 'IceCreamShop', 'Winery', 'Brewery',
+    'TouristAttraction', 'TouristDestination', 'TouristInformationCenter', 'LandmarksOrHistoricalBuildings',
+    'Museum', 'Park', 'Beach', 'Zoo', 'Aquarium', 'AmusementPark', 'Campground',
+    'LodgingBusiness', 'Hotel', 'Hostel', 'Motel', 'BedAndBreakfast', 'Resort', 'VacationRental',
+    'SportsActivityLocation', 'GolfCourse', 'SportsClub', 'HealthAndBeautyBusiness', 'DaySpa',
+    'EntertainmentBusiness', 'TravelAgency', 'Store', 'ShoppingCenter', 'AutoRental',
+    'BoatTerminal', 'Marina', 'EventVenue', 'MovieTheater', 'NightClub', 'PlaceOfWorship',
+])
+FALLBACK_TYPES = frozenset(['Organization', 'Place', 'Corporation', 'CivicStructure'])
+
+NESTED_KEYS = ('@graph', 'mainEntity', 'mainEntityOfPage', 'about', 'location',
+               'containedInPlace', 'department', 'subOrganization', 'itemListElement', 'item')
+
+DAY_ORDER = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday',
+             'PublicHolidays')
+
+
+# ============================================================
+# GRAPH WALK
+# ============================================================
+def _types(node):
+    t = node.get('@type', ())
+    types = [t] if isinstance(t, str) else t if isinstance(t, list) else []
+    return {str(x).rsplit('/', 1)[-1] for x in types}
+
+
+def iter_nodes(data, depth=0):
+    """Yield every JSON-LD object in data (lists, @graph and nested entities)."""
+    if depth > 6:
+        return
+    if isinstance(data, list):
+        for item in data:
+            yield from iter_nodes(item, depth + 1)
+    elif isinstance(data, dict):
+        yield data
+        for key in NESTED_KEYS:
+            if key in data:
+                yield from iter_nodes(data[key], depth + 1)
+
+
+def _business_nodes(json_ld):
+    """Business nodes first (in document order), then generic Organization/Place nodes."""
+    business, fallback = [], []
+    for block in json_ld:
+        for node in iter_nodes(block):
+            types = _types(node)
+            if types & BUSINESS_TYPES:
+                business.append(node)
+            elif types & FALLBACK_TYPES:
+                fallback.append(node)
+    return business + fallback
+
+
+# ============================================================
+# FIELD FORMATTING
+# ============================================================
+def _text(value):
+    if isinstance(value, list):
+        value = next((v for v in value if isinstance(v, (str, int, float))), '')
+    if isinstance(value, (int, float)):
+        value = str(value)
+    return value.strip() if isinstance(value, str) else ''
+
+
+def format_address(addr):
+    """PostalAddress (dict), list of them, or a plain string -> one line."""
+    if isinstance(addr, list):
+        addr = addr[0] if addr else ''
+    if isinstance(addr, str):
+        return addr.strip()
+    if not isinstance(addr, dict):
+        return ''
+    parts = [_text(addr.get('streetAddress')), _text(addr.get('postalCode')),
+             _text(addr.get('addressLocality'))]
+    return ', '.join(p for p in parts if p)
+
+
+def _day_name(day):
+    return _text(day).rsplit('/', 1)[-1]
+
+
+def format_opening_hours(node):
+    """openingHoursSpecification or openingHours -> 'Monday 09:00-17:00; ...'."""
+    specs = node.get('openingHoursSpecification')
+    if isinstance(specs, dict):
+        specs = [specs]
+    if isinstance(specs, list):
+        rows = []
+        for spec in specs:
+            if not isinstance(spec, dict):
+                continue
+            days = spec.get('dayOfWeek')
+            days = days if isinstance(days, list) else [days] if days else []
+            opens, closes = _text(spec.get('opens'))[:5], _text(spec.get('closes'))[:5]
+            hours = f'{opens}-{closes}' if opens or closes else 'closed'
+            for day in days:
+                rows.append((_day_name(day), hours))
+        rows.sort(key=lambda r: DAY_ORDER.index(r[0]) if r[0] in DAY_ORDER else len(DAY_ORDER))
+        if rows:
+            return '; '.join(f'{day} {hours}' for day, hours in rows)
+    hours = node.get('openingHours')
+    if isinstance(hours, list):
+        return '; '.join(_text(h) for h in hours if _text(h))
+    return _text(hours)
+
+
+def _geo(node):
+    geo = node.get('geo')
+    if isinstance(geo, list):
+        geo = geo[0] if geo else None
+    if not isinstance(geo, dict):
+        return None
+    try:
+        return {'lat': float(geo['latitude']), 'lon': float(geo['longitude'])}
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+# ============================================================
+# EXTRACTION
+# ============================================================
+FIELD_GETTERS = (
+    ('name', lambda node: _text(node.get('name'))),
+    ('opening_hours', format_opening_hours),
+    ('price_range', lambda node: _text(node.get('priceRange'))),
+    ('address', lambda node: format_address(node.get('address'))),
+    ('phone', lambda node: _text(node.get('telephone'))),
+    ('email', lambda node: _text(node.get('email')).replace('mailto:', '')),
+    ('geo', _geo),
+)
+
+
+def structured_facts(json_ld, opengraph=None):
+    """Facts from schema.org nodes (first node with a field wins), then OpenGraph."""
+    facts = {}
+    for node in _business_nodes(json_ld or []):
+        if 'schema_type' not in facts:
+            types = _types(node)
+            specific = (types & BUSINESS_TYPES) - {'LocalBusiness'}
+            facts['schema_type'] = sorted(specific or types)[0]
+        for fact, get in FIELD_GETTERS:
+            if fact not in facts:
+                value = get(node)
+                if value:
+                    facts[fact] = value
+
+    og = opengraph or {}
+    if 'address' not in facts:
+        parts = [og.get('business:contact_data:street_address') or og.get('og:street-address'),
+                 og.get('business:contact_data:postal_code') or og.get('og:postal-code'),
+                 og.get('business:contact_data:locality') or og.get('og:locality')]
+        address = ', '.join(p.strip() for p in parts if p and p.strip())
+        if address:
+            facts['address'] = address
+    if 'phone' not in facts:
+        phone = og.get('business:contact_data:phone_number') or og.get('og:phone_number')
+        if phone:
+            facts['phone'] = phone.strip()
+    if 'geo' not in facts:
+        try:
+            facts['geo'] = {'lat': float(og.get('place:location:latitude') or og['og:latitude']),
+                            'lon': float(og.get('place:location:longitude') or og['og:longitude'])}
+        except (KeyError, TypeError, ValueError):
+            pass
+    return facts
+
+
+def facts_complete(facts, structured_names, required=REQUIRED_FACTS):
+    """True when every required fact has a value taken from structured data.
+
+    structured_names: the fact names filled from structured_facts() (a
+    scraper's result['structured_facts']).
+    """
+    return all(facts.get(name) and name in structured_names for name in required)
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Relevance-ranked, token-budgeted packing of POI source text for LLM prompts.
+
+Source text was cut by position: R2 kept the first 3,000 words of a
+website and the first 1,000 of each subpage, and the R3 prompts kept the
+first 5,500 characters of source_text_for_llm. Page order is not
+importance, though. Opening hours, prices and menus are often near the end
+of a page, below the navigation and intro, so the cut dropped them and kept
+boilerplate. The packer selects by content instead:
+
+    passages : the text is split into sections (a header line such as
+               'WEBSITE CONTENT:', 'HIGHLIGHTS:' or '--- /menu ---') and
+               each section into passages. Short lines are grouped up to
+               PASSAGE_MIN_WORDS, so an opening-hours table stays together.
+               Long lines are split into sentence windows of at most
+               PASSAGE_MAX_WORDS.
+    score    : fact density. scrape_facts hits (hours, prices, contact) are
+               weighted by FACT_WEIGHTS, then FEATURE_KEYWORDS and the POI
+               category's CATEGORY_KEYWORDS are added and BOILERPLATE terms
+               subtracted, all divided by sqrt(words). Passages below zero
+               are never kept.
+    budget   : passages are taken best first until the token budget
+               (estimate_tokens, ~4 characters per token) is full. They are
+               written back in their original order, and '[...]' marks
+               omitted stretches. Sections in PINNED_HEADERS (Google
+               description, highlights, verified facts) and warning lines
+               (R6b stale-source notes) are always kept.
+
+Text that already fits the budget is returned unchanged. The result is
+deterministic, so the generation and verification prompts of one POI see
+the same source text. SOURCE_TOKEN_BUDGETS sets the budget per data-quality
+tier: rich sheets get the most room, and minimal ones need few tokens.
+
+Usage:
+    from source_packer import pack_source_text, pack_text
+    source = pack_source_text(fact_sheet)                  # R3 prompts (tier budget)
+    website = pack_text(content, 4000, category='Natuur')  # any text, explicit budget
+    log(f'Source packing: {format_packer_stats()}')
+"""
+
+import math
+import re
+import threading
+
+from scrape_facts import scan_facts
+
+# ============================================================
+# CONFIG
+# ============================================================
+# Source-data tokens per prompt, by data quality (was: 5,500 characters for every tier)
+SOURCE_TOKEN_BUDGETS = {'rich': 1200, 'moderate': 700, 'minimal': 400, 'none': 250}
+CHARS_PER_TOKEN = 4
+
+PASSAGE_MIN_WORDS = 25      # Short lines are grouped up to this size
+PASSAGE_MAX_WORDS = 80      # Longer lines are split into sentence windows
+
+GAP_MARKER = '[...]'
+PACKED_NOTE = '[Source data condensed for length — the most fact-dense passages are kept]'
+
+FACT_WEIGHTS = {'opening_hours': 3.0, 'price': 3.0, 'address': 1.5, 'phone': 1.5, 'email': 1.5,
+                'social': 0.5}
+FEATURE_WEIGHT = 1.0
+CATEGORY_WEIGHT = 1.5
+BOILERPLATE_WEIGHT = 2.0
+
+# Facilities and offer words (NL / EN / ES / DE), matched as word prefixes
+FEATURE_KEYWORDS = (
+    'terras', 'terrace', 'terraza', 'parkeer', 'parking', 'aparcamiento', 'wifi', 'rolstoel',
+    'wheelchair', 'toegankelijk', 'accessible', 'honden', 'dogs', 'hunde', 'perros', 'kinderen',
+    'children', 'kids', 'niños', 'reserv', 'booking', 'boeken', 'menu', 'menú', 'lunch', 'diner',
+    'dinner', 'cena', 'ontbijt', 'breakfast', 'desayuno', 'verhuur', 'rental', 'alquiler', 'huur',
+    'zwembad', 'pool', 'piscina', 'sauna', 'rondleiding', 'excursie', 'excursión', 'workshop',
+    'cursus', 'course', 'afhalen', 'takeaway', 'bezorg', 'delivery', 'vegetari', 'vegan',
+    'glutenvrij', 'gluten', 'biologisch', 'organic', 'zelfgemaakt', 'homemade', 'sinds', 'since',
+    'desde', 'opgericht', 'founded', 'geopend', 'gesloten', 'closed', 'cerrado', 'seizoen', 'season',
+)
+
+_FOOD = ('gerecht', 'dish', 'keuken', 'cuisine', 'cocina', 'vis', 'fish', 'pescado', 'vlees', 'meat',
+         'carne', 'wijn', 'wine', 'vino', 'bier', 'beer', 'cerveza', 'koffie', 'coffee', 'tapas',
+         'paella', 'pizza', 'gebak', 'pastr', 'brood', 'bread', 'chef', 'kaart', 'carta', 'specialit')
+_NATURE = ('duin', 'dune', 'strand', 'beach', 'playa', 'vogel', 'bird', 'aves', 'wandel', 'walk',
+           'route', 'sendero', 'trail', 'natuurgebied', 'reserve', 'zeehond', 'seal', 'wad', 'bos',
+           'forest', 'mirador', 'uitzicht', 'view')
+_CULTURE = ('museum', 'museo', 'tentoonstelling', 'exhibition', 'exposición', 'collectie',
+            'collection', 'geschiedenis', 'history', 'historia', 'eeuw', 'century', 'siglo',
+            'monument', 'kerk', 'church', 'iglesia', 'rondleiding', 'guided', 'entree', 'admission')
+_SHOPPING = ('winkel', 'shop', 'tienda', 'product', 'producto', 'collectie', 'collection', 'merk',
+             'brand', 'marca', 'souvenir', 'kleding', 'clothing', 'ropa', 'streekproduct',
+             'local produce', 'assortiment', 'range')
+_ACTIVE = ('fiets', 'bike', 'bicicleta', 'kano', 'kayak', 'surf', 'zeil', 'sail', 'vela', 'duik',
+           'dive', 'buceo', 'golf', 'tennis', 'paard', 'horse', 'caballo', 'activiteit', 'activit',
+           'actividad', 'groep', 'group', 'grupo', 'les ', 'lesson', 'clase', 'huur', 'rent',
+           'alquiler')
+_HEALTH = ('behandeling', 'treatment', 'tratamiento', 'massage', 'masaje', 'sauna', 'wellness',
+           'spa', 'therap', 'terapia', 'afspraak', 'appointment', 'cita')
+_PRACTICAL = ('service', 'dienst', 'servicio', 'afspraak', 'appointment', 'cita', 'balie', 'desk',
+              'bereikbaar', 'contact')
+
+# Category-specific words, keyed like fase_r3_prompt_templates.CATEGORY_RULES
+CATEGORY_KEYWORDS = {
+    'Eten & Drinken': _FOOD, 'Food & Drinks': _FOOD,
+    'Natuur': _NATURE, 'Beaches & Nature': _NATURE,
+    'Cultuur & Historie': _CULTURE, 'Culture & History': _CULTURE,
+    'Winkelen': _SHOPPING, 'Shopping': _SHOPPING,
+    'Recreatief': _ACTIVE, 'Recreation': _ACTIVE, 'Actief': _ACTIVE, 'Active': _ACTIVE,
+    'Gezondheid & Verzorging': _HEALTH, 'Health & Wellness': _HEALTH,
+    'Praktisch': _PRACTICAL, 'Practical': _PRACTICAL,
+}
+
+BOILERPLATE = (
+    'cookie', 'privacy', 'nieuwsbrief', 'newsletter', 'algemene voorwaarden', 'terms and conditions',
+    'copyright', '©', 'all rights reserved', 'alle rechten', 'inloggen', 'log in', 'winkelwagen',
+    'shopping cart', 'javascript', 'volg ons', 'follow us', 'síguenos', 'skip to content',
+    'naar inhoud', 'lees meer', 'read more', 'leer más',
+)
+
+# Section headers in source_text_for_llm (R2) and the R6b enhanced source text
+PINNED_HEADERS = frozenset(['GOOGLE PLACES DESCRIPTION:', 'HIGHLIGHTS:', 'VERIFIED FACTS:'])
+_HEADER = re.compile(r'^(?:[A-Z][A-Z0-9 /&()\-]*:|--- .+ ---)$')
+_DIRECTIVE = re.compile(r'^(?:WARNING:|ONLY use for:|DO NOT use for:)')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def _prefix_regex(words):
+    return re.compile(r'(?<!\w)(?:' + '|'.join(re.escape(w) for w in words) + ')')
+
+
+_FEATURES = _prefix_regex(FEATURE_KEYWORDS)
+_BOILERPLATE = _prefix_regex(BOILERPLATE)
+_CATEGORY_REGEXES = {category: _prefix_regex(words) for category, words in CATEGORY_KEYWORDS.items()}
+_CATEGORY_REGEXES_LOWER = {category.lower(): regex for category, regex in _CATEGORY_REGEXES.items()}
+
+# ============================================================
+# STATE
+# ============================================================
+_lock = threading.Lock()
+_stats = {'texts': 0, 'packed': 0, 'tokens_in': 0, 'tokens_out': 0, 'passages_dropped': 0}
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token, as in get_prompt_stats)."""
+    return len(text) // CHARS_PER_TOKEN if text else 0
+
+
+def _category_regex(category):
+    if not category:
+        return None
+    return _CATEGORY_REGEXES.get(category) or _CATEGORY_REGEXES_LOWER.get(category.lower())
+
+
+# ============================================================
+# PASSAGES
+# ============================================================
+def score_passage(text, category=None):
+    """Fact density of a passage: weighted fact and keyword hits per sqrt(word)."""
+    lowered = text.lower()
+    score = sum(FACT_WEIGHTS.get(m['kind'], 1.0) for m in scan_facts(text))
+    score += FEATURE_WEIGHT * len(_FEATURES.findall(lowered))
+    category_regex = _category_regex(category)
+    if category_regex is not None:
+        score += CATEGORY_WEIGHT * len(category_regex.findall(lowered))
+    score -= BOILERPLATE_WEIGHT * len(_BOILERPLATE.findall(lowered))
+    return score / math.sqrt(max(len(text.split()), 1))
+
+
+def _windows(line):
+    """Split a long line into sentence windows of at most PASSAGE_MAX_WORDS words."""
+    windows, current, count = [], [], 0
+    for sentence in _SENTENCE_END.split(line):
+        words = sentence.split()
+        while len(words) > PASSAGE_MAX_WORDS:   # No sentence punctuation (scraped text)
+            if current:
+                windows.append(' '.join(current))
+                current, count = [], 0
+            windows.append(' '.join(words[:PASSAGE_MAX_WORDS]))
+            words = words[PASSAGE_MAX_WORDS:]
+        if count + len(words) > PASSAGE_MAX_WORDS and current:
+            windows.append(' '.join(current))
+            current, count = [], 0
+        if words:
+            current.append(' '.join(words))
+            count += len(words)
+    if current:
+        windows.append(' '.join(current))
+    return windows
+
+
+def split_passages(lines):
+    """[(text, separator, pinned)] for a section's lines; separator joins it to the previous one."""
+    passages, group, words = [], [], 0
+
+    def flush():
+        nonlocal group, words
+        if group:
+            passages.append(('\n'.join(group), '\n', False))
+            group, words = [], 0
+
+    for line in lines:
+        count = len(line.split())
+        if _DIRECTIVE.match(line):
+            flush()
+            passages.append((line, '\n', True))
+        elif _BOILERPLATE.search(line.lower()):
+            flush()   # On its own, so it does not ride along with a fact-dense neighbour
+            passages.append((line, '\n', False))
+        elif count > PASSAGE_MAX_WORDS:
+            flush()
+            for i, window in enumerate(_windows(line)):
+                passages.append((window, ' ' if i else '\n', False))
+        else:
+            group.append(line)
+            words += count
+            if words >= PASSAGE_MIN_WORDS:
+                flush()
+    flush()
+    return passages
+
+
+def _sections(text):
+    """[(header or None, [lines])] in order; sections are separated by their header lines."""
+    sections = [(None, [])]
+    for line in text.split('\n'):
+        if _HEADER.match(line.strip()):
+            sections.append((line, []))
+        elif line.strip():
+            sections[-1][1].append(line)
+    return [(header, lines) for header, lines in sections if header is not None or lines]
+
+
+# ============================================================
+# PACKING
+# ============================================================
+def pack_text(text, budget_tokens, category=None, note=None):
+    """The most fact-dense passages of text within budget_tokens, in original order.
+
+    Returns text unchanged when it fits. note is appended when passages were dropped.
+    """
+    tokens_in = estimate_tokens(text)
+    if not text or tokens_in <= budget_tokens:
+        with _lock:
+            _stats['texts'] += 1
+            _stats['tokens_in'] += tokens_in
+            _stats['tokens_out'] += tokens_in
+        return text
+
+    # (section, header, [(text, sep, pinned, score)])
+    sections = []
+    for header, lines in _sections(text):
+        pinned_section = header is not None and header.strip() in PINNED_HEADERS
+        passages = [(p, sep, pinned or pinned_section,
+                     0.0 if pinned or pinned_section else score_passage(p, category))
+                    for p, sep, pinned in split_passages(lines)]
+        sections.append((header, passages))
+
+    kept = set()
+    opened = set()   # Sections whose header is already paid for
+    used = 0
+    for s, (header, passages) in enumerate(sections):
+        for i, (p, _, pinned, _) in enumerate(passages):
+            if pinned:
+                kept.add((s, i))
+                used += estimate_tokens(p) + (estimate_tokens(header) + 1 if s not in opened and header else 0)
+                opened.add(s)
+
+    ranked = sorted(((score, s, i) for s, (_, passages) in enumerate(sections)
+                     for i, (_, _, pinned, score) in enumerate(passages) if not pinned and score >= 0),
+                    key=lambda item: (-item[0], item[1], item[2]))
+    for _, s, i in ranked:
+        header = sections[s][0]
+        cost = estimate_tokens(sections[s][1][i][0]) + (
+            estimate_tokens(header) + 1 if s not in opened and header else 0)
+        if used + cost <= budget_tokens:
+            kept.add((s, i))
+            opened.add(s)
+            used += cost
+
+    # Write back in order, marking gaps
+    out_sections = []
+    dropped = 0
+    prefix = ''   # Header of an empty section (e.g. 'SUBPAGES:') kept with the next one
+    for s, (header, passages) in enumerate(sections):
+        if not passages and header:
+            prefix = prefix + header + '\n' if s + 1 in opened else ''
+            continue
+        if s not in opened:
+            dropped += len(passages)
+            prefix = ''
+            continue
+        body = ''
+        gap = False
+        for i, (p, sep, _, _) in enumerate(passages):
+            if (s, i) not in kept:
+                gap = True
+                dropped += 1
+                continue
+            if gap:
+                body += ('\n' if body else '') + GAP_MARKER + '\n' + p
+            else:
+                body += (sep if body else '') + p
+            gap = False
+        if gap:
+            body += '\n' + GAP_MARKER
+        out_sections.append(prefix + (f'{header}\n{body}' if header else body))
+        prefix = ''
+
+    packed = '\n\n'.join(out_sections)
+    if note:
+        packed += '\n\n' + note
+    with _lock:
+        _stats['texts'] += 1
+        _stats['packed'] += 1
+        _stats['tokens_in'] += tokens_in
+        _stats['tokens_out'] += estimate_tokens(packed)
+        _stats['passages_dropped'] += dropped
+    return packed
+
+
+def pack_source_text(fact_sheet):
+    """A fact sheet's source_text_for_llm packed to its data-quality tier's budget."""
+    quality = fact_sheet.get('data_quality', 'none')
+    budget = SOURCE_TOKEN_BUDGETS.get(quality, SOURCE_TOKEN_BUDGETS['minimal'])
+    return pack_text(fact_sheet.get('source_text_for_llm', '') or '', budget,
+                     fact_sheet.get('category'), PACKED_NOTE)
+
+
+# ============================================================
+# REPORTING
+# ============================================================
+def packer_stats():
+    with _lock:
+        return dict(_stats)
+
+
+def format_packer_stats():
+    """One-line summary for run logs."""
+    ps = packer_stats()
+    saved = 1 - ps['tokens_out'] / ps['tokens_in'] if ps['tokens_in'] else 0
+    return (f'{ps["packed"]}/{ps["texts"]} texts packed, ~{ps["tokens_in"]} → ~{ps["tokens_out"]} '
+            f'source tokens ({saved:.0%} less), {ps["passages_dropped"]} passages dropped')
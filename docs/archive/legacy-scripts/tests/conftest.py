@@ -0,0 +1,5 @@
+"""The pipeline scripts are flat modules in the parent directory."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
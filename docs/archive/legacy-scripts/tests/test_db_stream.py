@@ -0,0 +1,99 @@
+import sqlite3
+
+import pytest
+
+from db_stream import keyset_pages, prefetched, stream_rows
+
+
+class Cursor:
+    """mysql.connector-style dictionary cursor over sqlite (%s placeholders)."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._cursor = None
+
+    def execute(self, query, params=()):
+        self._conn.queries.append(query)
+        self._cursor = self._conn.db.execute(query.replace('%s', '?'), params)
+
+    def fetchmany(self, size):
+        names = [d[0] for d in self._cursor.description]
+        return [dict(zip(names, row)) for row in self._cursor.fetchmany(size)]
+
+    def close(self):
+        self._cursor = None
+
+
+class Connection:
+    def __init__(self, rows):
+        self.db = sqlite3.connect(':memory:', check_same_thread=False)
+        self.db.execute('CREATE TABLE POI (id INTEGER PRIMARY KEY, destination_id INTEGER, name TEXT)')
+        self.db.executemany('INSERT INTO POI VALUES (?, ?, ?)', rows)
+        self.queries = []
+
+    def cursor(self, dictionary=False, buffered=True):
+        assert dictionary and not buffered
+        return Cursor(self)
+
+
+def pois(n):
+    # Gaps in the ids: keyset paging must not assume consecutive keys
+    return [(3 * i + 1, 1 + i % 2, f'POI {i}') for i in range(n)]
+
+
+@pytest.mark.parametrize('n', [0, 1, 4, 5, 6, 10, 11])
+def test_keyset_pages_boundaries(n):
+    conn = Connection(pois(n))
+    pages = list(keyset_pages(conn, 'id, name', 'POI', chunk=5))
+    assert [len(p) for p in pages] == [5] * (n // 5) + ([n % 5] if n % 5 else [])
+    assert [row['id'] for page in pages for row in page] == [pid for pid, _, _ in pois(n)]
+    assert len(conn.queries) == n // 5 + 1   # A full last page costs one empty query
+
+
+def test_filter_with_or_is_kept_inside_parentheses():
+    conn = Connection(pois(12))
+    rows = list(stream_rows(conn, 'id, destination_id', 'POI', 'destination_id = %s OR destination_id = %s',
+                            (2, 3), chunk=2, prefetch=False))
+    assert [row['id'] for row in rows] == [4, 10, 16, 22, 28, 34]
+
+
+def test_writes_while_iterating_do_not_shift_pages():
+    conn = Connection(pois(10))
+    seen = []
+    for row in stream_rows(conn, 'id', 'POI', 'name NOT LIKE %s', ('done%',), chunk=3, prefetch=False):
+        seen.append(row['id'])
+        # Rows that leave the filter would shift an OFFSET page; the keyset is unaffected
+        conn.db.execute("UPDATE POI SET name = 'done' WHERE id = ?", (row['id'],))
+        if row['id'] == 4:
+            conn.db.execute('DELETE FROM POI WHERE id = 13')   # Not read yet: skipped
+    assert seen == [pid for pid, _, _ in pois(10) if pid != 13]
+
+
+def test_prefetched_stream_matches_synchronous():
+    conn = Connection(pois(23))
+    assert (list(stream_rows(conn, 'id, name', 'POI', chunk=4))
+            == list(stream_rows(conn, 'id, name', 'POI', chunk=4, prefetch=False)))
+
+
+def test_prefetched_reraises_producer_errors():
+    def pages():
+        yield [1]
+        raise RuntimeError('lost connection')
+
+    it = prefetched(pages())
+    assert next(it) == [1]
+    with pytest.raises(RuntimeError, match='lost connection'):
+        next(it)
+
+
+def test_prefetched_stops_producer_on_early_exit():
+    produced = []
+
+    def pages():
+        for i in range(100):
+            produced.append(i)
+            yield [i]
+
+    for page in prefetched(pages()):
+        break
+    assert len(produced) < 100
@@ -0,0 +1,79 @@
+import types
+from datetime import datetime
+
+import pytest
+
+import factsheet_manifest
+from factsheet_manifest import Manifest, changed_poi_ids, facts_hash, fingerprint, last_build
+
+HASHES = {'row': 'r', 'scrape': 's', 'enhanced': ''}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'manifest.sqlite')
+
+
+def build(path, monkeypatch, at, sheets):
+    """One build at unix time `at`: {poi_id: sheet}; POIs not in sheets are removed."""
+    monkeypatch.setattr(factsheet_manifest, 'time', types.SimpleNamespace(time=lambda: at))
+    manifest = Manifest(path)
+    stats = {'sheets': len(sheets), 'rebuilt': 0, 'facts_changed': 0}
+    for poi_id, sheet in sheets.items():
+        fp = fingerprint(f'row-{sheet}', 'scrape', '')
+        if manifest.fingerprint(poi_id) == fp:
+            continue
+        stats['rebuilt'] += 1
+        stats['facts_changed'] += manifest.record(poi_id, fp, HASHES, facts_hash(sheet))
+    stats['removed'] = manifest.mark_removed(set(sheets))
+    manifest.finish_build(stats)
+    manifest.close()
+    return stats
+
+
+def test_changed_poi_ids_only_reports_new_facts(path, monkeypatch):
+    first = build(path, monkeypatch, 1000, {1: {'name': 'A'}, 2: {'name': 'B'}, 3: {'name': 'C'}})
+    assert first == {'sheets': 3, 'rebuilt': 3, 'facts_changed': 3, 'removed': 0}
+    assert changed_poi_ids(999, path) == {1, 2, 3}
+
+    # POI 1: rebuilt, same facts (a column outside the sheet changed); 2: new facts; 3: gone
+    second = build(path, monkeypatch, 2000, {1: {'name': 'A', 'rating': 4.5}, 2: {'name': 'B2'}})
+    assert second == {'sheets': 2, 'rebuilt': 2, 'facts_changed': 1, 'removed': 1}
+    assert changed_poi_ids(1500, path) == {2}
+    assert changed_poi_ids(1500, path, include_removed=True) == {2, 3}
+    assert changed_poi_ids(2000, path) == set()
+
+
+def test_unchanged_fingerprint_is_not_rebuilt(path, monkeypatch):
+    build(path, monkeypatch, 1000, {1: {'name': 'A'}})
+    assert build(path, monkeypatch, 2000, {1: {'name': 'A'}})['rebuilt'] == 0
+    assert changed_poi_ids(1500, path) == set()
+
+
+def test_returning_poi_counts_as_changed(path, monkeypatch):
+    build(path, monkeypatch, 1000, {1: {'name': 'A'}, 2: {'name': 'B'}})
+    build(path, monkeypatch, 2000, {1: {'name': 'A'}})
+    third = build(path, monkeypatch, 3000, {1: {'name': 'A'}, 2: {'name': 'B'}})
+    assert third['facts_changed'] == 1
+    assert changed_poi_ids(2500, path) == {2}
+
+
+def test_since_accepts_dates_and_datetimes(path, monkeypatch):
+    at = datetime(2026, 3, 2, 12, 0).timestamp()
+    build(path, monkeypatch, at, {1: {'name': 'A'}})
+    assert changed_poi_ids('2026-03-01', path) == {1}
+    assert changed_poi_ids(datetime(2026, 3, 3), path) == set()
+
+
+def test_facts_hash_ignores_non_fact_fields():
+    sheet = {'name': 'A', 'verified_facts': {'phone': '0222'}}
+    assert facts_hash(sheet) == facts_hash(dict(sheet, word_target=150))
+    assert facts_hash(sheet) != facts_hash(sheet, enhanced_hash='fb')
+    assert facts_hash(sheet) != facts_hash(dict(sheet, verified_facts={'phone': '0223'}))
+
+
+def test_last_build(path, monkeypatch):
+    assert last_build(path) is None
+    build(path, monkeypatch, 1000, {1: {'name': 'A'}})
+    assert last_build(path) == {'finished_at': 1000, 'sheets': 1, 'rebuilt': 1,
+                                'facts_changed': 1, 'removed': 0}
@@ -0,0 +1,166 @@
+import json
+import sqlite3
+
+import pytest
+
+from factsheet_store import (R2_LAYERS, R6B_LAYERS, FactSheetStore, layer_stats, open_fact_sheets,
+                             render_source_text)
+
+
+def sheet(poi_id, destination_id=2, quality='rich', category='Natuur'):
+    return {
+        'poi_id': poi_id,
+        'name': f'POI {poi_id}',
+        'destination_id': destination_id,
+        'data_quality': quality,
+        'category': category,
+        'website_content': f'Welkom bij POI {poi_id}',
+        'website_subpages': {'/menu': 'Soep van de dag'},
+        'source_text_for_llm': f'WEBSITE CONTENT:\nWelkom bij POI {poi_id}',
+        'word_target': 150,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = FactSheetStore(str(tmp_path / 'sheets.sqlite'))
+    for position, poi_id in enumerate([3, 1, 2]):
+        store.put(sheet(poi_id, destination_id=1 if poi_id == 2 else 2), position)
+    store.commit()
+    yield store
+    store.close()
+
+
+def test_large_fields_are_read_on_first_access(store):
+    fs = store.get(3)
+    assert not dict.__contains__(fs, 'website_content')
+    assert 'website_content' in fs
+    assert fs['website_subpages'] == {'/menu': 'Soep van de dag'}
+    assert fs.get('website_content') == 'Welkom bij POI 3'
+    assert dict.__contains__(fs, 'website_content')
+    fs.unload()
+    assert not dict.__contains__(fs, 'website_content')
+    assert fs.get('missing', 'default') == 'default'
+    with pytest.raises(KeyError):
+        fs['missing']
+
+
+def test_to_dict_is_the_original_sheet(store):
+    assert store.get('1').to_dict() == sheet(1)
+    assert list(store.get(1).to_dict()) == list(sheet(1))
+
+
+def test_sheets_are_ordered_by_destination_then_position(store):
+    assert store.poi_ids() == [2, 3, 1]
+    assert [fs['poi_id'] for fs in store.get_many([1, 2, 3, 99])] == [2, 3, 1]
+    assert [fs['poi_id'] for fs in store.iter_sheets(destination_id=2)] == [3, 1]
+    assert store.quality_counts(destination_id=2) == {'rich': 2, 'moderate': 0, 'minimal': 0, 'none': 0}
+    assert store.get(99) is None and 99 not in store and len(store) == 3
+
+
+def test_delete_removes_sheet_and_fields(store):
+    store.delete([3])
+    store.commit()
+    assert store.get(3) is None
+    assert store.large_field(3, 'website_content') is None
+    assert store.source_text(3) == ''
+
+
+def test_stored_poi_ids_include_layers_without_a_sheet(store):
+    store.set_layers(7, {'facebook': ('Open', 'fresh', '2026-01-02')}, R6B_LAYERS)
+    assert sorted(store.stored_poi_ids()) == [1, 2, 3, 7]
+    store.delete([7])
+    assert sorted(store.stored_poi_ids()) == [1, 2, 3]
+    assert store.source_text(7, 'enhanced') == ''
+
+
+def test_readonly_open_writes_nothing(tmp_path):
+    legacy = tmp_path / 'sheets.json'
+    legacy.write_text(json.dumps([sheet(5)]), encoding='utf-8')
+    path = tmp_path / 'new.sqlite'
+    with open_fact_sheets(str(path), str(legacy), readonly=True) as store:
+        assert store.poi_ids() == [5]
+    assert list(tmp_path.iterdir()) == [legacy]
+    with open_fact_sheets(str(path), str(legacy)):
+        pass
+    with open_fact_sheets(str(path), str(legacy), readonly=True) as store:
+        assert store.get(5)['source_text_for_llm'] == sheet(5)['source_text_for_llm']
+        with pytest.raises(sqlite3.OperationalError):
+            store.delete([5])
+
+
+def test_legacy_json_is_imported_and_exported(tmp_path):
+    legacy = tmp_path / 'sheets.json'
+    legacy.write_text(json.dumps([sheet(5), sheet(4)]), encoding='utf-8')
+    with open_fact_sheets(str(tmp_path / 'new.sqlite'), str(legacy)) as store:
+        assert store.poi_ids() == [5, 4]
+        assert store.get(4)['source_text_for_llm'] == sheet(4)['source_text_for_llm']
+        store.export_json(str(tmp_path / 'out.json'))
+    assert json.loads((tmp_path / 'out.json').read_text(encoding='utf-8')) == [sheet(5), sheet(4)]
+
+
+R2 = {'website': 'Welkom', 'google': 'Strandpaviljoen'}
+
+
+def test_source_text_renders_layers_in_order(tmp_path):
+    with FactSheetStore(str(tmp_path / 's.sqlite')) as store:
+        store.set_layers(1, R2, R2_LAYERS)
+        store.set_layers(1, {'facebook': ('Nieuwe menukaart', 'stale', '2025-06-01'),
+                             'instagram': 'Beach club'}, R6B_LAYERS)
+        assert store.source_text(1) == 'WEBSITE CONTENT:\nWelkom\n\nGOOGLE PLACES DESCRIPTION:\nStrandpaviljoen'
+        enhanced = store.source_text(1, 'enhanced')
+        assert enhanced.startswith(store.source_text(1) + '\n\n--- FACEBOOK PAGE DATA (STALE')
+        assert 'WARNING: This Facebook page' in enhanced
+        assert enhanced.endswith('--- INSTAGRAM BIO (STATIC — use for name/type only) ---\nBeach club')
+        assert enhanced == render_source_text(dict(R2, facebook=('Nieuwe menukaart', 'stale', '2025-06-01'),
+                                                   instagram='Beach club'))
+
+
+def test_set_layers_only_writes_changed_layers(tmp_path):
+    with FactSheetStore(str(tmp_path / 's.sqlite')) as store:
+        store.set_layers(1, R2, R2_LAYERS)
+        before = layer_stats()
+        store.set_layers(1, {'website': 'Welkom', 'highlights': 'Zonsondergang'}, R2_LAYERS)
+        after = layer_stats()
+        assert after['layers_unchanged'] - before['layers_unchanged'] == 1
+        assert after['layers_written'] - before['layers_written'] == 2   # highlights + google removed
+        assert 'GOOGLE' not in store.source_text(1)
+
+
+def test_readers_never_write(tmp_path):
+    path = str(tmp_path / 's.sqlite')
+    with FactSheetStore(path, cache_writes=True) as writer:
+        writer.put(sheet(1), 0, layers=R2)
+    with FactSheetStore(path) as reader:
+        changes = reader.conn.total_changes
+        assert reader.source_text(1, 'enhanced').startswith('WEBSITE CONTENT:')
+        assert reader.get(1)['source_text_for_llm']
+        assert reader.conn.total_changes == changes
+        assert not reader.conn.in_transaction
+
+
+def test_writer_cache_is_used_until_a_layer_changes(tmp_path):
+    with FactSheetStore(str(tmp_path / 's.sqlite'), cache_writes=True) as store:
+        store.put(dict(sheet(1), source_text_for_llm='rendered by R2'), 0, layers=R2)
+        assert store.source_text(1) == 'rendered by R2'   # put() cached R2's own rendering
+        store.set_layers(1, {'facebook': ('Open', 'fresh', '2026-01-02')}, R6B_LAYERS)
+        assert store.source_text(1) == 'rendered by R2'   # R6b layers are not in the r2 set
+        hits = layer_stats()['cache_hits']
+        enhanced = store.source_text(1, 'enhanced')
+        assert store.source_text(1, 'enhanced') == enhanced
+        assert layer_stats()['cache_hits'] == hits + 1
+        store.set_layers(1, {'website': 'Nieuw'}, ('website',))
+        assert store.source_text(1).startswith('WEBSITE CONTENT:\nNieuw')
+
+
+def test_layers_hashes_change_with_any_layer(tmp_path):
+    with FactSheetStore(str(tmp_path / 's.sqlite')) as store:
+        store.set_layers(1, R2, R2_LAYERS)
+        store.set_layers(2, {'website': 'Anders'}, R2_LAYERS)
+        first = store.layers_hashes(R2_LAYERS)
+        assert set(first) == {1, 2} and first[1] != first[2]
+        store.set_layers(1, {'facebook': ('Open', 'fresh', '2026-01-02')}, R6B_LAYERS)
+        assert store.layers_hashes(R2_LAYERS) == first
+        fresh = store.layers_hashes(R6B_LAYERS)
+        store.set_layers(1, {'facebook': ('Open', 'stale', '2026-01-02')}, R6B_LAYERS)
+        assert store.layers_hashes(R6B_LAYERS)[1] != fresh[1]   # Freshness alone changes the hash
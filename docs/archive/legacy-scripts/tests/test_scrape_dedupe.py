@@ -0,0 +1,93 @@
+import pytest
+
+from scrape_dedupe import GLOBAL_BOILERPLATE_DOMAINS, MAIN_PAGE, BlockStore, block_key, build_block_store
+
+COOKIES = 'Wij gebruiken cookies om uw ervaring op deze website te verbeteren.'
+HOURS = 'Maandag: 10:00 - 17:00'
+
+
+def unique_text(i):
+    """Page content no other page shares (keeps pages out of near-duplicate clusters)."""
+    return '\n'.join(f'Pagina {i} alinea {j}: ' + 'abcdefghij'[j] * (20 + i) for j in range(4))
+
+
+def site(poi_id, domain, *lines, subpages=None):
+    return {'poi_id': poi_id, 'website': f'https://www.{domain}/', 'scrape_success': True,
+            'main_content': '\n'.join(lines + (unique_text(poi_id),)), 'subpages': subpages or {}}
+
+
+@pytest.mark.parametrize('domains, stripped', [
+    (GLOBAL_BOILERPLATE_DOMAINS, True),
+    (GLOBAL_BOILERPLATE_DOMAINS - 1, False),
+])
+def test_global_boilerplate_needs_enough_domains(domains, stripped):
+    store = build_block_store([site(i, f'site{i}.nl', COOKIES) for i in range(domains)])
+    assert (block_key(COOKIES) in store.global_boilerplate) is stripped
+    assert (COOKIES in store.clean_text(0, MAIN_PAGE)) is not stripped
+
+
+def test_short_lines_are_not_global_boilerplate():
+    store = build_block_store([site(i, f'site{i}.nl', 'Dinsdag gesloten') for i in range(8)])
+    assert not store.global_boilerplate
+    assert 'Dinsdag gesloten' in store.clean_text(3, MAIN_PAGE)
+
+
+def test_fact_lines_are_never_boilerplate():
+    pages = {f'/p{j}': f'{HOURS}\n{unique_text(100 + j)}' for j in range(4)}
+    store = build_block_store([site(i, f'site{i}.nl', HOURS, subpages=pages if i == 0 else None)
+                               for i in range(8)])
+    assert not store.global_boilerplate
+    assert not store.boilerplate
+    assert HOURS in store.clean_text(5, MAIN_PAGE)
+
+
+def test_domain_boilerplate_needs_share_of_domain_pages():
+    menu = 'Home | Kamers | Restaurant | Arrangementen | Contact'
+    pages = {f'/p{j}': f'{menu}\n{unique_text(10 + j)}' for j in range(3)}
+    pages['/p3'] = unique_text(20)
+    store = build_block_store([site(1, 'hotel.nl', subpages=pages)])
+    assert store.boilerplate == {'hotel.nl': {block_key(menu)}}
+    assert menu not in store.clean_text(1, '/p0')
+
+    pages = {f'/p{j}': f'{menu}\n{unique_text(10 + j)}' if j < 3 else unique_text(10 + j)
+             for j in range(8)}
+    store = build_block_store([site(1, 'hotel.nl', subpages=pages)])
+    assert not store.boilerplate   # 3 of 9 pages: under BOILERPLATE_MIN_SHARE
+
+
+def test_clean_text_emits_each_block_once_per_poi():
+    intro = 'Ecomare is het zeehondencentrum en natuurmuseum op Texel'
+    store = build_block_store([site(1, 'ecomare.nl', intro, 'Texel',
+                                    subpages={'/over-ons': f'{intro}\nTexel\nSinds 1952'})])
+    seen = set()
+    assert intro in store.clean_text(1, MAIN_PAGE, seen)
+    assert store.clean_text(1, '/over-ons', seen) == 'Texel\nSinds 1952'
+
+
+def test_clean_text_keeps_repeats_within_a_page():
+    table = ['Maandag', '10:00 - 17:00', 'Dinsdag', '10:00 - 17:00', 'Woensdag', 'Gesloten',
+             'Donderdag', 'Gesloten', 'Volwassenen', '€ 6,50', 'Kinderen', '€ 6,50']
+    store = build_block_store([site(1, 'museum.nl', *table,
+                                    subpages={'/tarieven': '\n'.join(table)})])
+    seen = set()
+    assert store.clean_text(1, MAIN_PAGE, seen).split('\n')[:len(table)] == table
+    assert store.clean_text(1, '/tarieven', seen).split('\n') == table
+
+
+def test_main_page_that_is_all_boilerplate_is_kept():
+    store = build_block_store([site(i, f'site{i}.nl', COOKIES) for i in range(6)]
+                              + [{'poi_id': 99, 'website': 'https://x.nl', 'scrape_success': True,
+                                  'main_content': COOKIES}])
+    assert store.clean_text(99, MAIN_PAGE) == COOKIES
+
+
+def test_identical_pages_are_near_duplicates():
+    text = unique_text(1)
+    store = BlockStore()
+    store.add_page(1, MAIN_PAGE, 'a.nl', text)
+    store.add_page(2, MAIN_PAGE, 'b.nl', text)
+    store.add_page(3, MAIN_PAGE, 'c.nl', unique_text(3))
+    store.finalize()
+    assert store.near_duplicates(1, MAIN_PAGE) == [(2, MAIN_PAGE)]
+    assert store.near_duplicates(3, MAIN_PAGE) == []
+    assert store.stats()['blocks_unique'] == 8
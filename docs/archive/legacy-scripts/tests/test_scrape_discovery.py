@@ -0,0 +1,102 @@
+import threading
+from urllib.robotparser import RobotFileParser
+
+import pytest
+
+import scrape_discovery
+from scrape_discovery import discover_subpages, fetch_subpages, rank_candidates, select_top
+from scrape_hosts import HostUnavailable
+
+HOME = 'https://www.example.com/'
+LINKS = [('/openingstijden', 'Openingstijden'), ('/prijzen', 'Prijzen'),
+         ('/menu', 'Menukaart'), ('/over-ons', 'Over ons')]
+
+
+class Response:
+    def __init__(self, status_code, body=b''):
+        self.status_code = status_code
+        self.content = body
+        self.headers = {}
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    """URLs requested through http_get; the site has no robots.txt or sitemap."""
+    urls = []
+
+    def http_get(url, **kwargs):
+        urls.append(url)
+        return Response(404)
+
+    monkeypatch.setattr(scrape_discovery, 'http_get', http_get)
+    monkeypatch.setattr(scrape_discovery, 'get_robots', lambda url, headers: None)
+    return urls
+
+
+def test_robots_fetch_is_counted(fetched):
+    candidates, discovery = discover_subpages(HOME, LINKS, {})
+    assert fetched == ['https://www.example.com/robots.txt']
+    assert discovery['requests'] == 1
+    assert [c['topic'] for c in candidates] == ['hours', 'prices', 'menu', 'about']
+
+
+def test_cached_robots_costs_no_request(fetched, monkeypatch):
+    robots = RobotFileParser()
+    robots.parse(['User-agent: *', 'Disallow: /prijzen'])
+    monkeypatch.setattr(scrape_discovery, 'get_robots', lambda url, headers: robots)
+    candidates, discovery = discover_subpages(HOME, LINKS, {})
+    assert fetched == ['https://www.example.com/sitemap.xml']   # Three links left: sitemap read
+    assert discovery['requests'] == 1
+    assert 'prices' not in [c['topic'] for c in candidates]
+
+
+def test_known_dead_host_costs_no_request(monkeypatch):
+    def http_get(url, **kwargs):
+        raise HostUnavailable('example.com: known dead (dns)')
+
+    monkeypatch.setattr(scrape_discovery, 'http_get', http_get)
+    monkeypatch.setattr(scrape_discovery, 'get_robots', lambda url, headers: None)
+    _, discovery = discover_subpages(HOME, [], {}, fallback_paths=['/menu'])
+    assert discovery == {'source': 'guess', 'requests': 0, 'internal_urls': 0, 'candidates': 1}
+
+
+def test_subpages_are_fetched_lazily_on_the_calling_thread(monkeypatch):
+    threads = []
+
+    def http_get(url, **kwargs):
+        threads.append(threading.get_ident())
+        return Response(200)
+
+    monkeypatch.setattr(scrape_discovery, 'http_get', http_get)
+    monkeypatch.setattr(scrape_discovery, 'polite', lambda: True)
+    candidates = [{'url': HOME + path.lstrip('/')} for path, _ in LINKS]
+    for _ in zip(range(2), fetch_subpages(candidates, {}, 5)):
+        pass
+    assert threads == [threading.get_ident()] * 2
+
+
+@pytest.mark.parametrize('polite, pauses', [(False, 2), (True, 0)])
+def test_subpages_to_one_host_pause_without_politeness(monkeypatch, polite, pauses):
+    sleeps = []
+    monkeypatch.setattr(scrape_discovery, 'http_get', lambda url, **kwargs: Response(200))
+    monkeypatch.setattr(scrape_discovery, 'polite', lambda: polite)
+    monkeypatch.setattr(scrape_discovery.time, 'sleep', sleeps.append)
+    candidates = [{'url': url} for url in ('https://www.example.com/menu', 'https://other.org/a',
+                                           'https://example.com/prijzen', 'https://example.com/over')]
+    list(fetch_subpages(candidates, {}, 5))
+    assert len(sleeps) == pauses
+    assert all(0 < s <= scrape_discovery.SUBPAGE_DELAY for s in sleeps)
+
+
+def test_rank_drops_external_duplicate_and_homepage_links():
+    raw = [('/menu', '', 'link'), ('https://example.com/menu/', '', 'sitemap'),
+           ('https://other.org/menu', '', 'link'), ('/', 'Home', 'link'), ('/logo.png', '', 'link')]
+    ranked, internal = rank_candidates(HOME, raw)
+    assert internal == 1
+    assert [(c['path'], c['source']) for c in ranked] == [('/menu', 'link')]
+
+
+def test_select_top_prefers_one_page_per_topic():
+    ranked, _ = rank_candidates(HOME, [('/menu', '', 'link'), ('/menu-lunch', 'menu', 'link'),
+                                       ('/contact', '', 'link')])
+    assert [c['topic'] for c in select_top(ranked, 2)] == ['menu', 'contact']
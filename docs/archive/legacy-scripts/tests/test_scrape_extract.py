@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pytest
+
+from scrape_dates import latest_date
+from scrape_extract import CODE_TAGS, EXTRACTORS, extract_page
+
+BACKENDS = sorted(EXTRACTORS)
+
+PAGE = """<!DOCTYPE html>
+<html lang="nl-NL"><head>
+<title> Strandpaviljoen Paal 17 </title>
+<meta name="description" content="Aan het strand">
+<meta property="og:title" content="Paal 17">
+<script type="application/ld+json">{"@type": "Restaurant", "telephone": "0222-123456"}</script>
+<style>.x { color: red }</style>
+</head><body>
+<header><a href="/contact">Contact</a></header>
+<nav><ul><li><a href="/menu">Menu</a></li></ul></nav>
+<div><!-- wp:paragraph --> Open daily 9:00-17:00<!-- /wp:paragraph --></div>
+<p>Koffie &amp; gebak<!-- x -->, lunch <b>en</b> diner.</p>
+<ul><li>Terras</li><li>Honden <i>welkom</i></li></ul>
+<footer>© 2025 Paal 17</footer>
+</body></html>"""
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_backends_agree(backend):
+    assert extract_page(PAGE, backend) == extract_page(PAGE, 'bs4')
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_text_after_comments_is_kept(backend):
+    page = extract_page(PAGE, backend)
+    assert page['text'].split('\n') == ['Strandpaviljoen Paal 17', 'Open daily 9:00-17:00',
+                                        'Koffie & gebak', ', lunch', 'en', 'diner.', 'Terras',
+                                        'Honden', 'welkom']
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_fields(backend):
+    page = extract_page(PAGE, backend)
+    assert page['title'] == 'Strandpaviljoen Paal 17'
+    assert page['meta_description'] == 'Aan het strand'
+    assert page['language'] == 'nl'
+    assert page['opengraph'] == {'og:title': 'Paal 17'}
+    assert page['json_ld'] == [{'@type': 'Restaurant', 'telephone': '0222-123456'}]
+    assert ('/contact', 'Contact') in page['links'] and ('/menu', 'Menu') in page['links']
+    assert page['list_items'] == ['Terras', 'Hondenwelkom']
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_list_items_after_word_cap(backend):
+    html = '<p>' + 'woord ' * 30 + '</p><ul><li>Terras</li><li>Open <b>9-17</b></li></ul>'
+    page = extract_page(html, backend, max_words=10)
+    assert page['text'] == ' '.join(['woord'] * 10)
+    assert page['list_items'] == ['Terras', 'Open9-17']
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_word_cap_cuts_inside_a_line(backend):
+    page = extract_page('<p>een twee drie</p><p>vier vijf</p>', backend, max_words=4)
+    assert page['text'] == 'een twee drie\nvier'
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_code_tags_keep_header_and_footer_dates(backend):
+    html = ('<header>3 hours ago</header><p>Nieuwe menukaart</p><footer>© 2025 Paal 17</footer>'
+            '<script>var year = 2031;</script><noscript>Enable JavaScript</noscript>')
+    now = datetime(2026, 1, 15)
+    assert latest_date(extract_page(html, backend)['text'], now) is None
+    text = extract_page(html, backend, strip_tags=CODE_TAGS)['text']
+    assert text.split('\n') == ['3 hours ago', 'Nieuwe menukaart', '© 2025 Paal 17']
+    assert latest_date(text, now) == now
+    assert latest_date(text.split('\n', 1)[1], now) == datetime(2025, 6, 1)   # Footer year alone
+
+
+def test_empty_and_broken_input():
+    for backend in BACKENDS:
+        assert extract_page('', backend)['text'] == ''
+        assert extract_page('<p>open <b>tag', backend)['text'] == 'open\ntag'
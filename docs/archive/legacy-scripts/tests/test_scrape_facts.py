@@ -0,0 +1,35 @@
+import pytest
+
+from scrape_facts import group_fact_matches, first_pattern_hits, scan_facts, scan_facts_per_pattern
+
+TEXTS = [
+    'Openingstijden: ma-vr 10:00 - 17:00\nWoensdag 09:00-18:00, zondag: 12.00 – 16.00',
+    'Prijs 12,50 euro, kind 8.50 EUR, groep 99,00 Euro, entree € 5',
+    'Adres: Weverstraat 12, 1791 AX Den Burg\nTel: 0222-312456, info@Texelaar.NL',
+    'Calle Mayor 3, 03710 Calpe. Llamar +34 965 83 12 34. facebook.com/Paal17',
+    'Ünïcode İstanbul dinsdag 10:00-12:00 €3',   # lower() changes the length
+    '',
+]
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_compiled_equals_per_pattern(text):
+    assert scan_facts(text) == scan_facts_per_pattern(text)
+
+
+def test_prices_are_case_sensitive():
+    prices = [m['value'] for m in first_pattern_hits(group_fact_matches(scan_facts(TEXTS[1])), 'price')]
+    assert prices == ['12,50 euro', '8.50 EUR', '€ 5']
+
+
+def test_day_names_inside_words_match_as_before():
+    # No word boundary in R2's original pattern: a day abbreviation inside a word matches too
+    hits = [m['value'] for m in scan_facts('thuisdo 10:00-12:00') if m['kind'] == 'opening_hours']
+    assert hits == ['do 10:00-12:00']
+
+
+def test_value_group_and_offsets():
+    text = TEXTS[2]
+    phone = [m for m in scan_facts(text) if m['pattern'] == 'phone_label'][0]
+    assert phone['value'] == '0222-312456'
+    assert text[phone['start']:phone['end']].startswith('Tel:')
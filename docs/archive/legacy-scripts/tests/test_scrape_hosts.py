@@ -0,0 +1,81 @@
+import pytest
+import requests
+
+import scrape_hosts
+from scrape_hosts import HostUnavailable, check, record_failure, record_status, record_success
+
+URL = 'https://www.example.com/menu'
+REFUSED = requests.exceptions.ConnectionError('Connection refused')
+
+
+@pytest.fixture(autouse=True)
+def registry(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(scrape_hosts.time, 'time', lambda: clock[0])
+    scrape_hosts.open_registry(str(tmp_path / 'hosts.sqlite'))
+    yield clock
+    scrape_hosts._state['conn'].close()
+    scrape_hosts._state['conn'] = None
+
+
+def open_breaker():
+    for _ in range(scrape_hosts.BREAKER_THRESHOLD):
+        check(URL)
+        record_failure(URL, REFUSED, 2.0)
+
+
+def test_breaker_opens_after_threshold():
+    for _ in range(scrape_hosts.BREAKER_THRESHOLD - 1):
+        record_failure(URL, REFUSED, 2.0)
+    check(URL)
+    record_failure(URL, REFUSED, 2.0)
+    with pytest.raises(HostUnavailable, match='circuit open'):
+        check('http://example.com/other')
+    assert scrape_hosts.host_stats()['breakers_opened'] == 1
+
+
+def test_ssl_errors_are_not_counted():
+    for _ in range(scrape_hosts.BREAKER_THRESHOLD):
+        record_failure(URL, requests.exceptions.SSLError('bad cert'), 1.0)
+    check(URL)
+
+
+def test_half_open_lets_one_trial_through(registry):
+    open_breaker()
+    registry[0] += scrape_hosts.BREAKER_COOLDOWN + 1
+    check(URL)   # The trial, despite the registry entry its breaker wrote
+    with pytest.raises(HostUnavailable, match='circuit open'):
+        check(URL)   # A concurrent caller while the trial is in flight
+    registry[0] += scrape_hosts.BREAKER_TRIAL_TIMEOUT + 1
+    check(URL)   # The trial never reported back: another one is allowed
+
+
+def test_trial_failure_reopens_and_success_closes(registry):
+    open_breaker()
+    registry[0] += scrape_hosts.BREAKER_COOLDOWN + 1
+    check(URL)
+    record_failure(URL, REFUSED, 2.0)
+    with pytest.raises(HostUnavailable, match='circuit open'):
+        check(URL)
+    registry[0] += scrape_hosts.BREAKER_COOLDOWN + 1
+    check(URL)
+    record_success(URL)
+    check(URL)
+    check(URL)
+    assert scrape_hosts.host_stats()['known_dead'] == {}
+
+
+def test_trial_still_honours_other_registry_entries(registry):
+    open_breaker()
+    record_status('https://example.com/', 410, 1.0)   # Homepage gone: replaces the host entry
+    registry[0] += scrape_hosts.BREAKER_COOLDOWN + 1
+    with pytest.raises(HostUnavailable, match='known dead \\(http_410\\)'):
+        check(URL)
+
+
+def test_registry_persists_across_runs(tmp_path):
+    record_status('https://example.com/gone', 404, 1.0)
+    scrape_hosts.open_registry(str(tmp_path / 'hosts.sqlite'))
+    with pytest.raises(HostUnavailable, match='known dead'):
+        check('http://www.example.com/gone/')
+    check(URL)
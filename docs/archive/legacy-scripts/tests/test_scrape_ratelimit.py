@@ -0,0 +1,72 @@
+import threading
+import types
+
+import pytest
+
+import scrape_ratelimit
+from scrape_ratelimit import Crawl, HostBuckets, TokenBucket, ratelimit_stats, run_crawls
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock; sleep() advances it."""
+    now = [100.0]
+    fake = types.SimpleNamespace(monotonic=lambda: now[0],
+                                 sleep=lambda seconds: now.__setitem__(0, now[0] + seconds))
+    monkeypatch.setattr(scrape_ratelimit, 'time', fake)
+    monkeypatch.setattr(scrape_ratelimit, '_stats', {})
+    return now
+
+
+def test_bucket_paces_to_rate(clock):
+    bucket = TokenBucket(2, name='fb')
+    waits = [bucket.acquire() for _ in range(5)]
+    assert waits == [0.0, 0.5, 0.5, 0.5, 0.5]
+    assert clock[0] == pytest.approx(102.0)
+    assert ratelimit_stats()['fb'] == {'acquired': 5, 'waits': 4, 'wait_seconds': pytest.approx(2.0)}
+
+
+def test_burst_is_banked_up_to_its_size(clock):
+    bucket = TokenBucket(1, burst=3)
+    clock[0] += 60   # Idle for a minute: still at most 3 tokens
+    assert [bucket.acquire() for _ in range(4)] == [0.0, 0.0, 0.0, 1.0]
+
+
+def test_waiters_queue_behind_each_other(clock, monkeypatch):
+    # Callers that arrive together (nobody has slept yet) reserve consecutive slots
+    monkeypatch.setattr(scrape_ratelimit.time, 'sleep', lambda seconds: None)
+    bucket = TokenBucket(4)
+    assert [bucket.acquire() for _ in range(4)] == [0.0, 0.25, 0.5, 0.75]
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_host_buckets_are_per_host(clock):
+    buckets = HostBuckets(1)
+    assert buckets.acquire('https://www.paal17.nl/menu') == 0.0
+    assert buckets.acquire('https://ecomare.nl/') == 0.0
+    assert buckets.acquire('http://paal17.nl/contact') == 1.0
+    assert buckets.bucket('https://paal17.nl') is buckets.bucket('https://www.paal17.nl:443/')
+
+
+def test_run_crawls_collects_results_and_failures():
+    results = {}
+    lock = threading.Lock()
+
+    def store(item, result):
+        with lock:
+            results[item] = result
+
+    def fetch(item):
+        if item == 3:
+            raise RuntimeError('boom')
+        return None if item == 4 else item * 10
+
+    crawls = [Crawl('a', range(6), fetch, store, workers=3), Crawl('empty', [], fetch, store)]
+    run_crawls(crawls, progress_every=0, log=lambda msg: None)
+    assert results == {0: 0, 1: 10, 2: 20, 5: 50}
+    assert (crawls[0].done, crawls[0].failed) == (6, 2)
+    assert crawls[1].done == 0
@@ -0,0 +1,116 @@
+import json
+import os
+
+import pytest
+
+from scrape_results import ResultLog
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'scraped.jsonl')
+
+
+def write_log(path, records, **kwargs):
+    with ResultLog(path, truncate=True, **kwargs) as log:
+        for record in records:
+            log.append(record, key=record['poi_id'], ok=record.get('ok', True))
+
+
+def test_replay_yields_latest_record_per_key_in_log_order(path):
+    write_log(path, [{'poi_id': 1, 'v': 'a'}, {'poi_id': 2, 'v': 'b'}, {'poi_id': 1, 'v': 'c', 'ok': False}])
+    with ResultLog(path) as log:
+        assert list(log.replay()) == [{'poi_id': 2, 'v': 'b'}, {'poi_id': 1, 'v': 'c', 'ok': False}]
+        assert log.keys() == {1, 2}
+        assert log.keys(ok=False) == {1}
+        assert len(log) == 2
+
+
+def test_torn_tail_is_cut_off_and_resume_appends(path):
+    write_log(path, [{'poi_id': 1}, {'poi_id': 2}])
+    size = os.path.getsize(path)
+    with open(path, 'ab') as f:
+        f.write(b'{"poi_id": 3, "main_con')   # Crash mid-append
+    with ResultLog(path) as log:
+        assert os.path.getsize(path) == size
+        assert log.keys() == {1, 2}
+        log.append({'poi_id': 3}, key=3)
+    with ResultLog(path) as log:
+        assert [r['poi_id'] for r in log.replay()] == [1, 2, 3]
+
+
+def test_missing_or_stale_index_is_rebuilt(path):
+    write_log(path, [{'poi_id': 1}, {'poi_id': 2, 'ok': False}])
+    os.remove(f'{path}.ids')
+    with ResultLog(path) as log:
+        assert log.keys(ok=False) == {2}
+    with open(f'{path}.ids', 'w') as f:
+        f.write('1 0 1\n')   # Behind the log
+    with ResultLog(path) as log:
+        assert log.keys() == {1, 2}
+    with open(f'{path}.ids') as f:
+        assert len(f.read().splitlines()) == 2
+
+
+def test_truncate_starts_empty(path):
+    write_log(path, [{'poi_id': 1}])
+    with ResultLog(path, truncate=True) as log:
+        assert len(log) == 0
+        assert list(log.replay()) == []
+
+
+def test_export_json_writes_legacy_array(path, tmp_path):
+    write_log(path, [{'poi_id': 1, 'name': 'Paal 17'}, {'poi_id': 2, 'name': 'Ecomare'}])
+    out = str(tmp_path / 'scraped.json')
+    with ResultLog(path) as log:
+        log.export_json(out)
+    with open(out, encoding='utf-8') as f:
+        assert json.load(f) == [{'poi_id': 1, 'name': 'Paal 17'}, {'poi_id': 2, 'name': 'Ecomare'}]
+
+
+def test_unknown_fsync_policy_is_rejected(path):
+    with pytest.raises(ValueError):
+        ResultLog(path, fsync='sometimes')
+
+
+def test_ref_records_resolve_to_base_plus_overrides(path):
+    base = {'poi_id': 1, 'website': 'https://paal17.nl', 'main_content': 'x' * 500,
+            'extracted_facts': {'phone': '0222'}}
+    with ResultLog(path, truncate=True) as log:
+        offset = log.append(base, key=1)
+        log.append_ref(2, offset, {'poi_id': 2, 'coalesced_from': 1})
+    with ResultLog(path) as log:
+        first, second = log.replay()
+        assert second == dict(base, poi_id=2, coalesced_from=1)
+        second['extracted_facts']['phone'] = None   # Nested dicts are not shared
+        assert first['extracted_facts'] == {'phone': '0222'}
+    assert os.path.getsize(path) < 2 * len(base['main_content'])
+
+
+def test_ref_survives_base_being_superseded(path):
+    with ResultLog(path, truncate=True) as log:
+        offset = log.append({'poi_id': 1, 'v': 'old'}, key=1)
+        log.append_ref(2, offset, {'poi_id': 2})
+        log.append({'poi_id': 1, 'v': 'new'}, key=1)
+    with ResultLog(path) as log:
+        assert list(log.replay()) == [{'poi_id': 2, 'v': 'old'}, {'poi_id': 1, 'v': 'new'}]
+
+
+def test_shared_texts_are_written_once(path):
+    page = 'Boek uw verblijf via ons reserveringssysteem. ' * 10
+    records = [{'poi_id': i, 'main_content': page, 'subpages': {'/menu': page, '/kort': 'Menu'}}
+               for i in range(3)]
+    with ResultLog(path, truncate=True, shared_fields=('main_content', 'subpages')) as log:
+        for record in records:
+            log.append(record, key=record['poi_id'])
+        assert log.shared_chars == 5 * len(page)
+    assert os.path.getsize(path) < 2 * len(page)
+    with ResultLog(path) as log:
+        assert list(log.replay()) == records
+
+
+def test_short_texts_stay_inline(path):
+    with ResultLog(path, truncate=True, shared_fields=('main_content',)) as log:
+        log.append({'poi_id': 1, 'main_content': 'Gesloten'}, key=1)
+        log.append({'poi_id': 2, 'main_content': 'Gesloten'}, key=2)
+        assert log.shared_chars == 0
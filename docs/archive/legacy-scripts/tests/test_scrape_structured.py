@@ -0,0 +1,28 @@
+from scrape_structured import facts_complete, structured_facts
+
+BUSINESS = {
+    '@context': 'https://schema.org',
+    '@type': 'Restaurant',
+    'name': 'Paal 17',
+    'telephone': '+31 222 123456',
+    'address': {'streetAddress': 'Dorpsstraat 1', 'postalCode': '1791 AA', 'addressLocality': 'Den Burg'},
+    'openingHours': 'Mo-Su 09:00-17:00',
+}
+
+
+def test_structured_facts_complete_skip_subpages():
+    facts = structured_facts([BUSINESS])
+    assert facts_complete(facts, list(facts))
+
+
+def test_text_pattern_facts_do_not_skip_subpages():
+    # A homepage with one 'Maandag 10:00' line and a street-like match, no JSON-LD
+    facts = {'opening_hours': ['Maandag 10:00'], 'address': ['Dorpsstraat 1'], 'phone': ['0222-123456']}
+    assert not facts_complete(facts, [])
+
+
+def test_one_text_pattern_fact_keeps_subpages():
+    facts = structured_facts([dict(BUSINESS, openingHours=None)])
+    names = list(facts)
+    facts['opening_hours'] = ['Maandag 10:00']   # Filled by the text patterns afterwards
+    assert not facts_complete(facts, names)
@@ -0,0 +1,68 @@
+import pytest
+
+from source_packer import (GAP_MARKER, PACKED_NOTE, SOURCE_TOKEN_BUDGETS, estimate_tokens,
+                           pack_source_text, pack_text, split_passages)
+
+FILLER = ' '.join(['Welkom op onze website waar u alles leest over ons mooie verhaal.'] * 8)   # > PASSAGE_MAX_WORDS
+HOURS = 'Openingstijden: maandag 10:00 - 17:00, dinsdag 10:00 - 17:00'
+PRICES = 'Entree volwassenen € 12,50 en kinderen € 8,00'
+COOKIES = 'Wij gebruiken cookies. Lees ons privacy beleid en de algemene voorwaarden.'
+
+
+def source(filler_lines=12):
+    website = [f'{FILLER} ({i})' for i in range(filler_lines)]
+    return '\n'.join(['WEBSITE CONTENT:', COOKIES] + website[:6] + [HOURS] + website[6:] + [PRICES,
+                      '', 'HIGHLIGHTS:', 'Zeehonden kijken op de wadden', '',
+                      'VERIFIED FACTS:', 'phone: 0222-312456'])
+
+
+def test_text_within_budget_is_unchanged():
+    text = source(1)
+    assert pack_text(text, estimate_tokens(text)) is text
+    assert pack_text('', 10) == ''
+
+
+def test_fact_passages_beat_position():
+    packed = pack_text(source(), 120)
+    assert HOURS in packed and PRICES in packed
+    assert estimate_tokens(packed) < estimate_tokens(source()) // 4
+    assert GAP_MARKER in packed
+    assert COOKIES not in packed
+    assert packed.index(HOURS) < packed.index(PRICES) < packed.index('HIGHLIGHTS:')   # Original order
+
+
+@pytest.mark.parametrize('budget', [60, 120, 300])
+def test_budget_is_respected(budget):
+    packed = pack_text(source(), budget)
+    # Gap markers and section breaks are not budgeted: allow a few tokens for them
+    assert estimate_tokens(packed) <= budget + 3 * packed.count(GAP_MARKER) + 10
+
+
+def test_pinned_sections_and_warnings_are_always_kept():
+    text = source() + ('\n\n--- FACEBOOK PAGE DATA (STALE — last active: 2025-01-01) ---\n'
+                       'WARNING: This Facebook page has not been updated in >4 months.\n' + FILLER)
+    packed = pack_text(text, 5)   # Less than the pinned parts alone
+    assert 'HIGHLIGHTS:\nZeehonden kijken op de wadden' in packed
+    assert 'VERIFIED FACTS:\nphone: 0222-312456' in packed
+    assert 'WARNING: This Facebook page has not been updated' in packed
+    assert 'Welkom op onze website' not in packed
+
+
+def test_packing_is_deterministic():
+    assert pack_text(source(), 150, category='Natuur') == pack_text(source(), 150, category='Natuur')
+
+
+def test_pack_source_text_uses_tier_budget_and_note():
+    sheet = {'data_quality': 'minimal', 'category': 'Natuur', 'source_text_for_llm': source(40)}
+    packed = pack_source_text(sheet)
+    assert packed.endswith(PACKED_NOTE)
+    assert estimate_tokens(packed) < SOURCE_TOKEN_BUDGETS['rich']
+    assert len(pack_source_text(dict(sheet, data_quality='rich'))) > len(packed)
+    assert pack_source_text({'data_quality': 'rich'}) == ''
+
+
+def test_short_lines_are_grouped_and_long_lines_windowed():
+    passages = split_passages(['ma 10-17', 'di 10-17', 'wo 10-17', ' '.join(['woord'] * 200)])
+    assert passages[0] == ('ma 10-17\ndi 10-17\nwo 10-17', '\n', False)
+    assert [len(p.split()) for p, _, _ in passages[1:]] == [80, 80, 40]
+    assert [sep for _, sep, _ in passages[1:]] == ['\n', ' ', ' ']